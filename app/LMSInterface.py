@@ -1,13 +1,14 @@
 import json
 import os
 import re
+import sqlite3
 from collections import defaultdict
 from datetime import datetime, timezone
 from typing import Optional, Any
 from urllib.parse import urlparse, unquote
 
-from PyQt5.QtCore import pyqtSlot, Qt, QUrl, QStandardPaths, QBuffer
-from PyQt5.QtGui import QDesktopServices, QImageReader, QPixmap
+from PyQt5.QtCore import pyqtSlot, Qt, QUrl, QStandardPaths
+from PyQt5.QtGui import QDesktopServices, QPixmap
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QFrame, QHBoxLayout, QFileDialog, QSizePolicy, QDialog
 from qfluentwidgets import ScrollArea, TitleLabel, StrongBodyLabel, InfoBar, InfoBarPosition, BreadcrumbBar, \
     TransparentToolButton, FluentIcon
@@ -16,16 +17,21 @@ from .components.ProgressInfoBar import ProgressInfoBar
 from .sessions.lms_session import LMSSession
 from .sessions.session_backend import AccessMode
 from .threads.LMSFileDownloadThread import LMSFileDownloadThread
+from .threads.LMSPrefetchThread import LMSPrefetchThread
 from .threads.LMSThread import LMSThread, LMSAction
 from .threads.ProcessWidget import ProcessWidget
 from .utils import StyleSheet, accounts, AccountDataManager, cfg
 from .sub_interfaces.lms import PageStatus, LMSStartPage, LMSCoursePage, LMSActivityPage, LMSDetailPage, LMSSubmissionPage, LMSVideoPage
 from .sub_interfaces.lms.image_preview_dialog import LMSImagePreviewDialog
+from .sub_interfaces.lms.preview_cache import LMSPreviewCache, decode_preview_image
 from .sub_interfaces.lms.batch_download_dialog import LMSBatchDownloadDialog
 from .sub_interfaces.lms.common import format_size as common_format_size, format_replay_video_label, \
     can_preview_as_image, is_mark_attachment_upload
 from auth import getVPNUrl
-from lms import LMSUtil
+from lms import LMSRequestCache, LMSUtil
+from lms.mark_overlay import MarkOverlayMemo, parse_mark_attachment_text
+from lms.prefetch import DEFAULT_PREFETCH_LIMIT, prefetch_order
+from lms.sync_store import LMSSyncStore
 from lms.models import ActivityType
 from .threads.LMSBatchDownloadThread import LMSBatchDownloadThread
 
@@ -38,8 +44,12 @@ class LMSInterface(ScrollArea):
     ROUTE_DETAIL = "detailPage"
     ROUTE_SUBMISSION = "submissionPage"
     ROUTE_VIDEO = "videoPage"
+    # 旧版本的整份 JSON 缓存，仅用于迁移到增量存储
     COURSE_CACHE_FILE = "lms_courses_cache.json"
     ACTIVITY_CACHE_FILE = "lms_activities_cache.json"
+    SYNC_DATABASE_FILE = "lms_sync.db"
+    # 图片预览的磁盘缓存目录（位于账户数据目录下）
+    PREVIEW_CACHE_DIRECTORY = "lms_previews"
 
     def __init__(self, parent=None):
         """初始化 LMS 主容器、导航区、页面区与线程协作组件。"""
@@ -53,12 +63,15 @@ class LMSInterface(ScrollArea):
         self._current_submission: Optional[dict] = None
         self._download_jobs: list[tuple[ProgressInfoBar, LMSFileDownloadThread]] = []
         self._current_activities: list[dict] = []
-        self._preview_pixmap_cache: dict[str, QPixmap] = {}
-        self._mark_overlay_cache: dict[str, tuple[str | None, list[dict]]] = {}
+        self._preview_pixmap_cache = LMSPreviewCache()
+        # 批注解析结果，按提交 ID 分组缓存
+        self._mark_overlay_cache = MarkOverlayMemo()
         self._submission_marked_attachment_cache: dict[int, dict] = {}
         self._preview_dialog: LMSImagePreviewDialog | None = None
         self._course_cache_visible_during_refresh = False
         self._activity_cache_visible_during_refresh = False
+        self._sync_store: LMSSyncStore | None = None
+        self._prefetch_thread: LMSPrefetchThread | None = None
 
         self.view = QWidget(self)
         self.setObjectName("LMSInterface")
@@ -149,14 +162,18 @@ class LMSInterface(ScrollArea):
         self.thread_.coursesLoaded.connect(self.onCoursesLoaded)
         self.thread_.activitiesLoaded.connect(self.onActivitiesLoaded)
         self.thread_.activityDetailLoaded.connect(self.onActivityDetailLoaded)
+        self.thread_.updatesSynced.connect(self.onUpdatesSynced)
         self.thread_.finished.connect(self.unlock)
 
         self.startPage.queryCoursesRequested.connect(self.onStartQueryCoursesClicked)
         self.coursePage.retryRequested.connect(self.refreshCourses)
         self.coursePage.courseSelected.connect(self.onCourseSelected)
+        self.coursePage.syncRequested.connect(self.syncUpdates)
         self.activityPage.retryRequested.connect(self.refreshActivities)
         self.activityPage.activitySelected.connect(self.onActivitySelected)
-        self.detailPage.retryRequested.connect(self.refreshActivityDetail)
+        self.activityPage.activityTypeChanged.connect(self.onActivityTypeChanged)
+        self.detailPage.retryRequested.connect(lambda: self.refreshActivityDetail(force=True))
+        self.detailPage.refreshRequested.connect(lambda: self.refreshActivityDetail(force=True))
         self.detailPage.submissionRequested.connect(self.show_submission_page)
         self.detailPage.downloadRequested.connect(self._save_file)
         self.detailPage.previewRequested.connect(self.show_attachment_preview)
@@ -189,6 +206,9 @@ class LMSInterface(ScrollArea):
         # 如果从视频播放页面切换出去，那么需要停止视频的播放。
         if getattr(self, "_current_page", None) is self.videoPage and page is not self.videoPage:
             self.videoPage.stopPlayback()
+        # 回到课程列表时，当前课程的预取已经没有意义
+        if page is self.startPage or page is self.coursePage:
+            self._cancelDetailPrefetch()
 
         self._current_page = page
         pages = (self.startPage, self.coursePage, self.activityPage, self.detailPage, self.submissionPage, self.videoPage)
@@ -329,75 +349,91 @@ class LMSInterface(ScrollArea):
     def _stableDump(data: Any) -> str:
         return json.dumps(data, ensure_ascii=False, sort_keys=True, default=str, separators=(",", ":"))
 
-    def _readCoursesCache(self) -> list[dict]:
+    def _getSyncStore(self) -> LMSSyncStore | None:
+        """返回当前账户的思源学堂增量存储；缓存关闭或没有账户时返回 None。"""
         if not self._isLmsCacheEnabled():
-            return []
-        file_path = self._getLmsCacheFilePath(self.COURSE_CACHE_FILE)
+            return None
+        file_path = self._getLmsCacheFilePath(self.SYNC_DATABASE_FILE)
         if not file_path:
-            return []
+            return None
+        if self._sync_store is not None and self._sync_store.database_path == file_path:
+            return self._sync_store
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                payload = json.load(f)
-        except (OSError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+            store = LMSSyncStore(file_path)
+            self._migrateLegacyJsonCache(store)
+        except (OSError, sqlite3.Error):
+            return None
+        self._sync_store = store
+        return store
+
+    def _migrateLegacyJsonCache(self, store: LMSSyncStore) -> None:
+        """将旧版本整份写入的 JSON 缓存导入增量存储，然后删除旧文件。"""
+        course_file = self._getLmsCacheFilePath(self.COURSE_CACHE_FILE)
+        activity_file = self._getLmsCacheFilePath(self.ACTIVITY_CACHE_FILE)
+        for file_path in (course_file, activity_file):
+            if not file_path or not os.path.exists(file_path):
+                continue
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    payload = json.load(f)
+            except (OSError, json.JSONDecodeError, TypeError, ValueError):
+                payload = None
+            if isinstance(payload, dict) and file_path == course_file and store.last_sync_time() is None:
+                store.sync_courses(self._sanitizeCacheItems(payload.get("courses")))
+            elif isinstance(payload, dict) and file_path == activity_file:
+                by_course = payload.get("by_course_id")
+                for raw_key, raw_value in (by_course.items() if isinstance(by_course, dict) else ()):
+                    key = str(raw_key).strip()
+                    if key.isdigit() and not store.has_activities(int(key)):
+                        store.sync_activities(int(key), self._sanitizeCacheItems(raw_value))
+            try:
+                os.remove(file_path)
+            except OSError:
+                pass
+
+    def _readCoursesCache(self) -> list[dict]:
+        store = self._getSyncStore()
+        if store is None:
             return []
-        if not isinstance(payload, dict):
+        try:
+            return store.get_courses()
+        except (sqlite3.Error, ValueError):
             return []
-        return self._sanitizeCacheItems(payload.get("courses"))
 
     def _writeCoursesCache(self, courses: list[dict]) -> None:
-        if not self._isLmsCacheEnabled():
-            return
-        file_path = self._getLmsCacheFilePath(self.COURSE_CACHE_FILE)
-        if not file_path:
+        store = self._getSyncStore()
+        if store is None:
             return
         try:
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump({"courses": self._sanitizeCacheItems(courses)}, f, ensure_ascii=False)
-        except (OSError, TypeError, ValueError):
+            store.sync_courses(self._sanitizeCacheItems(courses))
+        except (sqlite3.Error, TypeError, ValueError):
             return
 
-    def _readActivityCacheMap(self) -> dict[str, list[dict]]:
-        if not self._isLmsCacheEnabled():
-            return {}
-        file_path = self._getLmsCacheFilePath(self.ACTIVITY_CACHE_FILE)
-        if not file_path:
-            return {}
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                payload = json.load(f)
-        except (OSError, json.JSONDecodeError, KeyError, TypeError, ValueError):
-            return {}
-        if not isinstance(payload, dict):
-            return {}
-        by_course = payload.get("by_course_id")
-        if not isinstance(by_course, dict):
-            return {}
-
-        normalized: dict[str, list[dict]] = {}
-        for raw_key, raw_value in by_course.items():
-            key = str(raw_key).strip()
-            if not key:
-                continue
-            normalized[key] = self._sanitizeCacheItems(raw_value)
-        return normalized
-
     def _readActivitiesCache(self, course_id: int) -> list[dict]:
-        return self._readActivityCacheMap().get(str(course_id), [])
+        store = self._getSyncStore()
+        if store is None:
+            return []
+        try:
+            return store.get_activities(course_id)
+        except (sqlite3.Error, ValueError):
+            return []
 
     def _writeActivitiesCache(self, course_id: int, activities: list[dict]) -> None:
-        if not self._isLmsCacheEnabled():
+        store = self._getSyncStore()
+        if store is None:
             return
-        file_path = self._getLmsCacheFilePath(self.ACTIVITY_CACHE_FILE)
-        if not file_path:
+        try:
+            store.sync_activities(course_id, self._sanitizeCacheItems(activities))
+        except (sqlite3.Error, TypeError, ValueError):
+            return
+
+    def _writeUploadsCache(self, detail: dict) -> None:
+        store = self._getSyncStore()
+        if store is None:
             return
-        by_course = self._readActivityCacheMap()
-        by_course[str(course_id)] = self._sanitizeCacheItems(activities)
         try:
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump({"by_course_id": by_course}, f, ensure_ascii=False)
-        except (OSError, TypeError, ValueError):
+            store.sync_uploads(detail)
+        except (sqlite3.Error, TypeError, ValueError):
             return
 
     def _diffById(self, old_items: list[dict], new_items: list[dict]) -> dict[str, Any]:
@@ -542,6 +578,9 @@ class LMSInterface(ScrollArea):
             if keep_cached:
                 self.setPageStatus(self.activityPage, PageStatus.NORMAL)
                 return
+        elif action == LMSAction.SYNC_UPDATES:
+            # 增量同步失败时，已经显示的课程与活动仍然有效
+            return
 
         self.setPageStatus(self._current_page, PageStatus.ERROR)
 
@@ -583,19 +622,43 @@ class LMSInterface(ScrollArea):
         self.thread_.course_id = self.selected_course_id
         self.thread_.start()
 
-    def refreshActivityDetail(self):
+    @pyqtSlot()
+    def syncUpdates(self):
+        """在后台增量同步课程：只重新获取发生变化或较长时间未同步的课程的活动列表。
+
+        :return: 无返回值。
+        """
+        store = self._getSyncStore()
+        if store is None:
+            self.error(self.tr("无法检查更新"), self.tr("请先在设置中开启思源学堂缓存"), parent=self)
+            return
+        self.processWidget.setVisible(True)
+        self.lock()
+        self.thread_.action = LMSAction.SYNC_UPDATES
+        self.thread_.sync_store = store
+        self.thread_.start()
+
+    def refreshActivityDetail(self, force: bool = False):
         """触发当前活动详情异步加载。
 
+        :param force: 是否忽略请求缓存重新获取（用户点击刷新或重试时为 True）。
         :return: 无返回值。
         """
         if self.selected_activity_id is None:
             self.error(self.tr("未选择活动"), self.tr("请先选择一个活动"), parent=self)
             return
+        if not force and not self.thread_.isRunning():
+            detail = self._peekCachedActivityDetail(self.selected_activity_id)
+            if detail is not None:
+                # 详情已被预取或近期加载过，直接渲染，无需再启动后台线程
+                self.onActivityDetailLoaded(self.selected_activity_id, detail)
+                return
         self.setPageStatus(self.detailPage, PageStatus.LOADING)
         self.processWidget.setVisible(True)
         self.lock()
         self.thread_.action = LMSAction.LOAD_ACTIVITY_DETAIL
         self.thread_.activity_id = self.selected_activity_id
+        self.thread_.refresh = force
         self.thread_.start()
 
     @pyqtSlot(str)
@@ -630,6 +693,7 @@ class LMSInterface(ScrollArea):
         :param course_name: 课程名称。
         :return: 无返回值。
         """
+        self._cancelDetailPrefetch()
         self.selected_course_id = course_id
         self.selected_course_name = course_name
         self.selected_activity_id = None
@@ -643,6 +707,12 @@ class LMSInterface(ScrollArea):
         self.navigate_to(self.activityPage, self.selected_course_name)
         self.refreshActivities()
 
+    @pyqtSlot(str)
+    def onActivityTypeChanged(self, _key: str):
+        """切换活动类型后，按新的可见列表重新预取活动详情。"""
+        if self._current_activities:
+            self._startDetailPrefetch()
+
     @pyqtSlot(int, str)
     def onActivitySelected(self, activity_id: int, activity_name: str):
         """处理活动选择事件并进入详情页。
@@ -677,7 +747,8 @@ class LMSInterface(ScrollArea):
         self.selected_activity_name = ""
         self._current_submission = None
         self._current_activities = []
-        self._preview_pixmap_cache.clear()
+        self._cancelDetailPrefetch()
+        self._preview_pixmap_cache.clear_memory()
         self._mark_overlay_cache.clear()
         self._submission_marked_attachment_cache.clear()
         if self._preview_dialog is not None:
@@ -748,6 +819,7 @@ class LMSInterface(ScrollArea):
         else:
             diff = self._diffById(current_activities, network_activities)
 
+        self._invalidateUpdatedActivityDetails(diff["upserts"])
         if not current_activities or diff["full_replace"]:
             self.activityPage.setActivities(network_activities)
         elif not diff["identical"] and diff["upserts"]:
@@ -756,6 +828,7 @@ class LMSInterface(ScrollArea):
         self._current_activities = network_activities
         self._writeActivitiesCache(course_id, network_activities)
         self.switchPage(self.activityPage)
+        self._startDetailPrefetch()
         if not network_activities:
             self.success(self.tr("无活动"), self.tr("该课程暂无可显示活动"), parent=self)
             return
@@ -774,6 +847,38 @@ class LMSInterface(ScrollArea):
         elif had_cached_view and diff["identical"]:
             self.success(self.tr("作业已是最新"), self.tr("缓存与网络数据一致"), parent=self)
 
+    @pyqtSlot(dict)
+    def onUpdatesSynced(self, result: dict):
+        """处理增量同步完成回调，刷新课程列表并汇报变化。
+
+        :param result: 同步摘要，包含本次同步以来变化的课程、活动与附件。
+        :return: 无返回值。
+        """
+        if result.get("courses_changed"):
+            self.coursePage.setCourses(self._readCoursesCache())
+        if self.selected_course_id in result.get("refreshed_course_ids", []):
+            self._showCachedActivitiesIfAvailable(self.selected_course_id)
+
+        new_count = result.get("new_activity_count", 0)
+        updated_count = result.get("updated_activity_count", 0)
+        checked_count = len(result.get("refreshed_course_ids", []))
+        if new_count or updated_count:
+            changed_courses = {
+                one.get("_course_id") for one in result.get("changes", {}).get("activities", [])
+                if isinstance(one, dict)
+            }
+            self.success(
+                self.tr("发现更新"),
+                self.tr("{0} 门课程中新增 {1} 项、更新 {2} 项活动").format(len(changed_courses), new_count, updated_count),
+                parent=self
+            )
+        else:
+            self.success(
+                self.tr("课程已是最新"),
+                self.tr("已检查 {0} 门课程，其余课程近期已同步").format(checked_count),
+                parent=self
+            )
+
     @pyqtSlot(int, dict)
     def onActivityDetailLoaded(self, activity_id: int, detail: dict):
         """处理活动详情加载回调并下发到详情页。
@@ -783,6 +888,7 @@ class LMSInterface(ScrollArea):
         :return: 无返回值。
         """
         self.setPageStatus(self.detailPage, PageStatus.NORMAL)
+        self._writeUploadsCache(detail)
         if self.selected_activity_id != activity_id:
             return
         self.detailPage.setDetail(detail, self.selected_course_name, self.selected_activity_name)
@@ -817,6 +923,55 @@ class LMSInterface(ScrollArea):
             return None, str(e)
         return session, None
 
+    def _getLmsRequestCache(self) -> LMSRequestCache | None:
+        """返回当前账户思源学堂 session 绑定的请求缓存（不会触发登录）。"""
+        current_account = accounts.current
+        if current_account is None:
+            return None
+        return LMSRequestCache.for_session(current_account.session_manager.get_session("lms"))
+
+    def _invalidateUpdatedActivityDetails(self, activities: list[dict]) -> None:
+        """活动列表中内容有变化的活动，其详情缓存也已经过时。"""
+        cache = self._getLmsRequestCache()
+        if cache is None:
+            return
+        for one in activities:
+            if isinstance(one, dict) and isinstance(one.get("id"), int):
+                cache.invalidate("activity_detail", one["id"])
+
+    def _peekCachedActivityDetail(self, activity_id: int) -> dict | None:
+        """从请求缓存中取出活动详情，缓存缺失或过期时返回 None（不会发起请求）。"""
+        cache = self._getLmsRequestCache()
+        if cache is None:
+            return None
+        hit, detail = cache.peek("activity_detail", activity_id)
+        return detail if hit and isinstance(detail, dict) else None
+
+    def _startDetailPrefetch(self) -> None:
+        """取消进行中的预取，并在后台预取活动页当前可见的前若干项活动详情。"""
+        self._cancelDetailPrefetch()
+        current_account = accounts.current
+        if current_account is None:
+            return
+        activity_ids = prefetch_order(self.activityPage.getVisibleActivities(), DEFAULT_PREFETCH_LIMIT)
+        if not activity_ids:
+            return
+        thread = LMSPrefetchThread(current_account, activity_ids, self)
+        thread.finished.connect(lambda: self._onDetailPrefetchFinished(thread))
+        self._prefetch_thread = thread
+        thread.start()
+
+    def _onDetailPrefetchFinished(self, thread: LMSPrefetchThread) -> None:
+        if self._prefetch_thread is thread:
+            self._prefetch_thread = None
+        thread.deleteLater()
+
+    def _cancelDetailPrefetch(self) -> None:
+        """停止进行中的预取。线程会在当前请求结束后自行退出。"""
+        if self._prefetch_thread is not None:
+            self._prefetch_thread.cancel()
+            self._prefetch_thread = None
+
     def _get_lms_util(self) -> LMSUtil | None:
         session, _ = self.ensure_lms_login()
         if session is None:
@@ -831,6 +986,8 @@ class LMSInterface(ScrollArea):
         if not isinstance(submission_id, int):
             return False
 
+        if force:
+            self._mark_overlay_cache.invalidate(submission_id)
         marked_data = None if force else self._submission_marked_attachment_cache.get(submission_id)
         util = None
         if marked_data is None:
@@ -964,7 +1121,9 @@ class LMSInterface(ScrollArea):
         self._current_activities = []
         self._course_cache_visible_during_refresh = False
         self._activity_cache_visible_during_refresh = False
-        self._preview_pixmap_cache.clear()
+        self._sync_store = None
+        self._cancelDetailPrefetch()
+        self._preview_pixmap_cache.clear_memory()
         self._mark_overlay_cache.clear()
         self._submission_marked_attachment_cache.clear()
         if self._preview_dialog is not None:
@@ -1306,510 +1465,6 @@ class LMSInterface(ScrollArea):
         reason = errors[-1] if errors else self.tr("无法读取批改标注文件")
         return None, reason
 
-    def _extract_mark_overlay_items(self, payload) -> list[dict]:
-        items: list[dict] = []
-        page_container_keys = {"pages", "images", "attachments", "files", "canvases", "slides"}
-        id_keys = (
-            "id", "upload_id", "uploadId", "target_id", "targetId", "image_id", "imageId", "origin_upload_id",
-            "originUploadId"
-        )
-        reference_id_keys = ("reference_id", "referenceId", "file_id", "fileId", "origin_reference_id", "originReferenceId")
-        key_keys = ("key", "upload_key", "uploadKey", "file_key", "fileKey")
-
-        def normalize_token(value) -> str:
-            if isinstance(value, float) and value.is_integer():
-                value = int(value)
-            return str(value or "").strip().lower()
-
-        def add_prefixed_token(kind: str, raw, tokens: set[str]):
-            if raw is None:
-                return
-            if isinstance(raw, (int, float)):
-                token_value = normalize_token(raw)
-                if token_value:
-                    tokens.add(f"{kind}:{token_value}")
-                return
-            if isinstance(raw, str):
-                token_value = normalize_token(raw)
-                if token_value:
-                    tokens.add(f"{kind}:{token_value}")
-                return
-            if isinstance(raw, dict):
-                add_tokens_from_mapping(raw, tokens)
-                return
-            if isinstance(raw, (list, tuple)):
-                for one in raw[:12]:
-                    add_prefixed_token(kind, one, tokens)
-
-        def add_tokens_from_mapping(raw: dict, tokens: set[str]):
-            for key in id_keys:
-                add_prefixed_token("id", raw.get(key), tokens)
-            for key in reference_id_keys:
-                add_prefixed_token("reference_id", raw.get(key), tokens)
-            for key in key_keys:
-                add_prefixed_token("key", raw.get(key), tokens)
-            for nested_key in (
-                "upload",
-                "origin_upload", "originUpload",
-                "origin_attachment", "originAttachment",
-                "source_upload", "sourceUpload",
-                "source_attachment", "sourceAttachment",
-                "attachment",
-                "origin",
-                "source",
-                "file",
-                "image",
-            ):
-                nested_value = raw.get(nested_key)
-                if isinstance(nested_value, dict):
-                    add_tokens_from_mapping(nested_value, tokens)
-                elif isinstance(nested_value, (list, tuple)):
-                    for one in nested_value[:12]:
-                        if isinstance(one, dict):
-                            add_tokens_from_mapping(one, tokens)
-
-        def collect_target_tokens(node) -> set[str]:
-            if not isinstance(node, dict):
-                return set()
-            tokens: set[str] = set()
-            add_tokens_from_mapping(node, tokens)
-            return {one for one in tokens if one}
-
-        def parse_unit_hint(node, inherited: str | None) -> str | None:
-            if not isinstance(node, dict):
-                return inherited
-            for key in (
-                "coord_unit", "coordUnit", "coordinate_unit", "coordinateUnit",
-                "coordinate_type", "coordinateType", "coord_type", "coordType", "unit"
-            ):
-                value = node.get(key)
-                if not isinstance(value, str):
-                    continue
-                text = value.strip().lower()
-                if not text:
-                    continue
-                if "percent" in text or text in {"%", "pct"}:
-                    return "percent"
-                if "ratio" in text or "normalized" in text or "relative" in text:
-                    return "ratio"
-                if "pixel" in text or text in {"px", "pixels"}:
-                    return "px"
-            return inherited
-
-        def parse_page_hint(node, inherited: int | None) -> int | None:
-            if not isinstance(node, dict):
-                return inherited
-            for key in ("page_index", "pageIndex", "image_index", "imageIndex", "img_index", "imgIndex", "page"):
-                value = self._as_float(node.get(key))
-                if value is None:
-                    continue
-                return int(round(value))
-            return inherited
-
-        def parse_dimension_hints(node, inherited_w: float | None, inherited_h: float | None) -> tuple[float | None, float | None]:
-            width = inherited_w
-            height = inherited_h
-            if not isinstance(node, dict):
-                return width, height
-
-            for w_key, h_key in (
-                ("image_width", "image_height"),
-                ("imageWidth", "imageHeight"),
-                ("img_width", "img_height"),
-                ("imgWidth", "imgHeight"),
-                ("origin_width", "origin_height"),
-                ("originWidth", "originHeight"),
-                ("original_width", "original_height"),
-                ("originalWidth", "originalHeight"),
-                ("natural_width", "natural_height"),
-                ("naturalWidth", "naturalHeight"),
-                ("canvas_width", "canvas_height"),
-                ("canvasWidth", "canvasHeight"),
-                ("page_width", "page_height"),
-                ("pageWidth", "pageHeight"),
-                ("display_width", "display_height"),
-                ("displayWidth", "displayHeight"),
-                ("source_width", "source_height"),
-                ("sourceWidth", "sourceHeight"),
-                ("base_width", "base_height"),
-                ("baseWidth", "baseHeight"),
-            ):
-                w = self._as_float(node.get(w_key))
-                h = self._as_float(node.get(h_key))
-                if w is not None and h is not None and w > 0 and h > 0:
-                    return w, h
-
-            for size_key in (
-                "size", "image_size", "imageSize", "origin_size", "originSize",
-                "original_size", "originalSize", "natural_size", "naturalSize",
-                "canvas_size", "canvasSize", "page_size", "pageSize",
-                "display_size", "displaySize", "source_size", "sourceSize"
-            ):
-                size = node.get(size_key)
-                if not isinstance(size, dict):
-                    continue
-                for w_key, h_key in (("width", "height"), ("w", "h"), ("imageWidth", "imageHeight")):
-                    w = self._as_float(size.get(w_key))
-                    h = self._as_float(size.get(h_key))
-                    if w is not None and h is not None and w > 0 and h > 0:
-                        return w, h
-
-            return width, height
-
-        def apply_box_values(
-            values,
-            *,
-            prefer_xyxy: bool = False,
-            current_x: float | None = None,
-            current_y: float | None = None,
-            current_w: float | None = None,
-            current_h: float | None = None,
-        ) -> tuple[float | None, float | None, float | None, float | None]:
-            if not isinstance(values, (list, tuple)) or len(values) < 4:
-                return current_x, current_y, current_w, current_h
-
-            v1 = self._as_float(values[0])
-            v2 = self._as_float(values[1])
-            v3 = self._as_float(values[2])
-            v4 = self._as_float(values[3])
-
-            x = current_x if current_x is not None else v1
-            y = current_y if current_y is not None else v2
-            w = current_w
-            h = current_h
-
-            treat_as_xyxy = prefer_xyxy
-            if not treat_as_xyxy and None not in (v1, v2, v3, v4):
-                treat_as_xyxy = (v3 >= v1 and v4 >= v2 and (v3 > 1 or v4 > 1))
-
-            if treat_as_xyxy:
-                if x is not None and w is None and v3 is not None:
-                    w = v3 - x
-                if y is not None and h is None and v4 is not None:
-                    h = v4 - y
-            else:
-                if w is None:
-                    w = v3
-                if h is None:
-                    h = v4
-
-            return x, y, w, h
-
-        def append_item(
-            item: dict,
-            context_tokens: set[str],
-            context_w: float | None,
-            context_h: float | None,
-            context_page: int | None,
-            context_unit: str | None,
-        ):
-            if context_tokens:
-                item["targets"] = sorted(context_tokens)[:24]
-            if context_w is not None and context_w > 0:
-                item["base_w"] = context_w
-            if context_h is not None and context_h > 0:
-                item["base_h"] = context_h
-            if context_page is not None:
-                item["page_index"] = context_page
-            if context_unit:
-                item["coord_unit"] = context_unit
-            items.append(item)
-
-        def walk(
-            node,
-            context_tokens: set[str] | None = None,
-            context_w: float | None = None,
-            context_h: float | None = None,
-            context_page: int | None = None,
-            context_unit: str | None = None,
-            parent_key: str | None = None,
-        ):
-            inherited_tokens = set(context_tokens or set())
-
-            if isinstance(node, dict):
-                local_tokens = inherited_tokens | collect_target_tokens(node)
-                local_w, local_h = parse_dimension_hints(node, context_w, context_h)
-                local_page = parse_page_hint(node, context_page)
-                local_unit = parse_unit_hint(node, context_unit)
-
-                text = ""
-                for key in ("text", "comment", "content", "remark", "label", "note", "msg", "message"):
-                    value = node.get(key)
-                    if isinstance(value, str) and value.strip():
-                        text = value.strip()
-                        break
-
-                x = self._as_float(node.get("x"))
-                y = self._as_float(node.get("y"))
-                w = self._as_float(node.get("w"))
-                h = self._as_float(node.get("h"))
-                if x is None:
-                    x = self._as_float(node.get("x1"))
-                if y is None:
-                    y = self._as_float(node.get("y1"))
-                if x is None:
-                    x = self._as_float(node.get("left"))
-                if y is None:
-                    y = self._as_float(node.get("top"))
-                if w is None:
-                    w = self._as_float(node.get("width"))
-                if h is None:
-                    h = self._as_float(node.get("height"))
-
-                right = self._as_float(node.get("right"))
-                bottom = self._as_float(node.get("bottom"))
-                x2 = self._as_float(node.get("x2"))
-                y2 = self._as_float(node.get("y2"))
-                if right is not None:
-                    x2 = right if x2 is None else x2
-                if bottom is not None:
-                    y2 = bottom if y2 is None else y2
-                if x is not None and w is None and x2 is not None:
-                    w = x2 - x
-                if y is not None and h is None and y2 is not None:
-                    h = y2 - y
-                if x is None and x2 is not None and w is not None:
-                    x = x2 - w
-                if y is None and y2 is not None and h is not None:
-                    y = y2 - h
-
-                rect = node.get("rect")
-                if isinstance(rect, (list, tuple)) and len(rect) >= 4:
-                    x, y, w, h = apply_box_values(rect, current_x=x, current_y=y, current_w=w, current_h=h)
-                elif isinstance(rect, dict):
-                    rect_x1 = self._as_float(rect.get("x1"))
-                    rect_y1 = self._as_float(rect.get("y1"))
-                    rect_x2 = self._as_float(rect.get("x2"))
-                    rect_y2 = self._as_float(rect.get("y2"))
-                    x = self._as_float(rect.get("x")) if x is None else x
-                    y = self._as_float(rect.get("y")) if y is None else y
-                    if x is None:
-                        x = rect_x1
-                    if y is None:
-                        y = rect_y1
-                    if x is None:
-                        x = self._as_float(rect.get("left"))
-                    if y is None:
-                        y = self._as_float(rect.get("top"))
-                    if w is None:
-                        w = self._as_float(rect.get("w"))
-                    if h is None:
-                        h = self._as_float(rect.get("h"))
-                    if w is None:
-                        w = self._as_float(rect.get("width"))
-                    if h is None:
-                        h = self._as_float(rect.get("height"))
-                    if x is not None and w is None:
-                        right_value = rect_x2 if rect_x2 is not None else self._as_float(rect.get("right"))
-                        if right_value is not None:
-                            w = right_value - x
-                    if y is not None and h is None:
-                        bottom_value = rect_y2 if rect_y2 is not None else self._as_float(rect.get("bottom"))
-                        if bottom_value is not None:
-                            h = bottom_value - y
-
-                bbox = node.get("bbox")
-                if isinstance(bbox, (list, tuple)) and len(bbox) >= 4:
-                    x, y, w, h = apply_box_values(
-                        bbox, prefer_xyxy=True, current_x=x, current_y=y, current_w=w, current_h=h
-                    )
-                elif isinstance(bbox, dict):
-                    bbox_x1 = self._as_float(bbox.get("x1"))
-                    bbox_y1 = self._as_float(bbox.get("y1"))
-                    bbox_x2 = self._as_float(bbox.get("x2"))
-                    bbox_y2 = self._as_float(bbox.get("y2"))
-                    x = bbox_x1 if x is None else x
-                    y = bbox_y1 if y is None else y
-                    if w is None:
-                        w = self._as_float(bbox.get("w"))
-                    if h is None:
-                        h = self._as_float(bbox.get("h"))
-                    if x is not None and w is None and bbox_x2 is not None:
-                        w = bbox_x2 - x
-                    if y is not None and h is None and bbox_y2 is not None:
-                        h = bbox_y2 - y
-
-                graphic = node.get("graphic")
-                has_graphic_path = False
-                if isinstance(graphic, dict):
-                    path = graphic.get("path")
-                    if isinstance(path, list) and path:
-                        has_graphic_path = True
-                        append_item(
-                            {
-                                "path": path,
-                                "text": text,
-                                "color": graphic.get("borderColor") or node.get("borderColor"),
-                                "border_width": self._as_float(graphic.get("borderWidth")) or self._as_float(node.get("borderWidth")),
-                            },
-                            local_tokens,
-                            local_w,
-                            local_h,
-                            local_page,
-                            local_unit,
-                        )
-                    if x is None:
-                        x = self._as_float(graphic.get("left"))
-                    if y is None:
-                        y = self._as_float(graphic.get("top"))
-                    if w is None:
-                        w = self._as_float(graphic.get("width"))
-                    if h is None:
-                        h = self._as_float(graphic.get("height"))
-
-                should_append_xy_item = x is not None and y is not None
-                if has_graphic_path and w is None and h is None and not text:
-                    should_append_xy_item = False
-
-                if should_append_xy_item:
-                    append_item(
-                        {
-                            "x": x, "y": y, "w": w, "h": h, "text": text,
-                            "color": node.get("borderColor"), "border_width": self._as_float(node.get("borderWidth")),
-                        },
-                        local_tokens,
-                        local_w,
-                        local_h,
-                        local_page,
-                        local_unit,
-                    )
-
-                for key, value in node.items():
-                    if isinstance(value, list) and key in page_container_keys and local_page is None:
-                        for i, one in enumerate(value):
-                            walk(one, local_tokens, local_w, local_h, i, local_unit, key)
-                    else:
-                        walk(value, local_tokens, local_w, local_h, local_page, local_unit, key)
-                return
-
-            if isinstance(node, list):
-                for i, value in enumerate(node):
-                    page_hint = context_page
-                    if parent_key in page_container_keys and page_hint is None:
-                        page_hint = i
-                    walk(value, inherited_tokens, context_w, context_h, page_hint, context_unit, parent_key)
-
-        walk(payload)
-        return items[:200]
-
-    def _extract_mark_summary_text(self, payload) -> str | None:
-        texts: list[str] = []
-
-        def walk(node):
-            if isinstance(node, dict):
-                for key in ("text", "comment", "content", "remark", "label", "note", "msg", "message"):
-                    value = node.get(key)
-                    if isinstance(value, str):
-                        stripped = value.strip()
-                        if stripped:
-                            texts.append(stripped)
-                for value in node.values():
-                    walk(value)
-                return
-            if isinstance(node, list):
-                for value in node:
-                    walk(value)
-
-        walk(payload)
-        if not texts:
-            return None
-        return "\n".join(texts[:10])
-
-    def _iter_mark_payload_candidates(self, payload) -> list:
-        candidates: list = []
-        seen: set[str] = set()
-
-        def remember(node) -> bool:
-            try:
-                marker = json.dumps(node, ensure_ascii=False, sort_keys=True, default=str)
-            except Exception:
-                marker = repr(node)
-            if marker in seen:
-                return False
-            seen.add(marker)
-            candidates.append(node)
-            return True
-
-        def walk(node, depth: int = 0):
-            if depth > 5:
-                return
-            if not remember(node):
-                return
-
-            if isinstance(node, str):
-                text = node.strip()
-                if not text:
-                    return
-                variants = [text]
-                try:
-                    decoded = unquote(text)
-                    if decoded and decoded != text:
-                        variants.append(decoded)
-                        decoded_twice = unquote(decoded)
-                        if decoded_twice and decoded_twice != decoded:
-                            variants.append(decoded_twice)
-                except Exception:
-                    pass
-
-                for variant in variants:
-                    compact = variant.strip()
-                    if not compact:
-                        continue
-                    if compact[:1] in {'{', '[', '"'}:
-                        try:
-                            walk(json.loads(compact), depth + 1)
-                        except Exception:
-                            continue
-                return
-
-            if isinstance(node, dict):
-                for key in (
-                    "data", "payload", "result", "content", "annotation", "annotations",
-                    "mark", "marks", "markup", "items", "list"
-                ):
-                    if key in node:
-                        walk(node.get(key), depth + 1)
-                for value in node.values():
-                    if isinstance(value, (dict, list, str)):
-                        walk(value, depth + 1)
-                return
-
-            if isinstance(node, list):
-                for value in node[:50]:
-                    if isinstance(value, (dict, list, str)):
-                        walk(value, depth + 1)
-
-        walk(payload)
-        return candidates
-
-    def _parse_mark_attachment_text(self, text: str) -> tuple[str | None, list[dict]]:
-        content = (text or "").strip()
-        if not content:
-            return None, []
-
-        for one in self._iter_mark_payload_candidates(content):
-            if isinstance(one, (dict, list)):
-                items = self._extract_mark_overlay_items(one)
-                summary = self._extract_mark_summary_text(one)
-                if summary or items:
-                    return summary, items
-
-        items: list[dict] = []
-        line_re = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*[,，]\s*(-?\d+(?:\.\d+)?)\s*[:：\-]\s*(.+?)\s*$")
-        for line in content.splitlines():
-            match = line_re.match(line)
-            if not match:
-                continue
-            x = self._as_float(match.group(1))
-            y = self._as_float(match.group(2))
-            msg = match.group(3).strip()
-            if x is not None and y is not None:
-                items.append({"x": x, "y": y, "text": msg, "shape": "point"})
-
-        summary_lines = [one.strip() for one in content.splitlines() if one.strip()][:10]
-        summary = "\n".join(summary_lines) if summary_lines else None
-        return summary, items
-
     @staticmethod
     def _extract_inline_mark_payload(upload: dict):
         for key in (
@@ -1915,23 +1570,6 @@ class LMSInterface(ScrollArea):
                 filtered.append(item)
         return filtered
 
-    def _parse_mark_attachment_payload(self, payload) -> tuple[str | None, list[dict]]:
-        if payload is None:
-            return None, []
-        for one in self._iter_mark_payload_candidates(payload):
-            if isinstance(one, (dict, list)):
-                summary = self._extract_mark_summary_text(one)
-                items = self._extract_mark_overlay_items(one)
-                if summary or items:
-                    return summary, items
-        if isinstance(payload, str):
-            return self._parse_mark_attachment_text(payload)
-        try:
-            dumped = json.dumps(payload, ensure_ascii=False)
-        except Exception:
-            return None, []
-        return self._parse_mark_attachment_text(dumped)
-
     def _format_overlay_text(self, summary: str | None, items: list[dict], raw_text: str | None = None) -> str | None:
         if summary:
             return summary
@@ -1991,15 +1629,17 @@ class LMSInterface(ScrollArea):
             "name": current_file.get("name"),
         }
         cache_key = f"attachment-direct-v3|{self._preview_key(text_source)}"
-        if cache_key in self._mark_overlay_cache:
-            overlay_text, items = self._mark_overlay_cache[cache_key]
+        submission_id = self._current_submission.get("id") if isinstance(self._current_submission, dict) else None
+        cached = self._mark_overlay_cache.get(submission_id, cache_key)
+        if cached is not None:
+            overlay_text, items = cached
         else:
             raw_text, error_text = self._fetch_text_payload(text_source)
             if not raw_text:
                 return None, [], (error_text or self.tr("无法读取批注文件"))
-            summary, items = self._parse_mark_attachment_text(raw_text)
+            summary, items = parse_mark_attachment_text(raw_text)
             overlay_text = self._format_overlay_text(summary, items, raw_text)
-            self._mark_overlay_cache[cache_key] = (overlay_text, items)
+            self._mark_overlay_cache.put(submission_id, cache_key, (overlay_text, items))
 
         if overlay_text or items:
             return overlay_text, items, None
@@ -2109,13 +1749,14 @@ class LMSInterface(ScrollArea):
 
         dialog.set_overlay_content(overlay_text, overlay_items)
 
-    def _fetch_image_pixmap(self, file_info: dict) -> tuple[QPixmap | None, str | None]:
+    def _fetch_image_pixmap(self, file_info: dict) -> tuple[QPixmap | None, bytes | None, str | None]:
+        """下载并解码附件图片，返回 (图片, 原始字节, 错误信息)。"""
         if accounts.current is None:
-            return None, self.tr("请先登录后再预览")
+            return None, None, self.tr("请先登录后再预览")
 
         session, error = self.ensure_lms_login()
         if session is None:
-            return None, error
+            return None, None, error
 
         queue = self._resolve_upload_urls(file_info)
         tried: set[str] = set()
@@ -2136,16 +1777,9 @@ class LMSInterface(ScrollArea):
 
             content = response.content or b""
             if content:
-                buffer = QBuffer()
-                buffer.setData(content)
-                buffer.open(QBuffer.ReadOnly)
-                image_reader = QImageReader(buffer)
-                # Respect EXIF orientation so phone photos display with correct rotation.
-                image_reader.setAutoTransform(True)
-                loaded_image = image_reader.read()
-                if not loaded_image.isNull():
-                    pixmap = QPixmap.fromImage(loaded_image)
-                    return pixmap, None
+                pixmap = decode_preview_image(content, self._preview_pixmap_cache.max_side)
+                if pixmap is not None:
+                    return pixmap, content, None
 
             nested_url = None
             content_type = str(response.headers.get("Content-Type") or "").lower()
@@ -2161,17 +1795,25 @@ class LMSInterface(ScrollArea):
                 queue.append(nested_url)
 
         reason = errors[-1] if errors else self.tr("文件不是可预览图片，或缺少有效图片链接")
-        return None, reason
+        return None, None, reason
+
+    def _getPreviewCache(self) -> LMSPreviewCache:
+        """返回图片预览缓存，并按当前账户与缓存设置调整其磁盘目录。"""
+        disk_dir = self._getLmsCacheFilePath(self.PREVIEW_CACHE_DIRECTORY) if self._isLmsCacheEnabled() else None
+        if self._preview_pixmap_cache.disk_dir != disk_dir:
+            self._preview_pixmap_cache.set_disk_dir(disk_dir)
+        return self._preview_pixmap_cache
 
     def _get_cached_preview_pixmap(self, file_info: dict) -> tuple[QPixmap | None, str | None]:
+        cache = self._getPreviewCache()
         cache_key = self._preview_key(file_info)
-        pixmap = self._preview_pixmap_cache.get(cache_key)
+        pixmap = cache.get(cache_key)
         if pixmap is not None and not pixmap.isNull():
             return pixmap, None
 
-        pixmap, error_text = self._fetch_image_pixmap(file_info)
+        pixmap, data, error_text = self._fetch_image_pixmap(file_info)
         if pixmap is not None and not pixmap.isNull():
-            self._preview_pixmap_cache[cache_key] = pixmap
+            cache.put(cache_key, pixmap, data)
             return pixmap, None
         return None, error_text
 
@@ -19,7 +19,8 @@ from app.threads.ProcessWidget import ProcessWidget
 from app.threads.ScoreThread import ScoreThread
 from app.utils import StyleSheet, cfg, AccountDataManager, accounts, logger, DATA_DIRECTORY
 from app.utils.notification import notify
-from score_statistics import calculate_score_statistics
+from app.utils.score_store import ScoreDiff, ScoreStore
+from score_statistics import ScoreSelection, ScoreTable
 
 
 class ScoreInterface(ScrollArea):
@@ -66,6 +67,7 @@ class ScoreInterface(ScrollArea):
         self.scoreThread.error.connect(self.onThreadError)
         self.scoreThread.scores.connect(self.onReceiveScore)
         self.scoreThread.finished.connect(self.unlock)
+        self.scoreThread.finished.connect(self.onBackgroundSearchFinished)
 
         self.graduateScoreThread = GraduateScoreThread()
         self.graduateProcessWidget = ProcessWidget(self.graduateScoreThread, self.view, stoppable=True, hide_on_end=True)
@@ -73,9 +75,12 @@ class ScoreInterface(ScrollArea):
         self.graduateScoreThread.error.connect(self.onThreadError)
         self.graduateScoreThread.scores.connect(self.onReceiveScore)
         self.graduateScoreThread.finished.connect(self.unlock)
+        self.graduateScoreThread.finished.connect(self.onBackgroundSearchFinished)
 
         self._onlyNotice = None
         self.scores = None
+        # 当前成绩的统计表，选择变化时只累加进出选择的行
+        self.scoreSelection = None
 
         self._force_push = False
         self._last_score = None
@@ -368,14 +373,17 @@ class ScoreInterface(ScrollArea):
         self._background_search_running = True
 
         if accounts.current:
+            # 定时查询的结果由 onReceiveScheduledScore 处理，只有成绩发生变化时才刷新表格
             if accounts.current.type == accounts.current.UNDERGRADUATE:
                 # 设置查询为当前学期
                 self.scoreThread.term_number = []
                 self.scoreThread.allow_qrcode_login = False
+                self.scoreThread.scores.disconnect(self.onReceiveScore)
                 self.scoreThread.scores.connect(self.onReceiveScheduledScore)
                 self.scoreThread.start()
             else:
                 self.graduateScoreThread.allow_qrcode_login = False
+                self.graduateScoreThread.scores.disconnect(self.onReceiveScore)
                 self.graduateScoreThread.scores.connect(self.onReceiveScheduledScore)
                 self.graduateScoreThread.start()
         else:
@@ -387,6 +395,40 @@ class ScoreInterface(ScrollArea):
                 w.exec()
             self._background_search_running = False
 
+    def _load_score_store(self) -> ScoreStore:
+        """读取按账户保存的成绩快照"""
+        cache = AccountDataManager(accounts.current)
+        try:
+            return ScoreStore.from_json(cache.read_json("score_store.json"))
+        except (OSError, json.JSONDecodeError, AttributeError):
+            return ScoreStore()
+
+    def _save_score_store(self, store: ScoreStore):
+        cache = AccountDataManager(accounts.current)
+        try:
+            cache.write_json("score_store.json", store.json(), allow_overwrite=True)
+        except OSError:
+            pass
+
+    def _diff_scheduled_score(self, score_list: list, is_postgraduate: bool) -> ScoreDiff:
+        """把定时查询的结果与保存的成绩快照比较，更新并保存快照，返回变化"""
+        if accounts.current is None:
+            return ScoreDiff()
+        store = self._load_score_store()
+        seeded = len(store) == 0
+        if seeded:
+            # 还没有快照：按课程名与查询前显示的成绩比较，然后建立快照
+            last_names = {one["courseName"] for one in self._last_score} if self._last_score else None
+            diff = ScoreDiff(new=[one for one in score_list if last_names is None or one["courseName"] not in last_names])
+            store.reset([one for one in score_list if last_names is not None and one["courseName"] in last_names])
+            store.apply(diff)
+        else:
+            # 本科生定时查询只查询当前学期（查询后 term_number 为实际查询的学期），其他学期的成绩不算作消失
+            diff = store.update(score_list, None if is_postgraduate else self.scoreThread.term_number)
+        if diff or seeded:
+            self._save_score_store(store)
+        return diff
+
     def _load_score_hook_state(self) -> dict:
         """读取按账户保存的 Hook 状态（用于限流/去重）。"""
         if accounts.current is None:
@@ -433,15 +475,16 @@ class ScoreInterface(ScrollArea):
             state["last_force_ts"] = now_ts
             return True, state
 
-        if event == "score.new":
+        if event in ("score.new", "score.changed"):
+            kind = event.split(".")[1]
             fp = self._fingerprint(event, nickname, new_names)
-            last_fp = state.get("last_new_fp")
-            last_ts = float(state.get("last_new_ts", 0) or 0)
+            last_fp = state.get(f"last_{kind}_fp")
+            last_ts = float(state.get(f"last_{kind}_ts", 0) or 0)
             cooldown = int(cfg.scoreHookCooldownNewSec.value or 0)
             if last_fp == fp and cooldown > 0 and now_ts - last_ts < cooldown:
                 return False, state
-            state["last_new_fp"] = fp
-            state["last_new_ts"] = now_ts
+            state[f"last_{kind}_fp"] = fp
+            state[f"last_{kind}_ts"] = now_ts
             return True, state
 
         return False, state
@@ -513,16 +556,19 @@ class ScoreInterface(ScrollArea):
         else:
             self.error(self.tr("成绩钩子执行失败"), message)
 
-    def _maybe_run_score_hook(self, *, event: str, score_list: list, new_names: list[str]):
+    def _maybe_run_score_hook(self, *, event: str, score_list: list, new_names: list[str], diff: ScoreDiff | None = None):
         """
         根据配置和限流状态，决定是否执行外部命令
         传递给外部命令的字段包括：
-        - event: 事件类型，"score.new" 或 "score.force"
+        - event: 事件类型，"score.new"、"score.changed" 或 "score.force"
         - timestamp: 事件发生的时间，ISO 8601 格式
         - account: 包含当前账户的 nickname 字段
         - new_names: 新公布成绩的课程名称列表（仅当 event 为 "score.new" 时包含）
         - new_scores: 新公布成绩的成绩列表（仅当 event 为 "score.new" 时包含）
+        - changed_names / changed_scores: 成绩发生变化的课程名称与变化后的成绩列表
+        - removed_names: 不再出现在查询结果中的课程名称列表
         - all_scores: 所有成绩列表（仅当配置项 scoreHookIncludeFullScores 启用时包含）
+        new_names 在 event 为 "score.changed" 时为成绩发生变化的课程名称，用于去重
         这些字段会被写入一个 JSON 文件，并将该文件的路径通过命令行参数传递给外部命令
         """
         if not cfg.scoreHookEnable.value:
@@ -549,17 +595,24 @@ class ScoreInterface(ScrollArea):
         if event == "score.new":
             fp = self._fingerprint(event, nickname, new_names)
 
+        if event == "score.changed":
+            fp = self._fingerprint(event, nickname, new_names)
+
         new_scores = []
         if event == "score.new" and new_names:
             new_name_set = set(new_names)
             new_scores = [s for s in score_list if isinstance(s, dict) and s.get("courseName") in new_name_set]
+        diff = diff or ScoreDiff()
 
         payload = {
             "event": event,
             "timestamp": timestamp,
             "account": {"nickname": nickname},
-            "new_names": new_names or [],
+            "new_names": (new_names or []) if event == "score.new" else [],
             "new_scores": new_scores,
+            "changed_names": [new["courseName"] for _, new in diff.changed],
+            "changed_scores": [new for _, new in diff.changed],
+            "removed_names": [one["courseName"] for one in diff.removed],
         }
         if cfg.scoreHookIncludeFullScores.value:
             payload["all_scores"] = score_list
@@ -571,7 +624,7 @@ class ScoreInterface(ScrollArea):
             "event": event,
             "timestamp": timestamp,
             "nickname": nickname,
-            "new_count": len(new_names or []),
+            "new_count": len(payload["new_names"]),
         }
 
         args = cfg.scoreHookArgs.value or []
@@ -589,19 +642,17 @@ class ScoreInterface(ScrollArea):
 
     @pyqtSlot(list, bool)
     def onReceiveScheduledScore(self, score_list, is_postgraduate=False):
-        new_names = []
-        last_class_names = [one["courseName"] for one in self._last_score] if self._last_score else []
-
-        if self._last_score is None:
-            new_names = [one["courseName"] for one in score_list]
-        else:
-            for one in score_list:
-                if one["courseName"] not in last_class_names:
-                    new_names.append(one["courseName"])
+        diff = self._diff_scheduled_score(score_list, is_postgraduate)
+        new_names = [one["courseName"] for one in diff.new]
+        changed_names = [new["courseName"] for _, new in diff.changed]
+        if diff:
+            logger.info("定时查询成绩：新增 %d，变化 %d，消失 %d", len(diff.new), len(diff.changed), len(diff.removed))
 
         try:
             if new_names:
                 notify(self.tr("查询到新的课程成绩"), f"{self.formatClassName(new_names)}的成绩已经公布")
+            elif changed_names:
+                notify(self.tr("课程成绩有更新"), f"{self.formatClassName(changed_names)}的成绩发生了变化")
             elif self._force_push:
                 notify(self.tr("没有新的成绩公布"), self.tr("您的成绩没有更新"))
         except NotImplementedError as e:
@@ -615,20 +666,33 @@ class ScoreInterface(ScrollArea):
 
         # 无论是否成功推送通知，都尝试触发外部命令（按限流策略决定是否真正执行）
         if new_names:
-            self._maybe_run_score_hook(event="score.new", score_list=score_list, new_names=new_names)
+            self._maybe_run_score_hook(event="score.new", score_list=score_list, new_names=new_names, diff=diff)
+        elif changed_names:
+            self._maybe_run_score_hook(event="score.changed", score_list=score_list, new_names=changed_names, diff=diff)
         elif self._force_push:
-            self._maybe_run_score_hook(event="score.force", score_list=score_list, new_names=[])
+            self._maybe_run_score_hook(event="score.force", score_list=score_list, new_names=[], diff=diff)
 
-        # 断开连接，避免影响手动查询成绩时的信号处理
-        if is_postgraduate:
-            self.graduateScoreThread.scores.disconnect(self.onReceiveScheduledScore)
-        else:
-            self.scoreThread.scores.disconnect(self.onReceiveScheduledScore)
+        # 成绩有变化时才刷新表格
+        if diff:
+            self.onReceiveScore(score_list, is_postgraduate, False)
+        self._finishBackgroundSearch(is_postgraduate)
+
+    def _finishBackgroundSearch(self, is_postgraduate: bool):
+        """恢复手动查询时的信号连接，结束定时查询"""
+        thread = self.graduateScoreThread if is_postgraduate else self.scoreThread
+        thread.scores.disconnect(self.onReceiveScheduledScore)
+        thread.scores.connect(self.onReceiveScore)
 
         self._force_push = False
         self._last_score = None
         self._background_search_running = False
 
+    @pyqtSlot()
+    def onBackgroundSearchFinished(self):
+        # 定时查询出错或被取消时不会收到成绩，在线程结束时恢复状态
+        if self._background_search_running:
+            self._finishBackgroundSearch(self.sender() is self.graduateScoreThread)
+
     @pyqtSlot(list, bool)
     def onReceiveScore(self, scores: list, is_postgraduate=False, show_success_message=True):
         # 研究生无法区分缓考信息
@@ -636,6 +700,7 @@ class ScoreInterface(ScrollArea):
             scores = [score for score in scores if "passFlag" not in score or score["passFlag"] or score["specificReason"] != "缓考"]
 
         self.scores = scores
+        self.scoreSelection = ScoreSelection(ScoreTable(scores))
         self.scoreTable.clearSelection()
         self.scoreTable.setRowCount(len(scores))
         if is_postgraduate:
@@ -703,12 +768,10 @@ class ScoreInterface(ScrollArea):
         if not selected_rows:
             selected_rows = list(range(self.scoreTable.rowCount()))
 
-        try:
-            scores = [self.scores[index] for index in selected_rows]
-        except IndexError:
+        if self.scoreSelection is None or max(selected_rows) >= len(self.scoreSelection.table):
             return
 
-        statistics = calculate_score_statistics(scores)
+        statistics = self.scoreSelection.update(selected_rows)
         # 0 学分课程无法计算绩点和平均分，直接返回
         if statistics is None:
             return
@@ -23,6 +23,7 @@ from .utils.auto_start import add_to_startup, delete_from_startup
 from .utils.config import cfg, TraySetting
 from .utils import accounts, LOG_DIRECTORY, DEFAULT_ACCOUNT_PATH
 from .sessions.session_backend import AccessMode
+from .sessions.tracing import request_tracer
 from .utils.session_manager import SessionManager
 from .utils.style_sheet import StyleSheet
 from .cards.custom_color_setting_card import CustomColorSettingCard
@@ -260,6 +261,13 @@ class SettingInterface(ScrollArea):
             cfg.keepSessionOnExit,
             self.sessionGroup
         )
+        self.trustedRestoreCard = CustomSwitchSettingCard(
+            FIF.HISTORY,
+            self.tr("信任近期验证过的登录状态"),
+            self.tr("启动时复用几分钟内验证过的登录状态，不再逐个重新验证；失效时会自动重新登录"),
+            cfg.trustedSessionRestore,
+            self.sessionGroup
+        )
         self.clearSessionCard = PushSettingCard(
             self.tr("清空"),
             FIF.CLEAR_SELECTION,
@@ -274,6 +282,13 @@ class SettingInterface(ScrollArea):
             cfg.sessionKeepAliveEnabled,
             self.sessionGroup,
         )
+        self.loginWarmUpCard = CustomSwitchSettingCard(
+            FIF.SPEED_HIGH,
+            self.tr("启动后预先登录常用系统"),
+            self.tr("启动或切换账户后在后台同时登录常用的校内系统，打开页面时无需再等待登录"),
+            cfg.loginWarmUpEnabled,
+            self.sessionGroup,
+        )
         self.sessionKeepAliveCard = ComboBoxSettingCard(
             cfg.sessionKeepAliveInterval,
             FIF.SYNC,
@@ -283,8 +298,10 @@ class SettingInterface(ScrollArea):
             parent=self.sessionGroup,
         )
         self.sessionGroup.addSettingCard(self.keepSessionCard)
+        self.sessionGroup.addSettingCard(self.trustedRestoreCard)
         self.sessionGroup.addSettingCard(self.sessionKeepAliveEnableCard)
         self.sessionGroup.addSettingCard(self.sessionKeepAliveCard)
+        self.sessionGroup.addSettingCard(self.loginWarmUpCard)
         self.sessionGroup.addSettingCard(self.clearSessionCard)
 
         # 校园网访问设置组
@@ -344,6 +361,14 @@ class SettingInterface(ScrollArea):
             self.venueGroup
         )
         self.venueGroup.addSettingCard(self.venueCacheCard)
+        self.venueCaptchaCard = CustomSwitchSettingCard(
+            FIF.FINGERPRINT,
+            self.tr("验证码多候选重试（实验性）"),
+            self.tr("识别验证码时比较多个候选位置，识别错误时先提交同一张验证码的第二个位置"),
+            cfg.venueCaptchaRanking,
+            self.venueGroup
+        )
+        self.venueGroup.addSettingCard(self.venueCaptchaCard)
 
         # 通知查询组
         self.noticeGroup = SettingCardGroup(self.tr("定时查询"), self.view)
@@ -421,6 +446,13 @@ class SettingInterface(ScrollArea):
             self.tr("打开应用的日志目录"),
             self.aboutGroup
         )
+        self.requestTraceCard = PushSettingCard(
+            self.tr("导出"),
+            FIF.SAVE,
+            self.tr("导出网络请求记录"),
+            self.tr("导出最近网络请求的耗时统计，便于排查页面加载缓慢的问题"),
+            self.aboutGroup
+        )
         self.visitorIdCard = CopyablePushSettingCard(
             self.tr("重置 ID"),
             FIF.CONNECT,
@@ -432,6 +464,7 @@ class SettingInterface(ScrollArea):
         self.aboutGroup.addSettingCard(self.minimizeToTrayCard)
         self.aboutGroup.addSettingCard(self.feedbackCard)
         self.aboutGroup.addSettingCard(self.logCard)
+        self.aboutGroup.addSettingCard(self.requestTraceCard)
         self.aboutGroup.addSettingCard(self.autoStartCard)
         self.aboutGroup.addSettingCard(self.updateOnStartCard)
         self.aboutGroup.addSettingCard(self.prereleaseCard)
@@ -477,6 +510,7 @@ class SettingInterface(ScrollArea):
         self.logCard.clicked.connect(lambda: QDesktopServices.openUrl(QUrl("file:///" + LOG_DIRECTORY)))
         self.autoStartCard.checkedChanged.connect(self._onAutoStartClicked)
         self.showAvatarCard.checkedChanged.connect(self._showAvatarClicked)
+        self.requestTraceCard.clicked.connect(self._onExportRequestTraceClicked)
         self.visitorIdCard.clicked.connect(self._onVisitorIdClicked)
         self.visitorIdCard.copied.connect(self._onVisitorIdCopiedClicked)
 
@@ -761,6 +795,21 @@ class SettingInterface(ScrollArea):
             cfg.loginId.value = w.visitorId
             InfoBar.success(self.tr("重置 ID 成功"), self.tr("新的客户端登录 ID 已经设置"), parent=self)
 
+    @pyqtSlot()
+    def _onExportRequestTraceClicked(self):
+        """把最近的网络请求记录导出为 JSON 文件。"""
+        path, _ = QFileDialog.getSaveFileName(self, self.tr("导出网络请求记录"), "request_trace.json",
+                                              self.tr("JSON 文件 (*.json)"))
+        if not path:
+            return
+        try:
+            request_tracer.export_to_file(path)
+        except OSError as e:
+            InfoBar.error(self.tr("导出失败"), str(e), parent=self)
+            return
+        InfoBar.success(self.tr("导出成功"), self.tr("已导出 {0} 条网络请求记录").format(len(request_tracer)),
+                        parent=self)
+
     @pyqtSlot()
     def _onVisitorIdCopiedClicked(self):
         QApplication.clipboard().setText(cfg.loginId.value)
@@ -6,10 +6,10 @@ import json
 import logging
 import os
 import re
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 from typing import Optional
 
-from PyQt5.QtCore import Qt, pyqtSignal, pyqtSlot, QTimer, QPropertyAnimation, QParallelAnimationGroup, QEasingCurve, QUrl
+from PyQt5.QtCore import Qt, pyqtSignal, pyqtSlot, QTimer, QPropertyAnimation, QParallelAnimationGroup, QEasingCurve, QUrl, QTime
 from PyQt5.QtGui import QColor, QDesktopServices
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QFrame, QHBoxLayout,
                              QSizePolicy, QHeaderView, QStackedWidget,
@@ -19,7 +19,8 @@ from qfluentwidgets import (ScrollArea, TitleLabel, StrongBodyLabel,
                             FlowLayout, BreadcrumbBar, PrimaryPushButton,
                             TransparentToolButton, PushButton, Pivot,
                             InfoBar, InfoBarPosition, ComboBox,
-                            CheckBox, MessageBox, MessageBoxBase, SubtitleLabel)
+                            CheckBox, MessageBox, MessageBoxBase, SubtitleLabel,
+                            LineEdit, TimePicker)
 
 from .utils import StyleSheet, accounts, AccountDataManager, cfg
 from .venues.venue import VenueInfo, AreaSlot, OrderInfo, VenueUtil
@@ -245,6 +246,127 @@ class PayDialog(MessageBoxBase):
         self.accept()
 
 
+# ============================= 定时预订对话框 =============================
+
+class RushDialog(MessageBoxBase):
+    """定时预订：选择日期、放号时间与目标时段，到点后自动抢订。"""
+
+    def __init__(self, advanceday: int, prefill: list[tuple[str, str | None]], parent=None):
+        super().__init__(parent=parent)
+        self.titleLabel = SubtitleLabel(self.tr("定时预订"), self)
+        self.viewLayout.addWidget(self.titleLabel)
+
+        self.viewLayout.addWidget(StrongBodyLabel(self.tr("预订日期"), self))
+        self.dateCombo = ComboBox(self)
+        today = date.today()
+        # 比日期栏多一天：放号当天才开放的日期
+        for i in range(max(1, min(int(advanceday), 14)) + 1):
+            d = today + timedelta(days=i)
+            self.dateCombo.addItem(d.isoformat(), userData=d.isoformat())
+        self.dateCombo.setCurrentIndex(self.dateCombo.count() - 1)
+        self.viewLayout.addWidget(self.dateCombo)
+
+        self.viewLayout.addWidget(StrongBodyLabel(self.tr("放号时间"), self))
+        self.timePicker = TimePicker(self)
+        now = QTime.currentTime()
+        self.timePicker.setTime(QTime((now.hour() + 1) % 24, 0))
+        self.viewLayout.addWidget(self.timePicker)
+
+        self.viewLayout.addWidget(StrongBodyLabel(self.tr("目标时段"), self))
+        self.wantedEdit = LineEdit(self)
+        self.wantedEdit.setPlaceholderText(self.tr("如 18:30-19:30 场地1, 19:30-20:30"))
+        self.wantedEdit.setText(", ".join(
+            f"{time_slot} {area}" if area else time_slot for time_slot, area in prefill))
+        self.viewLayout.addWidget(self.wantedEdit)
+        hint = CaptionLabel(self.tr(
+            "多个时段用逗号分隔，时段后可跟场地名，不填场地则任选可订场地。\n"
+            "放号前会提前识别验证码，请保持程序运行。"), self)
+        hint.setWordWrap(True)
+        self.viewLayout.addWidget(hint)
+
+        self.yesButton.setText(self.tr("开始等待"))
+        self.cancelButton.setText(self.tr("取消"))
+        self.widget.setMinimumWidth(420)
+
+    @staticmethod
+    def parse_wanted(text: str) -> list[tuple[str, str | None]]:
+        """解析目标时段，如 ``"18:30-19:30 场地1, 19:30-20:30"``。"""
+        wanted = []
+        for entry in re.split(r"[,，;；\n]", text):
+            parts = entry.split(maxsplit=1)
+            if parts:
+                wanted.append((parts[0], parts[1].strip() if len(parts) > 1 else None))
+        return wanted
+
+    def wanted(self) -> list[tuple[str, str | None]]:
+        return self.parse_wanted(self.wantedEdit.text())
+
+    def dateString(self) -> str:
+        return self.dateCombo.currentData()
+
+    def releaseAt(self) -> datetime:
+        """放号时刻：所选时间的下一次出现（今天已过则为明天）。"""
+        picked = self.timePicker.time
+        now = datetime.now()
+        release = now.replace(hour=picked.hour(), minute=picked.minute(), second=0, microsecond=0)
+        return release if release > now else release + timedelta(days=1)
+
+    def validate(self) -> bool:
+        return bool(self.wanted())
+
+
+# ============================= 查找空闲场地对话框 =============================
+
+class FreeSlotDialog(MessageBoxBase):
+    """查找空闲场地：按关键字、日期和时间段，一次查询所有场馆。"""
+
+    # (名称, 开始时间不早于, 开始时间早于)
+    PERIODS = (("任意时间", None, None), ("上午", None, "12:00"),
+               ("下午", "12:00", "18:00"), ("晚上", "18:00", None))
+
+    def __init__(self, days: int, parent=None):
+        super().__init__(parent=parent)
+        self.titleLabel = SubtitleLabel(self.tr("查找空闲场地"), self)
+        self.viewLayout.addWidget(self.titleLabel)
+
+        self.keywordEdit = LineEdit(self)
+        self.keywordEdit.setPlaceholderText(self.tr("场馆或场地关键字，如 羽毛球（可不填）"))
+        self.viewLayout.addWidget(self.keywordEdit)
+
+        self.dateCombo = ComboBox(self)
+        self.dateCombo.addItem(self.tr("未来 {0} 天").format(days), userData=None)
+        today = date.today()
+        for i in range(days):
+            d = today + timedelta(days=i)
+            label = self.tr("今天") if i == 0 else (self.tr("明天") if i == 1 else d.isoformat())
+            self.dateCombo.addItem(label, userData=d.isoformat())
+        self.viewLayout.addWidget(self.dateCombo)
+
+        self.periodCombo = ComboBox(self)
+        for name, _, _ in self.PERIODS:
+            self.periodCombo.addItem(self.tr(name))
+        self.viewLayout.addWidget(self.periodCombo)
+
+        self.yesButton.setText(self.tr("查找"))
+        self.cancelButton.setText(self.tr("取消"))
+        self.widget.setMinimumWidth(380)
+        self._days = days
+
+    def keyword(self) -> str:
+        return self.keywordEdit.text().strip()
+
+    def dates(self) -> list[str]:
+        picked = self.dateCombo.currentData()
+        if picked:
+            return [picked]
+        today = date.today()
+        return [(today + timedelta(days=i)).isoformat() for i in range(self._days)]
+
+    def period(self) -> tuple[str | None, str | None]:
+        _, start_after, start_before = self.PERIODS[self.periodCombo.currentIndex()]
+        return start_after, start_before
+
+
 # ============================= 主界面 =============================
 
 class VenueInterface(ScrollArea):
@@ -348,8 +470,17 @@ class VenueInterface(ScrollArea):
         self.vpLayout.setSpacing(10)
         self.vpLayout.setAlignment(Qt.AlignTop)
 
-        self.venueSection = StrongBodyLabel(self.tr("场馆"), self.venuePage)
-        self.vpLayout.addWidget(self.venueSection)
+        venueBar = QFrame(self.venuePage)
+        vb = QHBoxLayout(venueBar)
+        vb.setContentsMargins(0, 0, 0, 0)
+        self.venueSection = StrongBodyLabel(self.tr("场馆"), venueBar)
+        vb.addWidget(self.venueSection)
+        vb.addStretch(1)
+        # 一次查询所有场馆的空闲时段，不必逐个点开
+        self.scanBtn = PushButton(FluentIcon.SEARCH, self.tr("  查找空闲场地"), venueBar)
+        self.scanBtn.clicked.connect(self._onScanClicked)
+        vb.addWidget(self.scanBtn)
+        self.vpLayout.addWidget(venueBar)
 
         self.venueHost = QWidget(self.venuePage)
         self.venueFlow = FlowLayout(self.venueHost, needAni=False)
@@ -404,12 +535,22 @@ class VenueInterface(ScrollArea):
         self.slotTable.verticalHeader().setVisible(True)
         self.spLayout.addWidget(self.slotTable)
 
-        # 预订按钮
-        self.bookBtn = PrimaryPushButton(FluentIcon.SHOPPING_CART, self.tr("  预订"), self.slotPage)
+        # 预订按钮 / 定时预订按钮（未开放预订时也可使用）
+        bookBar = QFrame(self.slotPage)
+        bb = QHBoxLayout(bookBar)
+        bb.setContentsMargins(0, 0, 0, 0)
+        bb.setSpacing(12)
+        self.bookBtn = PrimaryPushButton(FluentIcon.SHOPPING_CART, self.tr("  预订"), bookBar)
         self.bookBtn.setFixedWidth(120)
         self.bookBtn.setVisible(False)
         self.bookBtn.clicked.connect(self._onBookClicked)
-        self.spLayout.addWidget(self.bookBtn)
+        bb.addWidget(self.bookBtn)
+        self.rushBtn = PushButton(FluentIcon.STOP_WATCH, self.tr("  定时预订"), bookBar)
+        self.rushBtn.setFixedWidth(140)
+        self.rushBtn.clicked.connect(self._onRushClicked)
+        bb.addWidget(self.rushBtn)
+        bb.addStretch(1)
+        self.spLayout.addWidget(bookBar)
 
         # 时段页错误重试（统一工厂）
         self.slotFailFrame, self.slotRetryBtn = create_retry_frame(
@@ -439,8 +580,9 @@ class VenueInterface(ScrollArea):
         self.thread_ = VenueThread(self)
         self._connectThreadSignals()
 
+        # 定时预订可能等待较久，允许取消
         self.processWidget = ProcessWidget(
-            self.thread_, self.view, stoppable=False, hide_on_end=True)
+            self.thread_, self.view, stoppable=True, hide_on_end=True)
         self.processWidget.setVisible(False)
         # 放在 stackHost 外层，体育场馆 / 我的订单两个 Tab 都能显示进度条
         self.vBoxLayout.insertWidget(
@@ -485,12 +627,16 @@ class VenueInterface(ScrollArea):
         self.thread_.load_slots(self._selected_id, dt)
 
     def _lock(self):
+        self.scanBtn.setEnabled(False)
+        self.rushBtn.setEnabled(False)
         self.returnButton.setEnabled(False)
         self.dateCombo.setEnabled(False)
         self.startPage.setInteractionEnabled(False)
 
     def _unlock(self):
         # 恢复后按面包屑根节点重新计算返回按钮状态
+        self.scanBtn.setEnabled(True)
+        self.rushBtn.setEnabled(True)
         self.dateCombo.setEnabled(True)
         self.startPage.setInteractionEnabled(True)
         self._updateReturnButtonState()
@@ -758,6 +904,68 @@ class VenueInterface(ScrollArea):
             self.processWidget.setVisible(False)
             self.error(self.tr("操作进行中"), self.tr("请等待当前操作完成"))
 
+    def _onRushClicked(self):
+        """定时预订：到放号时间后自动查询并抢订目标时段。"""
+        venue = next((v for v in self._venues if str(v.id) == str(self._selected_id)), None)
+        prefill = [(s.time_slot, s.area_name) for s in self._selected_slots()]
+        dialog = RushDialog(venue.advanceday if venue else 7, prefill, self.window())
+        if not dialog.exec_():
+            return
+        wanted = dialog.wanted()[:max(self._advancenum, 1)]
+        release = dialog.releaseAt()
+
+        self.bookBtn.setVisible(False)
+        self.processWidget.setVisible(True)
+        self._lock()
+        if not self.thread_.do_rush(self._selected_id, dialog.dateString(), wanted, release.timestamp()):
+            self._unlock()
+            self.processWidget.setVisible(False)
+            self.error(self.tr("操作进行中"), self.tr("请等待当前操作完成"))
+            return
+        self.success(self.tr("已开始等待"), self.tr("将在 {0} 抢订 {1} 个时段").format(
+            release.strftime("%m-%d %H:%M"), len(wanted)))
+
+    # ======================== 查找空闲场地 ========================
+
+    def _onScanClicked(self):
+        if not self._venues:
+            self.error(self.tr("暂无场馆"), self.tr("请先查询场馆"))
+            return
+        days = max(1, min(max(v.advanceday for v in self._venues), 14))
+        dialog = FreeSlotDialog(days, self.window())
+        if not dialog.exec_():
+            return
+        keyword = dialog.keyword()
+        # 关键字命中场馆名时只扫描这些场馆，否则按场地名在所有场馆中查找
+        named = [v for v in self._venues if keyword and keyword in v.name]
+        area_keyword = "" if named else keyword
+        start_after, start_before = dialog.period()
+        self.processWidget.setVisible(True)
+        self._lock()
+        if not self.thread_.do_scan(named or self._venues, dialog.dates(), area_keyword,
+                                    start_after, start_before):
+            self._unlock()
+            self.processWidget.setVisible(False)
+            self.error(self.tr("操作进行中"), self.tr("请等待当前操作完成"))
+
+    def _onScanFinished(self, matches: list, changes: list):
+        self.processWidget.setVisible(False)
+        if not matches:
+            self.warning(self.tr("没有空闲场地"), self.tr("所选日期和时间段内没有可预订的场地"))
+            return
+        limit = 30
+        lines = [self.tr("{0}  {1}  {2}  {3}  ¥{4:.0f}").format(
+            slot.date, slot.time_slot, venue.name, slot.area_name, slot.price)
+            for venue, slot in matches[:limit]]
+        if len(matches) > limit:
+            lines.append(self.tr("……共 {0} 个空闲时段").format(len(matches)))
+        opened = sum(1 for change in changes if change.kind == "opened"
+                     and any(change.slot is slot for _, slot in matches))
+        title = self.tr("找到 {0} 个空闲时段").format(len(matches))
+        if opened:
+            title += self.tr("（比上次查询新增 {0} 个）").format(opened)
+        MessageBox(title, "\n".join(lines), self.window()).exec_()
+
     def _onBookingResult(self, success: bool, msg: str, info=None):
         self._unlock()
         self.processWidget.setVisible(False)
@@ -1048,6 +1256,7 @@ class VenueInterface(ScrollArea):
         self.thread_.ordersLoaded.connect(self._onOrdersLoaded)
         self.thread_.orderCanceled.connect(self._onOrderCanceled)
         self.thread_.bookingResult.connect(self._onBookingResult)
+        self.thread_.scanFinished.connect(self._onScanFinished)
         self.thread_.error.connect(self._onThreadError)
         self.thread_.finished.connect(self._onThreadFinished)
 
@@ -1055,7 +1264,7 @@ class VenueInterface(ScrollArea):
         """账号切换时安全停止后台线程，并重连信号避免旧信号干扰新账号。"""
         for sig in (self.thread_.venuesLoaded, self.thread_.slotsLoaded,
                     self.thread_.ordersLoaded, self.thread_.orderCanceled,
-                    self.thread_.bookingResult, self.thread_.error,
+                    self.thread_.bookingResult, self.thread_.scanFinished, self.thread_.error,
                     self.thread_.finished):
             try:
                 sig.disconnect()
@@ -1079,6 +1288,7 @@ class VenueInterface(ScrollArea):
         self._venuePageCached = False
         self._clearContainer()
         self._cleanupThread()
+        self.thread_.clear_scan_index()
         self.slotTable.setRowCount(0)
         self.slotTable.setColumnCount(0)
         self.switchPage(self.startPage)
@@ -49,12 +49,16 @@ from app.VenueInterface import VenueInterface
 from .sub_interfaces.NoticeInterface import NoticeInterface
 from .sub_interfaces.NoticeSettingInterface import NoticeSettingInterface
 from .sub_interfaces.WebVPNConvertInterface import WebVPNConvertInterface
+from .threads.LoginWarmUpThread import LoginWarmUpThread
 from .threads.SessionKeepAliveThread import SessionKeepAliveThread
 from .threads.UpdateThread import UpdateThread, UpdateStatus
 from .utils import cfg, accounts, MyFluentIcon, SessionManager, logger, migrate_all, QtMFAProvider, MFAAction, \
     MFAActionType, MFARequest, QtQRCodeLoginProvider, QRCodeLoginAction, QRCodeLoginActionType, QRCodeLoginRequest
 from .utils.config import TraySetting
 
+# 后台 Session 保活计时器检查到期站点的间隔
+SESSION_KEEP_ALIVE_TICK_MS = 60 * 1000
+
 
 def registerSession():
     """
@@ -119,6 +123,9 @@ class MainWindow(MSFluentWindow):
         self._install_mfa_provider_for_accounts()
         accounts.accountAdded.connect(self._install_mfa_provider_for_accounts)
         QTimer.singleShot(1500, self._start_access_probe_for_current_account)
+        self.login_warm_up_thread: LoginWarmUpThread | None = None
+        self._login_warm_up_pending = False
+        QTimer.singleShot(1500, self._start_login_warm_up)
 
         self.light_icon = QIcon("assets/icons/toolbox_light.png")
         self.dark_icon = QIcon("assets/icons/toolbox_dark.png")
@@ -173,6 +180,7 @@ class MainWindow(MSFluentWindow):
 
         accounts.currentAccountChanged.connect(self.on_avatar_update)
         accounts.currentAccountChanged.connect(self._start_access_probe_for_current_account)
+        accounts.currentAccountChanged.connect(self._start_login_warm_up)
         self.account_interface.avatarChanged.connect(self.on_avatar_update)
         self.on_avatar_update()
 
@@ -246,6 +254,37 @@ class MainWindow(MSFluentWindow):
             return
         accounts.current.session_manager.start_background_access_probe()
 
+    @pyqtSlot()
+    def _start_login_warm_up(self) -> None:
+        """
+        如果用户开启了登录预热，在后台并发登录当前账户常用的校内系统。
+        二维码登录需要用户扫码，无法在后台完成，因此开启二维码登录时不预热。
+        """
+        if not cfg.loginWarmUpEnabled.value or cfg.enableQRCodeLogin.value:
+            return
+        if self.login_warm_up_thread is not None:
+            # 切换账户时停止为旧账户继续预热，等它结束后再为新账户预热
+            self.login_warm_up_thread.cancel()
+            self._login_warm_up_pending = True
+            return
+        if accounts.current is None:
+            return
+
+        thread = LoginWarmUpThread(accounts.current, self)
+        self.login_warm_up_thread = thread
+        thread.finished.connect(lambda current_thread=thread: self._on_login_warm_up_finished(current_thread))
+        thread.start()
+
+    @pyqtSlot(object)
+    def _on_login_warm_up_finished(self, thread: LoginWarmUpThread) -> None:
+        """在后台登录预热线程结束后清理线程对象。"""
+        if self.login_warm_up_thread is thread:
+            self.login_warm_up_thread = None
+        thread.deleteLater()
+        if self._login_warm_up_pending:
+            self._login_warm_up_pending = False
+            self._start_login_warm_up()
+
     @pyqtSlot(object)
     def show_mfa_dialog(self, request: object) -> None:
         """
@@ -473,16 +512,25 @@ class MainWindow(MSFluentWindow):
             timer.start(60 * 1000)
 
     def _session_keep_alive_interval_ms(self) -> int:
-        """返回后台 Session 保活计时器的毫秒间隔。"""
+        """返回每个站点后台保活的毫秒间隔。"""
         return int(cfg.sessionKeepAliveInterval.value.value) * 60 * 1000
 
+    def _session_keep_alive_tick_ms(self) -> int:
+        """
+        返回后台 Session 保活计时器的毫秒间隔。
+        计时器只负责定期检查，每个站点按照自己带抖动的保活时间被单独保活，因此检查频率高于保活间隔。
+        """
+        return min(SESSION_KEEP_ALIVE_TICK_MS, self._session_keep_alive_interval_ms())
+
     @pyqtSlot()
     def _restart_session_keep_alive_timer(self) -> None:
         """按照当前设置重启后台 Session 保活计时器。"""
         if not cfg.sessionKeepAliveEnabled.value:
             self.session_keep_alive_timer.stop()
             return
-        self.session_keep_alive_timer.start(self._session_keep_alive_interval_ms())
+        if accounts.current is not None:
+            accounts.current.session_manager.reset_keep_alive_schedule()
+        self.session_keep_alive_timer.start(self._session_keep_alive_tick_ms())
 
     @pyqtSlot()
     def _start_session_keep_alive(self) -> None:
@@ -497,7 +545,7 @@ class MainWindow(MSFluentWindow):
         if accounts.current is None:
             return
 
-        thread = SessionKeepAliveThread(accounts.current, self)
+        thread = SessionKeepAliveThread(accounts.current, self._session_keep_alive_interval_ms() / 1000, self)
         self.session_keep_alive_thread = thread
         thread.finished.connect(lambda current_thread=thread: self._on_session_keep_alive_finished(current_thread))
         thread.start()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 import threading
 import time
 import enum
@@ -14,8 +15,11 @@ from typing import TYPE_CHECKING, cast
 import requests
 import requests.structures
 
-from auth import NewLogin, QRCodeLoginMixin, ServerError, is_safety_verify_page
+from auth import NewLogin, QRCodeLoginMixin, ServerError, getUrlOrigin, getVPNUrl, is_safety_verify_page
+from .login_coordinator import LoginCoordinator
 from .session_backend import AccessMode, SessionBackend
+from .tracing import RequestTrace, RequestTracer, normalize_endpoint, request_tracer
+from .transport import take_connect_time
 
 if TYPE_CHECKING:
     from app.utils.account import Account
@@ -25,6 +29,17 @@ if TYPE_CHECKING:
     from app.utils.session_persistence import SiteSnapshot
 
 
+@functools.lru_cache(maxsize=256)
+def _should_rewrite_origin_to_webvpn(origin: str) -> bool:
+    parsed = urlparse(origin)
+    if parsed.scheme not in ("http", "https") or not parsed.netloc:
+        return False
+    hostname = parsed.hostname or ""
+    if hostname == "webvpn.xjtu.edu.cn":
+        return False
+    return hostname == "xjtu.edu.cn" or hostname.endswith(".xjtu.edu.cn")
+
+
 @dataclass(frozen=True)
 class LoginContext:
     """
@@ -64,6 +79,12 @@ class CommonLoginSession(metaclass=ABCMeta):
     supports_webvpn = False
     # 自动检测为校外网络时，当前站点是否需要通过 WebVPN 访问。
     use_webvpn_when_off_campus = True
+    # 从持久化快照恢复的登录态，如果在这么多秒内验证过，则直接信任而不再发送验证请求；为 0 时不启用。
+    # 只有登录态失效时业务请求会返回统一认证页面（能被 is_auth_failure_response 识别）的站点才应当启用，
+    # 这样失效的登录态会在第一次业务请求时被发现，并由 _retry_request_after_auth_failure 重新登录。
+    trusted_restore_window = 0.0
+    # 记录请求耗时的记录器，为 None 时不记录
+    tracer: RequestTracer | None = request_tracer
 
     def __init__(self, backend: SessionBackend | None = None, site_key: str | None = None,
                  timeout: int = 15 * 60) -> None:
@@ -82,17 +103,33 @@ class CommonLoginSession(metaclass=ABCMeta):
         # 是否已经登录
         self._has_login = False
         self._restored_auth_candidate = False
+        # 站点登录态最近一次通过验证的时间
+        self._last_validated_at = 0.0
         self._login_context: LoginContext | None = None
-        self._login_depth = 0
+        # 按线程记录登录流程的嵌套层数：登录流程内的请求不做登录态失效判断，但不应影响其他线程同时发出的业务请求
+        self._login_state = threading.local()
+        # 每次登录成功后加一，用于判断请求发出后是否已经有其他线程重新登录过
+        self._login_generation = 0
         self.session_manager: SessionManager | None = None
         # 自身防止同时登录的锁
         self.login_lock = threading.RLock()
+        # 合并多个线程同时发起的 ensure_login
+        self.login_coordinator = LoginCoordinator()
 
     @property
     def access_mode(self) -> AccessMode:
         """返回当前适配器正在使用的访问方式。"""
         return self.backend.access_mode
 
+    @property
+    def _login_depth(self) -> int:
+        """当前线程正在执行的登录流程层数。"""
+        return getattr(self._login_state, "depth", 0)
+
+    @_login_depth.setter
+    def _login_depth(self, value: int) -> None:
+        self._login_state.depth = value
+
     @property
     def cookies(self) -> CookieJar:
         """返回当前访问方式共享的 cookie jar。"""
@@ -140,9 +177,29 @@ class CommonLoginSession(metaclass=ABCMeta):
         :param kwargs: 传递给具体登录实现的上下文参数
         :return: 如果本次执行了登录流程则返回 True，否则返回 False
         """
+        # 多个线程同时确保同一站点登录时，只由第一个线程验证或登录，其他线程等待并共享它的结果。
+        # 只有交互方式相同的调用才能合并，避免界面发起的登录共享后台非交互登录的失败结果
+        key = self._login_flight_key(force, preferred_access_mode, allow_qrcode_login, kwargs)
+        return self.login_coordinator.run(key, lambda: self._ensure_login(
+            username, password, force=force, preferred_access_mode=preferred_access_mode,
+            allow_qrcode_login=allow_qrcode_login, **kwargs))
+
+    @staticmethod
+    def _login_flight_key(force: bool, preferred_access_mode: AccessMode | None, allow_qrcode_login: bool,
+                          kwargs: Mapping[str, object]) -> tuple[object, ...]:
+        """返回判断两次 ensure_login 能否合并的键。"""
+        return force, preferred_access_mode, allow_qrcode_login, id(kwargs.get("mfa_provider"))
+
+    def _ensure_login(self, username: str, password: str, *, force: bool,
+                      preferred_access_mode: AccessMode | None, allow_qrcode_login: bool,
+                      **kwargs: object) -> bool:
+        """ensure_login 的实际实现。"""
         with self.login_lock:
             self._remember_login_context(username, password, kwargs, allow_qrcode_login)
             self.choose_backend(preferred=preferred_access_mode, **kwargs)
+            if not force and self.has_login and self.is_trusted_restore():
+                # 登录态最近验证过，跳过验证请求；如果它其实已经失效，第一次业务请求会触发重新登录
+                return False
             if not force and self.has_login and self.validate_login():
                 self.mark_login_validated()
                 return False
@@ -183,6 +240,7 @@ class CommonLoginSession(metaclass=ABCMeta):
         request_headers = kwargs.pop("headers", None)
         skip_auth_check = kwargs.pop("_skip_auth_check", False) is True
         skip_webvpn_rewrite = kwargs.pop("_skip_webvpn_rewrite", False) is True
+        auth_retry = kwargs.pop("_auth_retry", False) is True
         headers: dict[str, str] = {}
         # 使用公用 headers
         headers.update(self.backend.session.headers)
@@ -196,12 +254,66 @@ class CommonLoginSession(metaclass=ABCMeta):
 
         prepared_url = self.prepare_url_for_access_mode(url, skip_webvpn_rewrite=skip_webvpn_rewrite)
         prepared_headers = self.prepare_headers_for_access_mode(headers, skip_webvpn_rewrite=skip_webvpn_rewrite)
-        response = self.backend.session.request(method, prepared_url, headers=prepared_headers, **kwargs)
-        if skip_auth_check or self._login_depth > 0 or not self.is_auth_failure_response(response):
+        login_generation = self._login_generation
+        started_at = time.time()
+        started = time.perf_counter()
+        take_connect_time()
+        try:
+            response = self.backend.session.request(method, prepared_url, headers=prepared_headers, **kwargs)
+        except Exception as e:
+            self._record_trace(method, url, None, started_at, time.perf_counter() - started,
+                               auth_retry=auth_retry, error=e)
+            raise
+        total = time.perf_counter() - started
+        # 判断登录态时可能会读取流式请求的响应体，因此在此之前记录响应体是否已经下载
+        body_loaded = response._content_consumed
+        auth_failed = not skip_auth_check and self._login_depth == 0 and self.is_auth_failure_response(response)
+        self._record_trace(method, url, response, started_at, total, body_loaded=body_loaded,
+                           auth_failed=auth_failed, auth_retry=auth_retry)
+        if not auth_failed:
             return response
 
-        self.invalidate_login()
-        return self._retry_request_after_auth_failure(method, url, request_headers, kwargs)
+        return self._retry_request_after_auth_failure(method, url, request_headers, kwargs,
+                                                      login_generation=login_generation)
+
+    def _record_trace(self, method: str, url: str, response: requests.Response | None, started_at: float,
+                      total: float, *, body_loaded: bool = False, auth_failed: bool = False,
+                      auth_retry: bool = False, error: BaseException | None = None) -> None:
+        """把一次请求的耗时与结果记录到 tracer。"""
+        if self.tracer is None or not self.tracer.enabled:
+            return
+        connect = take_connect_time()
+        status = None
+        size = 0
+        ttfb = total - connect
+        body = 0.0
+        if response is not None:
+            status = response.status_code
+            # requests 在收到响应头时记录 elapsed；非流式请求此时已经读完响应体
+            headers_elapsed = min(response.elapsed.total_seconds(), total)
+            ttfb = max(headers_elapsed - connect, 0.0)
+            if body_loaded and isinstance(response._content, bytes):
+                size = len(response._content)
+                body = total - headers_elapsed
+            else:
+                length = response.headers.get("Content-Length", "")
+                size = int(length) if length.isdigit() else 0
+        self.tracer.record(RequestTrace(
+            site=self.site_key,
+            method=method.upper(),
+            endpoint=normalize_endpoint(url),
+            access_mode=self.access_mode.value,
+            status=status,
+            bytes=size,
+            started_at=started_at,
+            total=total,
+            connect=connect,
+            ttfb=ttfb,
+            body=body,
+            auth_failed=auth_failed,
+            auth_retry=auth_retry,
+            error=None if error is None else type(error).__name__,
+        ))
 
     def get(self, url: str, **kwargs: object) -> requests.Response:
         """发起 GET 请求。"""
@@ -233,9 +345,6 @@ class CommonLoginSession(metaclass=ABCMeta):
             return url
         if not self._should_rewrite_to_webvpn(url):
             return url
-
-        from auth import getVPNUrl
-
         return getVPNUrl(url)
 
     def prepare_headers_for_access_mode(self, headers: dict[str, str], *,
@@ -247,8 +356,6 @@ class CommonLoginSession(metaclass=ABCMeta):
         prepared = dict(headers)
         referer = prepared.get("Referer") or prepared.get("referer")
         if referer is not None and self._should_rewrite_to_webvpn(referer):
-            from auth import getVPNUrl
-
             rewritten = getVPNUrl(referer)
             if "Referer" in prepared:
                 prepared["Referer"] = rewritten
@@ -260,6 +367,7 @@ class CommonLoginSession(metaclass=ABCMeta):
         """清理当前站点适配器状态，不清理共享 cookie。"""
         self._has_login = False
         self._restored_auth_candidate = False
+        self._last_validated_at = 0.0
         self.headers.clear()
 
     def invalidate_login(self) -> None:
@@ -314,6 +422,7 @@ class CommonLoginSession(metaclass=ABCMeta):
             access_mode=self.access_mode.value,
             headers={str(key): str(value) for key, value in self.headers.items()},
             saved_at=time.time(),
+            last_validated_at=self._last_validated_at,
         )
 
     def restore_site_snapshot(self, snapshot: SiteSnapshot) -> None:
@@ -330,12 +439,27 @@ class CommonLoginSession(metaclass=ABCMeta):
         self.headers.update(snapshot.headers)
         self._has_login = True
         self._restored_auth_candidate = True
+        self._last_validated_at = snapshot.last_validated_at
         self.reset_timeout()
 
+    def is_trusted_restore(self) -> bool:
+        """
+        判断当前登录态是否是可以直接信任的恢复态：站点启用了 trusted_restore_window，
+        登录态来自持久化快照，且在窗口期内验证过。
+        """
+        from app.utils.config import cfg
+
+        if not cfg.trustedSessionRestore.value or self.trusted_restore_window <= 0:
+            return False
+        if not self._restored_auth_candidate or self._last_validated_at <= 0:
+            return False
+        return 0 <= time.time() - self._last_validated_at < self.trusted_restore_window
+
     def mark_login_validated(self) -> None:
         """将当前站点适配器标记为已经验证的登录态。"""
         self._has_login = True
         self._restored_auth_candidate = False
+        self._last_validated_at = time.time()
         self.reset_timeout()
         self.backend.mark_login_validated()
 
@@ -357,13 +481,8 @@ class CommonLoginSession(metaclass=ABCMeta):
     @staticmethod
     def _should_rewrite_to_webvpn(url: str) -> bool:
         """判断 URL 是否应当被改写为 WebVPN 地址。"""
-        parsed = urlparse(url)
-        if parsed.scheme not in ("http", "https") or not parsed.netloc:
-            return False
-        hostname = parsed.hostname or ""
-        if hostname == "webvpn.xjtu.edu.cn":
-            return False
-        return hostname == "xjtu.edu.cn" or hostname.endswith(".xjtu.edu.cn")
+        # 判断结果只取决于协议和主机，按 URL 前缀缓存，避免每次请求都完整解析 URL
+        return _should_rewrite_origin_to_webvpn(getUrlOrigin(url))
 
     def get_login_context(self, kwargs: dict[str, object]) -> tuple[Account | None, MFAProvider | None]:
         """
@@ -456,6 +575,20 @@ class CommonLoginSession(metaclass=ABCMeta):
         page = response.text
         return is_safety_verify_page(page) or self._is_unified_login_page(page)
 
+    def update_login_context(self, username: str, password: str, kwargs: Mapping[str, object],
+                             allow_qrcode_login: bool, *,
+                             only_if: Callable[[LoginContext], bool] | None = None) -> bool:
+        """
+        在登录流程之外修改保存的登录上下文（例如登录预热结束后换回可交互的上下文）。在 login_lock 下进行，不会与登录交错。
+        :param only_if: 只有当前保存的上下文满足此条件时才替换，避免覆盖其他线程在此期间登录时保存的上下文
+        :return: 是否替换了上下文
+        """
+        with self.login_lock:
+            if only_if is not None and (self._login_context is None or not only_if(self._login_context)):
+                return False
+            self._remember_login_context(username, password, kwargs, allow_qrcode_login)
+            return True
+
     def _remember_login_context(self, username: str, password: str, kwargs: Mapping[str, object],
                                 allow_qrcode_login: bool) -> None:
         """保存最近一次登录上下文，供响应兜底恢复使用。"""
@@ -510,6 +643,7 @@ class CommonLoginSession(metaclass=ABCMeta):
         self._login_depth += 1
         try:
             self._login(username, password, **kwargs)
+            self._login_generation += 1
         finally:
             self._login_depth -= 1
 
@@ -518,6 +652,7 @@ class CommonLoginSession(metaclass=ABCMeta):
         self._login_depth += 1
         try:
             self._re_login(username, password, **kwargs)
+            self._login_generation += 1
         finally:
             self._login_depth -= 1
 
@@ -526,11 +661,15 @@ class CommonLoginSession(metaclass=ABCMeta):
             method: str,
             url: str,
             request_headers: object,
-            request_kwargs: dict[str, object]) -> requests.Response:
+            request_kwargs: dict[str, object],
+            *,
+            login_generation: int | None = None) -> requests.Response:
         """
         在业务请求遇到二次认证页后，尝试重新登录并重放本次请求。
+        :param login_generation: 发出请求时的登录次数。如果此后已经有其他线程重新登录过，直接使用新的登录态重放请求
         """
         if self._login_context is None:
+            self.invalidate_login()
             raise ServerError(102, "当前业务系统登录态已失效，需要重新登录。")
 
         context = self._login_context
@@ -539,24 +678,37 @@ class CommonLoginSession(metaclass=ABCMeta):
         # 理论上不会出现登录态被误用到其他账号的情况，但这里多加一个检查以防万一
         self._ensure_login_context_matches_current_account(context)
         # 尝试重新使用 context 静默登录
-        self.ensure_login(
-            context.username,
-            context.password,
-            force=True,
-            allow_qrcode_login=context.allow_qrcode_login,
-            **dict(context.kwargs),
-        )
+        self._relogin_after_auth_failure(context, login_generation)
 
         retry_kwargs = dict(request_kwargs)
         if request_headers is not None:
             retry_kwargs["headers"] = request_headers
         retry_kwargs["_skip_auth_check"] = True
+        retry_kwargs["_auth_retry"] = True
         retry_response = self.request(method, url, **retry_kwargs)
         if self.is_auth_failure_response(retry_response):
             self.invalidate_login()
             raise ServerError(102, "当前业务系统登录态已失效，需要重新进行安全验证。")
         return retry_response
 
+    def _relogin_after_auth_failure(self, context: LoginContext, login_generation: int | None) -> None:
+        """
+        使用登录上下文强制重新登录。多个线程的请求同时发现登录态失效时只会重新登录一次：
+        登录进行中到达的线程共享这次登录的结果，登录完成后才到达的线程发现登录次数已经变化，不再重复登录。
+        """
+        kwargs = dict(context.kwargs)
+
+        def relogin() -> bool:
+            with self.login_lock:
+                if login_generation is not None and self._login_generation != login_generation:
+                    return False
+                return self._ensure_login(context.username, context.password, force=True,
+                                          preferred_access_mode=None,
+                                          allow_qrcode_login=context.allow_qrcode_login, **kwargs)
+
+        key = self._login_flight_key(True, None, context.allow_qrcode_login, kwargs)
+        self.login_coordinator.run(key, relogin)
+
     def close(self) -> None:
         """关闭当前适配器使用的共享后端。"""
         self.backend.close()
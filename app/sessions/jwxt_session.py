@@ -15,6 +15,7 @@ class JWXTSession(CommonLoginSession):
     site_key = "jwxt"
     site_name = "本科教务系统"
     supports_webvpn = True
+    trusted_restore_window = 10 * 60
     use_webvpn_when_off_campus = False
 
     def _login(self, username: str, password: str, **kwargs: object) -> None:
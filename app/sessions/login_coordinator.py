@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Hashable
+import threading
+from typing import TypeVar
+
+
+T = TypeVar("T")
+
+
+class _LoginFlight:
+    """一次正在进行的登录操作。"""
+
+    def __init__(self) -> None:
+        self.owner = threading.get_ident()
+        self.done = threading.Event()
+        self.result: object = None
+        self.error: BaseException | None = None
+
+
+class LoginCoordinator:
+    """
+    把同一个 key 上并发发起的登录操作合并为一次（single-flight）。
+    第一个调用者执行登录，登录期间到达的其他调用者等待它完成并共享同一个结果：
+    登录成功时返回相同的返回值，登录失败时抛出相同的异常，避免多个线程重复登录，
+    或者在密码错误时连续多次提交同一个错误密码。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: dict[Hashable, _LoginFlight] = {}
+        # 实际执行的登录次数
+        self.started = 0
+        # 等待并共享了其他线程登录结果的次数
+        self.coalesced = 0
+
+    def run(self, key: Hashable, operation: Callable[[], T]) -> T:
+        """
+        执行 key 对应的登录操作；如果已有相同 key 的登录正在进行，则等待并返回它的结果。
+        :param key: 判断两次登录是否可以合并的键
+        :param operation: 实际执行登录的函数
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and flight.owner == threading.get_ident():
+                # 登录过程中同一线程再次进入（例如登录流程内部又调用了 ensure_login），直接执行，避免等待自己
+                flight = None
+                leader = None
+            elif flight is None:
+                leader = flight = self._flights[key] = _LoginFlight()
+                self.started += 1
+            else:
+                leader = None
+                self.coalesced += 1
+
+        if flight is None:
+            return operation()
+
+        if leader is None:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result  # type: ignore[return-value]
+
+        try:
+            flight.result = operation()
+            return flight.result  # type: ignore[return-value]
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def in_flight(self, key: Hashable) -> bool:
+        """判断 key 对应的登录是否正在进行。"""
+        with self._lock:
+            return key in self._flights
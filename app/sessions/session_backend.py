@@ -8,6 +8,9 @@ from typing import TYPE_CHECKING
 
 import requests
 
+from .login_coordinator import LoginCoordinator
+from .transport import SessionTransport, TransportConfig
+
 if TYPE_CHECKING:
     from app.utils.session_persistence import BackendSnapshot
 
@@ -22,12 +25,20 @@ class AccessMode(enum.Enum):
 class SessionBackend:
     """同一账号、同一访问方式下共享的底层请求后端。"""
 
-    def __init__(self, access_mode: AccessMode, timeout: int = 15 * 60) -> None:
-        """创建一个共享请求后端。"""
+    def __init__(self, access_mode: AccessMode, timeout: int = 15 * 60,
+                 transport_config: TransportConfig | None = None) -> None:
+        """
+        创建一个共享请求后端。
+        :param access_mode: 访问方式
+        :param timeout: 本地登录态超时时间（秒）
+        :param transport_config: 底层连接池与重试策略配置，为 None 时使用默认配置
+        """
         from app.utils.config import cfg
 
         self.access_mode = access_mode
         self.session = requests.Session()
+        self.transport = SessionTransport(transport_config)
+        self.transport.mount(self.session)
         self.session.cookies = LWPCookieJar()
         self.session.headers.update({"User-Agent": cfg.userAgent.value})
         self.timeout = timeout
@@ -36,6 +47,8 @@ class SessionBackend:
         self.webvpn_has_login = False
         self.restored_auth_candidate = False
         self.login_lock = threading.RLock()
+        # 合并多个线程同时发起的后端本身（WebVPN）登录
+        self.login_coordinator = LoginCoordinator()
 
     def reset_timeout(self) -> None:
         """刷新后端最近请求时间。"""
@@ -59,30 +72,35 @@ class SessionBackend:
     def to_snapshot(self) -> BackendSnapshot:
         """导出当前后端的认证快照。"""
         from app.utils.config import cfg
-        from app.utils.session_persistence import BackendSnapshot, cookie_jar_to_lwp_text
+        from app.utils.session_persistence import BackendSnapshot, cookie_jar_to_bytes
 
         cookie_jar = self.session.cookies
         if not isinstance(cookie_jar, LWPCookieJar):
             raise TypeError("session.cookies should be LWPCookieJar")
         return BackendSnapshot(
             access_mode=self.access_mode.value,
-            cookie_lwp_text=cookie_jar_to_lwp_text(cookie_jar),
+            cookie_lwp_text=None,
             cookie_file=None,
             user_agent=str(cfg.userAgent.value),
             login_id=str(cfg.loginId.value),
             saved_at=time.time(),
+            cookie_data=cookie_jar_to_bytes(cookie_jar),
         )
 
     def restore_snapshot(self, snapshot: BackendSnapshot) -> bool:
         """从认证快照恢复当前后端，返回快照是否可安全使用。"""
         from app.utils.config import cfg
-        from app.utils.session_persistence import lwp_text_to_cookie_jar
+        from app.utils.session_persistence import bytes_to_cookie_jar, lwp_text_to_cookie_jar
 
         if snapshot.user_agent != str(cfg.userAgent.value) or snapshot.login_id != str(cfg.loginId.value):
             self.clear_auth_state()
             return False
 
-        cookie_jar = lwp_text_to_cookie_jar(snapshot.cookie_lwp_text)
+        if snapshot.cookie_data is not None:
+            cookie_jar = bytes_to_cookie_jar(snapshot.cookie_data)
+        else:
+            # 旧版快照以 LWP 文本保存 cookie
+            cookie_jar = lwp_text_to_cookie_jar(snapshot.cookie_lwp_text)
         if cookie_jar is None:
             self.clear_auth_state()
             return False
@@ -109,6 +127,10 @@ class SessionBackend:
         self.restored_auth_candidate = False
         self.reset_timeout()
 
+    def transport_stats(self) -> dict:
+        """返回底层连接的使用统计，包括连接池耗尽次数。"""
+        return self.transport.stats.snapshot()
+
     def close(self) -> None:
         """关闭底层 requests session。"""
         self.session.close()
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import asdict, dataclass
+import functools
+import json
+import re
+import threading
+import time
+from typing import Iterable
+from urllib.parse import urlparse
+
+
+# 环形缓冲区默认保存的请求数量
+DEFAULT_TRACE_CAPACITY = 2000
+# 摘要中输出的百分位
+SUMMARY_PERCENTILES = (50, 90, 99)
+
+# 路径中看起来像 ID 的片段：纯数字、UUID、较长的十六进制串
+_ID_SEGMENT = re.compile(r"^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F-]{27}|[0-9a-fA-F]{16,})$")
+
+
+@dataclass(frozen=True)
+class RequestTrace:
+    """一次经过 CommonLoginSession.request 的 HTTP 请求的记录。时间单位均为秒。"""
+
+    site: str
+    method: str
+    # 归一化后的接口，形如 lms.xjtu.edu.cn/api/courses/{id}/activities，不包含查询参数
+    endpoint: str
+    access_mode: str
+    # 请求抛出异常时为 None
+    status: int | None
+    # 响应体字节数；流式请求只能取 Content-Length
+    bytes: int
+    started_at: float
+    total: float
+    # 本次请求中新建连接（包括 DNS 解析与 TLS 握手）花费的时间；复用连接或无法统计时为 0
+    connect: float
+    # 从发出请求到收到响应头的时间（不含建立连接）
+    ttfb: float
+    # 下载响应体的时间；流式请求为 0
+    body: float
+    # 响应被判定为登录态失效
+    auth_failed: bool = False
+    # 这是登录态失效并重新登录后的重放请求
+    auth_retry: bool = False
+    error: str | None = None
+
+
+@functools.lru_cache(maxsize=1024)
+def _normalize_endpoint(url: str) -> str:
+    parsed = urlparse(url)
+    segments = ["{id}" if _ID_SEGMENT.match(segment) else segment for segment in parsed.path.split("/")]
+    return (parsed.hostname or "") + ("/".join(segments) or "/")
+
+
+def normalize_endpoint(url: str) -> str:
+    """把 URL 归一化为接口名：去掉协议、端口与查询参数，并把路径中的 ID 替换为 {id}，使同一接口的请求可以聚合统计。"""
+    return _normalize_endpoint(url.split("#", 1)[0].split("?", 1)[0])
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """
+    使用最近秩法计算百分位数。
+    :param sorted_values: 已经升序排序的数据
+    :param q: 百分位，0 到 100
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[min(int(rank), len(sorted_values)) - 1]
+
+
+def summarize_traces(traces: Iterable[RequestTrace]) -> list[dict]:
+    """按站点与接口聚合请求记录，返回按总耗时降序排列的摘要。"""
+    groups: dict[tuple[str, str], list[RequestTrace]] = {}
+    for trace in traces:
+        groups.setdefault((trace.site, trace.endpoint), []).append(trace)
+
+    summary = []
+    for (site, endpoint), group in groups.items():
+        totals = sorted(trace.total for trace in group)
+        item: dict[str, object] = {
+            "site": site,
+            "endpoint": endpoint,
+            "count": len(group),
+            "errors": sum(1 for trace in group if trace.error is not None or (trace.status or 0) >= 400),
+            "webvpn": sum(1 for trace in group if trace.access_mode == "webvpn"),
+            "auth_failures": sum(1 for trace in group if trace.auth_failed),
+            "auth_retries": sum(1 for trace in group if trace.auth_retry),
+            "bytes": sum(trace.bytes for trace in group),
+            "total_time": sum(totals),
+            "mean_connect": sum(trace.connect for trace in group) / len(group),
+            "mean_ttfb": sum(trace.ttfb for trace in group) / len(group),
+            "mean_body": sum(trace.body for trace in group) / len(group),
+        }
+        for q in SUMMARY_PERCENTILES:
+            item[f"p{q}"] = percentile(totals, q)
+        summary.append(item)
+    summary.sort(key=lambda item: item["total_time"], reverse=True)
+    return summary
+
+
+class RequestTracer:
+    """把请求记录保存在固定容量的环形缓冲区中，可以在多个线程中同时记录。"""
+
+    def __init__(self, capacity: int = DEFAULT_TRACE_CAPACITY) -> None:
+        self.enabled = True
+        self._traces: deque[RequestTrace] = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        return self._traces.maxlen or 0
+
+    def __len__(self) -> int:
+        return len(self._traces)
+
+    def record(self, trace: RequestTrace) -> None:
+        """记录一次请求；缓冲区已满时丢弃最早的记录。"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._traces.append(trace)
+
+    def traces(self, site: str | None = None) -> list[RequestTrace]:
+        """返回当前缓冲区中的请求记录副本，可以按站点筛选。"""
+        with self._lock:
+            traces = list(self._traces)
+        if site is not None:
+            traces = [trace for trace in traces if trace.site == site]
+        return traces
+
+    def summary(self, site: str | None = None) -> list[dict]:
+        """返回按站点与接口聚合的耗时摘要，参见 summarize_traces。"""
+        return summarize_traces(self.traces(site))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._traces.clear()
+
+    def export(self) -> dict:
+        """导出摘要与全部请求记录。"""
+        traces = self.traces()
+        return {
+            "exported_at": time.time(),
+            "capacity": self.capacity,
+            "summary": summarize_traces(traces),
+            "traces": [asdict(trace) for trace in traces],
+        }
+
+    def export_to_file(self, path: str) -> None:
+        """把 export 的结果以 JSON 格式写入文件。"""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.export(), file, ensure_ascii=False, indent=2)
+
+
+# 进程内共享的请求记录器，所有站点 Session 默认记录到这里
+request_tracer = RequestTracer()
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+import threading
+import time
+from typing import Callable
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+
+# 可以安全重试的幂等请求方法；POST 等请求只在连接阶段失败（请求尚未发出）时才会被重试
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"})
+
+# 记录当前线程新建连接花费的时间，供请求记录（tracing.py）区分建立连接与等待响应的耗时
+_connect_timing = threading.local()
+
+
+def take_connect_time() -> float:
+    """返回当前线程自上次调用以来新建连接（包括 DNS 解析与 TLS 握手）花费的总时间，并清零。"""
+    elapsed = getattr(_connect_timing, "elapsed", 0.0)
+    _connect_timing.elapsed = 0.0
+    return elapsed
+
+
+@dataclass(frozen=True)
+class TransportConfig:
+    """SessionBackend 底层连接的配置。"""
+
+    # 每个 backend 最多缓存多少个主机的连接池
+    pool_connections: int = 16
+    # 每个主机的连接池大小。LMS 批量下载、预取与后台保活会同时访问同一主机，因此比 requests 默认的 10 更大
+    pool_maxsize: int = 24
+    # 连接池耗尽时是否等待空闲连接；为 False 时会临时新建一个用完即丢弃的连接
+    pool_block: bool = False
+    # 是否复用连接；关闭后每个请求都会带上 Connection: close
+    keep_alive: bool = True
+    # 重试次数，为 0 时不重试
+    max_retries: int = 2
+    # 幂等请求读取响应超时后是否也重试。默认只重试连接错误与 status_forcelist 中的状态码：
+    # 超时的请求再重试会让调用者等待数倍的超时时间才得到失败结果
+    retry_read_timeouts: bool = False
+    # 重试的指数退避系数（秒），第 n 次重试前等待 backoff_factor * 2 ** (n - 1) 秒
+    backoff_factor: float = 0.3
+    # 幂等请求遇到这些状态码时重试
+    status_forcelist: tuple[int, ...] = (502, 503, 504)
+    # 自定义适配器工厂。可以在这里接入其他 HTTP 客户端（例如支持 HTTP/2 的客户端）实现的 requests 适配器；
+    # 为 None 时使用带统计的 urllib3 适配器
+    adapter_factory: Callable[[TransportConfig, TransportStats], BaseAdapter] | None = None
+
+
+@dataclass
+class TransportStats:
+    """记录一个 backend 的连接使用情况，可以在多个线程中同时更新。"""
+
+    requests: int = 0
+    retries: int = 0
+    # 请求开始时该主机的连接池已经没有空闲连接的次数
+    pool_exhausted: int = 0
+    # 同时进行中的请求数量峰值
+    peak_in_flight: int = 0
+    exhausted_by_host: Counter[str] = field(default_factory=Counter)
+    _in_flight: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def request_started(self) -> None:
+        with self._lock:
+            self.requests += 1
+            self._in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+
+    def request_finished(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def record_pool_exhausted(self, host: str) -> None:
+        with self._lock:
+            self.pool_exhausted += 1
+            self.exhausted_by_host[host] += 1
+
+    def snapshot(self) -> dict:
+        """返回当前统计数据的副本。"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "pool_exhausted": self.pool_exhausted,
+                "peak_in_flight": self.peak_in_flight,
+                "in_flight": self._in_flight,
+                "exhausted_by_host": dict(self.exhausted_by_host),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.retries = 0
+            self.pool_exhausted = 0
+            self.peak_in_flight = self._in_flight
+            self.exhausted_by_host.clear()
+
+
+class _MeteredRetry(Retry):
+    """在每次重试时记录统计的 Retry。"""
+
+    def __init__(self, *args, stats: TransportStats | None = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = stats
+
+    def new(self, **kw) -> Retry:
+        retry = super().new(**kw)
+        retry.stats = self.stats
+        return retry
+
+    def increment(self, *args, **kwargs) -> Retry:
+        retry = super().increment(*args, **kwargs)
+        if self.stats is not None:
+            self.stats.record_retry()
+        return retry
+
+
+def _metered_pool_class(base: type[HTTPConnectionPool], stats: TransportStats) -> type[HTTPConnectionPool]:
+    """创建一个在取连接时检测连接池是否耗尽、并记录新建连接耗时的连接池类。"""
+
+    class MeteredConnection(base.ConnectionCls):
+        def connect(self) -> None:
+            started = time.perf_counter()
+            try:
+                super().connect()
+            finally:
+                _connect_timing.elapsed = getattr(_connect_timing, "elapsed", 0.0) + time.perf_counter() - started
+
+    class MeteredConnectionPool(base):
+        ConnectionCls = MeteredConnection
+
+        def _get_conn(self, timeout: float | None = None):
+            if self.pool is not None and self.pool.empty():
+                stats.record_pool_exhausted(self.host)
+            return super()._get_conn(timeout)
+
+    MeteredConnectionPool.__name__ = f"Metered{base.__name__}"
+    return MeteredConnectionPool
+
+
+class MeteredHTTPAdapter(HTTPAdapter):
+    """按照 TransportConfig 配置连接池与重试策略，并记录连接池耗尽情况的适配器。"""
+
+    def __init__(self, config: TransportConfig, stats: TransportStats) -> None:
+        # HTTPAdapter 自身已经使用了 config 属性
+        self.transport_config = config
+        self.stats = stats
+        retries = _MeteredRetry(
+            total=config.max_retries,
+            # False 时不重试，并像不重试时一样抛出原本的读取超时异常（requests.ReadTimeout）
+            read=config.max_retries if config.retry_read_timeouts else False,
+            backoff_factor=config.backoff_factor,
+            status_forcelist=config.status_forcelist,
+            allowed_methods=IDEMPOTENT_METHODS,
+            # 重试次数用完后返回最后一次的响应，而不是抛出异常，保持与不重试时相同的行为
+            raise_on_status=False,
+            # 不按服务器的 Retry-After 等待，避免界面线程之外的请求被拖住过久
+            respect_retry_after_header=False,
+            # 重定向由 requests 处理
+            redirect=False,
+            stats=stats,
+        ) if config.max_retries > 0 else 0
+        super().__init__(
+            pool_connections=config.pool_connections,
+            pool_maxsize=config.pool_maxsize,
+            max_retries=retries,
+            pool_block=config.pool_block,
+        )
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs) -> None:
+        super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _metered_pool_class(HTTPConnectionPool, self.stats),
+            "https": _metered_pool_class(HTTPSConnectionPool, self.stats),
+        }
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if not self.transport_config.keep_alive:
+            request.headers["Connection"] = "close"
+        self.stats.request_started()
+        try:
+            return super().send(request, **kwargs)
+        finally:
+            self.stats.request_finished()
+
+
+class SessionTransport:
+    """
+    一个 SessionBackend 的传输层：同一 backend 下的所有站点共享同一个 requests.Session，
+    因此也共享这里挂载的适配器、连接池与统计数据。
+    """
+
+    def __init__(self, config: TransportConfig | None = None) -> None:
+        self.config = config or TransportConfig()
+        self.stats = TransportStats()
+        if self.config.adapter_factory is not None:
+            self.adapter = self.config.adapter_factory(self.config, self.stats)
+        else:
+            self.adapter = MeteredHTTPAdapter(self.config, self.stats)
+
+    def mount(self, session: requests.Session) -> None:
+        """把适配器挂载到 session 的 http 与 https 上。"""
+        session.mount("https://", self.adapter)
+        session.mount("http://", self.adapter)
+
+    def close(self) -> None:
+        """关闭适配器持有的全部连接。"""
+        self.adapter.close()
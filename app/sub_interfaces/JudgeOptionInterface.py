@@ -239,12 +239,10 @@ class JudgeOptionInterface(ScrollArea):
     @pyqtSlot()
     def onSubmitButtonClicked(self):
         self.thread_.questionnaire = self.questionnaire
-        template = QuestionnaireTemplate.from_file(self.classTypeBox.currentData(),
-                                                   self.scoreBox.currentData())
+        template = QuestionnaireTemplate.load(self.classTypeBox.currentData(),
+                                              self.scoreBox.currentData())
         subjective_answer = self.textArea.toPlainText() if self.textArea.toPlainText() else self.tr("无")
-        for one_data in template.data:
-            if one_data.TXDM != '01':
-                one_data.ZGDA = subjective_answer
+        template = template.with_subjective(subjective_answer)
         self.thread_.template = template
         self.thread_.score = template.score_to_int(self.scoreBox.currentData())
         self.thread_.msgAll = subjective_answer
@@ -195,6 +195,12 @@ class LMSActivityPage(QFrame):
         """
         return [one for one in self._activities if isinstance(one, dict)]
 
+    def getVisibleActivities(self) -> list[dict]:
+        """
+        列出当前类型下显示的活动，顺序与界面上的卡片顺序一致。
+        """
+        return [one for one in self._filtered_activities if isinstance(one, dict)]
+
     def getSelectedActivities(self) -> list[dict]:
         """获取当前选中的活动字典列表（在过滤后的结果中查找）。"""
         return [
@@ -2,7 +2,8 @@ import re
 
 from PyQt5.QtCore import Qt, pyqtSignal, QPropertyAnimation, QEasingCurve, QParallelAnimationGroup, QTimer
 from PyQt5.QtWidgets import QActionGroup, QFrame, QHBoxLayout, QVBoxLayout, QWidget
-from qfluentwidgets import Action, CheckableMenu, ComboBox, FluentIcon, FlowLayout, MenuIndicatorType, TransparentDropDownPushButton
+from qfluentwidgets import Action, CheckableMenu, ComboBox, FluentIcon, FlowLayout, MenuIndicatorType, TransparentDropDownPushButton, \
+    TransparentPushButton
 
 from .common import PageStatus, create_retry_frame
 from app.cards.course_card import LMSCourseCard, CourseSkeletonCard
@@ -13,6 +14,8 @@ class LMSCoursePage(QFrame):
     courseSelected = pyqtSignal(int, str)
     # 用户点击重试按钮后，请求主容器重新加载课程。
     retryRequested = pyqtSignal()
+    # 用户点击“检查更新”后，请求主容器增量同步所有课程的活动。
+    syncRequested = pyqtSignal()
     _FILTER_ALL_KEY = "__ALL__"
 
     def __init__(self, parent=None):
@@ -69,7 +72,13 @@ class LMSCoursePage(QFrame):
         self.sortMenu.addActions([self.termNewToOldAction, self.termOldToNewAction])
         self.sortButton.setMenu(self.sortMenu)
 
+        self.syncButton = TransparentPushButton(FluentIcon.UPDATE, self.tr("检查更新"), self.filterFrame)
+        self.syncButton.setFixedHeight(34)
+        self.syncButton.setToolTip(self.tr("只重新获取发生变化或较长时间未同步的课程"))
+        self.syncButton.clicked.connect(self.syncRequested.emit)
+
         self.filterLayout.addStretch(1)
+        self.filterLayout.addWidget(self.syncButton, alignment=Qt.AlignRight)
         self.filterLayout.addWidget(self.sortButton, alignment=Qt.AlignRight)
         self.filterFrame.setVisible(False)
 
@@ -449,3 +458,4 @@ class LMSCoursePage(QFrame):
         self.cardHost.setEnabled(enabled)
         self.termFilterComboBox.setEnabled(enabled)
         self.sortButton.setEnabled(enabled)
+        self.syncButton.setEnabled(enabled)
@@ -16,6 +16,7 @@ from qfluentwidgets import (
     TableWidget,
     TextBrowser,
     TitleLabel, PrimaryPushButton,
+    TransparentToolButton,
 )
 
 from lms.models import ActivityType
@@ -134,6 +135,8 @@ class DetailMetaCard(SimpleCardWidget):
 class LMSDetailPage(QFrame):
     # 用户点击重试后，请求主容器重新加载活动详情。
     retryRequested = pyqtSignal()
+    # 用户点击刷新按钮后，请求主容器忽略缓存重新加载活动详情。
+    refreshRequested = pyqtSignal()
     # 用户点击“查看详情”后，通知主容器打开提交详情页。
     submissionRequested = pyqtSignal(dict)
     # 用户点击下载按钮后，通知主容器执行下载。
@@ -165,6 +168,15 @@ class LMSDetailPage(QFrame):
         self.detailTitleLabel.setWordWrap(True)
         self.detailTitleLabel.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Fixed)
 
+        self.refreshButton = TransparentToolButton(FluentIcon.SYNC, self)
+        self.refreshButton.setToolTip(self.tr("刷新"))
+        self.refreshButton.clicked.connect(self.refreshRequested.emit)
+
+        self.titleLayout = QHBoxLayout()
+        self.titleLayout.setContentsMargins(0, 0, 0, 0)
+        self.titleLayout.addWidget(self.detailTitleLabel, stretch=1)
+        self.titleLayout.addWidget(self.refreshButton, alignment=Qt.AlignTop)
+
         self.detailMetaHost = QWidget(self)
         self.detailMetaLayout = FlowLayout(self.detailMetaHost, needAni=False)
         self.detailMetaLayout.setContentsMargins(0, 0, 0, 0)
@@ -226,7 +238,7 @@ class LMSDetailPage(QFrame):
         self.failFrame.setVisible(False)
         retry_button.clicked.connect(self.retryRequested.emit)
 
-        layout.addWidget(self.detailTitleLabel)
+        layout.addLayout(self.titleLayout)
         layout.addWidget(self.detailMetaHost)
         layout.addWidget(self.openRelatedLessonButton, alignment=Qt.AlignLeft)
         layout.addWidget(self.detailDescriptionCard)
@@ -287,6 +299,7 @@ class LMSDetailPage(QFrame):
     def _normalWidgets(self) -> list[QWidget]:
         """返回详情页常规显示控件集合。"""
         return [
+            self.refreshButton,
             self.detailMetaHost,
             self.openRelatedLessonButton,
             self.detailDescriptionCard,
@@ -2,13 +2,98 @@ from __future__ import annotations
 
 import math
 
-from PyQt5.QtCore import QEvent, QPoint, QTimer, Qt
+from PyQt5.QtCore import QEvent, QPoint, QRectF, QSize, QTimer, Qt
 from PyQt5.QtGui import QColor, QPainter, QPainterPath, QPen, QPixmap
 from PyQt5.QtWidgets import QDialog, QFrame, QHBoxLayout, QLabel, QSizePolicy, QVBoxLayout, QWidget
 from qfluentwidgets import CaptionLabel, PushButton, ScrollArea, TitleLabel, isDarkTheme
 
 
+QWIDGETSIZE_MAX = (1 << 24) - 1
+
+
+class _PreviewCanvas(QLabel):
+    """
+    显示缩放后图片的标签。
+
+    不会生成整张缩放后的图片：绘制时只处理当前可见（需要重绘）的区域，
+    并从逐级减半的图片层级中选取最接近目标尺寸的一层取样，因此超大扫描件放大后内存占用也不会增长。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # 第 0 层为原图，之后每层尺寸减半，按需生成
+        self._levels: list[QPixmap] = []
+        self._display_size = QSize()
+        self._smooth = True
+
+    def has_source(self) -> bool:
+        return bool(self._levels)
+
+    def set_source(self, pixmap: QPixmap | None):
+        self._levels = [pixmap] if pixmap is not None and not pixmap.isNull() else []
+        if not self._levels:
+            self.set_display_size(None)
+        self.update()
+
+    def set_display_size(self, size: QSize | None, smooth: bool = True):
+        """
+        设置图片的显示尺寸。
+        :param size: 显示尺寸；为 None 时取消固定尺寸，用于显示提示文字
+        :param smooth: 是否平滑缩放。连续缩放时先以 False 快速绘制，停止后再以 True 重绘
+        """
+        self._smooth = smooth
+        if size is None:
+            self._display_size = QSize()
+            self.setMinimumSize(0, 0)
+            self.setMaximumSize(QWIDGETSIZE_MAX, QWIDGETSIZE_MAX)
+        else:
+            self._display_size = QSize(size)
+            self.setFixedSize(size)
+        self.update()
+
+    def set_smooth(self, smooth: bool):
+        if self._smooth != smooth:
+            self._smooth = smooth
+            self.update()
+
+    def _level_for(self, width: int) -> QPixmap:
+        """返回宽度不小于 width 的最小层级；需要时继续生成更小的层级。"""
+        candidate = None
+        for level in reversed(self._levels):
+            if level.width() >= width:
+                candidate = level
+                break
+        if candidate is None:
+            return self._levels[0]
+
+        while candidate is self._levels[-1] and candidate.width() // 2 >= width and candidate.height() // 2 >= 1:
+            candidate = candidate.scaled(
+                candidate.width() // 2, candidate.height() // 2, Qt.IgnoreAspectRatio, Qt.SmoothTransformation
+            )
+            self._levels.append(candidate)
+        return candidate
+
+    def paintEvent(self, event):
+        if not self._levels or self._display_size.isEmpty():
+            super().paintEvent(event)
+            return
+
+        level = self._level_for(self._display_size.width())
+        ratio_x = level.width() / self._display_size.width()
+        ratio_y = level.height() / self._display_size.height()
+        target = QRectF(event.rect())
+        source = QRectF(target.x() * ratio_x, target.y() * ratio_y, target.width() * ratio_x, target.height() * ratio_y)
+
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, self._smooth)
+        painter.drawPixmap(target, level, source)
+        painter.end()
+
+
 class LMSImagePreviewDialog(QDialog):
+    # 连续缩放停止多久（毫秒）后改用平滑缩放重绘
+    SMOOTH_RENDER_DELAY = 120
+
     def __init__(self, fetch_pixmap_callback, preview_key_callback, safe_text_callback, parent=None):
         super().__init__(parent)
         self._fetch_pixmap = fetch_pixmap_callback
@@ -30,6 +115,10 @@ class LMSImagePreviewDialog(QDialog):
         self._drag_h_value = 0
         self._drag_v_value = 0
 
+        self._smoothRenderTimer = QTimer(self)
+        self._smoothRenderTimer.setSingleShot(True)
+        self._smoothRenderTimer.setInterval(self.SMOOTH_RENDER_DELAY)
+
         self.setObjectName("lmsImagePreviewDialog")
         self.setWindowTitle(self.tr("图片预览"))
         self.resize(960, 680)
@@ -62,8 +151,8 @@ class LMSImagePreviewDialog(QDialog):
 
         self.previewPrevButton.clicked.connect(self.preview_prev_image)
         self.previewNextButton.clicked.connect(self.preview_next_image)
-        self.previewZoomOutButton.clicked.connect(lambda: self.set_preview_scale(self._preview_scale / 1.2))
-        self.previewZoomInButton.clicked.connect(lambda: self.set_preview_scale(self._preview_scale * 1.2))
+        self.previewZoomOutButton.clicked.connect(lambda: self.set_preview_scale(self._preview_scale / 1.2, smooth=False))
+        self.previewZoomInButton.clicked.connect(lambda: self.set_preview_scale(self._preview_scale * 1.2, smooth=False))
         self.previewResetZoomButton.clicked.connect(lambda: self.set_preview_scale(1.0))
 
         toolLayout.addWidget(self.previewPrevButton)
@@ -86,7 +175,7 @@ class LMSImagePreviewDialog(QDialog):
         previewLayout.setContentsMargins(16, 16, 16, 16)
         previewLayout.setAlignment(Qt.AlignCenter)
 
-        self.previewImageLabel = QLabel(self.previewContent)
+        self.previewImageLabel = _PreviewCanvas(self.previewContent)
         self.previewImageLabel.setObjectName("lmsPreviewImageLabel")
         self.previewImageLabel.setAlignment(Qt.AlignCenter)
         self.previewImageLabel.setText(self.tr("无可预览图片"))
@@ -95,6 +184,7 @@ class LMSImagePreviewDialog(QDialog):
         self.previewScaleLabel.setObjectName("lmsPreviewScaleLabel")
         self.previewScrollArea.setWidget(self.previewContent)
         self.previewScrollArea.viewport().installEventFilter(self)
+        self._smoothRenderTimer.timeout.connect(lambda: self.previewImageLabel.set_smooth(True))
 
         layout.addWidget(self.previewTitleLabel)
         layout.addWidget(toolFrame)
@@ -118,25 +208,29 @@ class LMSImagePreviewDialog(QDialog):
             f"QLabel#lmsPreviewScaleLabel{{color:{sub_fg};background:transparent;}}"
         )
 
-    def set_preview_scale(self, scale: float):
+    def set_preview_scale(self, scale: float, smooth: bool = True):
+        """
+        设置缩放比例。
+        :param smooth: 为 False 时先快速绘制，稍后自动平滑重绘，用于滚轮等连续缩放
+        """
         self._preview_scale = max(0.1, min(float(scale), 8.0))
         self.previewScaleLabel.setText(f"{int(round(self._preview_scale * 100))}%")
-        self._apply_preview_scale()
+        self._apply_preview_scale(smooth)
 
-    def _apply_preview_scale(self):
-        source = self._preview_render_pixmap
-        if source is None or source.isNull():
-            source = self._preview_original_pixmap
-        if source is None or source.isNull():
-            self.previewImageLabel.setPixmap(QPixmap())
+    def _apply_preview_scale(self, smooth: bool = True):
+        source = self._current_render_source_pixmap()
+        if source is None or not self.previewImageLabel.has_source():
+            self.previewImageLabel.set_source(None)
             return
 
         width = max(1, int(source.width() * self._preview_scale))
         height = max(1, int(source.height() * self._preview_scale))
-        scaled = source.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
         self.previewImageLabel.setText("")
-        self.previewImageLabel.setPixmap(scaled)
-        self.previewImageLabel.resize(scaled.size())
+        self.previewImageLabel.set_display_size(QSize(width, height), smooth)
+        if smooth:
+            self._smoothRenderTimer.stop()
+        else:
+            self._smoothRenderTimer.start()
 
     def _draw_overlay(self, source: QPixmap) -> QPixmap:
         if not self._overlay_items:
@@ -259,6 +353,7 @@ class LMSImagePreviewDialog(QDialog):
         if self._overlay_items:
             source = self._draw_overlay(source)
         self._preview_render_pixmap = source
+        self.previewImageLabel.set_source(source)
 
     def _zoom_at(self, cursor_pos: QPoint, factor: float):
         source = self._current_render_source_pixmap()
@@ -273,7 +368,7 @@ class LMSImagePreviewDialog(QDialog):
         rel_x = (h_bar.value() + cursor_pos.x()) / old_w
         rel_y = (v_bar.value() + cursor_pos.y()) / old_h
 
-        self.set_preview_scale(old_scale * factor)
+        self.set_preview_scale(old_scale * factor, smooth=False)
 
         updated_source = self._current_render_source_pixmap()
         if updated_source is None or updated_source.isNull():
@@ -287,6 +382,7 @@ class LMSImagePreviewDialog(QDialog):
         self._preview_original_pixmap = pixmap if pixmap and not pixmap.isNull() else None
         self._preview_render_pixmap = None
         if self._preview_original_pixmap is None:
+            self.previewImageLabel.set_source(None)
             self.previewImageLabel.setCursor(Qt.ArrowCursor)
         else:
             self.previewImageLabel.setCursor(Qt.OpenHandCursor)
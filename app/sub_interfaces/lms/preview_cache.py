@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from collections import OrderedDict
+
+from PyQt5.QtCore import QBuffer, QSize
+from PyQt5.QtGui import QImageReader, QPixmap
+
+
+def decode_preview_image(data: bytes, max_side: int = 0) -> QPixmap | None:
+    """
+    把图片字节解码为 QPixmap。
+
+    :param data: 图片文件内容
+    :param max_side: 长边上限（像素），大于 0 时超大的扫描件会在解码阶段直接缩小，避免占用过多内存
+    :return: 解码失败时返回 None
+    """
+    if not data:
+        return None
+    buffer = QBuffer()
+    buffer.setData(data)
+    buffer.open(QBuffer.ReadOnly)
+    reader = QImageReader(buffer)
+    # Respect EXIF orientation so phone photos display with correct rotation.
+    reader.setAutoTransform(True)
+    size = reader.size()
+    if max_side > 0 and size.isValid() and max(size.width(), size.height()) > max_side:
+        ratio = max_side / max(size.width(), size.height())
+        reader.setScaledSize(QSize(max(1, round(size.width() * ratio)), max(1, round(size.height() * ratio))))
+    image = reader.read()
+    if image.isNull():
+        return None
+    return QPixmap.fromImage(image)
+
+
+class LMSPreviewCache:
+    """
+    图片预览的两级缓存。
+
+    第一级是按占用内存（字节）限制大小的 LRU，存放解码后的 QPixmap；
+    第二级是磁盘目录，存放下载得到的原始图片文件，总大小超过上限时删除最久未使用的文件。
+    内存中被淘汰或程序重启后，再次预览同一张图片只需从磁盘解码，不必重新下载。
+    """
+
+    DEFAULT_MEMORY_LIMIT = 256 * 1024 * 1024
+    DEFAULT_DISK_LIMIT = 200 * 1024 * 1024
+    # 解码后长边的上限。更大的图片会在解码时缩小，放大查看仍足够清晰
+    DEFAULT_MAX_SIDE = 8192
+    FILE_SUFFIX = ".img"
+
+    def __init__(self, memory_limit: int = DEFAULT_MEMORY_LIMIT, disk_dir: str | None = None,
+                 disk_limit: int = DEFAULT_DISK_LIMIT, max_side: int = DEFAULT_MAX_SIDE):
+        """
+        :param memory_limit: 内存缓存的容量（字节），按每像素 4 字节估算
+        :param disk_dir: 磁盘缓存目录，为 None 时只使用内存缓存
+        :param disk_limit: 磁盘缓存的容量（字节）
+        :param max_side: 解码后图片长边的上限（像素）
+        """
+        self.memory_limit = memory_limit
+        self.disk_dir = disk_dir
+        self.disk_limit = disk_limit
+        self.max_side = max_side
+        self._memory: OrderedDict[str, QPixmap] = OrderedDict()
+        self._memory_size = 0
+
+    @staticmethod
+    def pixmap_cost(pixmap: QPixmap) -> int:
+        return max(1, pixmap.width() * pixmap.height() * 4)
+
+    @property
+    def memory_size(self) -> int:
+        return self._memory_size
+
+    def set_disk_dir(self, disk_dir: str | None):
+        """切换磁盘缓存目录（如切换账户、关闭缓存时），内存缓存同时清空。"""
+        self.disk_dir = disk_dir
+        self.clear_memory()
+
+    def get(self, key: str) -> QPixmap | None:
+        """依次查询内存与磁盘缓存，都未命中时返回 None。"""
+        pixmap = self._memory.get(key)
+        if pixmap is not None:
+            self._memory.move_to_end(key)
+            return pixmap
+
+        file_path = self._disk_path(key)
+        if file_path is None:
+            return None
+        try:
+            with open(file_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        pixmap = decode_preview_image(data, self.max_side)
+        if pixmap is None:
+            self._remove_file(file_path)
+            return None
+        try:
+            # 用修改时间记录最近使用时间，磁盘淘汰时按它排序
+            os.utime(file_path)
+        except OSError:
+            pass
+        self._put_memory(key, pixmap)
+        return pixmap
+
+    def put(self, key: str, pixmap: QPixmap, data: bytes | None = None):
+        """
+        写入缓存。
+        :param key: 预览键
+        :param pixmap: 解码后的图片
+        :param data: 图片的原始字节；提供时同时写入磁盘缓存
+        """
+        if pixmap is None or pixmap.isNull():
+            return
+        self._put_memory(key, pixmap)
+        if data:
+            self._put_disk(key, data)
+
+    def clear_memory(self):
+        self._memory.clear()
+        self._memory_size = 0
+
+    def _put_memory(self, key: str, pixmap: QPixmap):
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_size -= self.pixmap_cost(old)
+        self._memory[key] = pixmap
+        self._memory_size += self.pixmap_cost(pixmap)
+        # 至少保留刚写入的一项，即使它本身超过上限
+        while self._memory_size > self.memory_limit and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= self.pixmap_cost(evicted)
+
+    def _disk_path(self, key: str) -> str | None:
+        if not self.disk_dir:
+            return None
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.disk_dir, digest + self.FILE_SUFFIX)
+
+    def _put_disk(self, key: str, data: bytes):
+        file_path = self._disk_path(key)
+        if file_path is None or len(data) > self.disk_limit:
+            return
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            temp_path = file_path + ".tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, file_path)
+        except OSError:
+            return
+        self._trim_disk()
+
+    def _trim_disk(self):
+        try:
+            entries = []
+            with os.scandir(self.disk_dir) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.endswith(self.FILE_SUFFIX):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            return
+        total = sum(one[1] for one in entries)
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.disk_limit:
+                break
+            if self._remove_file(path):
+                total -= size
+
+    @staticmethod
+    def _remove_file(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
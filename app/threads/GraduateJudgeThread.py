@@ -1,4 +1,4 @@
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 
 import requests
 from PyQt5.QtCore import pyqtSignal
@@ -10,6 +10,7 @@ from .ProcessWidget import ProcessThread
 from ..sessions.gmis_session import GMISSession
 from ..sessions.gste_session import GSTESession
 from ..utils import Account, logger, accounts
+from ..utils.judge_pipeline import JudgePipeline
 from ..utils.mfa import MFACancelledError, MFAUnavailableError
 from ..utils.qrcode_login import QRCodeLoginCancelledError, QRCodeLoginUnavailableError
 
@@ -17,6 +18,14 @@ from auth import ServerError
 from enum import Enum
 
 
+def is_degree_course(all_courses: List[Dict], questionnaire: GraduateQuestionnaire) -> bool:
+    """根据 GraduateScore.all_course_info 的结果判断问卷对应的课程是否为学位课程，没有信息时默认为选修课"""
+    for lesson in all_courses:
+        if lesson["courseName"] == questionnaire.KCMC:
+            return lesson["type"] == "学位课程"
+    return False
+
+
 class GraduateJudgeChoice(Enum):
     # 获得所有待评教的课程
     GET_COURSES = 0
@@ -37,6 +46,10 @@ class GraduateJudgeThread(ProcessThread):
     editSuccess = pyqtSignal()
     allSubmitSuccess = pyqtSignal()
 
+    # 全部评教时同时拉取问卷的数量与同时提交问卷的数量
+    FETCH_WORKERS = 4
+    SUBMIT_WORKERS = 2
+
     def __init__(self, account: Account, choice: GraduateJudgeChoice, parent=None):
         super().__init__(parent)
         self.account = account
@@ -165,16 +178,7 @@ class GraduateJudgeThread(ProcessThread):
                 self.messageChanged.emit(self.tr("正在获得课程类型信息..."))
                 score_util = GraduateScore(self.gmis_session)
                 all_courses = score_util.all_course_info()
-                for lesson in all_courses:
-                    if lesson["courseName"] == self.questionnaire.KCMC:
-                        if lesson["type"] == "学位课程":
-                            is_main_course = True
-                        else:
-                            is_main_course = False
-                        break
-                else:
-                    # 没有信息默认为选修课
-                    is_main_course = False
+                is_main_course = is_degree_course(all_courses, self.questionnaire)
                 # 填写问卷
                 util.completeQuestionnaire(self.questionnaire, self.questionnaire_data, basic_info, self.score, self.answer_dict, is_main_course)
 
@@ -215,53 +219,49 @@ class GraduateJudgeThread(ProcessThread):
                 all_questionnaires = util.getQuestionnaires()
                 all_questionnaires = [one for one in all_questionnaires if one.ASSESSMENT == "allow"]
 
-                step = 0
-                for questionnaire in all_questionnaires:
-                    step += 1
-                    # 计算当前进度
-                    self.progressChanged.emit(15 + int(85 * step / (len(all_questionnaires) * 3)))
-                    # 获得问卷内容
-                    self.messageChanged.emit(self.tr("正在获得 ") + questionnaire.KCMC + "-" + questionnaire.JSXM + self.tr(" 问卷的内容..."))
-                    data = util.getQuestionnaireData(questionnaire=questionnaire)
-
-                    if not self.can_run:
-                        self.canceled.emit()
-                        return
-
-                    step += 1
-                    # 获得课程基本信息
-                    self.progressChanged.emit(15 + int(85 * step / (len(all_questionnaires) * 3)))
-                    self.messageChanged.emit(self.tr("正在获得 ") + questionnaire.KCMC + self.tr(" 课程的基本信息..."))
-                    basic_info = gmis_util.lesson_detail(questionnaire.KCBH)
-
-                    if not self.can_run:
-                        self.canceled.emit()
-                        return
-
-                    # 判断是否为学位课程
-                    for lesson in all_courses:
-                        if lesson["courseName"] == questionnaire.KCMC:
-                            if lesson["type"] == "学位课程":
-                                is_main_course = True
-                            else:
-                                is_main_course = False
-                            break
-                    else:
-                        is_main_course = False
+                total_count = len(all_questionnaires)
+
+                def fetch(questionnaire):
+                    return (util.getQuestionnaireData(questionnaire=questionnaire),
+                            gmis_util.lesson_detail(questionnaire.KCBH))
 
-                    step += 1
-                    # 评教
-                    # 先设置所有主观题为同一内容
+                def complete(questionnaire, fetched):
+                    data, basic_info = fetched
+                    # 先设置所有主观题为同一内容，再完成问卷
                     data.set_all_textarea(self.single_answer)
-                    # 再完成问卷
-                    util.completeQuestionnaire(questionnaire, data, basic_info, self.score, self.answer_dict, is_main_course)
-                    self.progressChanged.emit(15 + int(85 * step / (len(all_questionnaires) * 3)))
-                    self.messageChanged.emit(self.tr("正在提交 ") + questionnaire.KCMC + "-" + questionnaire.JSXM + self.tr(" 问卷..."))
+                    util.completeQuestionnaire(questionnaire, data, basic_info, self.score, self.answer_dict,
+                                               is_degree_course(all_courses, questionnaire))
+                    return data
+
+                def submit(questionnaire, data):
                     util.submitQuestionnaire(questionnaire, data)
+                    return True, ""
+
+                finished = []
 
-                    if not self.can_run:
-                        self.canceled.emit()
-                        return
+                def on_result(result):
+                    finished.append(result)
+                    name = result.item.KCMC + "-" + result.item.JSXM
+                    if result.ok:
+                        self.messageChanged.emit(self.tr("已提交 ") + name + self.tr(" 问卷"))
+                    else:
+                        self.messageChanged.emit(self.tr("评教失败：") + name)
+                        logger.error(f"评教失败: {name}", exc_info=result.error)
+                    self.progressChanged.emit(15 + int(85 * len(finished) / total_count))
+
+                self.messageChanged.emit(self.tr("正在评教 ") + str(total_count) + self.tr(" 份问卷..."))
+                pipeline = JudgePipeline(fetch, complete, submit, fetch_workers=self.FETCH_WORKERS,
+                                         submit_workers=self.SUBMIT_WORKERS)
+                report = pipeline.run(all_questionnaires, on_result, aborted=lambda: not self.can_run)
+                logger.info("研究生评教完成：成功 %d/%d，各阶段耗时 %s ms", report.succeeded, total_count, report.stages)
+                if report.aborted:
+                    self.canceled.emit()
+                    return
+                if report.errors and not report.succeeded:
+                    # 全部失败时按第一个错误的类型提示
+                    raise report.errors[0]
+                if report.succeeded != total_count:
+                    self.error.emit("", self.tr("所有评教完成，成功 ") + f"{report.succeeded}/{total_count}")
 
                 self.allSubmitSuccess.emit()
 
@@ -6,10 +6,11 @@ from PyQt5.QtCore import pyqtSignal
 from .ProcessWidget import ProcessThread
 from ..sessions.jwxt_session import JWXTSession
 from ..utils import Account, logger, accounts
+from ..utils.judge_pipeline import JudgePipeline
 from ..utils.mfa import MFACancelledError, MFAUnavailableError
 from ..utils.qrcode_login import QRCodeLoginCancelledError, QRCodeLoginUnavailableError
 
-from jwxt import AutoJudge, QuestionnaireTemplate
+from jwxt import AutoJudge, Questionnaire, QuestionnaireTemplate
 from auth import ServerError
 from enum import Enum
 
@@ -25,12 +26,33 @@ class JudgeChoice(Enum):
     JUDGE_ALL = 3
 
 
+def questionnaire_template_type(questionnaire: Questionnaire) -> QuestionnaireTemplate.Type:
+    """根据问卷名称判断应使用的模版类型，无法判断时按理论课处理"""
+    type_dict = {
+        QuestionnaireTemplate.Type.THEORY: "理论课",
+        QuestionnaireTemplate.Type.IDEOLOGY: "思政课",
+        QuestionnaireTemplate.Type.GENERAL: "通识课",
+        QuestionnaireTemplate.Type.EXPERIMENT: "实验课",
+        QuestionnaireTemplate.Type.PROJECT: "项目设计课",
+        QuestionnaireTemplate.Type.PHYSICAL: "体育课"
+    }
+    for item in type_dict:
+        if type_dict[item] in questionnaire.WJMC:
+            return item
+    # 默认理论课
+    return QuestionnaireTemplate.Type.THEORY
+
+
 class JudgeThread(ProcessThread):
     # 未完成问卷与已完成问卷
     questionnaires = pyqtSignal(list, list)
     submitSuccess = pyqtSignal()
     editSuccess = pyqtSignal()
 
+    # 全部评教时同时拉取问卷的数量与同时提交问卷的数量
+    FETCH_WORKERS = 4
+    SUBMIT_WORKERS = 2
+
     def __init__(self, account: Account, choice: JudgeChoice, parent=None):
         super().__init__(parent)
         self.account = account
@@ -124,77 +146,54 @@ class JudgeThread(ProcessThread):
         self.messageChanged.emit(self.tr("正在获取所有待评教课程..."))
         self.progressChanged.emit(10)
         questionnaires = self.judge_.unfinishedQuestionnaires()
-        
+
         if not questionnaires:
             self.error.emit("没有待评教课程", "所有课程已经完成评教")
             return False
-        
+
         total_count = len(questionnaires)
-        success_count = 0
-        
-        for i, questionnaire in enumerate(questionnaires):
-            if not self.can_run:
-                return False
-                
-            progress_base = 10 + (i * 90 // total_count)
-            
-            try:
-                self.messageChanged.emit(self.tr(f"正在评教第{i+1}/{total_count}门: {questionnaire.KCM}"))
-                self.progressChanged.emit(progress_base + 5)
-                data = self.judge_.questionnaireData(questionnaire, self.account.username)
-                self.progressChanged.emit(progress_base + 20)
-                
-                options = self.judge_.questionnaireOptions(questionnaire, self.account.username)
-                self.progressChanged.emit(progress_base + 40)
-                
-                # 获取模版
-                type_dict = {
-                    QuestionnaireTemplate.Type.THEORY: "理论课",
-                    QuestionnaireTemplate.Type.IDEOLOGY: "思政课",
-                    QuestionnaireTemplate.Type.GENERAL: "通识课",
-                    QuestionnaireTemplate.Type.EXPERIMENT: "实验课",
-                    QuestionnaireTemplate.Type.PROJECT: "项目设计课",
-                    QuestionnaireTemplate.Type.PHYSICAL: "体育课"
-                }
+        default_score = QuestionnaireTemplate.score_to_int(self.scoreAll)
+        subjective_answer = self.msgAll if self.msgAll else self.tr("无")
+        # 同一类型的问卷共用一份模版
+        templates = {}
+        finished = []
 
-                questionnaire_type = None
-                for item in type_dict:
-                    if type_dict[item] in questionnaire.WJMC:
-                        questionnaire_type = item
-                        break
-                if questionnaire_type is None:
-                    # 默认理论课
-                    questionnaire_type = QuestionnaireTemplate.Type.THEORY
+        def fetch(questionnaire):
+            return (self.judge_.questionnaireData(questionnaire, self.account.username),
+                    self.judge_.questionnaireOptions(questionnaire, self.account.username))
 
-                template = QuestionnaireTemplate.from_file(
-                    questionnaire_type,
-                    self.scoreAll
-                )
+        def complete(questionnaire, fetched):
+            data, options = fetched
+            questionnaire_type = questionnaire_template_type(questionnaire)
+            if questionnaire_type not in templates:
+                template = QuestionnaireTemplate.load(questionnaire_type, self.scoreAll)
+                templates[questionnaire_type] = template.with_subjective(subjective_answer)
+            for one_data in data:
+                templates[questionnaire_type].complete(one_data, options, True, default_score=default_score, default_subjective=self.msgAll)
+            return data
 
-                for one_data in template.data:
-                    if one_data.TXDM != '01':
-                        one_data.ZGDA = self.msgAll if self.msgAll else self.tr("无")
+        def on_result(result):
+            finished.append(result)
+            done = len(finished)
+            if result.ok:
+                self.messageChanged.emit(self.tr(f"第{done}/{total_count}门课程评教成功: {result.item.KCM}"))
+            elif result.error is not None:
+                self.messageChanged.emit(self.tr(f"第{done}/{total_count}门课程评教异常: {result.item.KCM}"))
+                logger.error(f"评教异常: {result.item.KCM} {str(result.error)}")
+            else:
+                self.messageChanged.emit(self.tr(f"第{done}/{total_count}门课程评教失败: {result.item.KCM}"))
+                logger.warning(f"评教失败: {result.message}")
+            self.progressChanged.emit(10 + done * 90 // total_count)
 
-                for one_data in data:
-                    template.complete(one_data, options, True, default_score=QuestionnaireTemplate.score_to_int(self.scoreAll), default_subjective=self.msgAll)
-                self.progressChanged.emit(progress_base + 60)
-                
-                result, msg = self.judge_.submitQuestionnaire(questionnaire, data)
-                self.progressChanged.emit(progress_base + 80)
-                
-                if result:
-                    success_count += 1
-                    self.messageChanged.emit(self.tr(f"第{i+1}/{total_count}门课程评教成功: {questionnaire.KCM}"))
-                else:
-                    self.messageChanged.emit(self.tr(f"第{i+1}/{total_count}门课程评教失败: {questionnaire.KCM}"))
-                    logger.warning(f"评教失败: {msg}")
-                
-            except Exception as e:
-                self.messageChanged.emit(self.tr(f"第{i+1}/{total_count}门课程评教异常: {questionnaire.KCM}"))
-                logger.error(f"评教异常: {questionnaire.KCM} {str(e)}")
-                
-            self.progressChanged.emit(progress_base + 90)
+        self.messageChanged.emit(self.tr(f"正在评教 {total_count} 门课程..."))
+        pipeline = JudgePipeline(fetch, complete, self.judge_.submitQuestionnaire, fetch_workers=self.FETCH_WORKERS,
+                                 submit_workers=self.SUBMIT_WORKERS)
+        report = pipeline.run(questionnaires, on_result, aborted=lambda: not self.can_run)
+        logger.info("评教完成：成功 %d/%d，各阶段耗时 %s ms", report.succeeded, total_count, report.stages)
+        if report.aborted:
+            return False
 
+        success_count = report.succeeded
         if success_count != total_count:
             self.error.emit("", self.tr(f"所有评教完成，成功{success_count}/{total_count}门"))
 
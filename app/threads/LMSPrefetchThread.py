@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from PyQt5.QtCore import QThread, QObject
+
+from app.utils.account import Account
+from app.utils.log import logger
+from lms import LMSUtil
+from lms.prefetch import LMSDetailPrefetcher
+
+
+class LMSPrefetchThread(QThread):
+    """在后台把活动详情预取到思源学堂请求缓存中，不显示任何进度。"""
+
+    def __init__(self, account: Account, activity_ids: list[int], parent: QObject | None = None) -> None:
+        """
+        :param account: 预取所用的账户
+        :param activity_ids: 按优先级排好的活动 ID
+        :param parent: 父级对象
+        """
+        super().__init__(parent)
+        self.account = account
+        self.activity_ids = list(activity_ids)
+        self.can_run = True
+
+    def cancel(self) -> None:
+        """请求停止预取。正在进行的那一个请求会完成并写入缓存，之后的活动不再请求。"""
+        self.can_run = False
+
+    def _should_continue(self) -> bool:
+        return self.can_run
+
+    def run(self) -> None:
+        """依次预取活动详情。"""
+        session = self.account.session_manager.get_session("lms")
+        # 预取只复用已有的登录状态；登录可能需要用户交互（MFA、扫码），不能在后台静默触发
+        if not session.has_login:
+            return
+
+        try:
+            report = LMSDetailPrefetcher(LMSUtil(session)).prefetch(self.activity_ids,
+                                                                    should_continue=self._should_continue)
+        except Exception:
+            logger.exception("思源学堂活动详情预取失败")
+            return
+        for activity_id, e in report.failed.items():
+            logger.warning("预取活动 %s 的详情失败：%s", activity_id, e)
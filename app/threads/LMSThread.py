@@ -5,6 +5,7 @@ from PyQt5.QtCore import pyqtSignal
 
 from auth import ServerError
 from lms import LMSUtil
+from lms.sync_store import LMSIncrementalSync, LMSSyncStore
 from .ProcessWidget import ProcessThread
 from ..utils import accounts, logger
 from ..utils.mfa import MFACancelledError, MFAUnavailableError
@@ -15,12 +16,15 @@ class LMSAction(Enum):
     LOAD_COURSES = "load_courses"
     LOAD_ACTIVITIES = "load_activities"
     LOAD_ACTIVITY_DETAIL = "load_activity_detail"
+    SYNC_UPDATES = "sync_updates"
 
 
 class LMSThread(ProcessThread):
     coursesLoaded = pyqtSignal(dict, list)
     activitiesLoaded = pyqtSignal(int, list)
     activityDetailLoaded = pyqtSignal(int, dict)
+    # 增量同步完成：同步摘要与本次同步以来的变化（见 LMSSyncStore.changes_since）
+    updatesSynced = pyqtSignal(dict)
 
     def __init__(self, parent=None):
         """初始化 LMS 后台线程。
@@ -33,6 +37,10 @@ class LMSThread(ProcessThread):
         self.action = LMSAction.LOAD_COURSES
         self.course_id: int | None = None
         self.activity_id: int | None = None
+        # 是否忽略 LMSUtil 的请求缓存（用户主动刷新时为 True）
+        self.refresh = False
+        # 增量同步使用的本地存储，仅 SYNC_UPDATES 需要
+        self.sync_store: LMSSyncStore | None = None
 
     @property
     def session(self):
@@ -107,10 +115,29 @@ class LMSThread(ProcessThread):
                     raise ValueError(self.tr("活动 ID 不能为空"))
                 self.messageChanged.emit(self.tr("正在加载活动详情..."))
                 self.progressChanged.emit(40)
-                detail = self.util.get_activity_detail(self.activity_id)
+                detail = self.util.get_activity_detail(self.activity_id, refresh=self.refresh)
                 self.progressChanged.emit(100)
                 self.activityDetailLoaded.emit(self.activity_id, detail)
 
+            elif self.action == LMSAction.SYNC_UPDATES:
+                if self.sync_store is None:
+                    raise ValueError(self.tr("思源学堂缓存未开启"))
+                self.messageChanged.emit(self.tr("正在检查课程更新..."))
+                self.progressChanged.emit(20)
+                report = LMSIncrementalSync(self.util, self.sync_store).sync(should_continue=lambda: self.can_run)
+                if not self.can_run:
+                    self.canceled.emit()
+                    return
+                self.progressChanged.emit(100)
+                self.updatesSynced.emit({
+                    "refreshed_course_ids": report.refreshed_course_ids,
+                    "skipped_course_ids": report.skipped_course_ids,
+                    "courses_changed": not report.courses.identical,
+                    "new_activity_count": len(report.new_activities),
+                    "updated_activity_count": len(report.updated_activities),
+                    "changes": self.sync_store.changes_since(report.started_at),
+                })
+
             else:
                 raise ValueError(self.tr("未知的 LMS 操作"))
 
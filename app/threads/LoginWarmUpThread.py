@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from PyQt5.QtCore import QThread, QObject
+
+from app.utils.account import Account
+from app.utils.log import logger
+from app.utils.session_manager import LoginWarmUpReport
+
+
+class LoginWarmUpThread(QThread):
+    """在后台线程中为当前账号并发预热常用站点的登录状态。"""
+
+    def __init__(self, account: Account, parent: QObject | None = None) -> None:
+        """创建后台登录预热线程。"""
+        super().__init__(parent)
+        self.account = account
+        self.can_run = True
+        self.report: LoginWarmUpReport | None = None
+
+    def cancel(self) -> None:
+        """请求停止预热尚未开始登录的站点。"""
+        self.can_run = False
+
+    def run(self) -> None:
+        """执行一次登录预热。"""
+        try:
+            self.report = self.account.session_manager.warm_up_logins(
+                self.account, should_continue=lambda: self.can_run)
+        except Exception:
+            logger.exception("后台登录预热线程执行失败")
+            return
+
+        for result in self.report.site_results:
+            if result.success:
+                logger.info("登录预热：%s %s，用时 %.2f 秒", result.site_name,
+                            "已登录" if result.performed_login else "登录状态有效", result.elapsed)
+            else:
+                logger.info("登录预热：%s 未完成：%s", result.site_name, result.error)
+        logger.info("登录预热完成，共 %d 个站点，用时 %.2f 秒", len(self.report.site_results), self.report.duration)
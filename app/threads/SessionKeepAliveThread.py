@@ -10,15 +10,22 @@ from app.utils.session_manager import KeepAliveReport
 class SessionKeepAliveThread(QThread):
     """在后台线程中执行当前账号的 Session 保活。"""
 
-    def __init__(self, account: Account, parent: QObject | None = None) -> None:
-        """创建后台 Session 保活线程。"""
+    def __init__(self, account: Account, interval: float | None = None, parent: QObject | None = None) -> None:
+        """
+        创建后台 Session 保活线程。
+        :param account: 需要保活的账号
+        :param interval: 每个站点的保活间隔（秒）。为 None 时对所有已登录站点执行一次保活，否则只保活已经到期的站点
+        :param parent: 父对象
+        """
         super().__init__(parent)
         self.account = account
+        self.interval = interval
         self.report: KeepAliveReport | None = None
 
     def run(self) -> None:
         """执行一次后台 Session 保活。"""
         try:
-            self.report = self.account.session_manager.keep_alive_logged_in_sessions(self.account.uuid)
+            self.report = self.account.session_manager.keep_alive_logged_in_sessions(
+                self.account.uuid, interval=self.interval)
         except Exception:
             logger.exception("后台 Session 保活线程执行失败")
@@ -8,20 +8,29 @@ from enum import Enum
 from PyQt5.QtCore import pyqtSignal
 
 from app.venues.venue import VenueUtil, VenueAPIError
+from app.venues.rush import BookingRush, CaptchaPolicy, booking_outcome
+from app.venues.scanner import AvailabilityIndex, SlotScanner
 from app.threads.ProcessWidget import ProcessThread
 from app.utils import accounts
 
-from captcha_solver import fetch_captcha, detect_gap, gen_track, build_yzm
 
 _log = logging.getLogger("default")
 
 
+def _format_countdown(seconds: float) -> str:
+    seconds = int(seconds + 0.999)
+    hours, rest = divmod(seconds, 3600)
+    return f"{hours}:{rest // 60:02d}:{rest % 60:02d}" if hours else f"{rest // 60:02d}:{rest % 60:02d}"
+
+
 class VenueAction(Enum):
     LOAD_VENUES = "venues"
     LOAD_SLOTS = "slots"
     BOOK = "book"
     LOAD_ORDERS = "orders"
     CANCEL_ORDER = "cancel_order"
+    RUSH = "rush"
+    SCAN = "scan"
 
 
 class VenueThread(ProcessThread):
@@ -32,6 +41,9 @@ class VenueThread(ProcessThread):
     ordersLoaded = pyqtSignal(list)    # list[OrderInfo]
     orderCanceled = pyqtSignal(bool, str, str)  # (success, message, orderid)
     bookingResult = pyqtSignal(bool, str, object)  # (success, message, info|None)
+    scanFinished = pyqtSignal(list, list)  # (matches [(VenueInfo, AreaSlot)], changes [SlotChange])
+
+    CAPTCHA_BUDGET = 10.0  # 预订时处理验证码的总时限（秒）
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -41,6 +53,14 @@ class VenueThread(ProcessThread):
         self.date_str: str = ""
         self._selections: list[tuple[int, int]] = []  # [(area_id, stock_id)]
         self._order_id: str = ""
+        self._rush_date: str = ""
+        self._rush_wanted: list[tuple[str, str | None]] = []  # [(time_slot, area_name|None)]
+        self._rush_release_at: float = 0.0
+        self._scan_venues: list = []  # list[VenueInfo]
+        self._scan_dates: list[str] = []
+        self._scan_query: dict = {}
+        # 空闲时段索引在多次扫描间保留，用于发现新出现的空闲时段
+        self.index = AvailabilityIndex()
 
     @property
     def session(self):
@@ -74,6 +94,34 @@ class VenueThread(ProcessThread):
         self.start()
         return True
 
+    def do_rush(self, venue_id: int, date_str: str,
+                wanted: list[tuple[str, str | None]], release_at: float) -> bool:
+        """在放号时刻 release_at（Unix 时间戳）抢订 date_str 的目标时段。线程忙时返回 False。"""
+        if not self._ensure_idle():
+            return False
+        self.venue_id = venue_id
+        self._rush_date = date_str
+        self._rush_wanted = wanted
+        self._rush_release_at = release_at
+        self.action = VenueAction.RUSH
+        self.start()
+        return True
+
+    def do_scan(self, venues: list, dates: list[str], keyword: str = "",
+                start_after: str | None = None, start_before: str | None = None) -> bool:
+        """并发扫描 venues × dates 的空闲时段并按条件查询。线程忙时返回 False。"""
+        if not self._ensure_idle():
+            return False
+        self._scan_venues = venues
+        self._scan_dates = dates
+        self._scan_query = {"keyword": keyword, "start_after": start_after, "start_before": start_before}
+        self.action = VenueAction.SCAN
+        self.start()
+        return True
+
+    def clear_scan_index(self):
+        self.index = AvailabilityIndex()
+
     def load_orders(self) -> bool:
         """加载全部订单。线程忙时返回 False。"""
         if not self._ensure_idle():
@@ -90,6 +138,27 @@ class VenueThread(ProcessThread):
         self.action = VenueAction.CANCEL_ORDER
         self.start()
 
+    def _emitBooked(self, result: dict):
+        obj = result.get("object") if isinstance(result.get("object"), dict) else {}
+        oid = obj.get("orderid", "")
+        info = {"orderid": oid, "price": obj.get("price", 0)}
+        self.bookingResult.emit(True, self.tr("预订成功！订单号：{0}").format(oid), info)
+
+    def _emitBookingFailed(self, result: dict):
+        msg = result.get("message", "")
+        self.bookingResult.emit(
+            False, msg or self.tr("预订失败（{0}）").format(result.get("result", "")), None)
+
+    def _onRushStage(self, stage: str, seconds: float):
+        if stage == "waiting":
+            self.messageChanged.emit(self.tr("等待放号，剩余 {0}").format(_format_countdown(seconds)))
+        elif stage == "prefetching":
+            self.messageChanged.emit(self.tr("正在预先识别验证码，距放号 {0}").format(_format_countdown(seconds)))
+        elif stage == "polling":
+            self.messageChanged.emit(self.tr("已到放号时间，正在查询时段…"))
+        elif stage == "booking":
+            self.messageChanged.emit(self.tr("正在提交预订…"))
+
     def run(self):
         self.can_run = True
         acc = accounts.current
@@ -160,51 +229,71 @@ class VenueThread(ProcessThread):
 
             elif self.action == VenueAction.BOOK:
                 self.messageChanged.emit(self.tr("正在处理验证码…"))
-                # 最多重试 3 次（验证码获取失败也算一次，继续重试）
-                for attempt in range(3):
-                    try:
-                        # 取验证码（使用 session 的底层 HTTP 会话）
-                        raw = self.session.backend.session
-                        cid, bg, sl = fetch_captcha(raw)
-                        move_x, conf = detect_gap(bg, sl)
-                        track = gen_track(move_x)
-                        yzm = build_yzm(track, cid)
-                    except Exception:
-                        _log.info("book: captcha fetch failed (attempt %d), retry",
-                                  attempt + 1)
-                        continue
+                # 默认每张验证码只提交一次，识别错误时换一张；开启“验证码多候选重试”后先提交同一张验证码的第二个候选位置。
+                # 最多获取 3 张验证码（使用 session 的底层 HTTP 会话），总耗时不超过 CAPTCHA_BUDGET 秒
+                attempts = CaptchaPolicy.from_config().attempts(self.session.backend.session,
+                                                                budget=self.CAPTCHA_BUDGET)
+                for attempt, (yzm, candidate) in enumerate(attempts, 1):
                     if aborted():
                         self.canceled.emit()
                         return
 
                     self.messageChanged.emit(
-                        self.tr("正在提交预订（第 {0} 次）…").format(attempt + 1))
+                        self.tr("正在提交预订（第 {0} 次）…").format(attempt))
                     result = self.util.book(
                         self.venue_id, self._selections, yzm)
 
-                    code = result.get("result", "")
-                    msg = result.get("message", "")
-                    has_order = (isinstance(result.get("object"), dict)
-                                 and result["object"].get("orderid"))
-
-                    if code == "2" or has_order:
-                        oid = result.get("object", {}).get("orderid", "")
-                        price = result.get("object", {}).get("price", 0)
-                        info = {"orderid": oid, "price": price}
-                        self.bookingResult.emit(
-                            True, self.tr("预订成功！订单号：{0}").format(oid), info)
+                    outcome = booking_outcome(result)
+                    if outcome == "booked":
+                        self._emitBooked(result)
                         self.hasFinished.emit()
                         return
-                    elif "验证码" in msg or "captcha" in msg.lower():
+                    elif outcome == "captcha":
+                        _log.info("book: captcha rejected (attempt %d, move_x=%d, conf=%.3f), retry",
+                                  attempt, candidate.move_x, candidate.confidence)
                         continue  # 重试
                     else:
-                        self.bookingResult.emit(
-                            False, msg or self.tr("预订失败（{0}）").format(code), None)
+                        self._emitBookingFailed(result)
                         self.hasFinished.emit()
                         return
 
+                if attempts.fetch_errors:
+                    _log.info("book: captcha fetch failed %d time(s)", attempts.fetch_errors)
                 self.bookingResult.emit(False, self.tr("验证码识别失败，请重试"), None)
 
+            elif self.action == VenueAction.SCAN:
+                self.messageChanged.emit(self.tr("正在查询 {0} 个场馆 × {1} 天的空闲时段…").format(
+                    len(self._scan_venues), len(self._scan_dates)))
+                report = SlotScanner(self.util, self.index).scan(
+                    self._scan_venues, self._scan_dates, aborted=aborted)
+                if aborted():
+                    self.canceled.emit()
+                    return
+                _log.info("scan: %d requests, %d errors, %.2fs, %d changes",
+                          report.requests, report.errors, report.elapsed, len(report.changes))
+                matches = [item for date_str in self._scan_dates
+                           for item in self.index.query(date_str=date_str, **self._scan_query)]
+                self.scanFinished.emit(matches, report.changes)
+
+            elif self.action == VenueAction.RUSH:
+                rush = BookingRush(self.util, self.session.backend.session, self.venue_id,
+                                   self._rush_date, self._rush_wanted, self._rush_release_at,
+                                   captcha_policy=CaptchaPolicy.from_config())
+                report = rush.run(self._onRushStage, aborted)
+                _log.info("rush: outcome=%s polls=%d submissions=%d stages=%s pool=%s",
+                          report.outcome, report.polls, report.submissions, report.stages, report.pool)
+                if report.outcome == "aborted":
+                    self.canceled.emit()
+                    return
+                if report.outcome == "booked":
+                    self._emitBooked(report.result)
+                elif report.outcome == "failed":
+                    self._emitBookingFailed(report.result)
+                elif report.outcome == "not_open":
+                    self.bookingResult.emit(False, self.tr("放号后未查询到目标时段"), None)
+                else:
+                    self.bookingResult.emit(False, self.tr("验证码识别失败，请重试"), None)
+
             self.hasFinished.emit()
 
         except VenueAPIError as e:
@@ -282,6 +282,9 @@ class Config(QConfig):
                                        True, OptionsValidator([True, False]), BooleanSerializer())
     venueCacheEnable = OptionsConfigItem("Settings", "venue_cache_enable",
                                          True, OptionsValidator([True, False]), BooleanSerializer())
+    # 预订场馆时是否使用多候选验证码识别，并在换验证码前提交同一张验证码的第二个候选位置（实验性）
+    venueCaptchaRanking = OptionsConfigItem("Settings", "venue_captcha_ranking",
+                                            False, OptionsValidator([True, False]), BooleanSerializer())
     lmsBatchDownloadConcurrency = OptionsConfigItem("Settings", "lms_batch_concurrency",
                                                     4, OptionsValidator([1, 2, 3, 4, 5, 6]),
                                                     None)
@@ -359,6 +362,8 @@ class Config(QConfig):
                                    BooleanSerializer())
     keepSessionOnExit = OptionsConfigItem("Settings", "keep_session_on_exit", True,
                                           OptionsValidator([True, False]), BooleanSerializer())
+    trustedSessionRestore = OptionsConfigItem("Settings", "trusted_session_restore", True,
+                                              OptionsValidator([True, False]), BooleanSerializer())
     sessionKeepAliveEnabled = OptionsConfigItem("Settings", "session_keep_alive_enabled", True,
                                                OptionsValidator([True, False]), BooleanSerializer())
     sessionKeepAliveInterval = OptionsConfigItem("Settings", "session_keep_alive_interval",
@@ -368,6 +373,8 @@ class Config(QConfig):
                                                                   SessionKeepAliveInterval.MINUTES_15,
                                                                   SessionKeepAliveInterval.MINUTES_30]),
                                                 EnumSerializer(SessionKeepAliveInterval))
+    loginWarmUpEnabled = OptionsConfigItem("Settings", "login_warm_up_enabled", False,
+                                           OptionsValidator([True, False]), BooleanSerializer())
     enableQRCodeLogin = OptionsConfigItem("Settings", "enable_qrcode_login", False,
                                           OptionsValidator([True, False]), BooleanSerializer())
     # 同样不是设置项目；这个项目存储登录时使用的 fp_visitor_id，以保证每次启动程序后登录时使用相同的 ID
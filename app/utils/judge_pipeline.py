@@ -0,0 +1,125 @@
+"""评教流水线：并发拉取所有问卷，逐份填写后以有限并发提交，并统计各阶段耗时。"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Generic, Iterable, TypeVar
+
+Item = TypeVar("Item")
+
+
+@dataclass
+class JudgeResult(Generic[Item]):
+    """一份问卷的评教结果。error 为拉取、填写或提交时抛出的异常。"""
+
+    item: Item
+    ok: bool
+    message: str = ""
+    error: BaseException | None = None
+
+
+@dataclass
+class JudgeReport(Generic[Item]):
+    """一次批量评教的结果。"""
+
+    results: list[JudgeResult[Item]] = field(default_factory=list)
+    # 各阶段耗时（毫秒）：fetch / complete / submit 为所有问卷该阶段耗时之和，total 为整体耗时
+    stages: dict[str, float] = field(default_factory=dict)
+    aborted: bool = False
+
+    @property
+    def succeeded(self) -> int:
+        return sum(result.ok for result in self.results)
+
+    @property
+    def errors(self) -> list[BaseException]:
+        return [result.error for result in self.results if result.error is not None]
+
+
+class JudgePipeline(Generic[Item]):
+    """把“拉取题目 -> 填写 -> 提交”三个阶段流水线化。
+
+    所有问卷的拉取同时开始（最多 ``fetch_workers`` 个并发），任何一份拉取完成后立即在调用线程中填写，
+    再交给最多 ``submit_workers`` 个并发的提交线程。填写在调用线程中串行执行，因此可以放心复用模版等共享对象。
+    单份问卷出错只记入该问卷的结果，不影响其他问卷。
+
+    :param fetch: 拉取问卷题目 ``fetch(item) -> fetched``，在线程池中执行
+    :param complete: 填写问卷 ``complete(item, fetched) -> answer``
+    :param submit: 提交问卷 ``submit(item, answer) -> (是否成功, 提示信息)``，在线程池中执行
+    """
+
+    def __init__(self, fetch: Callable[[Item], Any], complete: Callable[[Item, Any], Any],
+                 submit: Callable[[Item, Any], tuple[bool, str]], fetch_workers: int = 4, submit_workers: int = 2):
+        self.fetch = fetch
+        self.complete = complete
+        self.submit = submit
+        self.fetch_workers = fetch_workers
+        self.submit_workers = submit_workers
+
+    @staticmethod
+    def _timed(stage: Callable, *args) -> tuple[Any, float]:
+        started = time.perf_counter()
+        value = stage(*args)
+        return value, (time.perf_counter() - started) * 1000
+
+    def run(self, items: Iterable[Item], on_result: Callable[[JudgeResult[Item]], None] | None = None,
+            aborted: Callable[[], bool] = lambda: False) -> JudgeReport[Item]:
+        """评教全部问卷，返回结果与各阶段耗时。
+
+        :param on_result: 每得到一份问卷的结果时在调用线程中调用，顺序为完成顺序
+        :param aborted: 返回 True 时不再填写和提交新的问卷，已经发出的提交会等待其完成并计入结果
+        """
+        items = list(items)
+        report: JudgeReport[Item] = JudgeReport(stages={"fetch": 0.0, "complete": 0.0, "submit": 0.0})
+        started = time.perf_counter()
+
+        def finish(result: JudgeResult[Item]) -> None:
+            report.results.append(result)
+            if on_result is not None:
+                on_result(result)
+
+        if items:
+            fetcher = concurrent.futures.ThreadPoolExecutor(max_workers=min(self.fetch_workers, len(items)))
+            submitter = concurrent.futures.ThreadPoolExecutor(max_workers=min(self.submit_workers, len(items)))
+            try:
+                owners: dict[concurrent.futures.Future, tuple[str, Item]] = {
+                    fetcher.submit(self._timed, self.fetch, item): ("fetch", item) for item in items
+                }
+                while owners:
+                    if not report.aborted and aborted():
+                        # 丢弃未完成的拉取，但已经发出的提交仍要等待其结果
+                        report.aborted = True
+                        for future, (stage, _) in list(owners.items()):
+                            if future.cancel() or stage == "fetch":
+                                del owners[future]
+                        continue
+                    done, _ = concurrent.futures.wait(owners, timeout=0.2,
+                                                      return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        stage, item = owners.pop(future)
+                        try:
+                            value, elapsed = future.result()
+                        except Exception as e:
+                            finish(JudgeResult(item, False, str(e), e))
+                            continue
+                        report.stages[stage] += elapsed
+                        if stage == "submit":
+                            ok, message = value
+                            finish(JudgeResult(item, ok, message))
+                            continue
+                        try:
+                            answer, elapsed = self._timed(self.complete, item, value)
+                        except Exception as e:
+                            finish(JudgeResult(item, False, str(e), e))
+                            continue
+                        report.stages["complete"] += elapsed
+                        owners[submitter.submit(self._timed, self.submit, item, answer)] = ("submit", item)
+            finally:
+                fetcher.shutdown(wait=True, cancel_futures=True)
+                submitter.shutdown(wait=True, cancel_futures=True)
+
+        report.stages = {stage: round(value, 1) for stage, value in report.stages.items()}
+        report.stages["total"] = round((time.perf_counter() - started) * 1000, 1)
+        return report
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import hashlib
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable
+
+
+# 计算出的指纹在这么多秒内直接复用，避免频繁执行读取 SSID 等子进程
+NETWORK_FINGERPRINT_MAX_AGE = 15.0
+# 读取 SSID 的子进程超时时间（秒）
+SSID_COMMAND_TIMEOUT = 1.0
+
+# 用于查询出口地址的公网地址。只用来让系统选择路由，UDP connect 不会发送任何数据包
+_ROUTE_PROBE_TARGETS = (
+    (socket.AF_INET, ("223.5.5.5", 53)),
+    (socket.AF_INET6, ("2400:3200::1", 53)),
+)
+
+_fingerprint_lock = threading.Lock()
+_cached_fingerprint = ""
+_cached_fingerprint_time = 0.0
+
+
+def _outbound_addresses() -> str:
+    """返回访问公网时系统会使用的本机 IPv4/IPv6 地址。"""
+    addresses = []
+    for family, target in _ROUTE_PROBE_TARGETS:
+        try:
+            with socket.socket(family, socket.SOCK_DGRAM) as sock:
+                sock.connect(target)
+                addresses.append(sock.getsockname()[0])
+        except OSError:
+            continue
+    return ",".join(addresses)
+
+
+def _default_gateway() -> str:
+    """返回默认网关。目前只在可以直接读取路由表的 Linux 上可用。"""
+    try:
+        with open("/proc/net/route", encoding="ascii") as file:
+            lines = file.readlines()[1:]
+    except OSError:
+        return ""
+    for line in lines:
+        fields = line.split()
+        if len(fields) >= 3 and fields[1] == "00000000":
+            gateway = bytes.fromhex(fields[2])[::-1]
+            return f"{fields[0]}:{socket.inet_ntoa(gateway)}"
+    return ""
+
+
+def _wifi_ssid() -> str:
+    """返回当前连接的 Wi-Fi 名称，无法获取时返回空字符串。"""
+    if sys.platform == "win32":
+        command = ["netsh", "wlan", "show", "interfaces"]
+    elif sys.platform == "darwin":
+        command = ["networksetup", "-getairportnetwork", "en0"]
+    else:
+        command = ["iwgetid", "-r"]
+    if shutil.which(command[0]) is None:
+        return ""
+    try:
+        completed = subprocess.run(
+            command,
+            capture_output=True,
+            text=True,
+            timeout=SSID_COMMAND_TIMEOUT,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+    except (OSError, subprocess.SubprocessError):
+        return ""
+    if sys.platform != "win32":
+        return completed.stdout.strip()
+    for line in completed.stdout.splitlines():
+        key, _, value = line.partition(":")
+        if key.strip() == "SSID":
+            return value.strip()
+    return ""
+
+
+# 组成网络指纹的各项信息。每一项都只读取本机状态，不发起网络请求
+NETWORK_FINGERPRINT_COLLECTORS: tuple[Callable[[], str], ...] = (_outbound_addresses, _default_gateway, _wifi_ssid)
+
+
+def compute_network_fingerprint() -> str:
+    """
+    计算当前网络环境的指纹：出口地址、默认网关与 Wi-Fi 名称的摘要。
+    网络环境切换（例如从校园网切换到家里的网络）时指纹会变化。所有信息都无法获取时返回空字符串。
+    """
+    parts = []
+    for collector in NETWORK_FINGERPRINT_COLLECTORS:
+        try:
+            parts.append(collector())
+        except Exception:
+            parts.append("")
+    if not any(parts):
+        return ""
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def current_network_fingerprint(*, max_age: float = NETWORK_FINGERPRINT_MAX_AGE) -> str:
+    """
+    返回当前网络环境的指纹，max_age 秒内重复调用时复用上一次的结果。
+    :param max_age: 指纹缓存的有效期（秒），为 0 时总是重新计算
+    """
+    global _cached_fingerprint, _cached_fingerprint_time
+
+    with _fingerprint_lock:
+        now = time.monotonic()
+        if _cached_fingerprint_time and now - _cached_fingerprint_time < max_age:
+            return _cached_fingerprint
+        _cached_fingerprint = compute_network_fingerprint()
+        _cached_fingerprint_time = now
+        return _cached_fingerprint
+
+
+def last_network_fingerprint(*, max_age: float | None = None) -> str | None:
+    """
+    返回最近一次计算出的网络指纹，不重新计算，也不等待正在进行的计算。
+    供界面线程等不能执行子进程的调用者使用，结果可能比 current_network_fingerprint 旧。
+    :param max_age: 指纹计算于这么多秒之前时视为未知；为 None 时不限制
+    :return: 指纹；从未计算过或已经过旧时返回 None
+    """
+    computed_at = _cached_fingerprint_time
+    fingerprint = _cached_fingerprint
+    if not computed_at or (max_age is not None and time.monotonic() - computed_at >= max_age):
+        return None
+    return fingerprint
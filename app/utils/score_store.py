@@ -0,0 +1,144 @@
+"""成绩快照与增量比较：记录上次查询到的每条成绩及其内容摘要，计算新增、变化与消失的成绩。"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Mapping
+
+# 课程名末尾的课程号，如 "生命科学基础I(BIOL200913)"
+_COURSE_CODE = re.compile(r"[(（]\s*([A-Za-z0-9]+)\s*[)）]\s*$")
+# 保存的变化记录条数
+HISTORY_LIMIT = 50
+
+
+def course_name(record: Mapping) -> str:
+    """去掉末尾课程号后的课程名"""
+    return _COURSE_CODE.sub("", str(record.get("courseName", ""))).strip()
+
+
+def score_key(record: Mapping) -> str:
+    """成绩的键：学期|课程号|考试性质。
+
+    没有课程号时使用课程名；研究生成绩没有学期，使用考试日期。初修（以及没有考试性质的成绩单格式）的考试性质记为空，
+    使同一门课程在教务系统格式和成绩单格式之间切换时键不变。
+    """
+    match = _COURSE_CODE.search(str(record.get("courseName", "")))
+    code = record.get("courseCode") or (match.group(1) if match else course_name(record))
+    term = record.get("term") or record.get("examDate") or ""
+    exam = record.get("examProp") or ""
+    if exam == "初修":
+        exam = ""
+    return f"{term}|{code}|{exam}"
+
+
+def score_hash(record: Mapping) -> str:
+    """成绩内容的摘要，字段顺序不影响结果"""
+    raw = json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class ScoreDiff:
+    """两次成绩查询之间的变化"""
+
+    new: list[dict] = field(default_factory=list)
+    # (旧成绩, 新成绩)
+    changed: list[tuple[dict, dict]] = field(default_factory=list)
+    removed: list[dict] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.new or self.changed or self.removed)
+
+    def json(self) -> dict:
+        return {
+            "new": [course_name(one) for one in self.new],
+            "changed": [course_name(new) for _, new in self.changed],
+            "removed": [course_name(one) for one in self.removed],
+        }
+
+
+class ScoreStore:
+    """按 :func:`score_key` 保存的成绩快照，以及最近若干次变化的记录。"""
+
+    def __init__(self, entries: dict[str, dict] | None = None, history: list[dict] | None = None):
+        # 键 -> {"hash": 内容摘要, "record": 成绩}
+        self.entries = entries or {}
+        self.history = history or []
+
+    @classmethod
+    def from_json(cls, data: Mapping) -> "ScoreStore":
+        return cls(dict(data.get("entries", {})), list(data.get("history", [])))
+
+    def json(self) -> dict:
+        return {"entries": self.entries, "history": self.history}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def reset(self, scores: Iterable[Mapping]) -> None:
+        """用一次查询结果重建快照，不记录变化"""
+        self.entries = {score_key(record): {"hash": score_hash(record), "record": dict(record)}
+                        for record in scores if isinstance(record, Mapping)}
+
+    def diff(self, scores: Iterable[Mapping], terms: Iterable[str] | None = None) -> ScoreDiff:
+        """
+        比较一次查询结果与快照，不修改快照。
+        :param scores: 查询到的成绩列表
+        :param terms: 本次查询的学期。只查询了部分学期时，其他学期的成绩不算作消失；None 表示查询了全部成绩
+        """
+        result = ScoreDiff()
+        seen = set()
+        for record in scores:
+            if not isinstance(record, Mapping):
+                continue
+            key = score_key(record)
+            seen.add(key)
+            old = self.entries.get(key)
+            if old is None:
+                result.new.append(dict(record))
+            elif old["hash"] != score_hash(record):
+                result.changed.append((old["record"], dict(record)))
+
+        scope = None if terms is None else set(terms)
+        for key, old in self.entries.items():
+            if key in seen:
+                continue
+            if scope is None or old["record"].get("term") in scope:
+                result.removed.append(old["record"])
+
+        # 同一学期、同名的课程先消失又出现（例如从成绩单格式变为教务系统格式），视为成绩变化
+        if result.new and result.removed:
+            removed = {(one.get("term"), course_name(one)): one for one in result.removed}
+            new = []
+            for record in result.new:
+                old = removed.pop((record.get("term"), course_name(record)), None)
+                if old is None:
+                    new.append(record)
+                else:
+                    result.changed.append((old, record))
+            result.new = new
+            result.removed = list(removed.values())
+        return result
+
+    def apply(self, diff: ScoreDiff, timestamp: float | None = None) -> None:
+        """把变化写入快照，并记录到历史中（没有变化时不记录）"""
+        if not diff:
+            return
+        for old in diff.removed:
+            self.entries.pop(score_key(old), None)
+        for old, _ in diff.changed:
+            self.entries.pop(score_key(old), None)
+        for record in [*diff.new, *(new for _, new in diff.changed)]:
+            self.entries[score_key(record)] = {"hash": score_hash(record), "record": record}
+        self.history.append({"timestamp": time.time() if timestamp is None else timestamp, **diff.json()})
+        del self.history[:-HISTORY_LIMIT]
+
+    def update(self, scores: Iterable[Mapping], terms: Iterable[str] | None = None) -> ScoreDiff:
+        """比较并写入快照，返回变化"""
+        diff = self.diff(scores, terms)
+        self.apply(diff)
+        return diff
@@ -1,17 +1,30 @@
 from __future__ import annotations
 
+import concurrent.futures
 from contextlib import ExitStack
 from dataclasses import dataclass
+import queue
+import random
 import threading
 import time
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable, Sequence
 
 import requests
 
 from app.sessions.common_session import KeepAliveStatus
 from auth import is_safety_verify_page
 from app.sessions.session_backend import AccessMode, SessionBackend
-from app.utils.session_persistence import AccountSessionSnapshot, SessionPersistenceStore, SiteSnapshot
+from app.utils.network_fingerprint import (
+    NETWORK_FINGERPRINT_MAX_AGE,
+    current_network_fingerprint,
+    last_network_fingerprint,
+)
+from app.utils.session_persistence import (
+    AccountSessionSnapshot,
+    SessionPersistenceStore,
+    SiteSnapshot,
+    snapshot_fingerprint,
+)
 
 if TYPE_CHECKING:
     from app.utils.account import Account
@@ -28,6 +41,8 @@ class KeepAliveSiteResult:
     site_name: str
     access_mode: AccessMode
     status: KeepAliveStatus
+    # 本次保活请求耗时（秒）；未实际发出请求时为 0
+    latency: float = 0.0
 
 
 @dataclass(frozen=True)
@@ -37,6 +52,54 @@ class KeepAliveReport:
     account_uuid: str
     webvpn_status: KeepAliveStatus | None
     site_results: tuple[KeepAliveSiteResult, ...]
+    # WebVPN 后端本身保活验证的耗时（秒）
+    webvpn_latency: float = 0.0
+    # 整轮保活的总耗时（秒）
+    duration: float = 0.0
+
+    @property
+    def max_latency(self) -> float:
+        """本轮保活中最慢的一个站点的耗时（秒）。"""
+        return max((result.latency for result in self.site_results), default=0.0)
+
+
+@dataclass(frozen=True)
+class LoginWarmUpSiteResult:
+    """记录单个站点的一次登录预热结果。"""
+
+    site_key: str
+    site_name: str
+    access_mode: AccessMode
+    # 站点是否已处于可用的登录状态
+    success: bool
+    # 是否实际执行了登录流程；为 False 表示原有登录态验证通过
+    performed_login: bool = False
+    # 预热该站点的耗时（秒）
+    elapsed: float = 0.0
+    error: str | None = None
+
+
+@dataclass(frozen=True)
+class LoginWarmUpReport:
+    """记录当前账号一次登录预热的整体结果。"""
+
+    account_uuid: str
+    site_results: tuple[LoginWarmUpSiteResult, ...]
+    # 整轮预热的总耗时（秒）
+    duration: float = 0.0
+    canceled: bool = False
+
+
+class _NonInteractiveMFAProvider:
+    """后台预热登录使用的 MFA provider：遇到两步验证时直接放弃，而不是在用户没有操作时弹出对话框。"""
+
+    def handle(self, context: object, request: object) -> bool:
+        from app.utils.mfa import MFAUnavailableError
+
+        raise MFAUnavailableError("后台预热登录不处理 MFA 验证")
+
+    def report_send_result(self, request: object, success: bool, message: str = "") -> None:
+        pass
 
 
 class WebVPNBackendUnknownError(RuntimeError):
@@ -51,6 +114,25 @@ class SessionManager:
     """
     # 类变量，用于存放全局注册的 session 类
     sessions: dict[str, type[CommonLoginSession]] = {}
+    # 同一后端内并发执行站点保活的最大线程数
+    KEEP_ALIVE_MAX_WORKERS = 4
+    # 站点保活间隔的随机抖动比例，避免所有站点总是在同一时刻被集中访问
+    KEEP_ALIVE_JITTER = 0.2
+    # 后端正在登录而跳过保活（BUSY）的站点，在这么多秒后重试，而不是推迟整个保活间隔
+    KEEP_ALIVE_BUSY_RETRY = 30.0
+    # 登录预热并发登录站点的最大线程数
+    WARM_UP_MAX_WORKERS = 4
+    # 没有历史登录记录时，登录预热默认登录的站点
+    DEFAULT_WARM_UP_SITES = ("jwxt", "lms", "attendance")
+    DEFAULT_POSTGRADUATE_WARM_UP_SITES = ("gmis", "lms", "attendance")
+    # 无法获取网络指纹时，访问方式探测结果的有效期（秒）
+    ACCESS_PROBE_TTL = 5 * 60
+    # 网络指纹没有变化时，访问方式探测结果的最长有效期（秒）
+    ACCESS_PROBE_FINGERPRINT_TTL = 30 * 60
+    # WebVPN 入口先于直连探测成功后，再等待直连探测结果的时间（秒）
+    ACCESS_PROBE_WEBVPN_GRACE = 1.5
+    # 用于判断 WebVPN 入口是否可达的地址
+    WEBVPN_PROBE_URL = "https://webvpn.xjtu.edu.cn/"
 
     def __init__(self) -> None:
         """
@@ -67,8 +149,15 @@ class SessionManager:
         self.qrcode_login_provider: QRCodeLoginProvider | None = None
         self._access_probe_result: AccessMode | None = None
         self._access_probe_time = 0.0
+        # 探测时的网络指纹；为空时表示无法获取指纹，只按 ACCESS_PROBE_TTL 判断有效期
+        self._access_probe_fingerprint = ""
         self._access_probe_generation = 0
         self._access_probe_lock = threading.RLock()
+        # 站点名称 -> 下一次需要保活的时间戳
+        self._keep_alive_due: dict[str, float] = {}
+        self._keep_alive_lock = threading.Lock()
+        # 最近一次读取或写入磁盘的快照内容摘要，内容没有变化时不重新写入
+        self._persisted_fingerprint: str | None = None
 
     def register(self, class_: type[CommonLoginSession], name: str, allow_override: bool = True) -> None:
         """
@@ -146,6 +235,10 @@ class SessionManager:
         """获取指定访问方式对应的共享后端。"""
         return self.backends[access_mode]
 
+    def transport_stats(self) -> dict[str, dict]:
+        """返回各访问方式后端的连接使用统计，键为访问方式的值。"""
+        return {mode.value: backend.transport_stats() for mode, backend in self.backends.items()}
+
     def resolve_access_mode(self, *, force_refresh: bool = False,
                             preferred: AccessMode | None = None) -> AccessMode:
         """根据用户设置和网络探测结果解析本次校内系统访问方式。"""
@@ -160,22 +253,35 @@ class SessionManager:
         if policy == cfg.NetworkAccessPolicy.WEBVPN:
             return AccessMode.WEBVPN
 
+        fingerprint = current_network_fingerprint()
         with self._access_probe_lock:
-            now = time.time()
-            if not force_refresh and self._access_probe_result is not None and now - self._access_probe_time < 5 * 60:
+            if not force_refresh and self._is_access_probe_fresh(fingerprint):
                 return self._access_probe_result
             if force_refresh:
                 self._access_probe_generation += 1
             generation = self._access_probe_generation
 
-        mode = AccessMode.NORMAL if self.can_reach_campus_network() else AccessMode.WEBVPN
+        mode = self.probe_access_mode()
         with self._access_probe_lock:
             if generation != self._access_probe_generation:
                 return mode
             self._access_probe_result = mode
             self._access_probe_time = time.time()
+            self._access_probe_fingerprint = fingerprint
         return mode
 
+    def _is_access_probe_fresh(self, fingerprint: str | None) -> bool:
+        """
+        判断缓存的探测结果是否仍然可用。调用者需要持有 _access_probe_lock，因此这里不计算指纹。
+        :param fingerprint: 当前网络指纹；为 None 时表示不知道当前指纹，只按 ACCESS_PROBE_TTL 判断有效期
+        """
+        if self._access_probe_result is None:
+            return False
+        age = time.time() - self._access_probe_time
+        if not self._access_probe_fingerprint or fingerprint is None:
+            return age < self.ACCESS_PROBE_TTL
+        return fingerprint == self._access_probe_fingerprint and age < self.ACCESS_PROBE_FINGERPRINT_TTL
+
     def resolve_access_mode_for_site(self, site: CommonLoginSession | type[CommonLoginSession], *,
                                      force_refresh: bool = False,
                                      preferred: AccessMode | None = None) -> AccessMode:
@@ -199,10 +305,14 @@ class SessionManager:
         return AccessMode.NORMAL
 
     def get_cached_access_probe_result(self) -> AccessMode | None:
-        """读取有效期内的自动访问探测缓存。"""
+        """
+        读取有效期内的自动访问探测缓存。
+        会在界面线程调用，因此不执行读取 SSID 等子进程：只有最近计算过的网络指纹（由后台的 resolve_access_mode
+        刷新）才用于延长有效期，否则只按 ACCESS_PROBE_TTL 判断，切换网络后不会长时间返回旧的访问方式。
+        """
+        fingerprint = last_network_fingerprint(max_age=NETWORK_FINGERPRINT_MAX_AGE)
         with self._access_probe_lock:
-            now = time.time()
-            if self._access_probe_result is None or now - self._access_probe_time >= 5 * 60:
+            if not self._is_access_probe_fresh(fingerprint):
                 return None
             return self._access_probe_result
 
@@ -242,6 +352,7 @@ class SessionManager:
             self._access_probe_generation += 1
             self._access_probe_result = None
             self._access_probe_time = 0.0
+            self._access_probe_fingerprint = ""
 
     def handle_access_policy_changed(self, preferred: AccessMode | None = None) -> None:
         """在访问策略切换后清理依赖旧访问方式的站点恢复态。"""
@@ -301,8 +412,56 @@ class SessionManager:
         except requests.RequestException:
             return False
 
+    def can_reach_webvpn(self, *, timeout: float = 10.0) -> bool:
+        """判断当前网络是否可以访问 WebVPN 入口。"""
+        try:
+            response = requests.get(self.WEBVPN_PROBE_URL, allow_redirects=False, timeout=timeout)
+            try:
+                return response.status_code < 500
+            finally:
+                response.close()
+        except requests.RequestException:
+            return False
+
+    def probe_access_mode(self, *, timeout: float = 10.0) -> AccessMode:
+        """
+        同时探测直连与 WebVPN 入口，判断校内系统应当使用的访问方式。
+        直连探测的结果总是优先：直连成功时使用直连，直连失败时使用 WebVPN。
+        校外网络下直连探测往往要等到超时才失败，因此 WebVPN 入口先探测成功后，
+        只再等待 ACCESS_PROBE_WEBVPN_GRACE 秒，直连仍未成功就判定为校外。
+        """
+        results: queue.Queue[tuple[AccessMode, bool]] = queue.Queue()
+
+        def run(mode: AccessMode, probe: Callable[..., bool]) -> None:
+            try:
+                reachable = probe(timeout=timeout)
+            except Exception:
+                reachable = False
+            results.put((mode, reachable))
+
+        # 使用守护线程：判定完成后不再等待另一个探测结束
+        for mode, probe in ((AccessMode.NORMAL, self.can_reach_campus_network),
+                            (AccessMode.WEBVPN, self.can_reach_webvpn)):
+            threading.Thread(target=run, args=(mode, probe), daemon=True).start()
+
+        # 比请求本身的超时稍长，留出线程调度的余量
+        deadline = time.monotonic() + timeout + 1.0
+        for _ in range(2):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                mode, reachable = results.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if mode == AccessMode.NORMAL:
+                return AccessMode.NORMAL if reachable else AccessMode.WEBVPN
+            if reachable:
+                deadline = min(deadline, time.monotonic() + self.ACCESS_PROBE_WEBVPN_GRACE)
+        return AccessMode.WEBVPN
+
     def start_background_access_probe(self) -> None:
-        """在自动访问模式下后台预热当前账号的网络探测结果。"""
+        """在自动访问模式下后台预热当前账号的网络探测结果。网络环境没有变化时不会重新探测。"""
         from app.utils.config import cfg
         from app.utils.log import logger
 
@@ -311,7 +470,8 @@ class SessionManager:
 
         def worker() -> None:
             try:
-                mode = self.resolve_access_mode(force_refresh=True)
+                # 网络指纹没有变化时直接使用缓存的探测结果
+                mode = self.resolve_access_mode()
                 logger.info("校内系统访问模式自动探测完成：%s", mode.value)
             except Exception:
                 logger.exception("校内系统访问模式自动探测失败")
@@ -324,7 +484,22 @@ class SessionManager:
                             mfa_provider: MFAProvider | None = None,
                             is_postgraduate: bool = False,
                             allow_qrcode_login: bool = True) -> None:
-        """确保当前账号的 WebVPN 后端已经登录 WebVPN 本身。"""
+        """
+        确保当前账号的 WebVPN 后端已经登录 WebVPN 本身。
+        多个站点同时需要 WebVPN 时只会登录一次，同时到达的调用共享这次登录的结果。
+        """
+        webvpn_backend = self.backends[AccessMode.WEBVPN]
+        key = ("webvpn", allow_qrcode_login, id(mfa_provider))
+        webvpn_backend.login_coordinator.run(key, lambda: self._ensure_webvpn_login(
+            username, password, account=account, mfa_provider=mfa_provider,
+            is_postgraduate=is_postgraduate, allow_qrcode_login=allow_qrcode_login))
+
+    def _ensure_webvpn_login(self, username: str, password: str, *,
+                             account: Account | None,
+                             mfa_provider: MFAProvider | None,
+                             is_postgraduate: bool,
+                             allow_qrcode_login: bool) -> None:
+        """ensure_webvpn_login 的实际实现。"""
         from app.utils.config import cfg
         from app.utils.interactive_login import login_with_optional_mfa, login_with_qrcode
         from auth import WEBVPN_LOGIN_URL
@@ -433,15 +608,22 @@ class SessionManager:
         finally:
             webvpn_backend.login_lock.release()
 
-    def keep_alive_logged_in_sessions(self, account_uuid: str = "") -> KeepAliveReport:
-        """对当前已创建且已登录的站点 Session 执行一次后台保活。"""
+    def keep_alive_logged_in_sessions(self, account_uuid: str = "", *,
+                                      interval: float | None = None) -> KeepAliveReport:
+        """
+        对当前已创建且已登录的站点 Session 执行一次后台保活。
+        同一后端内的站点会被并发保活；后端正在登录（其 login_lock 被占用）时，该后端的站点本轮记为 BUSY。
+
+        :param account_uuid: 当前账号的 uuid，仅用于填写报告
+        :param interval: 每个站点的保活间隔（秒）。为 None 时对所有站点执行一次保活；
+            否则只对已经到期的站点执行保活，并为每个站点安排带随机抖动的下一次保活时间。
+        """
         from app.utils.log import logger
 
+        started = time.perf_counter()
         normal_sessions: list[tuple[str, CommonLoginSession]] = []
         webvpn_sessions: list[tuple[str, CommonLoginSession]] = []
-        for key, session in tuple(self.instances.items()):
-            if session is None or not session.has_login:
-                continue
+        for key, session in self._due_keep_alive_sessions(interval):
             if session.access_mode == AccessMode.WEBVPN:
                 webvpn_sessions.append((key, session))
             else:
@@ -449,11 +631,13 @@ class SessionManager:
 
         site_results: list[KeepAliveSiteResult] = []
         webvpn_status: KeepAliveStatus | None = None
+        webvpn_latency = 0.0
         if webvpn_sessions:
+            webvpn_started = time.perf_counter()
             webvpn_status = self.keep_alive_webvpn_backend()
+            webvpn_latency = time.perf_counter() - webvpn_started
             if webvpn_status == KeepAliveStatus.VALID:
-                for key, session in webvpn_sessions:
-                    site_results.append(self._keep_alive_site(key, session))
+                site_results.extend(self._keep_alive_backend_sites(AccessMode.WEBVPN, webvpn_sessions))
             elif webvpn_status == KeepAliveStatus.AUTH_INVALID:
                 for key, session in webvpn_sessions:
                     session.invalidate_login()
@@ -462,35 +646,224 @@ class SessionManager:
                 for key, session in webvpn_sessions:
                     site_results.append(self._site_keep_alive_result(key, session, webvpn_status))
 
-        for key, session in normal_sessions:
-            site_results.append(self._keep_alive_site(key, session))
+        site_results.extend(self._keep_alive_backend_sites(AccessMode.NORMAL, normal_sessions))
+
+        if interval is not None:
+            self._schedule_next_keep_alive(site_results, interval)
 
         report = KeepAliveReport(
             account_uuid=account_uuid,
             webvpn_status=webvpn_status,
             site_results=tuple(site_results),
+            webvpn_latency=webvpn_latency,
+            duration=time.perf_counter() - started,
         )
         logger.debug("后台 Session 保活完成：%s", report)
         return report
 
+    def reset_keep_alive_schedule(self) -> None:
+        """清空各站点的保活计划，下一次按间隔保活时会重新为所有站点安排时间。"""
+        with self._keep_alive_lock:
+            self._keep_alive_due.clear()
+
+    def _due_keep_alive_sessions(self, interval: float | None) -> list[tuple[str, CommonLoginSession]]:
+        """
+        返回本轮需要保活的已登录站点。
+        首次出现的站点会被安排在一个间隔内的随机时刻，而不是立即保活，以便把各站点的保活错开。
+        """
+        logged_in = [
+            (key, session)
+            for key, session in tuple(self.instances.items())
+            if session is not None and session.has_login
+        ]
+        if interval is None:
+            return logged_in
+
+        now = time.time()
+        due: list[tuple[str, CommonLoginSession]] = []
+        with self._keep_alive_lock:
+            active_keys = {key for key, _ in logged_in}
+            for key in tuple(self._keep_alive_due):
+                if key not in active_keys:
+                    del self._keep_alive_due[key]
+            for key, session in logged_in:
+                due_time = self._keep_alive_due.get(key)
+                if due_time is None:
+                    self._keep_alive_due[key] = now + interval * random.uniform(self.KEEP_ALIVE_JITTER, 1.0)
+                elif due_time <= now:
+                    due.append((key, session))
+        return due
+
+    def _schedule_next_keep_alive(self, results: Sequence[KeepAliveSiteResult], interval: float) -> None:
+        """
+        为刚刚完成保活的站点安排带随机抖动的下一次保活时间。
+        因后端正在登录而跳过的站点在 KEEP_ALIVE_BUSY_RETRY 秒后重试，一次登录不会使保活推迟整个间隔。
+        """
+        now = time.time()
+        with self._keep_alive_lock:
+            for result in results:
+                jitter = random.uniform(-self.KEEP_ALIVE_JITTER, self.KEEP_ALIVE_JITTER)
+                delay = interval * (1.0 + jitter)
+                if result.status == KeepAliveStatus.BUSY:
+                    delay = min(self.KEEP_ALIVE_BUSY_RETRY * (1.0 + jitter), delay)
+                self._keep_alive_due[result.site_key] = now + delay
+
+    def _keep_alive_backend_sites(
+            self,
+            access_mode: AccessMode,
+            sessions: list[tuple[str, CommonLoginSession]]) -> list[KeepAliveSiteResult]:
+        """并发地对同一后端下的多个站点执行保活，结果顺序与传入顺序一致。"""
+        if not sessions:
+            return []
+
+        backend = self.backends[access_mode]
+        # 后端正在登录或切换访问方式时，站点保活的结果没有意义，直接跳过本轮。
+        # 获取后立即释放锁只是尽力而为的检查：释放之后才开始的登录仍可能与保活请求交错
+        if not backend.login_lock.acquire(blocking=False):
+            return [self._site_keep_alive_result(key, session, KeepAliveStatus.BUSY) for key, session in sessions]
+        backend.login_lock.release()
+
+        if len(sessions) == 1:
+            return [self._keep_alive_site(*sessions[0])]
+
+        max_workers = min(self.KEEP_ALIVE_MAX_WORKERS, len(sessions))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(lambda item: self._keep_alive_site(*item), sessions))
+
     def _keep_alive_site(self, key: str, session: CommonLoginSession) -> KeepAliveSiteResult:
         """对单个站点执行保活并返回结构化结果。"""
+        started = time.perf_counter()
         status = session.keep_alive()
-        return self._site_keep_alive_result(key, session, status)
+        return self._site_keep_alive_result(key, session, status, time.perf_counter() - started)
 
     @staticmethod
     def _site_keep_alive_result(
             key: str,
             session: CommonLoginSession,
-            status: KeepAliveStatus) -> KeepAliveSiteResult:
+            status: KeepAliveStatus,
+            latency: float = 0.0) -> KeepAliveSiteResult:
         """构造单个站点的后台保活结果。"""
         return KeepAliveSiteResult(
             site_key=key,
             site_name=session.site_name or session.site_key,
             access_mode=session.access_mode,
             status=status,
+            latency=latency,
+        )
+
+    def warm_up_candidates(self, account: Account) -> list[str]:
+        """
+        返回登录预热应当登录的站点名称。
+        优先使用上次退出时保存了登录状态的站点以及当前已经登录的站点；都没有时使用按账号类型给出的默认站点。
+        """
+        names = list(self._pending_site_snapshots)
+        names.extend(
+            key for key, session in self.instances.items()
+            if session is not None and session.has_login and key not in names
+        )
+        if not names:
+            if self._is_postgraduate_account(account, False):
+                names = list(self.DEFAULT_POSTGRADUATE_WARM_UP_SITES)
+            else:
+                names = list(self.DEFAULT_WARM_UP_SITES)
+        return [name for name in names if self.exists(name)]
+
+    def warm_up_logins(self, account: Account, site_names: Sequence[str] | None = None, *,
+                       should_continue: Callable[[], bool] | None = None) -> LoginWarmUpReport:
+        """
+        在后台并发地让多个站点进入已登录状态，使用户第一次打开对应页面时不必再等待统一认证登录。
+
+        同一访问方式下的站点共享统一认证的登录 cookie：每个后端先串行登录第一个站点以取得该 cookie，
+        其余站点随后并发登录，此时统一认证只需要几次重定向。第一个站点登录失败（例如密码错误、需要验证码）时，
+        同一后端的其他站点不再尝试，避免连续的失败登录。
+        预热从不弹出交互：需要两步验证或扫码登录的站点直接记为失败，留给用户打开页面时正常登录。
+
+        :param account: 需要预热的账号
+        :param site_names: 需要预热的站点名称；为 None 时使用 warm_up_candidates 的结果
+        :param should_continue: 每登录一个站点前调用，返回 False 时停止预热剩余站点
+        """
+        started = time.perf_counter()
+        if site_names is None:
+            site_names = self.warm_up_candidates(account)
+
+        groups: dict[AccessMode, list[tuple[str, CommonLoginSession]]] = {}
+        for name in site_names:
+            session = self.get_session(name)
+            groups.setdefault(self.resolve_access_mode_for_site(session), []).append((name, session))
+
+        results: list[LoginWarmUpSiteResult] = []
+        canceled = False
+        for access_mode, sessions in groups.items():
+            if should_continue is not None and not should_continue():
+                canceled = True
+                break
+            leader = self._warm_up_site(account, *sessions[0], access_mode, should_continue)
+            results.append(leader)
+            followers = sessions[1:]
+            if not followers:
+                continue
+            if not leader.success:
+                results.extend(
+                    LoginWarmUpSiteResult(
+                        site_key=key,
+                        site_name=session.site_name or session.site_key,
+                        access_mode=access_mode,
+                        success=False,
+                        error=f"跳过：{leader.site_name} 预热失败",
+                    )
+                    for key, session in followers
+                )
+                continue
+
+            max_workers = min(self.WARM_UP_MAX_WORKERS, len(followers))
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+                results.extend(pool.map(
+                    lambda item: self._warm_up_site(account, *item, access_mode, should_continue),
+                    followers,
+                ))
+
+        if should_continue is not None and not should_continue():
+            canceled = True
+        return LoginWarmUpReport(
+            account_uuid=account.uuid,
+            site_results=tuple(results),
+            duration=time.perf_counter() - started,
+            canceled=canceled,
         )
 
+    def _warm_up_site(self, account: Account, key: str, session: CommonLoginSession, access_mode: AccessMode,
+                      should_continue: Callable[[], bool] | None) -> LoginWarmUpSiteResult:
+        """预热单个站点的登录状态，所有异常都被转换为失败结果。"""
+        site_name = session.site_name or session.site_key
+        if should_continue is not None and not should_continue():
+            return LoginWarmUpSiteResult(key, site_name, access_mode, success=False, error="已取消")
+
+        is_postgraduate = self._is_postgraduate_account(account, False)
+        started = time.perf_counter()
+        mfa_provider = _NonInteractiveMFAProvider()
+        try:
+            performed_login = session.ensure_login(
+                account.username,
+                account.password,
+                preferred_access_mode=access_mode,
+                allow_qrcode_login=False,
+                account=account,
+                mfa_provider=mfa_provider,
+                is_postgraduate=is_postgraduate,
+            )
+        except Exception as e:
+            return LoginWarmUpSiteResult(key, site_name, access_mode, success=False,
+                                         elapsed=time.perf_counter() - started, error=str(e) or type(e).__name__)
+        # 登录上下文会被用于之后请求失效时的自动重新登录，那时应当正常地向用户请求两步验证。
+        # 只替换预热自己保存的上下文：其他线程在此期间发起的登录保存的上下文保持不变
+        session.update_login_context(
+            account.username, account.password,
+            {"account": account, "is_postgraduate": is_postgraduate}, True,
+            only_if=lambda context: context.kwargs.get("mfa_provider") is mfa_provider,
+        )
+        return LoginWarmUpSiteResult(key, site_name, access_mode, success=True, performed_login=performed_login,
+                                     elapsed=time.perf_counter() - started)
+
     @staticmethod
     def _is_postgraduate_account(account: Account | None, is_postgraduate: bool) -> bool:
         """判断当前登录上下文是否应使用研究生身份。"""
@@ -522,12 +895,19 @@ class SessionManager:
         if not self._restore_snapshot_backends(snapshot):
             self.clear_runtime_session_state()
             store.delete_account_snapshot(account)
+            self._persisted_fingerprint = None
             return
 
         self._pending_site_snapshots = self._restorable_site_snapshots(snapshot)
+        if store.has_account_snapshot(account):
+            self._persisted_fingerprint = snapshot_fingerprint(snapshot)
 
-    def save_persisted_state(self, account: Account) -> None:
-        """保存当前账号的 Session 状态。"""
+    def save_persisted_state(self, account: Account) -> bool:
+        """
+        保存当前账号的 Session 状态。
+        如果 cookie 与站点状态自上次读取或保存以来没有变化，则不重新写入文件。
+        :return: 是否实际写入了文件
+        """
         backends = {mode.value: backend.to_snapshot() for mode, backend in self.backends.items()}
         sites = dict(self._pending_site_snapshots)
         sites.update({
@@ -542,7 +922,13 @@ class SessionManager:
             backends=backends,
             sites=sites,
         )
-        SessionPersistenceStore().save_account_snapshot(account, snapshot)
+        store = SessionPersistenceStore()
+        fingerprint = snapshot_fingerprint(snapshot)
+        if fingerprint == self._persisted_fingerprint and store.has_account_snapshot(account):
+            return False
+        store.save_account_snapshot(account, snapshot)
+        self._persisted_fingerprint = fingerprint
+        return True
 
     def clear_runtime_session_state(self) -> None:
         """清理当前账号内存中的全部 Session 状态。"""
@@ -562,6 +948,7 @@ class SessionManager:
     def clear_persisted_session_state(self, account: Account) -> None:
         """清理当前账号持久化保存的 Session 状态。"""
         SessionPersistenceStore().delete_account_snapshot(account)
+        self._persisted_fingerprint = None
 
     def clear_persisted_session_state_only(self, account: Account) -> None:
         """只清理持久化 Session 状态，不影响内存。"""
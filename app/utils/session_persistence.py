@@ -2,12 +2,14 @@ from __future__ import annotations
 
 import base64
 import binascii
+import hashlib
 import json
 import os
+import struct
 import tempfile
 from collections.abc import Mapping
 from dataclasses import dataclass
-from http.cookiejar import LWPCookieJar, LoadError
+from http.cookiejar import Cookie, CookieJar, LWPCookieJar, LoadError
 from typing import TYPE_CHECKING, cast
 from uuid import UUID
 
@@ -37,6 +39,14 @@ SESSION_METADATA_FILE = "sessions.json"
 SESSION_DATA_DIRECTORY = os.path.join(DATA_DIRECTORY, "data")
 SESSION_METADATA_PURPOSE = "metadata"
 SESSION_COOKIE_PURPOSE = "cookie"
+# 单文件快照：元数据与所有 backend 的 cookie 一起保存在这个文件中
+SESSION_BUNDLE_FILE = "sessions.bin"
+SESSION_BUNDLE_PURPOSE = "bundle"
+SESSION_BUNDLE_MAGIC = b"XTSB"
+SESSION_BUNDLE_ENCRYPTED_MAGIC = b"XTSE"
+SESSION_BUNDLE_VERSION = 1
+COOKIE_BINARY_MAGIC = b"XTCK"
+COOKIE_BINARY_VERSION = 1
 
 
 def _read_aes_key() -> tuple[bytes | None, bool]:
@@ -201,6 +211,8 @@ class BackendSnapshot:
     user_agent: str
     login_id: str
     saved_at: float
+    # 使用 cookie_jar_to_bytes 序列化的 cookie；存在时优先于 cookie_lwp_text。它不写入 JSON，而是单独保存在快照文件中
+    cookie_data: bytes | None = None
 
     def to_dict(self) -> dict[str, object]:
         """转换为可 JSON 序列化的字典。"""
@@ -234,6 +246,8 @@ class SiteSnapshot:
     access_mode: str
     headers: dict[str, str]
     saved_at: float
+    # 站点登录态最近一次通过验证的时间戳；为 0 表示从未验证
+    last_validated_at: float = 0.0
 
     def to_dict(self) -> dict[str, object]:
         """转换为可 JSON 序列化的字典。"""
@@ -242,6 +256,7 @@ class SiteSnapshot:
             "access_mode": self.access_mode,
             "headers": dict(self.headers),
             "saved_at": self.saved_at,
+            "last_validated_at": self.last_validated_at,
         }
 
     @classmethod
@@ -258,6 +273,7 @@ class SiteSnapshot:
             access_mode=_string_value(data, "access_mode"),
             headers=headers,
             saved_at=_float_value(data, "saved_at"),
+            last_validated_at=_float_value(data, "last_validated_at"),
         )
 
 
@@ -353,7 +369,19 @@ class SessionPersistenceStore:
             self.migrate_account_snapshot(account)
 
     def _load_from_file(self, account: Account) -> AccountSessionSnapshot | None:
-        """从账号数据文件夹读取快照。"""
+        """从账号数据文件夹读取快照。优先读取单文件快照，不存在时读取旧版的元数据与 LWP cookie 文件。"""
+        bundle_path = self._account_file_path(account, SESSION_BUNDLE_FILE)
+        if os.path.exists(bundle_path):
+            try:
+                with open(bundle_path, "rb") as file:
+                    raw = file.read()
+            except OSError:
+                return None
+            return self._snapshot_from_bundle(account, raw)
+        return self._load_from_legacy_files(account)
+
+    def _load_from_legacy_files(self, account: Account) -> AccountSessionSnapshot | None:
+        """从旧版的元数据 JSON 与每个 backend 一个的 LWP cookie 文件读取快照。"""
         metadata_path = self._metadata_path(account)
         if not os.path.exists(metadata_path):
             return None
@@ -377,57 +405,33 @@ class SessionPersistenceStore:
         return self._with_cookie_text(account, snapshot)
 
     def _save_to_file(self, account: Account, snapshot: AccountSessionSnapshot) -> None:
-        """保存快照到账号数据文件夹。"""
-        metadata_path = self._metadata_path(account)
-        os.makedirs(os.path.dirname(metadata_path), exist_ok=True)
-
+        """把快照保存为账号数据文件夹中的单个（可选加密的）文件，并删除旧版的快照文件。"""
         use_encryption = cfg.useKeyring.value
         encryption_key = _get_or_create_aes_key() if use_encryption else None
         if use_encryption and encryption_key is None:
             return
 
-        file_backends: dict[str, BackendSnapshot] = {}
-        for key, backend in snapshot.backends.items():
-            access_mode = AccessMode(backend.access_mode)
-            cookie_file = self._cookie_file_name(access_mode)
-            cookie_path = self._account_file_path(account, cookie_file)
-            if backend.cookie_lwp_text is not None:
-                data = backend.cookie_lwp_text.encode("utf-8")
-                if encryption_key is not None:
-                    data = _encrypt_bytes(
-                        data,
-                        key=encryption_key,
-                        account_uuid=account.uuid,
-                        purpose=SESSION_COOKIE_PURPOSE,
-                        filename=cookie_file,
-                    )
-                _write_bytes_atomically(cookie_path, data)
-            file_backends[key] = BackendSnapshot(
-                access_mode=backend.access_mode,
-                cookie_lwp_text=None,
-                cookie_file=cookie_file,
-                user_agent=backend.user_agent,
-                login_id=backend.login_id,
-                saved_at=backend.saved_at,
-            )
-
-        file_snapshot = AccountSessionSnapshot(
-            version=snapshot.version,
-            account_uuid=snapshot.account_uuid,
-            saved_at=snapshot.saved_at,
-            backends=file_backends,
-            sites=snapshot.sites,
-        )
-        data = json.dumps(file_snapshot.to_dict(), ensure_ascii=False, indent=2).encode("utf-8")
+        data = encode_snapshot_bundle(snapshot)
         if encryption_key is not None:
-            data = _encrypt_bytes(
-                data,
-                key=encryption_key,
-                account_uuid=account.uuid,
-                purpose=SESSION_METADATA_PURPOSE,
-                filename=SESSION_METADATA_FILE,
-            )
-        _write_bytes_atomically(metadata_path, data)
+            data = _encrypt_bundle(data, key=encryption_key, account_uuid=account.uuid)
+        _write_bytes_atomically(self._account_file_path(account, SESSION_BUNDLE_FILE), data)
+        self._delete_legacy_files(account.uuid)
+
+    def _snapshot_from_bundle(self, account: Account, raw: bytes) -> AccountSessionSnapshot | None:
+        """从单文件快照的内容恢复账号快照。"""
+        if raw.startswith(SESSION_BUNDLE_ENCRYPTED_MAGIC):
+            decoded = _decrypt_bundle(raw, account_uuid=account.uuid)
+            if decoded is None:
+                return None
+            raw = decoded
+        snapshot = decode_snapshot_bundle(raw)
+        if snapshot is None or snapshot.version != self.VERSION:
+            return None
+        return snapshot
+
+    def has_account_snapshot(self, account: Account) -> bool:
+        """判断账号是否已经保存了单文件快照。"""
+        return os.path.exists(self._account_file_path(account, SESSION_BUNDLE_FILE))
 
     def _delete_file_snapshot(self, account: Account) -> None:
         """删除账号数据文件夹中的快照。"""
@@ -437,6 +441,14 @@ class SessionPersistenceStore:
         """按账号 UUID 删除账号数据文件夹中的快照。"""
         if not _is_uuid_text(account_uuid):
             return
+        try:
+            os.remove(self._account_uuid_file_path(account_uuid, SESSION_BUNDLE_FILE))
+        except OSError:
+            pass
+        self._delete_legacy_files(account_uuid)
+
+    def _delete_legacy_files(self, account_uuid: str) -> None:
+        """删除旧版的元数据与 LWP cookie 快照文件。"""
         paths = [
             self._account_uuid_file_path(account_uuid, SESSION_METADATA_FILE),
             self._account_uuid_file_path(account_uuid, self._cookie_file_name(AccessMode.NORMAL)),
@@ -577,6 +589,240 @@ def lwp_text_to_cookie_jar(cookie_text: str | None) -> LWPCookieJar | None:
     return jar
 
 
+_NONE_LENGTH = 0xFFFFFFFF
+_COOKIE_FLAGS = (
+    "port_specified", "domain_specified", "domain_initial_dot", "path_specified", "secure", "discard", "rfc2109",
+)
+_COOKIE_HAS_EXPIRES = 1 << len(_COOKIE_FLAGS)
+
+
+def _pack_bytes(out: bytearray, value: bytes | None) -> None:
+    """写入一个带长度前缀的字节串，None 使用特殊长度表示。"""
+    if value is None:
+        out += struct.pack("<I", _NONE_LENGTH)
+        return
+    out += struct.pack("<I", len(value))
+    out += value
+
+
+def _pack_str(out: bytearray, value: str | None) -> None:
+    """写入一个带长度前缀的 UTF-8 字符串。"""
+    _pack_bytes(out, None if value is None else value.encode("utf-8"))
+
+
+class _BinaryReader:
+    """按顺序读取 _pack_bytes/_pack_str 写入的数据，数据不完整时抛出 ValueError。"""
+
+    def __init__(self, data: bytes, offset: int = 0) -> None:
+        self.data = data
+        self.offset = offset
+
+    def unpack(self, fmt: str) -> tuple:
+        size = struct.calcsize(fmt)
+        if self.offset + size > len(self.data):
+            raise ValueError("truncated data")
+        values = struct.unpack_from(fmt, self.data, self.offset)
+        self.offset += size
+        return values
+
+    def read_bytes(self) -> bytes | None:
+        (length,) = self.unpack("<I")
+        if length == _NONE_LENGTH:
+            return None
+        if self.offset + length > len(self.data):
+            raise ValueError("truncated data")
+        value = self.data[self.offset:self.offset + length]
+        self.offset += length
+        return value
+
+    def read_str(self) -> str | None:
+        value = self.read_bytes()
+        return None if value is None else value.decode("utf-8")
+
+
+def cookie_jar_to_bytes(cookie_jar: CookieJar) -> bytes:
+    """
+    把 cookie jar 序列化为紧凑的二进制格式。
+    与 LWP 文本不同，它不需要经过临时文件，并且会保留 cookie 的全部属性（包括已过期和会话 cookie）。
+    """
+    cookies = list(cookie_jar)
+    out = bytearray(COOKIE_BINARY_MAGIC)
+    out += struct.pack("<BI", COOKIE_BINARY_VERSION, len(cookies))
+    for cookie in cookies:
+        flags = 0
+        for index, name in enumerate(_COOKIE_FLAGS):
+            if getattr(cookie, name):
+                flags |= 1 << index
+        if cookie.expires is not None:
+            flags |= _COOKIE_HAS_EXPIRES
+        out += struct.pack("<Hb", flags, -1 if cookie.version is None else cookie.version)
+        if cookie.expires is not None:
+            out += struct.pack("<q", int(cookie.expires))
+        for value in (cookie.name, cookie.value, cookie.port, cookie.domain, cookie.path,
+                      cookie.comment, cookie.comment_url):
+            _pack_str(out, value)
+        rest = getattr(cookie, "_rest", {})
+        out += struct.pack("<H", len(rest))
+        for key, value in rest.items():
+            _pack_str(out, str(key))
+            _pack_str(out, None if value is None else str(value))
+    return bytes(out)
+
+
+def bytes_to_cookie_jar(data: bytes) -> LWPCookieJar | None:
+    """从 cookie_jar_to_bytes 的结果恢复 cookie jar，数据损坏时返回 None。"""
+    jar = LWPCookieJar()
+    if not data.startswith(COOKIE_BINARY_MAGIC):
+        return None
+    try:
+        reader = _BinaryReader(data, len(COOKIE_BINARY_MAGIC))
+        version, count = reader.unpack("<BI")
+        if version != COOKIE_BINARY_VERSION:
+            return None
+        for _ in range(count):
+            flags, cookie_version = reader.unpack("<Hb")
+            expires = reader.unpack("<q")[0] if flags & _COOKIE_HAS_EXPIRES else None
+            name, value, port, domain, path, comment, comment_url = (reader.read_str() for _ in range(7))
+            (rest_count,) = reader.unpack("<H")
+            rest = {}
+            for _ in range(rest_count):
+                key = reader.read_str()
+                rest[key] = reader.read_str()
+            named_flags = {name: bool(flags & (1 << index)) for index, name in enumerate(_COOKIE_FLAGS)}
+            jar.set_cookie(Cookie(
+                version=None if cookie_version < 0 else cookie_version,
+                name=name, value=value, port=port, domain=domain or "", path=path or "/",
+                expires=expires, comment=comment, comment_url=comment_url, rest=rest,
+                **named_flags,
+            ))
+    except (ValueError, UnicodeError, struct.error):
+        return None
+    return jar
+
+
+def encode_snapshot_bundle(snapshot: AccountSessionSnapshot) -> bytes:
+    """
+    把账号快照编码为单个二进制包：紧凑的元数据 JSON，后面跟着每个 backend 的二进制 cookie。
+    """
+    metadata = snapshot.to_dict()
+    cookie_blobs: list[tuple[str, bytes]] = []
+    for key, backend in snapshot.backends.items():
+        cookie_data = backend.cookie_data
+        if cookie_data is None:
+            jar = lwp_text_to_cookie_jar(backend.cookie_lwp_text) or LWPCookieJar()
+            cookie_data = cookie_jar_to_bytes(jar)
+        cookie_blobs.append((key, cookie_data))
+        backend_metadata = cast(dict, metadata["backends"])[key]
+        backend_metadata["cookie_lwp_text"] = None
+        backend_metadata["cookie_file"] = None
+
+    out = bytearray(SESSION_BUNDLE_MAGIC)
+    out += struct.pack("<B", SESSION_BUNDLE_VERSION)
+    _pack_bytes(out, json.dumps(metadata, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+    out += struct.pack("<H", len(cookie_blobs))
+    for key, cookie_data in cookie_blobs:
+        _pack_str(out, key)
+        _pack_bytes(out, cookie_data)
+    return bytes(out)
+
+
+def decode_snapshot_bundle(data: bytes) -> AccountSessionSnapshot | None:
+    """从 encode_snapshot_bundle 的结果恢复账号快照，数据损坏时返回 None。"""
+    if not data.startswith(SESSION_BUNDLE_MAGIC):
+        return None
+    try:
+        reader = _BinaryReader(data, len(SESSION_BUNDLE_MAGIC))
+        (version,) = reader.unpack("<B")
+        if version != SESSION_BUNDLE_VERSION:
+            return None
+        metadata = _json_mapping_from_bytes(reader.read_bytes() or b"")
+        if metadata is None:
+            return None
+        (count,) = reader.unpack("<H")
+        cookie_blobs = {}
+        for _ in range(count):
+            key = reader.read_str()
+            cookie_blobs[key] = reader.read_bytes()
+    except (ValueError, UnicodeError, struct.error):
+        return None
+
+    snapshot = AccountSessionSnapshot.from_mapping(metadata)
+    backends = {}
+    for key, backend in snapshot.backends.items():
+        cookie_data = cookie_blobs.get(key)
+        if cookie_data is None:
+            return None
+        backends[key] = BackendSnapshot(
+            access_mode=backend.access_mode,
+            cookie_lwp_text=None,
+            cookie_file=None,
+            user_agent=backend.user_agent,
+            login_id=backend.login_id,
+            saved_at=backend.saved_at,
+            cookie_data=cookie_data,
+        )
+    return AccountSessionSnapshot(
+        version=snapshot.version,
+        account_uuid=snapshot.account_uuid,
+        saved_at=snapshot.saved_at,
+        backends=backends,
+        sites=snapshot.sites,
+    )
+
+
+def snapshot_fingerprint(snapshot: AccountSessionSnapshot) -> str:
+    """
+    计算快照内容的摘要，用于判断快照是否需要重新写入。
+    保存时间等每次都会变化的字段不参与计算。
+    """
+    digest = hashlib.sha256()
+    for key in sorted(snapshot.backends):
+        backend = snapshot.backends[key]
+        cookie_data = backend.cookie_data
+        if cookie_data is None:
+            cookie_data = (backend.cookie_lwp_text or "").encode("utf-8")
+        for value in (key, backend.access_mode, backend.user_agent, backend.login_id):
+            digest.update(value.encode("utf-8") + b"\0")
+        digest.update(struct.pack("<Q", len(cookie_data)))
+        digest.update(cookie_data)
+    sites = {
+        key: [site.site_key, site.access_mode, sorted(site.headers.items()), site.last_validated_at]
+        for key, site in snapshot.sites.items()
+    }
+    digest.update(json.dumps([snapshot.account_uuid, snapshot.version, sites], sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _encrypt_bundle(data: bytes, *, key: bytes, account_uuid: str) -> bytes:
+    """使用 AES-256-GCM 加密单文件快照，结果为二进制格式：魔数、版本、nonce、tag、密文。"""
+    nonce = os.urandom(SESSION_GCM_NONCE_LENGTH)
+    cipher = AES.new(key, AES.MODE_GCM, nonce=nonce)
+    cipher.update(_associated_data(account_uuid, SESSION_BUNDLE_PURPOSE, SESSION_BUNDLE_FILE))
+    ciphertext, tag = cipher.encrypt_and_digest(data)
+    return SESSION_BUNDLE_ENCRYPTED_MAGIC + struct.pack("<B", SESSION_ENCRYPTION_VERSION) + nonce + tag + ciphertext
+
+
+def _decrypt_bundle(data: bytes, *, account_uuid: str) -> bytes | None:
+    """解密 _encrypt_bundle 的结果，密钥不可用或数据被篡改时返回 None。"""
+    header_length = len(SESSION_BUNDLE_ENCRYPTED_MAGIC) + 1
+    if len(data) < header_length + SESSION_GCM_NONCE_LENGTH + 16:
+        return None
+    if data[header_length - 1] != SESSION_ENCRYPTION_VERSION:
+        return None
+    nonce = data[header_length:header_length + SESSION_GCM_NONCE_LENGTH]
+    tag = data[header_length + SESSION_GCM_NONCE_LENGTH:header_length + SESSION_GCM_NONCE_LENGTH + 16]
+    ciphertext = data[header_length + SESSION_GCM_NONCE_LENGTH + 16:]
+    key = _load_aes_key()
+    if key is None:
+        return None
+    try:
+        cipher = AES.new(key, AES.MODE_GCM, nonce=nonce)
+        cipher.update(_associated_data(account_uuid, SESSION_BUNDLE_PURPOSE, SESSION_BUNDLE_FILE))
+        return cipher.decrypt_and_verify(ciphertext, tag)
+    except ValueError:
+        return None
+
+
 def _string_value(data: Mapping[str, object], key: str) -> str:
     """从字典中读取字符串。"""
     value = data.get(key)
@@ -0,0 +1,197 @@
+"""定时抢订：放号前预取并识别验证码，放号后立即提交预订。"""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+import requests
+
+from captcha_solver import CaptchaAttempts, CaptchaPool, GapRanker, find_gaps, rank_gaps
+from .venue import AreaSlot, VenueAPIError, VenueUtil
+
+_log = logging.getLogger("default")
+
+
+def booking_outcome(result: dict) -> str:
+    """解析 tobook 返回值：``"booked"`` 预订成功，``"captcha"`` 验证码错误，``"failed"`` 其他失败。"""
+    has_order = isinstance(result.get("object"), dict) and result["object"].get("orderid")
+    if result.get("result", "") == "2" or has_order:
+        return "booked"
+    msg = str(result.get("message", ""))
+    if "验证码" in msg or "captcha" in msg.lower():
+        return "captcha"
+    return "failed"
+
+
+@dataclass(frozen=True)
+class CaptchaPolicy:
+    """预订时识别与重试验证码的策略。
+
+    默认使用 find_gaps 的最佳位置，每张验证码只提交一次，识别错误时换一张。开启设置中的“验证码多候选重试”后
+    使用 rank_gaps，并在换验证码前依次提交前两个候选位置；尚未确认服务器接受同一验证码的第二次答案，因此默认关闭。
+    """
+
+    ranker: GapRanker = find_gaps
+    candidates: int = 1
+
+    @classmethod
+    def from_config(cls) -> CaptchaPolicy:
+        """按用户设置返回验证码策略"""
+        from app.utils.config import cfg
+
+        if cfg.venueCaptchaRanking.value:
+            return cls(rank_gaps, 2)
+        return cls()
+
+    def attempts(self, session: requests.Session | None, **kwargs) -> CaptchaAttempts:
+        return CaptchaAttempts(session, candidates=self.candidates, ranker=self.ranker, **kwargs)
+
+    def pool(self, session: requests.Session | None, **kwargs) -> CaptchaPool:
+        return CaptchaPool(session, candidates=self.candidates, ranker=self.ranker, **kwargs)
+
+
+@dataclass
+class RushReport:
+    """一次定时抢订的结果与各阶段耗时。"""
+
+    outcome: str = "aborted"  # booked / failed / captcha / not_open / aborted
+    result: dict | None = None
+    selections: list[tuple[int, int]] = field(default_factory=list)
+    # 各阶段耗时（毫秒）：prefetch 首次填满验证码池，open 放号到查到目标时段，
+    # book 提交预订，release_to_result 放号到得到预订结果
+    stages: dict[str, float] = field(default_factory=dict)
+    polls: int = 0
+    submissions: int = 0
+    pool: dict = field(default_factory=dict)
+
+
+class BookingRush:
+    """在放号时刻抢订指定时段。
+
+    放号前 ``lead`` 秒开始预取并识别验证码，之后持续补充验证码池并丢弃过期的验证码；
+    到放号时刻起每隔 ``poll_interval`` 秒查询可预订时段，在 ``window`` 秒内查到目标时段后
+    立即用池中的验证码提交预订，验证码错误时按 ``captcha_policy`` 使用下一个候选位置或下一张验证码。
+
+    :param util: 场馆 API 工具
+    :param captcha_session: 获取验证码使用的 HTTP 会话
+    :param venue_id: 场馆 ID
+    :param date_str: 预订日期，如 ``"2026-10-20"``
+    :param wanted: 目标时段列表 ``[(时段, 场地名或 None)]``，场地名为 None 时任选一个可订场地
+    :param release_at: 放号时刻（Unix 时间戳）
+    :param captcha_policy: 验证码识别与重试策略，见 CaptchaPolicy
+    """
+
+    def __init__(self, util: VenueUtil, captcha_session: requests.Session, venue_id: int, date_str: str,
+                 wanted: list[tuple[str, str | None]], release_at: float, lead: float = 15.0,
+                 window: float = 60.0, poll_interval: float = 0.3, pool_size: int = 3,
+                 clock: Callable[[], float] = time.time, sleep: Callable[[float], None] = time.sleep,
+                 captcha_policy: CaptchaPolicy = CaptchaPolicy()):
+        self.util = util
+        self.venue_id = venue_id
+        self.date_str = date_str
+        self.wanted = wanted
+        self.release_at = release_at
+        self.lead = lead
+        self.window = window
+        self.poll_interval = poll_interval
+        self.captcha_policy = captcha_policy
+        self.pool = captcha_policy.pool(captcha_session, size=pool_size, clock=clock)
+        self._captcha_session = captcha_session
+        self._clock = clock
+        self._sleep = sleep
+
+    def match(self, slots: list[AreaSlot]) -> list[tuple[int, int]]:
+        """从可预订时段中挑出目标时段，返回 ``[(area_id, stock_id)]``。"""
+        selections = []
+        used = set()
+        for time_slot, area_name in self.wanted:
+            for slot in slots:
+                if (slot.is_available and slot.time_slot == time_slot and id(slot) not in used
+                        and area_name in (None, slot.area_name)):
+                    used.add(id(slot))
+                    selections.append((slot.area_id, slot.stock_id))
+                    break
+        return selections
+
+    def _wait_until(self, target: float, aborted: Callable[[], bool],
+                    on_tick: Callable[[float], None] | None = None) -> bool:
+        """等待到 ``target`` 时刻，每次最多睡 1 秒以便及时响应中断。被中断时返回 False。"""
+        while (remaining := target - self._clock()) > 0:
+            if aborted():
+                return False
+            if on_tick is not None:
+                on_tick(remaining)
+            self._sleep(min(remaining, 1.0))
+        return not aborted()
+
+    def run(self, on_stage: Callable[[str, float], None] | None = None,
+            aborted: Callable[[], bool] = lambda: False) -> RushReport:
+        """执行抢订。
+
+        :param on_stage: 阶段回调 ``(stage, seconds)``，stage 为 waiting / prefetching / polling / booking，
+            seconds 为距放号的剩余秒数（放号后为 0）
+        :param aborted: 返回 True 时尽快中止
+        """
+        report = RushReport()
+        stage = on_stage or (lambda name, seconds: None)
+
+        def countdown(name: str) -> Callable[[float], None]:
+            return lambda _: stage(name, max(self.release_at - self._clock(), 0.0))
+
+        if not self._wait_until(self.release_at - self.lead, aborted, countdown("waiting")):
+            return report
+
+        stage("prefetching", max(self.release_at - self._clock(), 0.0))
+        started = self._clock()
+        self.pool.fill()
+        report.stages["prefetch"] = round((self._clock() - started) * 1000, 1)
+        # 放号前持续补充验证码池，替换过期的验证码
+        while (remaining := self.release_at - self._clock()) > 0:
+            if aborted():
+                return report
+            stage("prefetching", remaining)
+            self.pool.fill()
+            self._sleep(min(max(self.release_at - self._clock(), 0.0), 1.0))
+
+        stage("polling", 0.0)
+        selections: list[tuple[int, int]] = []
+        while not selections:
+            if aborted():
+                return report
+            if self._clock() >= self.release_at + self.window:
+                report.outcome = "not_open"
+                report.pool = self.pool.stats()
+                return report
+            report.polls += 1
+            try:
+                selections = self.match(self.util.get_available_slots(self.venue_id, self.date_str))
+            except (VenueAPIError, requests.RequestException, ValueError) as e:
+                # 未到开放时间时服务器返回提示页
+                _log.debug("rush: slots not open yet: %s", e)
+            if not selections:
+                self._sleep(self.poll_interval)
+        opened = self._clock()
+        report.stages["open"] = round((opened - self.release_at) * 1000, 1)
+        report.selections = selections
+
+        stage("booking", 0.0)
+        report.outcome = "captcha"
+        for yzm, candidate in self.captcha_policy.attempts(self._captcha_session, clock=self._clock, pool=self.pool):
+            if aborted():
+                report.outcome = "aborted"
+                break
+            report.submissions += 1
+            report.result = self.util.book(self.venue_id, selections, yzm)
+            report.outcome = booking_outcome(report.result)
+            if report.outcome != "captcha":
+                break
+            _log.info("rush: captcha rejected (move_x=%d, conf=%.3f), retry",
+                      candidate.move_x, candidate.confidence)
+        finished = self._clock()
+        report.stages["book"] = round((finished - opened) * 1000, 1)
+        report.stages["release_to_result"] = round((finished - self.release_at) * 1000, 1)
+        report.pool = self.pool.stats()
+        return report
@@ -0,0 +1,189 @@
+"""并发查询多个场馆、多个日期的可预订时段，并建立空闲时段索引。"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Callable, Iterable
+
+import requests
+
+from .venue import AreaSlot, VenueAPIError, VenueInfo, VenueUtil
+
+
+class RateLimiter:
+    """限制多个线程合计的请求速率：相邻两次请求的开始时间至少间隔 1 / rate 秒。"""
+
+    def __init__(self, rate: float, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+        self._clock = clock
+        self._sleep = sleep
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = self._clock()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            self._sleep(start - now)
+
+
+@dataclass(frozen=True)
+class SlotChange:
+    """两次扫描之间的空闲时段变化。kind 为 ``"opened"``（新出现）或 ``"taken"``（已不可订）。"""
+
+    kind: str
+    venue: VenueInfo
+    slot: AreaSlot
+
+
+def _slot_key(slot: AreaSlot) -> tuple:
+    return slot.area_id, slot.stock_id, slot.time_slot
+
+
+def _slot_start(slot: AreaSlot) -> str:
+    """时段开始时间，如 ``"18:30-19:30"`` -> ``"18:30"``；补齐为两位小时便于按字符串比较。"""
+    start = slot.time_slot.split("-", 1)[0].strip()
+    return start.zfill(5) if ":" in start else start
+
+
+class AvailabilityIndex:
+    """空闲时段索引：(场馆 ID, 日期, 时段) -> 该时段可预订的场地。线程安全。"""
+
+    def __init__(self):
+        self.venues: dict[int, VenueInfo] = {}
+        self._slots: dict[tuple[int, str, str], list[AreaSlot]] = {}
+        self._scanned: set[tuple[int, str]] = set()
+        self._lock = threading.Lock()
+
+    def update(self, venue: VenueInfo, date_str: str, slots: Iterable[AreaSlot]) -> list[SlotChange]:
+        """用一次查询结果替换 (场馆, 日期) 下的全部时段，返回与上次相比的变化。
+
+        首次查询的 (场馆, 日期) 只建立基线，不产生变化。
+        """
+        available = [slot for slot in slots if slot.is_available]
+        with self._lock:
+            self.venues[venue.id] = venue
+            old = {_slot_key(slot): slot
+                   for (venue_id, day, _), cell in self._slots.items()
+                   if venue_id == venue.id and day == date_str for slot in cell}
+            for key in [key for key in self._slots if key[0] == venue.id and key[1] == date_str]:
+                del self._slots[key]
+            for slot in available:
+                self._slots.setdefault((venue.id, date_str, slot.time_slot), []).append(slot)
+            first = (venue.id, date_str) not in self._scanned
+            self._scanned.add((venue.id, date_str))
+        if first:
+            return []
+        new = {_slot_key(slot): slot for slot in available}
+        return ([SlotChange("opened", venue, new[key]) for key in new.keys() - old.keys()]
+                + [SlotChange("taken", venue, old[key]) for key in old.keys() - new.keys()])
+
+    def slots(self, venue_id: int, date_str: str, time_slot: str) -> list[AreaSlot]:
+        with self._lock:
+            return list(self._slots.get((venue_id, date_str, time_slot), []))
+
+    def query(self, keyword: str = "", date_str: str | None = None,
+              start_after: str | None = None, start_before: str | None = None) -> list[tuple[VenueInfo, AreaSlot]]:
+        """查找空闲场地。
+
+        :param keyword: 场馆名或场地名包含的关键字，如 ``"羽毛球"``
+        :param date_str: 日期，None 表示所有已扫描的日期
+        :param start_after: 时段开始时间不早于该时间，如 ``"18:00"``
+        :param start_before: 时段开始时间早于该时间
+        :return: 按日期、开始时间、场馆排序的 ``[(场馆, 时段)]``
+        """
+        with self._lock:
+            items = list(self._slots.items())
+        results = []
+        for (venue_id, day, _), cell in items:
+            if date_str is not None and day != date_str:
+                continue
+            venue = self.venues[venue_id]
+            for slot in cell:
+                start = _slot_start(slot)
+                if keyword and keyword not in venue.name and keyword not in slot.area_name:
+                    continue
+                if start_after is not None and start < start_after.zfill(5):
+                    continue
+                if start_before is not None and start >= start_before.zfill(5):
+                    continue
+                results.append((venue, slot))
+        results.sort(key=lambda item: (item[1].date, _slot_start(item[1]), item[0].id, item[1].area_name))
+        return results
+
+
+@dataclass
+class ScanReport:
+    """一次扫描的统计。"""
+
+    requests: int = 0
+    errors: int = 0
+    elapsed: float = 0.0  # 秒
+    changes: list[SlotChange] = field(default_factory=list)
+
+
+class SlotScanner:
+    """并发扫描场馆 × 日期的可预订时段，结果写入 :class:`AvailabilityIndex`。
+
+    每个 (场馆, 日期) 只查询一次 findOkArea，所有线程共用一个限速器，避免对场馆服务器造成压力。
+
+    :param util: 场馆 API 工具，底层 HTTP 会话会被多个线程共用
+    :param max_workers: 并发线程数
+    :param rate: 每秒最多发出的请求数
+    """
+
+    def __init__(self, util: VenueUtil, index: AvailabilityIndex | None = None,
+                 max_workers: int = 4, rate: float = 8.0):
+        self.util = util
+        self.index = index or AvailabilityIndex()
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(rate)
+
+    @staticmethod
+    def dates(days: int, start: date | None = None) -> list[str]:
+        start = start or date.today()
+        return [(start + timedelta(days=i)).isoformat() for i in range(days)]
+
+    def scan(self, venues: Iterable[VenueInfo], dates: Iterable[str],
+             on_change: Callable[[list[SlotChange]], None] | None = None,
+             aborted: Callable[[], bool] = lambda: False) -> ScanReport:
+        """扫描所有 (场馆, 日期)，返回统计；有变化时调用 ``on_change``。
+
+        未开放或查询失败的 (场馆, 日期) 计入 ``errors``，索引中保留上次的结果。
+        """
+        report = ScanReport()
+        started = time.perf_counter()
+        tasks = [(venue, day) for venue in venues for day in dates]
+        lock = threading.Lock()
+
+        def fetch(task: tuple[VenueInfo, str]) -> None:
+            if aborted():
+                return
+            venue, day = task
+            self.limiter.acquire()
+            try:
+                slots = self.util.get_available_slots(venue.id, day)
+            except (VenueAPIError, requests.RequestException, ValueError):
+                with lock:
+                    report.requests += 1
+                    report.errors += 1
+                return
+            changes = self.index.update(venue, day, slots)
+            with lock:
+                report.requests += 1
+                report.changes.extend(changes)
+
+        if tasks:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(self.max_workers, len(tasks))) as pool:
+                list(pool.map(fetch, tasks))
+        report.elapsed = time.perf_counter() - started
+        if report.changes and on_change is not None:
+            on_change(report.changes)
+        return report
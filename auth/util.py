@@ -1,3 +1,4 @@
+import functools
 import hashlib
 import platform
 import time
@@ -84,27 +85,87 @@ def getPlaintext(ciphertext, key=key_, cfb_iv=iv_, size=128):
     return cfb_msg_decrypt
 
 
+# 常用的校园网站点，模块加载时预先计算它们在 WebVPN 中的主机名密文
+KNOWN_WEBVPN_HOSTS = (
+    "jwxt.xjtu.edu.cn", "login.xjtu.edu.cn", "org.xjtu.edu.cn", "gmis.xjtu.edu.cn", "gs.xjtu.edu.cn",
+    "gste.xjtu.edu.cn", "jwapp.xjtu.edu.cn", "ywtb.xjtu.edu.cn", "lms.xjtu.edu.cn", "rms-v5.xjtu.edu.cn",
+    "tyxylp.xjtu.edu.cn", "hello.xjtu.edu.cn", "one2020.xjtu.edu.cn", "js.xjtu.edu.cn", "gr.xjtu.edu.cn",
+    "yjskq.xjtu.edu.cn", "bkkq.xjtu.edu.cn", "se.xjtu.edu.cn", "dean.xjtu.edu.cn", "ehall.xjtu.edu.cn",
+    "cas.xjtu.edu.cn", "agent.xjtu.edu.cn", "authx-service.xjtu.edu.cn", "xjtu.edu.cn", "www.xjtu.edu.cn",
+)
+_IV_HEX = hexlify(iv_).decode('utf-8')
+_KNOWN_HOST_CIPHERTEXTS = {host: getCiphertext(host) for host in KNOWN_WEBVPN_HOSTS}
+_KNOWN_CIPHERTEXT_HOSTS = {ciphertext: host for host, ciphertext in _KNOWN_HOST_CIPHERTEXTS.items()}
+
+
+@functools.lru_cache(maxsize=1024)
+def _cached_ciphertext(hostname):
+    return getCiphertext(hostname)
+
+
+@functools.lru_cache(maxsize=1024)
+def _cached_plaintext(ciphertext):
+    return getPlaintext(ciphertext)
+
+
+def getHostCiphertext(hostname):
+    """获取主机名在 WebVPN 中的密文。常用站点直接查表，其他主机名使用 LRU 缓存，避免每次请求都重新加密"""
+    ciphertext = _KNOWN_HOST_CIPHERTEXTS.get(hostname)
+    if ciphertext is None:
+        ciphertext = _cached_ciphertext(hostname)
+    return ciphertext
+
+
+def getHostPlaintext(ciphertext):
+    """getHostCiphertext 的逆过程：从 WebVPN 密文得到主机名"""
+    hostname = _KNOWN_CIPHERTEXT_HOSTS.get(ciphertext)
+    if hostname is None:
+        hostname = _cached_plaintext(ciphertext)
+    return hostname
+
+
+def getUrlOrigin(url):
+    """
+    返回 url 中到主机（含端口）为止的前缀，如 "https://jwxt.xjtu.edu.cn:8080"。
+    主机名之后的部分（路径、查询参数等）不影响 url 是否需要改写，因此可以用这个前缀作为判断结果的缓存键。
+    """
+    index = url.find('://')
+    if index < 0:
+        return url
+    start = index + 3
+    end = len(url)
+    for separator in '/?#':
+        position = url.find(separator, start)
+        if 0 <= position < end:
+            end = position
+    return url[:end]
+
+
 def getVPNUrl(url):
     """将常规的 url 加密为 webvpn 使用的 url"""
-    # 这里必须指定最多分割一次，防止 url 中包含多个 ://（比如西交登录系统的 returnUrl 里头就有 http:// 这种
-    parts = url.split('://', maxsplit=1)
-    pro = parts[0]
-    add = parts[1]
-
-    hosts = add.split('/')
-    domain = hosts[0].split(':')[0]
-    port = '-' + hosts[0].split(':')[1] if ":" in hosts[0] else ''
-    cph = getCiphertext(domain)
-    fold = '/'.join(hosts[1:])
+    # 这里必须只按第一个 :// 分割，防止 url 中包含多个 ://（比如西交登录系统的 returnUrl 里头就有 http:// 这种
+    index = url.find('://')
+    if index < 0:
+        raise IndexError("url should contain '://'")
+    pro = url[:index]
+    slash = url.find('/', index + 3)
+    if slash < 0:
+        netloc = url[index + 3:]
+        fold = ''
+    else:
+        netloc = url[index + 3:slash]
+        fold = url[slash + 1:]
 
-    key = hexlify(iv_).decode('utf-8')
+    netloc_parts = netloc.split(':')
+    port = '-' + netloc_parts[1] if len(netloc_parts) > 1 else ''
+    cph = getHostCiphertext(netloc_parts[0])
 
-    return 'https://' + institution + '/' + pro + port + '/' + key + cph + '/' + fold
+    return 'https://' + institution + '/' + pro + port + '/' + _IV_HEX + cph + '/' + fold
 
 
 def getOrdinaryUrl(url):
     """将 webvpn 使用的 url 解密为常规的 url"""
-    parts = url.split('/')
+    parts = url.split('/', 5)
     pro = parts[3]
     key_cph = parts[4]
 
@@ -113,12 +174,12 @@ def getOrdinaryUrl(url):
     else:
         port = ''
 
-    if key_cph[:16] == hexlify(iv_).decode('utf-8'):
+    if key_cph[:16] == _IV_HEX:
         print(key_cph[:32])
         return None
     else:
-        hostname = getPlaintext(key_cph[32:])
-        fold = '/'.join(parts[5:])
+        hostname = getHostPlaintext(key_cph[32:])
+        fold = parts[5] if len(parts) > 5 else ''
         if port:
             hostname += ':' + port
         return pro + "://" + hostname + '/' + fold
@@ -6,6 +6,9 @@ both the background (JPEG) and the cut piece (PNG RGBA). The client must
 detect the gap position and submit a simulated slider track.
 
 Algorithm: edge-NCC (normalized cross-correlation on binary edge maps).
+All offsets are scored at once: window sums come from cumulative column
+sums (an integral image over the band) and the correlation term from a
+single matrix product, so no per-offset window is copied.
 """
 
 from __future__ import annotations
@@ -16,9 +19,12 @@ import json
 import random
 import sys
 import time as _time_module
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterator
 
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import requests
 from PIL import Image
 
@@ -71,15 +77,25 @@ def _sobel(img: np.ndarray) -> np.ndarray:
     return np.sqrt(gx * gx + gy * gy)
 
 
-def detect_gap(bg_rgb: np.ndarray, slider_rgba: np.ndarray) -> tuple[int, float]:
-    """Detect gap, return (move_x, confidence).
+@dataclass(frozen=True)
+class GapCandidate:
+    """One candidate gap position, best candidates first in find_gaps()."""
 
-    move_x is the slider displacement in server coordinate space (0-260).
+    move_x: int        # slider displacement in server coordinates (0-260)
+    confidence: float  # edge-NCC score in [-1, 1]
+    x: int             # left edge of the gap in background pixels
+
+
+def _edge_maps(bg_rgb: np.ndarray, slider_rgba: np.ndarray):
+    """Binary edge maps -> (band, template, x0), or None without a piece.
+
+    ``band`` is the background edge map restricted to the rows of the piece,
+    ``template`` the edge map of the piece itself and ``x0`` the left edge of
+    the piece inside the slider image.
     """
-    bg_w = bg_rgb.shape[1]
     bbox = _piece_bbox(slider_rgba)
     if bbox is None:
-        return 0, 0.0
+        return None
     y0, y1, x0, x1 = bbox
 
     piece_gray = slider_rgba[y0:y1 + 1, x0:x1 + 1, :3].astype(np.float32).mean(axis=2)
@@ -89,26 +105,154 @@ def detect_gap(bg_rgb: np.ndarray, slider_rgba: np.ndarray) -> tuple[int, float]
     pe = _sobel(piece_gray)
     bg_bin = (bg_edge > bg_edge.mean() + bg_edge.std() * 0.6).astype(np.float32)
     pe_bin = (pe > pe.mean() + pe.std() * 0.6).astype(np.float32)
+    return bg_bin[y0:y1 + 1, :], pe_bin, x0
 
-    band = bg_bin[y0:y1 + 1, :]
-    pw = pe_bin.shape[1]
-    width = band.shape[1]
 
-    tmpl = pe_bin - pe_bin.mean()
+def ncc_scores(band: np.ndarray, template: np.ndarray) -> np.ndarray:
+    """NCC of ``template`` against every horizontal offset of ``band``.
+
+    Both inputs are 2D with the same height. Returns a float64 array of
+    ``band.shape[1] - template.shape[1] + 1`` scores (empty if the template
+    is wider than the band).
+    """
+    h, pw = template.shape
+    width = band.shape[1]
+    count = width - pw + 1
+    if count <= 0:
+        return np.empty(0)
+    band = band.astype(np.float64, copy=False)
+    tmpl = template.astype(np.float64) - template.mean(dtype=np.float64)
     tmpl_norm = np.sqrt((tmpl * tmpl).sum()) + 1e-6
 
-    best_ncc, best_x = -1e9, 0
-    for x in range(width - pw + 1):
-        win = band[:, x:x + pw]
-        win0 = win - win.mean()
-        ncc = float((win0 * tmpl).sum()
-                    / (tmpl_norm * (np.sqrt((win0 * win0).sum()) + 1e-6)))
-        if ncc > best_ncc:
-            best_ncc, best_x = ncc, x
+    # Window sums and sums of squares from the integral of the column sums.
+    n = h * pw
+    col = np.concatenate(([0.0], np.cumsum(band.sum(axis=0))))
+    col2 = np.concatenate(([0.0], np.cumsum((band * band).sum(axis=0))))
+    win_sum = col[pw:] - col[:-pw]
+    win_sq = col2[pw:] - col2[:-pw]
+    win_norm = np.sqrt(np.maximum(win_sq - win_sum * win_sum / n, 0.0)) + 1e-6
+
+    # The template is zero-mean, so sum((win - mean) * tmpl) == sum(win * tmpl).
+    # proj[j, x] = tmpl[:, j] . band[:, x]; the score at offset x is the sum
+    # of proj[j, x + j] over the template columns j (a diagonal).
+    proj = tmpl.T @ band
+    diagonals = sliding_window_view(proj, count, axis=1)
+    corr = np.diagonal(diagonals, axis1=0, axis2=1).sum(axis=1)
+    return corr / (tmpl_norm * win_norm)
 
-    # move_x in 260-based server coordinate space
-    move_x = (best_x - x0) * SERVER_BG_W / bg_w
-    return int(round(max(move_x, 0.0))), float(best_ncc)
+
+def _top_offsets(scores: np.ndarray, top_k: int, min_distance: int) -> list[int]:
+    """Indices of the ``top_k`` best scores at least ``min_distance`` apart.
+
+    Ties go to the smaller offset, as the first maximum of a left-to-right scan.
+    """
+    picked: list[int] = []
+    for x in np.argsort(-scores, kind="stable"):
+        x = int(x)
+        if all(abs(x - p) >= min_distance for p in picked):
+            picked.append(x)
+            if len(picked) == top_k:
+                break
+    return picked
+
+
+def find_gaps(bg_rgb: np.ndarray, slider_rgba: np.ndarray, top_k: int = 3,
+              min_distance: int | None = None) -> list[GapCandidate]:
+    """Detect the gap, return up to ``top_k`` candidates, best first.
+
+    Candidates are at least ``min_distance`` background pixels apart
+    (default: a quarter of the piece width) so that the runners-up are
+    distinct positions rather than the neighbours of the best one.
+    """
+    maps = _edge_maps(bg_rgb, slider_rgba)
+    if maps is None:
+        return []
+    band, template, x0 = maps
+    scores = ncc_scores(band, template)
+    if scores.size == 0:
+        return []
+    if min_distance is None:
+        min_distance = max(template.shape[1] // 4, 1)
+
+    bg_w = bg_rgb.shape[1]
+    candidates = []
+    for x in _top_offsets(scores, max(top_k, 1), min_distance):
+        # move_x in 260-based server coordinate space
+        move_x = (x - x0) * SERVER_BG_W / bg_w
+        candidates.append(GapCandidate(int(round(max(move_x, 0.0))), float(scores[x]), x))
+    return candidates
+
+
+def _downsample(img: np.ndarray, factor: int) -> np.ndarray:
+    """Block-mean downsampling of a 2D image by an integer factor."""
+    if factor == 1:
+        return img
+    h = img.shape[0] // factor * factor
+    w = img.shape[1] // factor * factor
+    return img[:h, :w].reshape(h // factor, factor, w // factor, factor).mean(axis=(1, 3))
+
+
+def _gray_scores(bg_rgb: np.ndarray, slider_rgba: np.ndarray, bbox, factor: int,
+                 offsets: np.ndarray) -> np.ndarray:
+    """Gray-level NCC of the piece interior, sampled at the given gap offsets.
+
+    The server only darkens the gap, and NCC ignores gain, so the interior
+    texture of the piece matches the gap itself but not a decoy shape. Only
+    the central half of the bounding box is used, which stays inside the
+    opaque part of the piece whatever its knobs look like.
+    """
+    y0, y1, x0, x1 = bbox
+    my = (y1 - y0 + 1) // 4
+    mx = (x1 - x0 + 1) // 4
+    piece = slider_rgba[y0 + my:y1 + 1 - my, x0 + mx:x1 + 1 - mx, :3].astype(np.float32).mean(axis=2)
+    band = bg_rgb[y0 + my:y1 + 1 - my].astype(np.float32).mean(axis=2)
+    scores = ncc_scores(_downsample(band, factor), _downsample(piece, factor))
+    if scores.size == 0:
+        return np.full(offsets.shape, -1.0)
+    # Coarse index i puts the interior at i * factor, i.e. the piece at i * factor - mx.
+    return np.interp(offsets, np.arange(scores.size) * factor - mx, scores)
+
+
+def rank_gaps(bg_rgb: np.ndarray, slider_rgba: np.ndarray, top_k: int = 3,
+              factors: tuple[int, ...] = (1, 2), min_distance: int | None = None) -> list[GapCandidate]:
+    """Multi-hypothesis gap detection, return up to ``top_k`` candidates, best first.
+
+    Each offset is scored by the mean of the edge-NCC of find_gaps() and the
+    gray-level NCC of the piece interior at every downsampling factor in
+    ``factors``. Slower than find_gaps() by a fraction; meant to be less
+    likely to pick a decoy gap. Opt-in (``ranker=rank_gaps``) until a
+    recorded corpus (scripts/record_captchas.py) shows it is at least as
+    accurate as find_gaps() on real captchas.
+    """
+    bbox = _piece_bbox(slider_rgba)
+    maps = _edge_maps(bg_rgb, slider_rgba)
+    if maps is None:
+        return []
+    band, template, x0 = maps
+    scores = ncc_scores(band, template)
+    if scores.size == 0:
+        return []
+    offsets = np.arange(scores.size)
+    for factor in factors:
+        scores = scores + _gray_scores(bg_rgb, slider_rgba, bbox, factor, offsets)
+    scores /= len(factors) + 1
+    if min_distance is None:
+        min_distance = max(template.shape[1] // 4, 1)
+
+    bg_w = bg_rgb.shape[1]
+    return [GapCandidate(int(round(max((x - x0) * SERVER_BG_W / bg_w, 0.0))), float(scores[x]), x)
+            for x in _top_offsets(scores, max(top_k, 1), min_distance)]
+
+
+def detect_gap(bg_rgb: np.ndarray, slider_rgba: np.ndarray) -> tuple[int, float]:
+    """Detect gap, return (move_x, confidence).
+
+    move_x is the slider displacement in server coordinate space (0-260).
+    """
+    candidates = find_gaps(bg_rgb, slider_rgba, top_k=1)
+    if not candidates:
+        return 0, 0.0
+    return candidates[0].move_x, candidates[0].confidence
 
 
 # ---------------------------------------------------------------------------
@@ -173,6 +317,162 @@ def solve(session: requests.Session | None = None):
     return build_yzm(track, cid), track, cid, conf
 
 
+# Captchas that cannot be fetched or decoded.
+FETCH_ERRORS = (requests.RequestException, KeyError, IndexError, ValueError, OSError)
+
+
+@dataclass
+class SolvedCaptcha:
+    """A fetched captcha with its ranked gap candidates."""
+
+    captcha_id: str
+    candidates: list[GapCandidate]
+    fetched_at: float  # clock of the fetcher, for expiry
+    fetch_ms: float
+    solve_ms: float
+
+    def answers(self) -> Iterator[tuple[str, GapCandidate]]:
+        """Yield ``(yzm, candidate)``, best candidate first.
+
+        Tracks are generated on demand, so their sliding timestamps are
+        current even for a captcha solved a while ago.
+        """
+        for candidate in self.candidates or [GapCandidate(0, 0.0, 0)]:
+            yield build_yzm(gen_track(candidate.move_x), self.captcha_id), candidate
+
+
+# Ranks the gap candidates of a captcha: (background, slider, top_k=...) -> candidates, best first.
+GapRanker = Callable[..., list[GapCandidate]]
+
+
+def solve_captcha(session: requests.Session | None = None, candidates: int = 1,
+                  clock=_time_module.monotonic, ranker: GapRanker = find_gaps) -> SolvedCaptcha:
+    """Fetch a captcha and rank its gap candidates, timing both stages."""
+    started = _time_module.perf_counter()
+    cid, bg, sl = fetch_captcha(session)
+    fetched = _time_module.perf_counter()
+    ranked = ranker(bg, sl, top_k=candidates)
+    solved = _time_module.perf_counter()
+    return SolvedCaptcha(cid, ranked, clock(), (fetched - started) * 1000, (solved - fetched) * 1000)
+
+
+class CaptchaPool:
+    """Captchas fetched and solved ahead of time, handed out before they expire.
+
+    ``fill()`` tops the pool up to ``size`` ready captchas and ``take()``
+    returns the oldest one still younger than ``ttl`` seconds. The server
+    does not publish its captcha lifetime, so the default leaves a margin
+    below the usual minute. Stage timings of every fetched captcha stay in
+    ``solved`` for instrumentation.
+    """
+
+    def __init__(self, session: requests.Session | None = None, size: int = 3, ttl: float = 50.0,
+                 candidates: int = 1, clock=_time_module.monotonic, ranker: GapRanker = find_gaps):
+        self.session = session
+        self.size = size
+        self.ttl = ttl
+        self.candidates = candidates
+        self.ranker = ranker
+        self.solved: list[SolvedCaptcha] = []
+        self.fetch_errors = 0
+        self.expired = 0
+        self._ready: list[SolvedCaptcha] = []
+        self._clock = clock
+
+    def __len__(self) -> int:
+        self._discard_expired()
+        return len(self._ready)
+
+    def _discard_expired(self) -> None:
+        now = self._clock()
+        fresh = [captcha for captcha in self._ready if now - captcha.fetched_at < self.ttl]
+        self.expired += len(self._ready) - len(fresh)
+        self._ready = fresh
+
+    def fill(self) -> int:
+        """Fetch until ``size`` captchas are ready, return how many were added.
+
+        Gives up on the first failed fetch; the next call retries.
+        """
+        added = 0
+        while len(self) < self.size:
+            try:
+                captcha = solve_captcha(self.session, self.candidates, self._clock, self.ranker)
+            except FETCH_ERRORS:
+                self.fetch_errors += 1
+                break
+            self.solved.append(captcha)
+            self._ready.append(captcha)
+            added += 1
+        return added
+
+    def take(self) -> SolvedCaptcha | None:
+        self._discard_expired()
+        return self._ready.pop(0) if self._ready else None
+
+    def stats(self) -> dict:
+        """Counts and median stage timings (ms) of the captchas fetched so far."""
+        def median(values: list[float]) -> float:
+            values = sorted(values)
+            return round(values[len(values) // 2], 1) if values else 0.0
+
+        return {
+            "ready": len(self),
+            "fetched": len(self.solved),
+            "expired": self.expired,
+            "fetch_errors": self.fetch_errors,
+            "fetch_ms_p50": median([captcha.fetch_ms for captcha in self.solved]),
+            "solve_ms_p50": median([captcha.solve_ms for captcha in self.solved]),
+        }
+
+
+class CaptchaAttempts:
+    """Captcha answers to submit in turn, within a retry budget.
+
+    Each fetched captcha is ranked with ``ranker`` and its best
+    ``candidates`` offsets are yielded before the next captcha is fetched.
+    The default is one answer per captcha: the venue server is not known to
+    accept a second answer for the same captcha id, so trying runners-up is
+    opt-in. Ready captchas from ``pool`` are used first and do not count
+    as fetches. Iteration yields ``(yzm, candidate)`` and stops after
+    ``fetches`` captchas or once ``budget`` seconds have passed; captchas
+    that cannot be fetched are counted in ``fetch_errors`` and skipped.
+    """
+
+    def __init__(self, session: requests.Session | None = None, budget: float = 10.0,
+                 fetches: int = 3, candidates: int = 1, clock=_time_module.monotonic,
+                 pool: CaptchaPool | None = None, ranker: GapRanker = find_gaps):
+        self.session = session
+        self.budget = budget
+        self.fetches = fetches
+        self.candidates = candidates
+        self.ranker = ranker
+        self.pool = pool
+        self.fetch_errors = 0
+        self._clock = clock
+
+    def _captchas(self) -> Iterator[SolvedCaptcha]:
+        while self.pool is not None and (captcha := self.pool.take()) is not None:
+            yield captcha
+        for _ in range(self.fetches):
+            try:
+                yield solve_captcha(self.session, self.candidates, self._clock, self.ranker)
+            except FETCH_ERRORS:
+                self.fetch_errors += 1
+
+    def __iter__(self) -> Iterator[tuple[str, GapCandidate]]:
+        deadline = self._clock() + self.budget
+        captchas = self._captchas()
+        while self._clock() < deadline:
+            captcha = next(captchas, None)
+            if captcha is None:
+                return
+            for answer in captcha.answers():
+                if self._clock() >= deadline:
+                    return
+                yield answer
+
+
 def verify(track: dict, captcha_id: str,
            session: requests.Session | None = None) -> bool:
     """Verify track via /check endpoint (self-test only)."""
@@ -2,7 +2,7 @@ import json
 
 from requests import Session
 from collections import namedtuple
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 from dataclasses import dataclass
 
 # 存储评教问卷的相关信息
@@ -90,23 +90,7 @@ class QuestionnaireData:
         """
         if self.TXDM != "01":
             raise ValueError("此题目不是客观题")
-        if self.ZBDM not in option:
-            raise ValueError("无法在输入的答案选项中找到此题目")
-        options = option[self.ZBDM]
-        if len(options) == 0:
-            raise ValueError("此题目没有可选的选项")
-        for one_option in options:
-            if one_option.DAPX == score:
-                self.DA = one_option.DA
-                return
-        # 如果没有找到与输入分值相同的选项，选择与输入分值最近的选项
-        score = float(score)
-        min_diff = 100
-        for one_option in options:
-            diff = abs(float(one_option.DAPX) - score)
-            if diff < min_diff:
-                min_diff = diff
-                self.DA = one_option.DA
+        self.DA = self._optionIndex(option).nearest(score)
 
     def getOptionMaxScore(self, options) -> str:
         """
@@ -117,17 +101,7 @@ class QuestionnaireData:
         """
         if self.TXDM != "01":
             raise ValueError("此题目不是客观题")
-        if self.ZBDM not in options:
-            raise ValueError("无法在输入的答案选项中找到此题目")
-        options = options[self.ZBDM]
-        if len(options) == 0:
-            raise ValueError("此题目没有可选的选项")
-        max_score = 0
-        for one_option in options:
-            score = int(one_option.DAPX)
-            if score > max_score:
-                max_score = score
-        return str(max_score)
+        return self._optionIndex(options).max_score
 
     def getOptionMinScore(self, options) -> str:
         """
@@ -138,17 +112,15 @@ class QuestionnaireData:
         """
         if self.TXDM != "01":
             raise ValueError("此题目不是客观题")
+        return self._optionIndex(options).min_score
+
+    def _optionIndex(self, options) -> "OptionIndex":
+        """取得本题选项的索引。QuestionnaireOptions 会缓存每道题的索引，普通字典则每次重新建立。"""
         if self.ZBDM not in options:
             raise ValueError("无法在输入的答案选项中找到此题目")
-        options = options[self.ZBDM]
-        if len(options) == 0:
-            raise ValueError("此题目没有可选的选项")
-        min_score = 100
-        for one_option in options:
-            score = int(one_option.DAPX)
-            if score < min_score:
-                min_score = score
-        return str(min_score)
+        if isinstance(options, QuestionnaireOptions):
+            return options.index(self.ZBDM)
+        return OptionIndex(options[self.ZBDM])
 
     def setSubjectiveOption(self, data: str):
         """如果本题目类型为主观题，可以直接设置其答案内容"""
@@ -198,6 +170,55 @@ class QuestionnaireOptionData:
     FZ: str
 
 
+class OptionIndex:
+    """一道客观题的选项索引：按分值直接查找选项编号，并预先算好最大、最小分值。"""
+
+    def __init__(self, options: List[QuestionnaireOptionData]):
+        """
+        :param options: 同一道题的全部选项
+        :raises ValueError: 没有任何选项
+        """
+        if len(options) == 0:
+            raise ValueError("此题目没有可选的选项")
+        # 选项分值 -> 选项编号，同一分值只保留第一个选项
+        self.by_score: Dict[str, str] = {}
+        for option in options:
+            self.by_score.setdefault(option.DAPX, option.DA)
+        self._scores = [(float(option.DAPX), option.DA) for option in options]
+        self._nearest: Dict[str, str] = {}
+        self.max_score = str(max(0, *(int(option.DAPX) for option in options)))
+        self.min_score = str(min(100, *(int(option.DAPX) for option in options)))
+
+    def nearest(self, score: str) -> str:
+        """
+        返回分值为 score 的选项编号；没有该分值时返回分值最接近的第一个选项的编号。
+        :param score: 选项分值，字符串 1-5
+        """
+        if score in self.by_score:
+            return self.by_score[score]
+        if score not in self._nearest:
+            target = float(score)
+            self._nearest[score] = min(self._scores, key=lambda item: abs(item[0] - target))[1]
+        return self._nearest[score]
+
+
+class QuestionnaireOptions(dict):
+    """AutoJudge.questionnaireOptions 的返回值：题目代码 -> 选项列表的字典，并缓存每道题的选项索引。"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._indexes: Dict[str, OptionIndex] = {}
+
+    def index(self, code: str) -> OptionIndex:
+        """
+        获得一道题的选项索引，第一次使用时建立。
+        :param code: 题目代码（ZBDM）
+        """
+        if code not in self._indexes:
+            self._indexes[code] = OptionIndex(self[code])
+        return self._indexes[code]
+
+
 class AutoJudge:
     # 教务系统里面请求的变量名起得太差劲了…全都是拼音首字母大写，鬼才知道是什么意思啊
     # 这帮开发人员自己过几年估计都看不懂了吧
@@ -315,7 +336,7 @@ class AutoJudge:
 
         return questionnaire_data
 
-    def questionnaireOptions(self, questionnaire: Questionnaire, username: str, finished=False):
+    def questionnaireOptions(self, questionnaire: Questionnaire, username: str, finished=False) -> QuestionnaireOptions:
         """获得一张问卷中的所有的选项。
         :param questionnaire: 问卷信息
         :param username: 学号（用于填写服务器未返回的参评人字段）
@@ -342,7 +363,7 @@ class AutoJudge:
                                      headers={"Content-Type": "application/x-www-form-urlencoded; charset=UTF-8"})
         result = response.json()
         data = result["datas"]["cxxswjzbxq"]["rows"]
-        result_json = {}
+        result_json = QuestionnaireOptions()
         for one_data in data:
             one_data_obj = QuestionnaireOptionData(one_data["ZBDM"], one_data["ZBMC"], one_data["DADM"],
                                                    one_data["DAFXDM"], one_data["TXDM"], one_data["DAPX"],
@@ -1,7 +1,8 @@
 import json
 import os.path
-from dataclasses import dataclass
-from typing import List
+import threading
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
 from enum import Enum
 from .judge import QuestionnaireData, QuestionnaireOptionData
 
@@ -65,12 +66,44 @@ class QuestionnaireTemplate:
                   Type.IDEOLOGY: "ideology", Type.GENERAL: "general"}
     __score_map = {Score.HUNDRED: "100", Score.EIGHTY: "80", Score.SIXTY: "60", Score.FORTY: "40"}
 
+    # load() 使用的共享模版缓存：(类型, 分值) -> 模版
+    __cache: Dict[Tuple[Type, Score], "QuestionnaireTemplate"] = {}
+    __cache_lock = threading.Lock()
+
     def __init__(self, name=None, data: List[QuestionnaireTemplateData] = None):
         self.name = name
         self.data = data or []
+        # 题目代码 -> 模版数据。与按顺序查找一致，同一代码只保留第一条
+        self._by_code: Dict[str, QuestionnaireTemplateData] = {}
+        # 题目名称 -> 名称匹配到的模版数据（None 表示匹配不到），在 complete 中按需填充
+        self._by_name: Dict[str, Optional[QuestionnaireTemplateData]] = {}
+        for one in self.data:
+            self._by_code.setdefault(one.ZBDM, one)
 
     def append(self, data: QuestionnaireTemplateData):
         self.data.append(data)
+        self._by_code.setdefault(data.ZBDM, data)
+        self._by_name.clear()
+
+    def with_subjective(self, answer: str) -> "QuestionnaireTemplate":
+        """
+        返回一份将所有非客观题的答案替换为 answer 的模版副本，原模版不会被修改。
+        :param answer: 主观题答案
+        """
+        return QuestionnaireTemplate(self.name, [one if one.TXDM == "01" else replace(one, ZGDA=answer)
+                                                 for one in self.data])
+
+    def match(self, data: QuestionnaireData) -> Optional[QuestionnaireTemplateData]:
+        """
+        查找与问卷题目对应的模版数据：先按题目代码匹配，匹配不到时查找名称包含于题目名称中的第一条模版数据。
+        :return: 匹配到的模版数据，匹配不到时返回 None
+        """
+        one = self._by_code.get(data.ZBDM)
+        if one is not None:
+            return one
+        if data.ZBMC not in self._by_name:
+            self._by_name[data.ZBMC] = next((one for one in self.data if one.name in data.ZBMC), None)
+        return self._by_name[data.ZBMC]
 
     @classmethod
     def score_to_int(cls, score: Score) -> int:
@@ -96,35 +129,23 @@ class QuestionnaireTemplate:
         :param default_subjective: 在没有匹配到模版时，填空题题目填写的默认答案
         :return:
         """
-        for one in self.data:
-            # 先尝试匹配编号
-            if one.ZBDM == data.ZBDM:
-                if data.TXDM == "01":
-                    data.setOption(options, one.DAPX)
-                elif data.TXDM == "02":
-                    data.setSubjectiveOption(one.ZGDA)
-                # 分值题在匹配不到的时候处理，用默认分数填写。
-                break
-        # 匹配不到编号的情况下，匹配名称
-        else:
-            for one in self.data:
-                if one.name in data.ZBMC:
-                    if data.TXDM == "01":
-                        data.setOption(options, one.DAPX)
-                    elif data.TXDM == "02":
-                        data.setSubjectiveOption(one.ZGDA)
-                    break
-            # 什么都匹配不到的情况下，根据设置决定是否强行填写
+        one = self.match(data)
+        if one is not None:
+            if data.TXDM == "01":
+                data.setOption(options, one.DAPX)
+            elif data.TXDM == "02":
+                data.setSubjectiveOption(one.ZGDA)
+            # 分值题在匹配不到的时候处理，用默认分数填写。
+        # 什么都匹配不到的情况下，根据设置决定是否强行填写
+        elif always_complete:
+            if data.TXDM == "01":
+                # 将 100-0 折算为一个 1-5 的分数
+                data.setOption(options, str(min(6 - default_score / 20, 5)))
+            elif data.TXDM == "03":
+                max_option = data.getMaxScore()
+                data.setScore(int(default_score / 100 * max_option))
             else:
-                if always_complete:
-                    if data.TXDM == "01":
-                        # 将 100-0 折算为一个 1-5 的分数
-                        data.setOption(options, str(min(6 - default_score / 20, 5)))
-                    elif data.TXDM == "03":
-                        max_option = data.getMaxScore()
-                        data.setScore(int(default_score / 100 * max_option))
-                    else:
-                        data.setSubjectiveOption(default_subjective)
+                data.setSubjectiveOption(default_subjective)
 
     @classmethod
     def from_file(cls, type_: Type, score: Score):
@@ -137,6 +158,21 @@ class QuestionnaireTemplate:
         with open(os.path.join("jwxt", "templates", f"{cls.__type_map[type_]}-{cls.__score_map[score]}.json"), "r", encoding="utf-8") as f:
             return cls.from_json(json.load(f))
 
+    @classmethod
+    def load(cls, type_: Type, score: Score) -> "QuestionnaireTemplate":
+        """与 from_file 相同，但每种模版只在第一次使用时读取一次，之后从共享缓存中返回。
+        返回的模版会被共用，请不要修改；需要修改主观题答案时使用 with_subjective。
+        :param type_: 问卷类型
+        :param score: 问卷分值
+        :raises FileNotFoundError: 未找到对应的问卷模版文件
+        :return: 问卷模版对象
+        """
+        key = (type_, score)
+        with cls.__cache_lock:
+            if key not in cls.__cache:
+                cls.__cache[key] = cls.from_file(type_, score)
+            return cls.__cache[key]
+
 
 if __name__ == '__main__':
     template = QuestionnaireTemplate("test")
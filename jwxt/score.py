@@ -1,5 +1,6 @@
 import re
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 import requests
@@ -57,6 +58,9 @@ class Score:
     """
     封装 Ehall 上与成绩查询相关的操作
     """
+    # 同时请求成绩单页面的最大数量
+    FR_PAGE_WORKERS = 4
+
     def __init__(self, session: requests.Session):
         """
         创建一个成绩查询对象。此类封装了一系列成绩相关的请求接口。
@@ -178,7 +182,10 @@ class Score:
                         "specificReason": one_data["TSYYDM_DISPLAY"],
                         "itemList": items,
                         "courseList": None,
-                        "statusCode": 0
+                        "statusCode": 0,
+                        # 以下两项不属于 Jwapp 格式，用于区分不同学期的同名课程
+                        "term": one_data.get("XNXQDM"),
+                        "courseCode": one_data.get("KCH")
                     }
                 )
             return new_format_list
@@ -267,7 +274,7 @@ class Score:
         raise ValueError("FR reportTotalPage not found in html")
 
     @staticmethod
-    def extract_course_scores_from_fr_form_html(html: str) -> Tuple[List[Dict[str, Any]], str]:
+    def extract_course_scores_from_fr_form_html(html: str, initial_term: Optional[str] = None) -> Tuple[List[Dict[str, Any]], str]:
         """从 FR 报表 page_content HTML 中解析课程成绩列表。
 
         返回二元组：
@@ -278,7 +285,37 @@ class Score:
         - 使用 lxml 遍历 tbody.rows-height-counter 下的 tr
         - 遇到“学期行”（如“2022-2023学年 第一学期”）更新 current_term
         - 遇到“课程行”（课程/学分/成绩三列）则记录到结果列表
+
+        :param initial_term: 上一页最后的学期。学期跨页时，本页第一个学期行之前的课程属于该学期；为 None 时跳过这些课程
+        :raises ValueError: 页面无法解析，或者页面中没有学期行且没有给出 initial_term
         """
+        courses, last_term = Score._parse_fr_form_html(html)
+        courses = Score._stitch_fr_pages([(courses, last_term)], initial_term)
+        last_term = last_term or initial_term
+        if last_term is None:
+            raise ValueError("no term found in html")
+        return courses, last_term
+
+    @staticmethod
+    def _stitch_fr_pages(pages: List[Tuple[List[Dict[str, Any]], Optional[str]]],
+                         initial_term: Optional[str] = None) -> List[Dict[str, Any]]:
+        """按页码顺序拼接 _parse_fr_form_html 的结果，把每页开头尚无学期的课程归入上一页最后的学期"""
+        all_courses: List[Dict[str, Any]] = []
+        carried_term = initial_term
+        for courses, last_term in pages:
+            for course in courses:
+                if course["term"] is None:
+                    if carried_term is None:
+                        # 在没有学期上下文时不记录，避免误解析
+                        continue
+                    course = dict(course, term=carried_term)
+                all_courses.append(course)
+            carried_term = last_term or carried_term
+        return all_courses
+
+    @staticmethod
+    def _parse_fr_form_html(html: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """解析单页 FR 报表。本页第一个学期行之前的课程 term 为 None，页面中没有学期行时返回的学期为 None"""
         if not html:
             raise ValueError("empty html")
 
@@ -374,10 +411,6 @@ class Score:
                 continue
             if course_name == "课程" and credit_text == "学分" and score_text == "成绩":
                 continue
-            if current_term is None:
-                # 在没有学期上下文时不记录，避免误解析
-                continue
-
             try:
                 course_credit = float(credit_text)
             except Exception:
@@ -409,11 +442,17 @@ class Score:
                 }
             )
 
-        if last_term is None:
-            raise ValueError("no term found in html")
-
         return courses, last_term
 
+    def _fr_page_content(self, session_id: str, pn: int) -> str:
+        """请求 FR 成绩单的第 pn 页（从 1 开始）"""
+        return self.session.get("https://jwxt.xjtu.edu.cn/jwapp/sys/frReport2/show.do",
+                                params={"_": int(time.time() * 1000),
+                                        "__boxModel__": "true",
+                                        "op": "page_content",
+                                        "sessionID": session_id,
+                                        "pn": pn}).text
+
     def reported_grade(self, student_id: str, term: Union[List[str], str, None] = None) -> List:
         """
         通过“获得成绩单”接口，获取选中学期的课程成绩列表。
@@ -434,30 +473,17 @@ class Score:
         html = response.text
         # 提取当前的 Session id
         session_id = self.extract_fr_session_id_from_html(html)
-        # 请求所有页成绩
-        first_page = (self.session.get("https://jwxt.xjtu.edu.cn/jwapp/sys/frReport2/show.do",
-                                      params={"_": int(time.time() * 1000),
-                                              "__boxModel__": "true",
-                                              "op": "page_content",
-                                              "sessionID": session_id,
-                                              "pn": 1})
-                      .text)
+        # 请求所有页成绩。得到 session id 与总页数后各页互不依赖，并发请求并解析，再按页码顺序拼接
+        first_page = self._fr_page_content(session_id, 1)
         total_page = self.extract_fr_report_total_page_from_html(first_page)
-        all_courses: List[Dict[str, Any]] = []
-        # 解析第一页
-        page_courses, last_term = self.extract_course_scores_from_fr_form_html(first_page)
-        all_courses.extend(page_courses)
-        # 解析后续各页
-        for pn in range(2, total_page + 1):
-            page_html = (self.session.get("https://jwxt.xjtu.edu.cn/jwapp/sys/frReport2/show.do",
-                                          params={"_": int(time.time() * 1000),
-                                                  "__boxModel__": "true",
-                                                  "op": "page_content",
-                                                  "sessionID": session_id,
-                                                  "pn": pn})
-                         .text)
-            page_courses, _ = self.extract_course_scores_from_fr_form_html(page_html)
-            all_courses.extend(page_courses)
+        with ThreadPoolExecutor(max_workers=max(1, min(self.FR_PAGE_WORKERS, total_page))) as pool:
+            first = pool.submit(self._parse_fr_form_html, first_page)
+            rest = pool.map(lambda pn: self._parse_fr_form_html(self._fr_page_content(session_id, pn)),
+                            range(2, total_page + 1))
+            pages = [first.result(), *rest]
+        if all(last_term is None for _, last_term in pages):
+            raise ValueError("no term found in html")
+        all_courses = self._stitch_fr_pages(pages)
         # 根据需要过滤学期
         if term is not None:
             if isinstance(term, str):
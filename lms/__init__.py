@@ -1,5 +1,6 @@
 """XJTU LMS API wrappers."""
 
+from .cache import LMSRequestCache
 from .lms import (
     LMSActivity,
     LMSCourseDetail,
@@ -12,6 +13,7 @@ from .lms import (
 
 __all__ = [
     "LMSUtil",
+    "LMSRequestCache",
     "LMSUserInfo",
     "LMSCourseSummary",
     "LMSCourseDetail",
@@ -0,0 +1,168 @@
+"""
+思源学堂请求的会话级缓存。
+
+同一个已登录的 `requests.Session` 会在多个界面、多个线程中反复构造 `LMSUtil`，
+因此缓存挂在 session 上而不是 `LMSUtil` 实例上：只要 session 不变，打开同一个页面就不会重复请求。
+同时，相同的请求如果正在进行中，后来者会等待并共享它的结果（single-flight），而不是再发一次请求。
+"""
+from __future__ import annotations
+
+import copy
+import threading
+import time
+import weakref
+from typing import Any, Callable, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# 调用 invalidate 时表示“该接口下的全部键”
+ANY_KEY = object()
+
+
+class _InFlight:
+    """一个正在进行中的请求，等待者通过 event 获取它的结果。"""
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class LMSRequestCache:
+    """
+    按接口设置有效期（秒）的请求缓存，并合并并发的相同请求。
+
+    缓存的值在写入和读取时都会深拷贝，调用方可以放心修改返回的字典。
+    """
+
+    # 各接口的默认有效期（秒）
+    DEFAULT_TTLS: dict[str, float] = {
+        # 用户信息在一次登录中基本不会变化
+        "user_info": 60 * 60,
+        "course_detail": 10 * 60,
+        # 活动详情中包含作业提交与批阅状态，有效期较短
+        "activity_detail": 5 * 60,
+        "lesson_player_token": 10 * 60,
+        "lesson_player_rms_token": 10 * 60,
+        "embed_token": 10 * 60,
+        "replay_videos": 30 * 60,
+    }
+    # 未在 DEFAULT_TTLS 中列出的接口使用的有效期（秒）
+    FALLBACK_TTL = 60
+
+    _by_session: "weakref.WeakKeyDictionary[Any, LMSRequestCache]" = weakref.WeakKeyDictionary()
+    _by_session_lock = threading.Lock()
+
+    def __init__(self, ttls: dict[str, float] | None = None, clock: Callable[[], float] = time.monotonic):
+        """
+        :param ttls: 覆盖默认有效期的字典，键为接口名
+        :param clock: 获取当前时间的函数，主要供测试替换
+        """
+        self.ttls = dict(self.DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, Hashable], tuple[float, Any]] = {}
+        self._in_flight: dict[tuple[str, Hashable], _InFlight] = {}
+        # 每次失效都会递增；请求完成时如果代数已经变化，结果不会写入缓存
+        self._generation = 0
+        # 统计信息：命中、实际加载、合并到进行中请求的次数
+        self.hits = 0
+        self.loads = 0
+        self.coalesced = 0
+
+    @classmethod
+    def for_session(cls, session: Any) -> "LMSRequestCache":
+        """获取某个 session 对应的缓存，不存在时创建。session 被回收后缓存随之释放。"""
+        with cls._by_session_lock:
+            cache = cls._by_session.get(session)
+            if cache is None:
+                cache = cls()
+                cls._by_session[session] = cache
+            return cache
+
+    def ttl(self, endpoint: str) -> float:
+        return self.ttls.get(endpoint, self.FALLBACK_TTL)
+
+    def get_or_load(self, endpoint: str, key: Hashable, loader: Callable[[], T], *, refresh: bool = False,
+                    should_cache: Callable[[T], bool] | None = None) -> T:
+        """
+        返回缓存中 `(endpoint, key)` 的值；缓存缺失或过期时调用 `loader` 加载。
+        如果相同的请求正在其他线程中进行，则等待该请求完成并共享结果（包括异常）。
+
+        :param endpoint: 接口名，决定有效期
+        :param key: 接口内区分不同请求的键，如活动 ID
+        :param loader: 实际发起请求的无参函数
+        :param refresh: 为 True 时忽略已有缓存，但仍会与进行中的请求合并
+        :param should_cache: 可选，返回 False 时本次结果只共享给等待者而不写入缓存（如服务器返回了错误信息）
+        """
+        cache_key = (endpoint, key)
+        with self._lock:
+            if not refresh:
+                cached = self._values.get(cache_key)
+                if cached is not None and cached[0] > self._clock():
+                    self.hits += 1
+                    return copy.deepcopy(cached[1])
+            flight = self._in_flight.get(cache_key)
+            leader = flight is None
+            if leader:
+                flight = _InFlight()
+                self._in_flight[cache_key] = flight
+                generation = self._generation
+                self.loads += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.value)
+
+        try:
+            value = loader()
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self._in_flight.pop(cache_key, None)
+            flight.event.set()
+            raise
+
+        flight.value = copy.deepcopy(value)
+        with self._lock:
+            self._in_flight.pop(cache_key, None)
+            if generation == self._generation and (should_cache is None or should_cache(value)):
+                self._values[cache_key] = (self._clock() + self.ttl(endpoint), flight.value)
+        flight.event.set()
+        return value
+
+    def peek(self, endpoint: str, key: Hashable) -> tuple[bool, Any]:
+        """不触发加载地查询缓存，返回 (是否命中, 值)。"""
+        with self._lock:
+            cached = self._values.get((endpoint, key))
+            if cached is None or cached[0] <= self._clock():
+                return False, None
+            return True, copy.deepcopy(cached[1])
+
+    def put(self, endpoint: str, key: Hashable, value: Any):
+        """直接写入一个值，例如由预取得到的结果。"""
+        with self._lock:
+            self._values[(endpoint, key)] = (self._clock() + self.ttl(endpoint), copy.deepcopy(value))
+
+    def invalidate(self, endpoint: str | None = None, key: Hashable = ANY_KEY):
+        """
+        使缓存失效。
+        :param endpoint: 接口名；为 None 时清空全部缓存
+        :param key: 接口内的键；默认使该接口下的全部键失效
+        """
+        with self._lock:
+            self._generation += 1
+            if endpoint is None:
+                self._values.clear()
+            elif key is ANY_KEY:
+                for cache_key in [one for one in self._values if one[0] == endpoint]:
+                    del self._values[cache_key]
+            else:
+                self._values.pop((endpoint, key), None)
@@ -7,6 +7,7 @@ from urllib.parse import parse_qs, urlparse
 
 from requests import Session
 
+from .cache import ANY_KEY, LMSRequestCache
 from .models import (LMSActivity, LMSActivityBrief, LMSUpload, LMSGrade, LMSInstructor, LMSDepartment, LMSReplayVideo,
                      LMSReplayError, LMSReplayVideosResponse, LMSSubmissionListResponse,
                      LMSUserInfo, LMSCourseSummary, LMSCourseDetail, ActivityType, LMSReplayCode)
@@ -27,17 +28,25 @@ class LMSUtil:
     BASE_URL = "https://lms.xjtu.edu.cn"
     RMS_BASE_URL = "https://rms-v5.xjtu.edu.cn"
 
-    def __init__(self, session: Session):
+    def __init__(self, session: Session, cache: LMSRequestCache | None = None):
         """
         创建一个 LMSUtil 实例。
         传入的 `session` 应使用 `app.sessions.lms_session.LMSSession`
         或其他已经完成思源学堂登录认证的 `requests.Session`。
+
+        :param cache: 请求缓存。默认使用与 `session` 绑定的缓存，因此基于同一 session 创建的多个 LMSUtil 会共享缓存，
+                      并合并并发的相同请求。
         """
         self.session = session
-        self._cached_user_info: LMSUserInfo | None = None
-        self._replay_video_cache: dict[str, list[LMSReplayVideo]] = {}
-        self._lesson_player_token_cache: dict[int, str] = {}
-        self._lesson_player_rms_token_cache: dict[int, str] = {}
+        self.cache = cache if cache is not None else LMSRequestCache.for_session(session)
+
+    def invalidate_cache(self, endpoint: str | None = None, key: Any = ANY_KEY):
+        """
+        使请求缓存失效，供界面上的“刷新”操作调用。
+        :param endpoint: 接口名（见 `LMSRequestCache.DEFAULT_TTLS`）；为 None 时清空全部缓存
+        :param key: 接口内的键，如活动 ID；默认使该接口下的全部缓存失效
+        """
+        self.cache.invalidate(endpoint, key)
 
     def _get_user_index_page(self) -> str:
         """获取用户主页 HTML（包含 globalData.user 信息）。"""
@@ -52,9 +61,9 @@ class LMSUtil:
 
         :param refresh: 是否强制刷新缓存（默认 `False`）。如果为 `True`，将重新请求用户主页并解析用户信息，而不是使用之前缓存的结果。
         """
-        if self._cached_user_info is not None and not refresh:
-            return self._cached_user_info
+        return self.cache.get_or_load("user_info", None, self._load_user_info, refresh=refresh)
 
+    def _load_user_info(self) -> LMSUserInfo:
         page = self._get_user_index_page()
         user_dict = self._parse_js_object(page, "user", "dept")
         dept_dict = self._parse_js_object(page, "dept", "locale")
@@ -82,7 +91,6 @@ class LMSUtil:
         if dept:
             info["dept"] = dept
 
-        self._cached_user_info = info
         return info
 
     def get_my_courses(self) -> list[LMSCourseSummary]:
@@ -109,8 +117,17 @@ class LMSUtil:
 
         return extracted_courses
 
-    def get_course_detail(self, course_id: int) -> Optional[LMSCourseDetail]:
-        """获取课程详细信息。"""
+    def get_course_detail(self, course_id: int, refresh: bool = False) -> Optional[LMSCourseDetail]:
+        """
+        获取课程详细信息。
+
+        :param refresh: 是否忽略缓存重新请求
+        """
+        return self.cache.get_or_load(
+            "course_detail", course_id, lambda: self._load_course_detail(course_id), refresh=refresh
+        )
+
+    def _load_course_detail(self, course_id: int) -> Optional[LMSCourseDetail]:
         data = self._get_json(f"{self.BASE_URL}/api/courses/{course_id}")
         if not isinstance(data, dict):
             raise ValueError(f"Unexpected response from /api/courses/{course_id}: expected object.")
@@ -131,8 +148,21 @@ class LMSUtil:
         extracted_activities = [self._extract_activity_brief(one) for one in activities if isinstance(one, dict)]
         return extracted_activities
 
-    def get_activity_detail(self, activity_id: int) -> LMSActivity:
-        """获取活动详细信息。"""
+    def get_activity_detail(self, activity_id: int, refresh: bool = False) -> LMSActivity:
+        """
+        获取活动详细信息。
+
+        :param refresh: 是否忽略缓存重新请求
+        """
+        return self.cache.get_or_load(
+            "activity_detail", activity_id, lambda: self._load_activity_detail(activity_id), refresh=refresh
+        )
+
+    def has_cached_activity_detail(self, activity_id: int) -> bool:
+        """活动详情是否已经在缓存中（不会发起请求）。"""
+        return self.cache.peek("activity_detail", activity_id)[0]
+
+    def _load_activity_detail(self, activity_id: int) -> LMSActivity:
         data = self._get_json(f"{self.BASE_URL}/api/activities/{activity_id}")
         if not isinstance(data, dict):
             raise ValueError(f"Unexpected response from /api/activities/{activity_id}: expected object.")
@@ -284,22 +314,30 @@ class LMSUtil:
         from_page: str = "course",
         timeout: float | tuple[float, float] | None = None,
     ) -> str:
-        cached = self._lesson_player_token_cache.get(lesson_activity_id)
-        if cached:
-            return cached
+        def load() -> str:
+            player_url = self._get_lesson_player_url(lesson_activity_id, from_page=from_page, timeout=timeout)
+            token = self._extract_url_query_param(player_url, "token")
+            if not token:
+                raise ValueError(f"Missing token in player url for lesson activity {lesson_activity_id}.")
+            return token
 
-        player_url = self._get_lesson_player_url(lesson_activity_id, from_page=from_page, timeout=timeout)
-        token = self._extract_url_query_param(player_url, "token")
-        if not token:
-            raise ValueError(f"Missing token in player url for lesson activity {lesson_activity_id}.")
-        self._lesson_player_token_cache[lesson_activity_id] = token
-        return token
+        return self.cache.get_or_load("lesson_player_token", lesson_activity_id, load)
 
     def _exchange_embed_token(
         self,
         player_token: str,
         *,
         timeout: float | tuple[float, float] | None = None,
+    ) -> str:
+        return self.cache.get_or_load(
+            "embed_token", player_token, lambda: self._load_embed_token(player_token, timeout=timeout)
+        )
+
+    def _load_embed_token(
+        self,
+        player_token: str,
+        *,
+        timeout: float | tuple[float, float] | None = None,
     ) -> str:
         data = self._get_json(
             f"{self.RMS_BASE_URL}/api/v1/auth/embed-token",
@@ -327,14 +365,11 @@ class LMSUtil:
         from_page: str = "course",
         timeout: float | tuple[float, float] | None = None,
     ) -> str:
-        cached = self._lesson_player_rms_token_cache.get(lesson_activity_id)
-        if cached:
-            return cached
+        def load() -> str:
+            player_token = self._get_lesson_player_token(lesson_activity_id, from_page=from_page, timeout=timeout)
+            return self._exchange_embed_token(player_token, timeout=timeout)
 
-        player_token = self._get_lesson_player_token(lesson_activity_id, from_page=from_page, timeout=timeout)
-        rms_token = self._exchange_embed_token(player_token, timeout=timeout)
-        self._lesson_player_rms_token_cache[lesson_activity_id] = rms_token
-        return rms_token
+        return self.cache.get_or_load("lesson_player_rms_token", lesson_activity_id, load)
 
     def _get_replay_videos(
         self,
@@ -385,31 +420,26 @@ class LMSUtil:
         if normalized_replay_code is None:
             return []
 
-        # 如果可以，则使用缓存信息，避免重复请求和解析
-        cached = self._replay_video_cache.get(normalized_replay_code)
-        if cached is not None:
-            return list(cached)
-
-        data = self._get_replay_videos(
-            normalized_replay_code,
-            lesson_activity_id=lesson_activity_id,
-            token=token,
-            timeout=timeout,
-        )
-        if isinstance(data.get("error"), Mapping):
-            return []
-
-        videos = data.get("lesson_videos", [])
-        if not isinstance(videos, list):
-            return []
+        # 如果可以，则使用缓存信息，避免重复请求和解析；服务器返回错误时不缓存
+        def load() -> list[LMSReplayVideo] | None:
+            data = self._get_replay_videos(
+                normalized_replay_code,
+                lesson_activity_id=lesson_activity_id,
+                token=token,
+                timeout=timeout,
+            )
+            if isinstance(data.get("error"), Mapping):
+                return None
 
-        result = []
-        for one in videos:
-            if isinstance(one, dict):
-                result.append(one)
+            videos = data.get("lesson_videos", [])
+            if not isinstance(videos, list):
+                return None
+            return [one for one in videos if isinstance(one, dict)]
 
-        self._replay_video_cache[normalized_replay_code] = list(result)
-        return result
+        result = self.cache.get_or_load(
+            "replay_videos", normalized_replay_code, load, should_cache=lambda value: value is not None
+        )
+        return result if result is not None else []
 
     @staticmethod
     def _extract_course_summary(course: Mapping[str, Any]) -> Optional[LMSCourseSummary]:
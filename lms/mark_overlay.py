@@ -0,0 +1,550 @@
+"""
+思源学堂批改附件（批注）的解析。
+
+批改附件的格式并不固定：可能是 JSON、被多次 URL 编码 / JSON 编码的字符串，也可能是“x,y: 文字”形式的纯文本；
+批注框的坐标、所属图片和页码分散在任意深度的字段中。这里把解析集中在一处：
+
+- `iter_mark_payload_candidates` 惰性地展开可能包含批注的候选节点，找到可用的候选后立刻停止；
+- `extract_mark_overlay` 使用显式栈单次遍历，同时提取批注项与文字摘要；
+- `MarkOverlayMemo` 按提交 ID 缓存解析结果，重复打开同一份批改预览时不再解析。
+"""
+from __future__ import annotations
+
+import json
+import re
+from collections import OrderedDict
+from typing import Any, Hashable, Iterator, Optional
+from urllib.parse import unquote
+
+# 最多返回的批注项数量与摘要行数
+MAX_OVERLAY_ITEMS = 200
+MAX_SUMMARY_TEXTS = 10
+
+# 这些字段下的列表按下标对应图片的页码
+PAGE_CONTAINER_KEYS = frozenset({"pages", "images", "attachments", "files", "canvases", "slides"})
+TEXT_KEYS = ("text", "comment", "content", "remark", "label", "note", "msg", "message")
+
+_ID_KEYS = (
+    "id", "upload_id", "uploadId", "target_id", "targetId", "image_id", "imageId", "origin_upload_id",
+    "originUploadId"
+)
+_REFERENCE_ID_KEYS = ("reference_id", "referenceId", "file_id", "fileId", "origin_reference_id", "originReferenceId")
+_KEY_KEYS = ("key", "upload_key", "uploadKey", "file_key", "fileKey")
+_NESTED_TARGET_KEYS = (
+    "upload",
+    "origin_upload", "originUpload",
+    "origin_attachment", "originAttachment",
+    "source_upload", "sourceUpload",
+    "source_attachment", "sourceAttachment",
+    "attachment",
+    "origin",
+    "source",
+    "file",
+    "image",
+)
+_TARGET_KEYS = frozenset(_ID_KEYS + _REFERENCE_ID_KEYS + _KEY_KEYS + _NESTED_TARGET_KEYS)
+
+_UNIT_KEYS = (
+    "coord_unit", "coordUnit", "coordinate_unit", "coordinateUnit",
+    "coordinate_type", "coordinateType", "coord_type", "coordType", "unit"
+)
+_PAGE_KEYS = ("page_index", "pageIndex", "image_index", "imageIndex", "img_index", "imgIndex", "page")
+_DIMENSION_KEY_PAIRS = (
+    ("image_width", "image_height"),
+    ("imageWidth", "imageHeight"),
+    ("img_width", "img_height"),
+    ("imgWidth", "imgHeight"),
+    ("origin_width", "origin_height"),
+    ("originWidth", "originHeight"),
+    ("original_width", "original_height"),
+    ("originalWidth", "originalHeight"),
+    ("natural_width", "natural_height"),
+    ("naturalWidth", "naturalHeight"),
+    ("canvas_width", "canvas_height"),
+    ("canvasWidth", "canvasHeight"),
+    ("page_width", "page_height"),
+    ("pageWidth", "pageHeight"),
+    ("display_width", "display_height"),
+    ("displayWidth", "displayHeight"),
+    ("source_width", "source_height"),
+    ("sourceWidth", "sourceHeight"),
+    ("base_width", "base_height"),
+    ("baseWidth", "baseHeight"),
+)
+_SIZE_KEYS = (
+    "size", "image_size", "imageSize", "origin_size", "originSize",
+    "original_size", "originalSize", "natural_size", "naturalSize",
+    "canvas_size", "canvasSize", "page_size", "pageSize",
+    "display_size", "displaySize", "source_size", "sourceSize"
+)
+_DIMENSION_KEYS = frozenset([one for pair in _DIMENSION_KEY_PAIRS for one in pair] + list(_SIZE_KEYS))
+_GEOMETRY_KEYS = frozenset({
+    "x", "y", "w", "h", "x1", "y1", "x2", "y2", "left", "top", "right", "bottom", "width", "height",
+    "rect", "bbox", "graphic",
+})
+
+_CANDIDATE_PREFERRED_KEYS = (
+    "data", "payload", "result", "content", "annotation", "annotations",
+    "mark", "marks", "markup", "items", "list"
+)
+_CANDIDATE_MAX_DEPTH = 5
+_LINE_RE = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*[,，]\s*(-?\d+(?:\.\d+)?)\s*[:：\-]\s*(.+?)\s*$")
+
+
+def as_float(value) -> Optional[float]:
+    try:
+        if value is None:
+            return None
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _normalize_token(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value or "").strip().lower()
+
+
+def _collect_target_tokens(node: dict) -> frozenset[str]:
+    """收集节点（及其 upload / origin 等嵌套字段）中标识目标图片的 ID、reference_id 与 key。"""
+    tokens: set[str] = set()
+    mappings = [node]
+    while mappings:
+        mapping = mappings.pop()
+        for kind, keys in (("id", _ID_KEYS), ("reference_id", _REFERENCE_ID_KEYS), ("key", _KEY_KEYS)):
+            for key in keys:
+                raw = mapping.get(key)
+                if raw is None:
+                    continue
+                values = [raw]
+                while values:
+                    one = values.pop()
+                    if isinstance(one, (int, float, str)):
+                        token_value = _normalize_token(one)
+                        if token_value:
+                            tokens.add(f"{kind}:{token_value}")
+                    elif isinstance(one, dict):
+                        mappings.append(one)
+                    elif isinstance(one, (list, tuple)):
+                        values.extend(one[:12])
+        for key in _NESTED_TARGET_KEYS:
+            nested_value = mapping.get(key)
+            if isinstance(nested_value, dict):
+                mappings.append(nested_value)
+            elif isinstance(nested_value, (list, tuple)):
+                mappings.extend(one for one in nested_value[:12] if isinstance(one, dict))
+    return frozenset(tokens)
+
+
+def _parse_unit_hint(node: dict, inherited: Optional[str]) -> Optional[str]:
+    for key in _UNIT_KEYS:
+        value = node.get(key)
+        if not isinstance(value, str):
+            continue
+        text = value.strip().lower()
+        if not text:
+            continue
+        if "percent" in text or text in {"%", "pct"}:
+            return "percent"
+        if "ratio" in text or "normalized" in text or "relative" in text:
+            return "ratio"
+        if "pixel" in text or text in {"px", "pixels"}:
+            return "px"
+    return inherited
+
+
+def _parse_page_hint(node: dict, inherited: Optional[int]) -> Optional[int]:
+    for key in _PAGE_KEYS:
+        value = as_float(node.get(key))
+        if value is None:
+            continue
+        return int(round(value))
+    return inherited
+
+
+def _parse_dimension_hints(node: dict, inherited_w: Optional[float],
+                           inherited_h: Optional[float]) -> tuple[Optional[float], Optional[float]]:
+    for w_key, h_key in _DIMENSION_KEY_PAIRS:
+        w = as_float(node.get(w_key))
+        h = as_float(node.get(h_key))
+        if w is not None and h is not None and w > 0 and h > 0:
+            return w, h
+
+    for size_key in _SIZE_KEYS:
+        size = node.get(size_key)
+        if not isinstance(size, dict):
+            continue
+        for w_key, h_key in (("width", "height"), ("w", "h"), ("imageWidth", "imageHeight")):
+            w = as_float(size.get(w_key))
+            h = as_float(size.get(h_key))
+            if w is not None and h is not None and w > 0 and h > 0:
+                return w, h
+
+    return inherited_w, inherited_h
+
+
+def _apply_box_values(values, *, prefer_xyxy: bool = False, current_x: Optional[float] = None,
+                      current_y: Optional[float] = None, current_w: Optional[float] = None,
+                      current_h: Optional[float] = None):
+    v1 = as_float(values[0])
+    v2 = as_float(values[1])
+    v3 = as_float(values[2])
+    v4 = as_float(values[3])
+
+    x = current_x if current_x is not None else v1
+    y = current_y if current_y is not None else v2
+    w = current_w
+    h = current_h
+
+    treat_as_xyxy = prefer_xyxy
+    if not treat_as_xyxy and None not in (v1, v2, v3, v4):
+        treat_as_xyxy = (v3 >= v1 and v4 >= v2 and (v3 > 1 or v4 > 1))
+
+    if treat_as_xyxy:
+        if x is not None and w is None and v3 is not None:
+            w = v3 - x
+        if y is not None and h is None and v4 is not None:
+            h = v4 - y
+    else:
+        if w is None:
+            w = v3
+        if h is None:
+            h = v4
+
+    return x, y, w, h
+
+
+def _node_box(node: dict):
+    """从节点的 x/y/w/h、left/top/right/bottom、rect、bbox 等字段中计算批注框。"""
+    x = as_float(node.get("x"))
+    y = as_float(node.get("y"))
+    w = as_float(node.get("w"))
+    h = as_float(node.get("h"))
+    if x is None:
+        x = as_float(node.get("x1"))
+    if y is None:
+        y = as_float(node.get("y1"))
+    if x is None:
+        x = as_float(node.get("left"))
+    if y is None:
+        y = as_float(node.get("top"))
+    if w is None:
+        w = as_float(node.get("width"))
+    if h is None:
+        h = as_float(node.get("height"))
+
+    right = as_float(node.get("right"))
+    bottom = as_float(node.get("bottom"))
+    x2 = as_float(node.get("x2"))
+    y2 = as_float(node.get("y2"))
+    if right is not None:
+        x2 = right if x2 is None else x2
+    if bottom is not None:
+        y2 = bottom if y2 is None else y2
+    if x is not None and w is None and x2 is not None:
+        w = x2 - x
+    if y is not None and h is None and y2 is not None:
+        h = y2 - y
+    if x is None and x2 is not None and w is not None:
+        x = x2 - w
+    if y is None and y2 is not None and h is not None:
+        y = y2 - h
+
+    rect = node.get("rect")
+    if isinstance(rect, (list, tuple)) and len(rect) >= 4:
+        x, y, w, h = _apply_box_values(rect, current_x=x, current_y=y, current_w=w, current_h=h)
+    elif isinstance(rect, dict):
+        rect_x1 = as_float(rect.get("x1"))
+        rect_y1 = as_float(rect.get("y1"))
+        rect_x2 = as_float(rect.get("x2"))
+        rect_y2 = as_float(rect.get("y2"))
+        x = as_float(rect.get("x")) if x is None else x
+        y = as_float(rect.get("y")) if y is None else y
+        if x is None:
+            x = rect_x1
+        if y is None:
+            y = rect_y1
+        if x is None:
+            x = as_float(rect.get("left"))
+        if y is None:
+            y = as_float(rect.get("top"))
+        if w is None:
+            w = as_float(rect.get("w"))
+        if h is None:
+            h = as_float(rect.get("h"))
+        if w is None:
+            w = as_float(rect.get("width"))
+        if h is None:
+            h = as_float(rect.get("height"))
+        if x is not None and w is None:
+            right_value = rect_x2 if rect_x2 is not None else as_float(rect.get("right"))
+            if right_value is not None:
+                w = right_value - x
+        if y is not None and h is None:
+            bottom_value = rect_y2 if rect_y2 is not None else as_float(rect.get("bottom"))
+            if bottom_value is not None:
+                h = bottom_value - y
+
+    bbox = node.get("bbox")
+    if isinstance(bbox, (list, tuple)) and len(bbox) >= 4:
+        x, y, w, h = _apply_box_values(bbox, prefer_xyxy=True, current_x=x, current_y=y, current_w=w, current_h=h)
+    elif isinstance(bbox, dict):
+        bbox_x1 = as_float(bbox.get("x1"))
+        bbox_y1 = as_float(bbox.get("y1"))
+        bbox_x2 = as_float(bbox.get("x2"))
+        bbox_y2 = as_float(bbox.get("y2"))
+        x = bbox_x1 if x is None else x
+        y = bbox_y1 if y is None else y
+        if w is None:
+            w = as_float(bbox.get("w"))
+        if h is None:
+            h = as_float(bbox.get("h"))
+        if x is not None and w is None and bbox_x2 is not None:
+            w = bbox_x2 - x
+        if y is not None and h is None and bbox_y2 is not None:
+            h = bbox_y2 - y
+
+    return x, y, w, h
+
+
+def extract_mark_overlay(payload: Any, *, max_items: int = MAX_OVERLAY_ITEMS,
+                         max_texts: int = MAX_SUMMARY_TEXTS) -> tuple[Optional[str], list[dict]]:
+    """
+    单次遍历批注数据，返回 (文字摘要, 批注项列表)。
+
+    批注项包含坐标（x/y/w/h）或路径（path）、文字、颜色与线宽，以及从祖先节点继承的目标图片标识（targets）、
+    基准尺寸（base_w/base_h）、页码（page_index）与坐标单位（coord_unit）。
+    摘要为前 max_texts 段文字，按换行连接；没有文字时为 None。
+
+    遍历顺序与深度优先的先序遍历一致；批注项和摘要都已收集满时提前结束。
+    """
+    items: list[dict] = []
+    texts: list[str] = []
+    # 栈中每一项：(节点, 目标标识, 基准宽, 基准高, 页码, 坐标单位, 所在字段名)
+    stack: list[tuple] = [(payload, frozenset(), None, None, None, None, None)]
+    sorted_targets: dict[frozenset, list[str]] = {}
+
+    def append_item(item: dict, tokens: frozenset, base_w, base_h, page, unit):
+        if tokens:
+            targets = sorted_targets.get(tokens)
+            if targets is None:
+                targets = sorted_targets[tokens] = sorted(tokens)[:24]
+            item["targets"] = list(targets)
+        if base_w is not None and base_w > 0:
+            item["base_w"] = base_w
+        if base_h is not None and base_h > 0:
+            item["base_h"] = base_h
+        if page is not None:
+            item["page_index"] = page
+        if unit:
+            item["coord_unit"] = unit
+        items.append(item)
+
+    while stack:
+        if len(items) >= max_items and len(texts) >= max_texts:
+            break
+        node, tokens, base_w, base_h, page, unit, parent_key = stack.pop()
+
+        if isinstance(node, list):
+            in_page_container = parent_key in PAGE_CONTAINER_KEYS and page is None
+            for i in range(len(node) - 1, -1, -1):
+                value = node[i]
+                if isinstance(value, (dict, list)):
+                    stack.append((value, tokens, base_w, base_h, i if in_page_container else page, unit, parent_key))
+            continue
+
+        if not isinstance(node, dict):
+            continue
+
+        if not _TARGET_KEYS.isdisjoint(node):
+            found = _collect_target_tokens(node)
+            if found and not found <= tokens:
+                tokens = tokens | found
+        if not _DIMENSION_KEYS.isdisjoint(node):
+            base_w, base_h = _parse_dimension_hints(node, base_w, base_h)
+        page = _parse_page_hint(node, page)
+        unit = _parse_unit_hint(node, unit)
+
+        text = ""
+        for key in TEXT_KEYS:
+            value = node.get(key)
+            if isinstance(value, str):
+                stripped = value.strip()
+                if stripped:
+                    if not text:
+                        text = stripped
+                    texts.append(stripped)
+
+        if not _GEOMETRY_KEYS.isdisjoint(node):
+            x, y, w, h = _node_box(node)
+
+            graphic = node.get("graphic")
+            has_graphic_path = False
+            if isinstance(graphic, dict):
+                path = graphic.get("path")
+                if isinstance(path, list) and path:
+                    has_graphic_path = True
+                    append_item(
+                        {
+                            "path": path,
+                            "text": text,
+                            "color": graphic.get("borderColor") or node.get("borderColor"),
+                            "border_width": as_float(graphic.get("borderWidth")) or as_float(node.get("borderWidth")),
+                        },
+                        tokens, base_w, base_h, page, unit,
+                    )
+                if x is None:
+                    x = as_float(graphic.get("left"))
+                if y is None:
+                    y = as_float(graphic.get("top"))
+                if w is None:
+                    w = as_float(graphic.get("width"))
+                if h is None:
+                    h = as_float(graphic.get("height"))
+
+            should_append_xy_item = x is not None and y is not None
+            if has_graphic_path and w is None and h is None and not text:
+                should_append_xy_item = False
+            if should_append_xy_item:
+                append_item(
+                    {
+                        "x": x, "y": y, "w": w, "h": h, "text": text,
+                        "color": node.get("borderColor"), "border_width": as_float(node.get("borderWidth")),
+                    },
+                    tokens, base_w, base_h, page, unit,
+                )
+
+        children = [(key, value) for key, value in node.items() if isinstance(value, (dict, list))]
+        for key, value in reversed(children):
+            stack.append((value, tokens, base_w, base_h, page, unit, key))
+
+    summary = "\n".join(texts[:max_texts]) if texts else None
+    return summary, items[:max_items]
+
+
+def iter_mark_payload_candidates(payload: Any) -> Iterator[Any]:
+    """
+    惰性地列出可能包含批注数据的候选节点：节点本身、常见的包装字段（data、payload、annotations 等），
+    以及字符串中经 URL 解码 / JSON 解码后得到的对象。内容相同的候选只出现一次。
+
+    调用方通常在第一个可用的候选处停止，因此后面的节点不会被展开。
+    """
+    seen_strings: set[str] = set()
+    seen_objects: set[int] = set()
+    # 保留已访问对象的引用，避免对象被回收后 id 被复用导致误判为重复
+    keep_alive: list = []
+    stack: list[tuple[Any, int]] = [(payload, 0)]
+
+    while stack:
+        node, depth = stack.pop()
+        if depth > _CANDIDATE_MAX_DEPTH:
+            continue
+        if isinstance(node, str):
+            if node in seen_strings:
+                continue
+            seen_strings.add(node)
+        else:
+            if id(node) in seen_objects:
+                continue
+            seen_objects.add(id(node))
+            keep_alive.append(node)
+        yield node
+
+        children: list = []
+        if isinstance(node, str):
+            text = node.strip()
+            if not text:
+                continue
+            variants = [text]
+            try:
+                decoded = unquote(text)
+                if decoded and decoded != text:
+                    variants.append(decoded)
+                    decoded_twice = unquote(decoded)
+                    if decoded_twice and decoded_twice != decoded:
+                        variants.append(decoded_twice)
+            except Exception:
+                pass
+            for variant in variants:
+                compact = variant.strip()
+                if compact[:1] in {'{', '[', '"'}:
+                    try:
+                        children.append(json.loads(compact))
+                    except Exception:
+                        continue
+        elif isinstance(node, dict):
+            children.extend(node[key] for key in _CANDIDATE_PREFERRED_KEYS if key in node)
+            children.extend(value for value in node.values() if isinstance(value, (dict, list, str)))
+        elif isinstance(node, list):
+            children.extend(value for value in node[:50] if isinstance(value, (dict, list, str)))
+
+        for child in reversed(children):
+            stack.append((child, depth + 1))
+
+
+def parse_mark_attachment_text(text: str) -> tuple[Optional[str], list[dict]]:
+    """
+    解析批改附件的文本内容，返回 (文字摘要, 批注项列表)。
+
+    优先使用其中第一个能提取出批注或文字的 JSON 候选；都没有时按“x,y: 文字”逐行解析。
+    """
+    content = (text or "").strip()
+    if not content:
+        return None, []
+
+    for one in iter_mark_payload_candidates(content):
+        if isinstance(one, (dict, list)):
+            summary, items = extract_mark_overlay(one)
+            if summary or items:
+                return summary, items
+
+    items: list[dict] = []
+    for line in content.splitlines():
+        match = _LINE_RE.match(line)
+        if not match:
+            continue
+        x = as_float(match.group(1))
+        y = as_float(match.group(2))
+        msg = match.group(3).strip()
+        if x is not None and y is not None:
+            items.append({"x": x, "y": y, "text": msg, "shape": "point"})
+
+    summary_lines = [one.strip() for one in content.splitlines() if one.strip()][:10]
+    summary = "\n".join(summary_lines) if summary_lines else None
+    return summary, items
+
+
+class MarkOverlayMemo:
+    """
+    按提交 ID 缓存批注解析结果。
+    同一提交下以批改附件地址等区分不同图片；重新获取某次提交的批改附件时，可只清除这次提交的结果。
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[Hashable, Hashable], Any] = OrderedDict()
+
+    def get(self, submission_id: Hashable, key: Hashable, default: Any = None) -> Any:
+        entry_key = (submission_id, key)
+        if entry_key not in self._entries:
+            return default
+        self._entries.move_to_end(entry_key)
+        return self._entries[entry_key]
+
+    def put(self, submission_id: Hashable, key: Hashable, value: Any):
+        entry_key = (submission_id, key)
+        self._entries[entry_key] = value
+        self._entries.move_to_end(entry_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, submission_id: Hashable):
+        for entry_key in [one for one in self._entries if one[0] == submission_id]:
+            del self._entries[entry_key]
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
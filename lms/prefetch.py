@@ -0,0 +1,111 @@
+"""
+思源学堂活动详情预取。
+
+打开课程后，用户通常会逐个点开列表最前面的几项活动。活动列表加载完成后，
+按优先级在后台把这些活动的详情提前请求到 `LMSRequestCache` 中，点击时即可直接从内存中渲染。
+"""
+from __future__ import annotations
+
+import datetime
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+
+from .lms import LMSUtil
+from .models import ActivityType
+
+# 每次最多预取的活动数量
+DEFAULT_PREFETCH_LIMIT = 8
+
+
+def _parse_time(value: object) -> Optional[datetime.datetime]:
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed
+
+
+def prefetch_order(activities: Iterable[dict], limit: int = DEFAULT_PREFETCH_LIMIT,
+                   now: datetime.datetime | None = None) -> list[int]:
+    """
+    计算需要预取的活动 ID 及其顺序。
+
+    尚未截止的作业最可能被点开，按截止时间由近到远排在最前；其余活动保持界面上的显示顺序。
+
+    :param activities: 当前界面上可见的活动，顺序即显示顺序
+    :param limit: 最多返回的活动数量
+    :param now: 当前时间，主要供测试替换
+    """
+    if limit <= 0:
+        return []
+    if now is None:
+        now = datetime.datetime.now(datetime.timezone.utc)
+
+    open_homework: list[tuple[datetime.datetime, int, int]] = []
+    others: list[int] = []
+    seen: set[int] = set()
+    for index, activity in enumerate(activities):
+        if not isinstance(activity, dict):
+            continue
+        activity_id = activity.get("id")
+        if not isinstance(activity_id, int) or activity_id in seen:
+            continue
+        seen.add(activity_id)
+        end_time = _parse_time(activity.get("end_time"))
+        if str(activity.get("type") or "") == ActivityType.HOMEWORK.value and end_time is not None and end_time > now:
+            open_homework.append((end_time, index, activity_id))
+        else:
+            others.append(activity_id)
+
+    open_homework.sort()
+    return ([one[2] for one in open_homework] + others)[:limit]
+
+
+@dataclass
+class LMSPrefetchReport:
+    """一次预取的结果。"""
+    # 本次实际发起请求的活动 ID
+    fetched: list[int] = field(default_factory=list)
+    # 已在缓存中而跳过的活动 ID
+    skipped: list[int] = field(default_factory=list)
+    # 请求失败的活动 ID 与对应的异常
+    failed: dict[int, Exception] = field(default_factory=dict)
+    # 是否因取消而提前结束
+    canceled: bool = False
+
+
+class LMSDetailPrefetcher:
+    """按给定顺序把活动详情逐个加载进 `LMSUtil` 的请求缓存。"""
+
+    def __init__(self, util: LMSUtil):
+        self.util = util
+
+    def prefetch(self, activity_ids: Iterable[int],
+                 should_continue: Callable[[], bool] | None = None) -> LMSPrefetchReport:
+        """
+        依次预取活动详情。单个活动失败不会中断后续活动；每个请求之前都会检查是否已取消。
+
+        用户在预取过程中点开同一个活动时，两者会由请求缓存合并为一次请求。
+
+        :param activity_ids: 按优先级排好的活动 ID
+        :param should_continue: 返回 False 时停止预取
+        """
+        report = LMSPrefetchReport()
+        for activity_id in activity_ids:
+            if should_continue is not None and not should_continue():
+                report.canceled = True
+                break
+            if self.util.has_cached_activity_detail(activity_id):
+                report.skipped.append(activity_id)
+                continue
+            try:
+                self.util.get_activity_detail(activity_id)
+            except Exception as e:
+                report.failed[activity_id] = e
+            else:
+                report.fetched.append(activity_id)
+        return report
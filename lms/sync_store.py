@@ -0,0 +1,425 @@
+"""
+思源学堂课程、活动与附件的本地增量同步存储。
+
+数据保存在每个账户独立的 Sqlite 数据库中，每一行都记录内容摘要、首次出现时间与最后变化时间，
+课程行额外记录最后一次同步活动列表的时间。这样刷新时只需要比对摘要即可得到新增/更新/删除的条目，
+并且可以直接查询“上次同步以来有什么新内容”，而不必重新加载每一门课程。
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Iterator, Mapping, Optional
+
+from .lms import LMSUtil
+
+
+# 数据库当前版本，存储在 PRAGMA user_version 中
+DATABASE_VERSION = 1
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS course (
+        id INTEGER PRIMARY KEY,
+        position INTEGER NOT NULL,
+        payload TEXT NOT NULL,
+        digest TEXT NOT NULL,
+        first_seen REAL NOT NULL,
+        changed_at REAL NOT NULL,
+        synced_at REAL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS activity (
+        id INTEGER PRIMARY KEY,
+        course_id INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        type TEXT,
+        payload TEXT NOT NULL,
+        digest TEXT NOT NULL,
+        first_seen REAL NOT NULL,
+        changed_at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS activity_course_id ON activity (course_id, position)",
+    "CREATE INDEX IF NOT EXISTS activity_changed_at ON activity (changed_at)",
+    """
+    CREATE TABLE IF NOT EXISTS upload (
+        id INTEGER PRIMARY KEY,
+        activity_id INTEGER NOT NULL,
+        course_id INTEGER,
+        payload TEXT NOT NULL,
+        digest TEXT NOT NULL,
+        first_seen REAL NOT NULL,
+        changed_at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS upload_activity_id ON upload (activity_id)",
+    "CREATE INDEX IF NOT EXISTS upload_changed_at ON upload (changed_at)",
+    """
+    CREATE TABLE IF NOT EXISTS config (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    )
+    """,
+)
+
+
+def _dump(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, default=str, separators=(",", ":"))
+
+
+def _digest(payload: str) -> str:
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _row_id(item: Mapping[str, Any]) -> Optional[int]:
+    value = item.get("id")
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
+
+
+@dataclass
+class LMSSyncDiff:
+    """一次写入与数据库中已有内容的差异。"""
+    # 新出现的条目
+    new: list[dict] = field(default_factory=list)
+    # 内容发生变化的条目
+    updated: list[dict] = field(default_factory=list)
+    # 已经从服务器消失的条目 ID
+    removed: list[int] = field(default_factory=list)
+
+    @property
+    def identical(self) -> bool:
+        return not self.new and not self.updated and not self.removed
+
+    @property
+    def upserts(self) -> list[dict]:
+        return self.new + self.updated
+
+
+@dataclass
+class LMSSyncReport:
+    """一次增量同步的结果汇总。"""
+    # 本次同步开始的时间戳
+    started_at: float
+    # 课程列表本身的变化
+    courses: LMSSyncDiff = field(default_factory=LMSSyncDiff)
+    # 实际重新拉取了活动列表的课程 ID
+    refreshed_course_ids: list[int] = field(default_factory=list)
+    # 因为摘要未变且未过期而跳过的课程 ID
+    skipped_course_ids: list[int] = field(default_factory=list)
+    # 各课程的活动变化，键为课程 ID
+    activities: dict[int, LMSSyncDiff] = field(default_factory=dict)
+
+    @property
+    def new_activities(self) -> list[dict]:
+        return [one for diff in self.activities.values() for one in diff.new]
+
+    @property
+    def updated_activities(self) -> list[dict]:
+        return [one for diff in self.activities.values() for one in diff.updated]
+
+
+class LMSSyncStore:
+    """
+    思源学堂本地增量存储。
+
+    每次操作都会单独打开数据库连接，因此同一个数据库文件可以同时被界面线程和后台线程使用。
+    所有时间戳均为 `time.time()` 返回的秒数。
+    """
+
+    def __init__(self, database_path: str):
+        """
+        打开（必要时创建）位于 `database_path` 的 Sqlite 数据库。
+        :param database_path: 数据库文件路径，所在文件夹不存在时会自动创建
+        """
+        self.database_path = database_path
+        directory = os.path.dirname(database_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            for statement in _SCHEMA:
+                connection.execute(statement)
+            if version != DATABASE_VERSION:
+                connection.execute(f"PRAGMA user_version = {DATABASE_VERSION}")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self.database_path, timeout=10)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    # ---- 写入 ----
+
+    def sync_courses(self, courses: Iterable[Mapping[str, Any]], now: float | None = None, *,
+                     starts_sync: bool = False) -> LMSSyncDiff:
+        """
+        用服务器返回的完整课程列表覆盖本地课程，并返回差异。
+        不在新列表中的课程会连同其活动与附件一起删除。
+        :param starts_sync: 为 True 时在同一事务中把 `now` 记录为最近一次增量同步的开始时间，供 `changes_since_last_sync` 使用
+        """
+        now = time.time() if now is None else now
+        rows = [dict(one) for one in courses if isinstance(one, Mapping) and _row_id(one) is not None]
+        with self._connect() as connection:
+            diff = self._replace_rows(connection, "course", rows, now, extra_columns={})
+            if diff.removed:
+                marks = ",".join("?" * len(diff.removed))
+                connection.execute(f"DELETE FROM activity WHERE course_id IN ({marks})", diff.removed)
+                connection.execute(f"DELETE FROM upload WHERE course_id IN ({marks})", diff.removed)
+            self._set_config(connection, "courses_synced_at", now)
+            if starts_sync:
+                self._set_config(connection, "last_sync_started_at", now)
+        return diff
+
+    def sync_activities(self, course_id: int, activities: Iterable[Mapping[str, Any]],
+                        now: float | None = None) -> LMSSyncDiff:
+        """
+        用服务器返回的某门课程的完整活动列表覆盖本地活动，返回差异，并更新该课程的最后同步时间。
+        """
+        now = time.time() if now is None else now
+        rows = [dict(one) for one in activities if isinstance(one, Mapping) and _row_id(one) is not None]
+        with self._connect() as connection:
+            diff = self._replace_rows(
+                connection, "activity", rows, now,
+                scope=("course_id", course_id),
+                extra_columns={"course_id": lambda _row: course_id, "type": lambda row: row.get("type")},
+            )
+            if diff.removed:
+                marks = ",".join("?" * len(diff.removed))
+                connection.execute(f"DELETE FROM upload WHERE activity_id IN ({marks})", diff.removed)
+            connection.execute("UPDATE course SET synced_at = ? WHERE id = ?", (now, course_id))
+        return diff
+
+    def sync_uploads(self, activity: Mapping[str, Any], now: float | None = None) -> LMSSyncDiff:
+        """
+        记录活动详情中附带的上传文件列表，返回差异。
+        :param activity: `LMSUtil.get_activity_detail` 返回的活动详情
+        """
+        activity_id = _row_id(activity)
+        if activity_id is None:
+            return LMSSyncDiff()
+        course_id = activity.get("course_id") if isinstance(activity.get("course_id"), int) else None
+        uploads = activity.get("uploads")
+        if not isinstance(uploads, list):
+            uploads = []
+        now = time.time() if now is None else now
+        rows = [dict(one) for one in uploads if isinstance(one, Mapping) and _row_id(one) is not None]
+        with self._connect() as connection:
+            return self._replace_rows(
+                connection, "upload", rows, now,
+                scope=("activity_id", activity_id),
+                extra_columns={"activity_id": lambda _row: activity_id, "course_id": lambda _row: course_id},
+                ordered=False,
+            )
+
+    @staticmethod
+    def _replace_rows(connection: sqlite3.Connection, table: str, rows: list[dict], now: float, *,
+                      extra_columns: dict, scope: tuple[str, int] | None = None,
+                      ordered: bool = True) -> LMSSyncDiff:
+        """
+        将 `rows` 写入 `table`，并删除 `scope` 范围内不再出现的行。
+        通过比较摘要判断行是否变化，只有变化的行才会更新 changed_at。
+        """
+        where = f" WHERE {scope[0]} = ?" if scope is not None else ""
+        params = (scope[1],) if scope is not None else ()
+        existing = {
+            row_id: digest
+            for row_id, digest in connection.execute(f"SELECT id, digest FROM {table}{where}", params)
+        }
+
+        diff = LMSSyncDiff()
+        seen: set[int] = set()
+        columns = list(extra_columns)
+        if ordered:
+            columns.append("position")
+        for position, row in enumerate(rows):
+            row_id = _row_id(row)
+            if row_id in seen:
+                continue
+            seen.add(row_id)
+            payload = _dump(row)
+            digest = _digest(payload)
+            values = [getter(row) for getter in extra_columns.values()]
+            if ordered:
+                values.append(position)
+
+            old_digest = existing.get(row_id)
+            if old_digest is None:
+                diff.new.append(row)
+                names = ", ".join(["id", "payload", "digest", "first_seen", "changed_at", *columns])
+                marks = ", ".join("?" * (5 + len(columns)))
+                connection.execute(
+                    f"INSERT OR REPLACE INTO {table} ({names}) VALUES ({marks})",
+                    (row_id, payload, digest, now, now, *values),
+                )
+            elif old_digest != digest:
+                diff.updated.append(row)
+                assignments = ", ".join(f"{name} = ?" for name in ["payload", "digest", "changed_at", *columns])
+                connection.execute(
+                    f"UPDATE {table} SET {assignments} WHERE id = ?",
+                    (payload, digest, now, *values, row_id),
+                )
+            elif ordered:
+                connection.execute(f"UPDATE {table} SET position = ? WHERE id = ?", (position, row_id))
+
+        diff.removed = [row_id for row_id in existing if row_id not in seen]
+        if diff.removed:
+            marks = ",".join("?" * len(diff.removed))
+            connection.execute(f"DELETE FROM {table} WHERE id IN ({marks})", diff.removed)
+        return diff
+
+    @staticmethod
+    def _set_config(connection: sqlite3.Connection, key: str, value: Any):
+        connection.execute("INSERT OR REPLACE INTO config (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def clear(self):
+        """删除本地存储的全部内容。"""
+        with self._connect() as connection:
+            for table in ("course", "activity", "upload", "config"):
+                connection.execute(f"DELETE FROM {table}")
+
+    # ---- 查询 ----
+
+    def get_courses(self) -> list[dict]:
+        """按服务器返回的顺序返回本地存储的全部课程。"""
+        with self._connect() as connection:
+            return [json.loads(row[0]) for row in connection.execute("SELECT payload FROM course ORDER BY position")]
+
+    def get_activities(self, course_id: int) -> list[dict]:
+        """按服务器返回的顺序返回某门课程的本地活动列表。"""
+        with self._connect() as connection:
+            return [json.loads(row[0]) for row in connection.execute(
+                "SELECT payload FROM activity WHERE course_id = ? ORDER BY position", (course_id,)
+            )]
+
+    def get_uploads(self, activity_id: int) -> list[dict]:
+        """返回某个活动已记录的上传文件。"""
+        with self._connect() as connection:
+            return [json.loads(row[0]) for row in connection.execute(
+                "SELECT payload FROM upload WHERE activity_id = ? ORDER BY id", (activity_id,)
+            )]
+
+    def has_activities(self, course_id: int) -> bool:
+        """某门课程是否已经同步过活动列表。"""
+        return self.last_synced(course_id) is not None
+
+    def last_synced(self, course_id: int) -> Optional[float]:
+        """返回某门课程活动列表的最后同步时间；从未同步过时返回 None。"""
+        with self._connect() as connection:
+            row = connection.execute("SELECT synced_at FROM course WHERE id = ?", (course_id,)).fetchone()
+        return None if row is None else row[0]
+
+    def last_sync_time(self) -> Optional[float]:
+        """返回课程列表的最后同步时间；从未同步过时返回 None。"""
+        with self._connect() as connection:
+            row = connection.execute("SELECT value FROM config WHERE key = 'courses_synced_at'").fetchone()
+        return None if row is None else float(row[0])
+
+    def courses_to_refresh(self, max_age: float, now: float | None = None) -> list[int]:
+        """
+        返回需要重新拉取活动列表的课程 ID：从未同步过、课程信息在上次同步后发生了变化，或者上次同步早于 `max_age` 秒之前。
+        """
+        now = time.time() if now is None else now
+        with self._connect() as connection:
+            return [row[0] for row in connection.execute(
+                "SELECT id FROM course WHERE synced_at IS NULL OR changed_at > synced_at OR synced_at < ? "
+                "ORDER BY position",
+                (now - max_age,),
+            )]
+
+    def changes_since(self, timestamp: float) -> dict[str, list[dict]]:
+        """
+        查询某个时间点（含）之后新增或发生变化的课程、活动与上传文件。
+        每个条目都是服务器原始数据的副本，并附加 `_first_seen`、`_changed_at` 与 `_is_new` 字段；
+        活动与上传文件还附加 `_course_id`（上传文件额外附加 `_activity_id`）。结果按变化时间从新到旧排列。
+        """
+        result: dict[str, list[dict]] = {"courses": [], "activities": [], "uploads": []}
+        queries = (
+            ("courses", "SELECT payload, first_seen, changed_at, NULL, NULL FROM course"),
+            ("activities", "SELECT payload, first_seen, changed_at, course_id, NULL FROM activity"),
+            ("uploads", "SELECT payload, first_seen, changed_at, course_id, activity_id FROM upload"),
+        )
+        with self._connect() as connection:
+            for key, query in queries:
+                for payload, first_seen, changed_at, course_id, activity_id in connection.execute(
+                    f"{query} WHERE changed_at >= ? ORDER BY changed_at DESC, id", (timestamp,)
+                ):
+                    item = json.loads(payload)
+                    item["_first_seen"] = first_seen
+                    item["_changed_at"] = changed_at
+                    item["_is_new"] = first_seen >= timestamp
+                    if key != "courses":
+                        item["_course_id"] = course_id
+                    if key == "uploads":
+                        item["_activity_id"] = activity_id
+                    result[key].append(item)
+        return result
+
+    def changes_since_last_sync(self) -> dict[str, list[dict]]:
+        """查询最近一次成功获取课程列表的增量同步中新增或发生变化的内容。"""
+        with self._connect() as connection:
+            row = connection.execute("SELECT value FROM config WHERE key = 'last_sync_started_at'").fetchone()
+        return self.changes_since(float(row[0]) if row is not None else 0)
+
+
+class LMSIncrementalSync:
+    """
+    使用 `LMSSyncStore` 对思源学堂进行增量同步：
+    先获取一次课程列表，然后只为新增、发生变化或过期的课程重新拉取活动列表。
+    """
+
+    # 课程活动列表默认的过期时间（秒）
+    DEFAULT_MAX_AGE = 6 * 60 * 60
+
+    def __init__(self, util: LMSUtil, store: LMSSyncStore):
+        self.util = util
+        self.store = store
+
+    def sync(self, max_age: float = DEFAULT_MAX_AGE, *, course_ids: Iterable[int] | None = None,
+             should_continue=None) -> LMSSyncReport:
+        """
+        执行一次增量同步。
+        :param max_age: 课程活动列表的过期时间（秒）。在此时间内同步过、且课程信息没有变化的课程不会重新拉取。
+        :param course_ids: 只同步这些课程；为 None 时同步所有需要刷新的课程
+        :param should_continue: 可选的无参回调，返回 False 时提前结束同步（已同步的部分会保留）
+        :raises: 与 `LMSUtil.get_my_courses` 和 `LMSUtil.get_course_activities` 相同
+        """
+        started_at = time.time()
+        report = LMSSyncReport(started_at=started_at)
+
+        courses = self.util.get_my_courses()
+        # 课程列表获取成功后才记录本次同步的开始时间，失败的同步不会让上次同步的变化“消失”
+        report.courses = self.store.sync_courses(courses, now=started_at, starts_sync=True)
+
+        targets = self.store.courses_to_refresh(max_age, now=started_at)
+        if course_ids is not None:
+            wanted = set(course_ids)
+            targets = [one for one in targets if one in wanted]
+        target_set = set(targets)
+        report.skipped_course_ids = [
+            course_id for course_id in (_row_id(one) for one in courses)
+            if course_id is not None and course_id not in target_set
+        ]
+
+        for course_id in targets:
+            if should_continue is not None and not should_continue():
+                break
+            activities = self.util.get_course_activities(course_id)
+            report.activities[course_id] = self.store.sync_activities(course_id, activities)
+            report.refreshed_course_ids.append(course_id)
+        return report
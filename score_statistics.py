@@ -4,7 +4,9 @@ from __future__ import annotations
 
 import math
 from dataclasses import dataclass
-from typing import Iterable, Mapping
+from typing import Iterable, Mapping, Sequence
+
+import numpy as np
 
 
 @dataclass(frozen=True)
@@ -16,45 +18,139 @@ class ScoreStatistics:
     course_count: int
 
 
+# Columns of ScoreTable.contributions: what one row adds to the running sums.
+_TOTAL_CREDIT, _GPA_TOTAL, _GPA_CREDIT, _SCORE_TOTAL, _SCORE_CREDIT, _INCOMPLETE, _COURSES = range(7)
+
+
 def calculate_score_statistics(scores: Iterable[Mapping]) -> ScoreStatistics | None:
     """Calculate the score page's credit-weighted summary once, consistently."""
 
-    rows = [one for one in scores if isinstance(one, Mapping)]
-    total_credit = 0.0
-    gpa_total = 0.0
-    gpa_credit = 0.0
-    score_total = 0.0
-    score_credit = 0.0
-    incomplete = 0
-    courses = 0
-    for row in rows:
-        credit = _finite_number(row.get("coursePoint"))
-        if credit is None or credit <= 0:
-            incomplete += 1
-            continue
-        courses += 1
-        total_credit += credit
-        gpa = _finite_number(row.get("gpa"))
-        score = _finite_number(row.get("score"))
-        if gpa is not None:
-            gpa_total += gpa * credit
-            gpa_credit += credit
-        if score is not None:
-            score_total += score * credit
-            score_credit += credit
-        if gpa is None or score is None:
-            incomplete += 1
-    if total_credit <= 0:
+    return ScoreTable(scores).statistics()
+
+
+class ScoreTable:
+    """Score rows as NumPy columns, so selections, groupings and projections are array sums.
+
+    Each row's share of the weighted sums is precomputed once in ``contributions``; a row whose credit is missing or
+    not positive only counts as incomplete, like in the score page. Rows keep their positions, so indices match the
+    score table; entries that are not mappings contribute nothing.
+    """
+
+    def __init__(self, scores: Iterable[Mapping]):
+        self.rows = list(scores)
+        rows = [row if isinstance(row, Mapping) else {} for row in self.rows]
+        self.credit = _column(row.get("coursePoint") for row in rows)
+        self.score = _column(row.get("score") for row in rows)
+        self.gpa = _column(row.get("gpa") for row in rows)
+        self.term = np.array([str(row.get("term") or "") for row in rows], dtype=object)
+        self.course_type = np.array([str(row.get("majorFlag") or row.get("type") or "") for row in rows],
+                                    dtype=object)
+        self.contributions = _contributions(self.credit, self.score, self.gpa)
+        self.contributions[[not isinstance(row, Mapping) for row in self.rows]] = 0.0
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def statistics(self, rows: Sequence[int] | np.ndarray | None = None) -> ScoreStatistics | None:
+        """Statistics of the given row indices (or a boolean mask), or of all rows."""
+        selected = self.contributions if rows is None else self.contributions[np.asarray(rows)]
+        return _statistics(selected.sum(axis=0))
+
+    def grouped(self, by: str = "term") -> dict[str, ScoreStatistics]:
+        """Statistics per term (``by="term"``) or per course type (``by="type"``); groups without credit are omitted."""
+        keys = {"term": self.term, "type": self.course_type}[by]
+        if not len(self):
+            return {}
+        names, inverse = np.unique(keys.astype(str), return_inverse=True)
+        inverse = inverse.ravel()
+        sums = np.zeros((len(names), self.contributions.shape[1]))
+        np.add.at(sums, inverse, self.contributions)
+        groups = {str(name): _statistics(row) for name, row in zip(names, sums)}
+        return {name: value for name, value in groups.items() if value is not None}
+
+    def what_if(self, hypothetical: Iterable[Mapping], rows: Sequence[int] | None = None) -> ScoreStatistics | None:
+        """Statistics after adding hypothetical future grades (``coursePoint`` plus ``score`` and/or ``gpa``).
+
+        A numeric score without a GPA is converted with the graduate GPA rules.
+        """
+        extra = ScoreTable(_with_gpa(one) for one in hypothetical if isinstance(one, Mapping))
+        current = self.contributions if rows is None else self.contributions[np.asarray(rows)]
+        return _statistics(current.sum(axis=0) + extra.contributions.sum(axis=0))
+
+    def required_gpa(self, target: float, credit: float, rows: Sequence[int] | None = None) -> float | None:
+        """Average GPA needed on ``credit`` more credits to bring the weighted GPA to ``target``."""
+        if credit <= 0:
+            return None
+        current = self.contributions if rows is None else self.contributions[np.asarray(rows)]
+        sums = current.sum(axis=0)
+        return float((target * (sums[_GPA_CREDIT] + credit) - sums[_GPA_TOTAL]) / credit)
+
+
+class ScoreSelection:
+    """Statistics of a changing selection of a ScoreTable.
+
+    The sums are taken over the selected rows of ``contributions`` every time instead of adding and subtracting the
+    rows that entered or left the selection, so rounding errors cannot accumulate (an emptied selection must give None
+    again); at transcript sizes the masked sum costs microseconds.
+    """
+
+    def __init__(self, table: ScoreTable):
+        self.table = table
+        self.mask = np.zeros(len(table), dtype=bool)
+        self.sums = np.zeros(table.contributions.shape[1])
+
+    def update(self, rows: Iterable[int]) -> ScoreStatistics | None:
+        """Select exactly ``rows`` and return their statistics."""
+        mask = np.zeros(len(self.table), dtype=bool)
+        mask[np.fromiter(rows, dtype=np.intp)] = True
+        if not np.array_equal(mask, self.mask):
+            self.sums = self.table.contributions[mask].sum(axis=0)
+            self.mask = mask
+        return _statistics(self.sums)
+
+
+def _column(values: Iterable) -> np.ndarray:
+    numbers = (_finite_number(value) for value in values)
+    return np.fromiter((np.nan if number is None else number for number in numbers), dtype=float)
+
+
+def _contributions(credit: np.ndarray, score: np.ndarray, gpa: np.ndarray) -> np.ndarray:
+    counted = credit > 0  # False for NaN as well
+    has_gpa = counted & ~np.isnan(gpa)
+    has_score = counted & ~np.isnan(score)
+    table = np.zeros((len(credit), 7))
+    table[:, _TOTAL_CREDIT] = np.where(counted, credit, 0.0)
+    table[:, _GPA_TOTAL] = np.where(has_gpa, gpa * credit, 0.0)
+    table[:, _GPA_CREDIT] = np.where(has_gpa, credit, 0.0)
+    table[:, _SCORE_TOTAL] = np.where(has_score, score * credit, 0.0)
+    table[:, _SCORE_CREDIT] = np.where(has_score, credit, 0.0)
+    table[:, _INCOMPLETE] = ~counted | ~has_gpa | ~has_score
+    table[:, _COURSES] = counted
+    return table
+
+
+def _statistics(sums: np.ndarray) -> ScoreStatistics | None:
+    # Decide emptiness from the course count, an exact integer sum, not from a float credit total.
+    if sums[_COURSES] < 0.5:
         return None
     return ScoreStatistics(
-        total_credit=total_credit,
-        weighted_gpa=gpa_total / gpa_credit if gpa_credit else None,
-        weighted_average=score_total / score_credit if score_credit else None,
-        incomplete_count=incomplete,
-        course_count=courses,
+        total_credit=float(sums[_TOTAL_CREDIT]),
+        weighted_gpa=float(sums[_GPA_TOTAL] / sums[_GPA_CREDIT]) if sums[_GPA_CREDIT] > 0 else None,
+        weighted_average=float(sums[_SCORE_TOTAL] / sums[_SCORE_CREDIT]) if sums[_SCORE_CREDIT] > 0 else None,
+        incomplete_count=int(round(sums[_INCOMPLETE])),
+        course_count=int(round(sums[_COURSES])),
     )
 
 
+def _with_gpa(row: Mapping) -> Mapping:
+    score = _finite_number(row.get("score"))
+    if _finite_number(row.get("gpa")) is not None or score is None:
+        return row
+    from gmis.score import score_to_gpa
+
+    return {**row, "gpa": score_to_gpa(score)}
+
+
 def _finite_number(value) -> float | None:
     if isinstance(value, bool):
         return None
@@ -0,0 +1,194 @@
+"""End-to-end login and data-fetch latency of the client against the offline fake campus server.
+
+The fake server (scripts/fakecampus) replays recorded responses for CAS, WebVPN, jwxt, bkkq and LMS and adds
+the requested per-request latency, so the numbers reflect how many round trips each client flow needs and
+how the transport layer copes with injected failures, without touching the real XJTU services.
+The "first data" cases time what a user waits for when opening a page right after start-up, with and
+without the background login warm-up having run beforehand.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+
+if __package__ in {None, ""}:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.sessions.attendance_session import AttendanceSession
+from app.sessions.common_session import CommonLoginSession
+from app.sessions.jwxt_session import JWXTSession
+from app.sessions.lms_session import LMSSession
+from app.sessions.session_backend import AccessMode, SessionBackend
+from app.sessions.tracing import percentile
+from app.utils.account import Account
+from app.utils.config import cfg
+from attendance.attendance import Attendance
+from auth import WEBVPN_LOGIN_URL
+from auth.new_login import NewLogin
+from jwxt.schedule import Schedule
+from jwxt.score import Score
+from lms import LMSUtil
+from scripts.fakecampus import FakeCampus
+
+
+SITE_HOSTS = ("jwxt.xjtu.edu.cn", "lms.xjtu.edu.cn", "bkkq.xjtu.edu.cn")
+WARM_UP_SITES = {"jwxt": JWXTSession, "lms": LMSSession, "attendance": AttendanceSession}
+
+
+def new_session(campus: FakeCampus, session_class: type[CommonLoginSession],
+                backend: SessionBackend | None = None, access_mode: AccessMode = AccessMode.NORMAL) -> CommonLoginSession:
+    if backend is None:
+        backend = SessionBackend(access_mode, transport_config=campus.transport_config())
+    session = session_class(backend)
+    session.tracer = None
+    return session
+
+
+def login(campus: FakeCampus, session: CommonLoginSession) -> CommonLoginSession:
+    session.ensure_login(campus.username, campus.password)
+    return session
+
+
+def webvpn_login(campus: FakeCampus, session_class: type[CommonLoginSession]) -> CommonLoginSession:
+    backend = SessionBackend(AccessMode.WEBVPN, transport_config=campus.transport_config())
+    NewLogin(WEBVPN_LOGIN_URL, session=backend.session).login_or_raise(campus.username, campus.password)
+    return login(campus, new_session(campus, session_class, backend))
+
+
+def fresh_account(campus: FakeCampus, warm_up: bool) -> Account:
+    """A just-started account whose session manager talks to the fake campus, optionally after the login warm-up."""
+    account = Account(campus.username, campus.password)
+    manager = account.session_manager
+    manager.backends = {mode: SessionBackend(mode, transport_config=campus.transport_config()) for mode in AccessMode}
+    for name, session_class in WARM_UP_SITES.items():
+        manager.register(session_class, name)
+        manager.get_session(name).tracer = None
+    if warm_up:
+        manager.warm_up_logins(account, list(WARM_UP_SITES))
+    return account
+
+
+def first_data(account: Account, site: str, fetch: Callable[[CommonLoginSession], object]) -> object:
+    """What a page does when it is opened: make sure the site is logged in, then fetch its data."""
+    session = account.session_manager.get_session(site)
+    session.ensure_login(account.username, account.password, account=account)
+    return fetch(session)
+
+
+def total_requests(campus: FakeCampus) -> int:
+    return sum(campus.requests_by_host.values())
+
+
+def measure(campus: FakeCampus, name: str, rounds: int, operation: Callable[[], object],
+            before: Callable[[], object] | None = None) -> dict:
+    elapsed = []
+    requests = 0
+    errors = 0
+    for _ in range(rounds):
+        if before is not None:
+            before()
+        started_requests = total_requests(campus)
+        started = time.perf_counter()
+        try:
+            operation()
+        except Exception:
+            errors += 1
+        elapsed.append((time.perf_counter() - started) * 1000)
+        requests += total_requests(campus) - started_requests
+    elapsed.sort()
+    return {
+        "case": name,
+        "rounds": rounds,
+        "errors": errors,
+        "server_hits_per_op": round(requests / rounds, 1),
+        "p50_ms": round(percentile(elapsed, 50), 1),
+        "p90_ms": round(percentile(elapsed, 90), 1),
+        "max_ms": round(elapsed[-1], 1),
+    }
+
+
+def run(campus: FakeCampus, rounds: int) -> list[dict]:
+    results = [
+        measure(campus, "login jwxt (cold)", rounds, lambda: login(campus, new_session(campus, JWXTSession))),
+        measure(campus, "login lms (cold)", rounds, lambda: login(campus, new_session(campus, LMSSession))),
+        measure(campus, "login attendance (cold)", rounds,
+                lambda: login(campus, new_session(campus, AttendanceSession))),
+        measure(campus, "login webvpn + jwxt (cold)", rounds, lambda: webvpn_login(campus, JWXTSession)),
+    ]
+
+    accounts: list[Account] = []
+    for site, fetch in (("jwxt", lambda session: Schedule(session).getCurrentTerm()),
+                        ("lms", lambda session: LMSUtil(session).get_my_courses())):
+        for warm_up in (False, True):
+            label = "after warm-up" if warm_up else "cold start"
+            results.append(measure(
+                campus, f"first {site} data ({label})", rounds,
+                lambda: first_data(accounts[-1], site, fetch),
+                before=lambda: accounts.append(fresh_account(campus, warm_up)),
+            ))
+
+    backend = SessionBackend(AccessMode.NORMAL, transport_config=campus.transport_config())
+    jwxt = login(campus, new_session(campus, JWXTSession, backend))
+    lms = login(campus, new_session(campus, LMSSession, backend))
+    attendance = login(campus, new_session(campus, AttendanceSession, backend))
+    webvpn_jwxt = webvpn_login(campus, JWXTSession)
+    results += [
+        measure(campus, "jwxt current term", rounds, lambda: Schedule(jwxt).getCurrentTerm()),
+        measure(campus, "jwxt scores", rounds, lambda: Score(jwxt).grade()),
+        measure(campus, "jwxt current term via webvpn", rounds, lambda: Schedule(webvpn_jwxt).getCurrentTerm()),
+        measure(campus, "attendance current week", rounds, lambda: Attendance(attendance).attendanceCurrentWeek()),
+        measure(campus, "lms courses", rounds, lambda: LMSUtil(lms).get_my_courses()),
+        measure(campus, "jwxt current term after site session expiry", rounds,
+                lambda: Schedule(jwxt).getCurrentTerm(), before=lambda: campus.expire_sessions(include_cas=False)),
+        measure(campus, "jwxt current term after full expiry", rounds,
+                lambda: Schedule(jwxt).getCurrentTerm(), before=campus.expire_sessions),
+    ]
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=20.0, help="server latency per request (ms)")
+    parser.add_argument("--jitter", type=float, default=5.0, help="latency jitter per request (ms)")
+    parser.add_argument("--webvpn-latency", type=float, default=15.0,
+                        help="extra latency added by the WebVPN hop (ms)")
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="probability of a 503 response from the business sites")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    if args.rounds < 1 or min(args.latency, args.jitter, args.webvpn_latency) < 0 \
+            or not 0 <= args.failure_rate <= 1:
+        parser.error("--rounds must be positive, latencies non-negative and --failure-rate within [0, 1]")
+
+    # QR code login needs user interaction; benchmark the password flow.
+    cfg.enableQRCodeLogin.value = False
+    # The fake campus is reachable directly; skip the access mode probe of the session manager.
+    cfg.campusAccessPolicy.value = cfg.NetworkAccessPolicy.DIRECT
+    with FakeCampus(seed=args.seed) as campus:
+        for host in (*SITE_HOSTS, "login.xjtu.edu.cn", "org.xjtu.edu.cn"):
+            campus.inject(host=host, latency=args.latency / 1000, jitter=args.jitter / 1000)
+        campus.inject(host="webvpn.xjtu.edu.cn", latency=args.webvpn_latency / 1000)
+        if args.failure_rate:
+            for host in SITE_HOSTS:
+                campus.inject(host=host, status=503, probability=args.failure_rate)
+        results = run(campus, args.rounds)
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        for result in results:
+            print(f"{result['case']}: p50 {result['p50_ms']} ms, p90 {result['p90_ms']} ms, "
+                  f"max {result['max_ms']} ms, {result['server_hits_per_op']} server hits/op, {result['errors']} errors")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,212 @@
+"""Offline accuracy, latency and memory benchmark for the venue slider-captcha solver.
+
+Replays a saved corpus (recorded with scripts/record_captchas.py, format in scripts/captcha_corpus.py) or, without
+``--corpus``, synthesized captchas through ``find_gaps`` and ``gen_track``/``build_yzm``, exactly as the booking
+flow does after ``/gen``. A sample counts as solved when the offset is within ``--tolerance`` server pixels of the
+verified one. ``--min-accuracy`` turns the run into a pass/fail check for CI; no network access is needed.
+
+``--booking`` replays the VenueThread retry loop on the corpus with simulated network costs, comparing the single
+edge-NCC guess per captcha with the ranked multi-hypothesis candidates of ``rank_gaps``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+
+if __package__ in {None, ""}:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.sessions.tracing import percentile
+from captcha_solver import SERVER_BG_W, _edge_maps, build_yzm, find_gaps, gen_track, rank_gaps
+from scripts.captcha_corpus import DEFAULT_TOLERANCE, CaptchaSample, load_corpus, synthesize
+
+
+def loop_detect_gap(bg_rgb: np.ndarray, slider_rgba: np.ndarray) -> int:
+    """The matcher before vectorization: one window copy, mean and norm per offset."""
+    maps = _edge_maps(bg_rgb, slider_rgba)
+    if maps is None:
+        return 0
+    band, pe_bin, x0 = maps
+    pw = pe_bin.shape[1]
+    tmpl = pe_bin - pe_bin.mean()
+    tmpl_norm = np.sqrt((tmpl * tmpl).sum()) + 1e-6
+    best_ncc, best_x = -1e9, 0
+    for x in range(band.shape[1] - pw + 1):
+        win = band[:, x:x + pw]
+        win0 = win - win.mean()
+        ncc = float((win0 * tmpl).sum() / (tmpl_norm * (np.sqrt((win0 * win0).sum()) + 1e-6)))
+        if ncc > best_ncc:
+            best_ncc, best_x = ncc, x
+    return int(round(max((best_x - x0) * SERVER_BG_W / bg_rgb.shape[1], 0.0)))
+
+
+def check_track(track: dict, move_x: int) -> bool:
+    """The invariants /check relies on: press at 0, monotonic drag ending on move_x, increasing time."""
+    points = track["trackList"]
+    xs = [point["x"] for point in points]
+    times = [point["t"] for point in points]
+    return (points[0]["type"] == "down" and points[-1]["type"] == "up" and xs[0] == 0 and xs[-1] == move_x
+            and xs == sorted(xs) and times == sorted(times))
+
+
+def summarize(name: str, samples: int, elapsed: list[float], **extra: object) -> dict:
+    elapsed.sort()
+    return {
+        "case": name,
+        "samples": samples,
+        **extra,
+        "p50_ms": round(percentile(elapsed, 50), 2),
+        "p99_ms": round(percentile(elapsed, 99), 2),
+    }
+
+
+def measure_memory(samples: list[CaptchaSample], top_k: int) -> float:
+    """Peak traced allocation (KiB) of one find_gaps + gen_track pass, worst sample."""
+    peak = 0
+    tracemalloc.start()
+    try:
+        for sample in samples:
+            tracemalloc.reset_peak()
+            candidates = find_gaps(sample.background, sample.slider, top_k=top_k)
+            build_yzm(gen_track(candidates[0].move_x if candidates else 0), sample.name)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def evaluate(samples: list[CaptchaSample], top_k: int, tolerance: int, repeat: int,
+             compare_loop: bool = True) -> list[dict]:
+    detect_ms, track_ms, total_ms, ranked_ms, loop_ms = [], [], [], [], []
+    top1 = topk = ranked_hits = loop_hits = bad_tracks = 0
+    for sample in samples:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            candidates = find_gaps(sample.background, sample.slider, top_k=top_k)
+            detected = time.perf_counter()
+            move_x = candidates[0].move_x if candidates else 0
+            track = gen_track(move_x)
+            build_yzm(track, sample.name)
+            finished = time.perf_counter()
+            detect_ms.append((detected - started) * 1000)
+            track_ms.append((finished - detected) * 1000)
+            total_ms.append((finished - started) * 1000)
+        top1 += sample.is_hit(move_x, tolerance)
+        topk += any(sample.is_hit(candidate.move_x, tolerance) for candidate in candidates)
+        bad_tracks += not check_track(track, move_x)
+
+        started = time.perf_counter()
+        ranked = rank_gaps(sample.background, sample.slider, top_k=top_k)
+        ranked_ms.append((time.perf_counter() - started) * 1000)
+        ranked_hits += bool(ranked) and sample.is_hit(ranked[0].move_x, tolerance)
+
+        if compare_loop:
+            started = time.perf_counter()
+            loop_hits += sample.is_hit(loop_detect_gap(sample.background, sample.slider), tolerance)
+            loop_ms.append((time.perf_counter() - started) * 1000)
+
+    count = len(samples)
+    results = [
+        summarize("detect_gap", count, detect_ms, top1_accuracy=round(top1 / count, 3),
+                  **{f"top{top_k}_accuracy": round(topk / count, 3)}),
+        summarize("gen_track + build_yzm", count, track_ms, invalid_tracks=bad_tracks),
+        summarize("solve (offline)", count, total_ms, peak_kib=measure_memory(samples, top_k)),
+        summarize("rank_gaps", count, ranked_ms, top1_accuracy=round(ranked_hits / count, 3)),
+    ]
+    if compare_loop:
+        results.append(summarize("detect_gap (loop matcher)", count, loop_ms,
+                                 top1_accuracy=round(loop_hits / count, 3)))
+    return results
+
+
+def simulate_booking(samples: list[CaptchaSample], ranked: bool, candidates: int, fetches: int,
+                     gen_ms: float, book_ms: float, tolerance: int) -> dict:
+    """Replay the VenueThread booking loop with the corpus as the stream of captchas.
+
+    Every booking starts at a different sample and takes the following ones for its retries. A ``/gen`` costs
+    ``gen_ms`` and a booking submission ``book_ms`` on top of the measured solve time; a submission succeeds when
+    its offset is within ``tolerance`` of the verified one. Like CaptchaAttempts with ``candidates > 1``, the
+    runners-up of a captcha are submitted before fetching another one.
+    """
+    elapsed, submissions = [], []
+    successes = 0
+    for start in range(len(samples)):
+        total = 0.0
+        submitted = 0
+        booked = False
+        for fetch in range(fetches):
+            sample = samples[(start + fetch) % len(samples)]
+            started = time.perf_counter()
+            if ranked:
+                found = rank_gaps(sample.background, sample.slider, top_k=candidates)
+            else:
+                found = find_gaps(sample.background, sample.slider, top_k=1)
+            total += gen_ms + (time.perf_counter() - started) * 1000
+            for candidate in found[:candidates]:
+                total += book_ms
+                submitted += 1
+                if sample.is_hit(candidate.move_x, tolerance):
+                    booked = True
+                    break
+            if booked:
+                break
+        successes += booked
+        elapsed.append(total)
+        submissions.append(submitted)
+    return summarize(f"booking ({'rank_gaps' if ranked else 'find_gaps'}, {candidates} per captcha)",
+                     len(samples), elapsed, success_rate=round(successes / len(samples), 3),
+                     submissions_per_booking=round(sum(submissions) / len(submissions), 2))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", type=Path, help="directory of saved captchas (default: synthesized)")
+    parser.add_argument("--samples", type=int, default=100, help="number of synthesized captchas")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--tolerance", type=int, default=DEFAULT_TOLERANCE, help="accepted error (server px)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed solver runs per sample")
+    parser.add_argument("--no-loop", action="store_true", help="skip the old per-offset loop matcher")
+    parser.add_argument("--min-accuracy", type=float, help="exit with status 1 below this top-1 accuracy")
+    parser.add_argument("--booking", action="store_true",
+                        help="also replay the booking retry loop with find_gaps and with rank_gaps")
+    parser.add_argument("--gen-latency", type=float, default=150.0, help="simulated /gen round trip (ms)")
+    parser.add_argument("--book-latency", type=float, default=200.0, help="simulated booking submission (ms)")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    if args.samples < 1 or args.top_k < 1 or args.repeat < 1 or args.tolerance < 0:
+        parser.error("--samples, --top-k and --repeat must be positive and --tolerance non-negative")
+
+    samples = load_corpus(args.corpus) if args.corpus else synthesize(args.samples, args.seed)
+    if not samples:
+        parser.error(f"no samples in {args.corpus}")
+    results = evaluate(samples, args.top_k, args.tolerance, args.repeat, compare_loop=not args.no_loop)
+    if args.booking:
+        for ranked, candidates in ((False, 1), (True, 2)):
+            results.append(simulate_booking(samples, ranked, candidates, 3, args.gen_latency,
+                                            args.book_latency, args.tolerance))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            details = ", ".join(f"{key} {value}" for key, value in result.items()
+                                if key not in {"case", "samples", "p50_ms", "p99_ms"})
+            print(f"{result['case']}: {result['samples']} samples, p50 {result['p50_ms']} ms, "
+                  f"p99 {result['p99_ms']} ms" + (f", {details}" if details else ""))
+    if args.min_accuracy is not None and results[0]["top1_accuracy"] < args.min_accuracy:
+        print(f"top-1 accuracy {results[0]['top1_accuracy']:.1%} is below {args.min_accuracy:.1%}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,156 @@
+"""Offline benchmark for fetching the FineReport transcript (``Score.reported_grade``).
+
+Serves FR ``page_content`` pages from a fake session with a simulated round trip and compares the old one-page-at-a-
+time loop with ``reported_grade``, which fetches and parses pages 2..N concurrently and stitches them in page order.
+Pages are synthesized (terms deliberately continue across page boundaries) or, with ``--pages-dir``, read from
+recorded ``page_content`` responses named ``<pn>.html``; page 1 must contain ``FR._p.reportTotalPage``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+
+if __package__ in {None, ""}:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.sessions.tracing import percentile
+from jwxt.score import Score
+
+SESSION_ID = "84207"
+_GRADES = ["A+", "A", "A-", "B+", "B", "通过", "优秀"]
+
+
+def synthesize_pages(pages: int, rows_per_page: int, seed: int = 0) -> list[str]:
+    """Render FR pages shaped like the transcript: a header row, term rows and course rows (name, credit, score)."""
+    rng = random.Random(seed)
+    rows = []
+    year, term_no = 2019, 1
+    while len(rows) < pages * rows_per_page:
+        cn = "一二三"[term_no - 1]
+        rows.append(f'<tr><td colspan="9">{year}-{year + 1}学年 第{cn}学期</td></tr>')
+        for index in range(rng.randint(6, 12)):
+            score = rng.randint(60, 100) if rng.random() < 0.8 else rng.choice(_GRADES)
+            rows.append(f"<tr><td>课程{year}{term_no}-{index:02d}</td><td>{rng.choice([1, 2, 3, 3.5, 4])}</td>"
+                        f"<td>{score}</td></tr>")
+        year, term_no = (year, term_no + 1) if term_no < 2 else (year + 1, 1)
+
+    header = "<tr><td>课程</td><td>学分</td><td>成绩</td></tr>"
+    result = []
+    for pn in range(pages):
+        body = "".join(rows[pn * rows_per_page:(pn + 1) * rows_per_page])
+        script = f"<script>FR._p.reportTotalPage = {pages};</script>" if pn == 0 else ""
+        result.append(f'<html><body>{script}<table><tbody class="rows-height-counter">{header}{body}'
+                      f"</tbody></table></body></html>")
+    return result
+
+
+def load_pages(directory: Path) -> list[str]:
+    files = sorted(directory.glob("*.html"), key=lambda path: int(path.stem))
+    return [file.read_text(encoding="utf-8") for file in files]
+
+
+class _Response:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeReportSession:
+    """Serves ``frReport2/show.do`` from memory; every request sleeps ``latency`` seconds."""
+
+    def __init__(self, pages: list[str], latency: float):
+        self.pages = pages
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, **kwargs):
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.latency)
+        params = params or {}
+        if params.get("op") == "page_content":
+            assert params["sessionID"] == SESSION_ID
+            return _Response(self.pages[int(params["pn"]) - 1])
+        return _Response(f"<html><script>FR.SessionMgr.register('{SESSION_ID}', contentPane);</script></html>")
+
+
+def sequential_reported_grade(session: FakeReportSession, student_id: str) -> list[dict]:
+    """The transcript loop before pipelining: one request and parse after another."""
+    util = Score(session)
+    util.extract_fr_session_id_from_html(session.get("show.do", params={"xh": student_id}).text)
+    first_page = util._fr_page_content(SESSION_ID, 1)
+    courses, last_term = util.extract_course_scores_from_fr_form_html(first_page)
+    for pn in range(2, util.extract_fr_report_total_page_from_html(first_page) + 1):
+        page_courses, last_term = util.extract_course_scores_from_fr_form_html(
+            util._fr_page_content(SESSION_ID, pn), initial_term=last_term)
+        courses.extend(page_courses)
+    return courses
+
+
+def run_case(name: str, function, pages: list[str], latency: float, repeat: int) -> tuple[dict, list[dict]]:
+    elapsed = []
+    courses: list[dict] = []
+    for _ in range(repeat):
+        session = FakeReportSession(pages, latency)
+        started = time.perf_counter()
+        courses = function(session)
+        elapsed.append((time.perf_counter() - started) * 1000)
+    elapsed.sort()
+    return {
+        "case": name,
+        "pages": len(pages),
+        "courses": len(courses),
+        "p50_ms": round(percentile(elapsed, 50), 2),
+        "p99_ms": round(percentile(elapsed, 99), 2),
+    }, courses
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages-dir", type=Path, help="recorded page_content responses named <pn>.html")
+    parser.add_argument("--pages", type=int, default=8, help="number of synthesized pages")
+    parser.add_argument("--rows-per-page", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=80.0, help="simulated round trip per request (ms)")
+    parser.add_argument("--workers", type=int, default=Score.FR_PAGE_WORKERS, help="concurrent page requests")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    if args.pages < 1 or args.rows_per_page < 1 or args.workers < 1 or args.repeat < 1 or args.latency < 0:
+        parser.error("--pages, --rows-per-page, --workers and --repeat must be positive and --latency non-negative")
+
+    pages = load_pages(args.pages_dir) if args.pages_dir else synthesize_pages(args.pages, args.rows_per_page)
+    if not pages:
+        parser.error(f"no pages in {args.pages_dir}")
+    latency = args.latency / 1000
+
+    def pipelined(session: FakeReportSession) -> list[dict]:
+        util = Score(session)
+        util.FR_PAGE_WORKERS = args.workers
+        return util.reported_grade("2200000000")
+
+    sequential, expected = run_case("sequential", lambda session: sequential_reported_grade(session, "2200000000"),
+                                    pages, latency, args.repeat)
+    concurrent, courses = run_case(f"reported_grade ({args.workers} workers)", pipelined, pages, latency, args.repeat)
+    results = [sequential, concurrent]
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        for result in results:
+            print(f"{result['case']}: {result['pages']} pages, {result['courses']} courses, "
+                  f"p50 {result['p50_ms']} ms, p99 {result['p99_ms']} ms")
+    if courses != expected:
+        print("reported_grade returned different courses than the sequential loop", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
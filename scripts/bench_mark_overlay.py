@@ -0,0 +1,111 @@
+"""Offline benchmark for parsing LMS marked-attachment (annotation) payloads."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+
+if __package__ in {None, ""}:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lms.mark_overlay import MarkOverlayMemo, parse_mark_attachment_text
+
+
+def build_payload(pages: int, marks_per_page: int, points_per_path: int) -> str:
+    """Build a payload shaped like a large scanned-homework annotation file."""
+    page_rows = []
+    for page in range(pages):
+        marks = []
+        for index in range(marks_per_page):
+            path = [["M", 10 + index, 20 + page]]
+            path.extend(["L", 10 + index + step, 20 + page + step % 7] for step in range(points_per_path))
+            marks.append({
+                "id": f"mark-{page}-{index}",
+                "comment": f"第 {page + 1} 页第 {index + 1} 处批注" if index % 3 == 0 else "",
+                "graphic": {"path": path, "borderColor": "#FF0000", "borderWidth": 2,
+                            "left": index, "top": page, "width": 30, "height": 12},
+                "style": {"opacity": 0.8, "dash": [4, 2]},
+            })
+        page_rows.append({
+            "upload": {"id": 1000 + page, "reference_id": 5000 + page, "key": f"upload-{page}"},
+            "image_width": 2480,
+            "image_height": 3508,
+            "marks": marks,
+        })
+    return json.dumps({"data": {"pages": page_rows, "version": 3}}, ensure_ascii=False)
+
+
+def load_payloads(paths: list[str]) -> list[tuple[str, str]]:
+    payloads = []
+    for one in paths:
+        path = Path(one)
+        files = sorted(path.glob("*")) if path.is_dir() else [path]
+        for file in files:
+            if file.is_file():
+                payloads.append((file.name, file.read_text(encoding="utf-8", errors="replace")))
+    return payloads
+
+
+def measure(function, repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("payloads", nargs="*", help="recorded payload files or directories (default: synthetic)")
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--marks", type=int, default=60, help="marks per page for the synthetic payload")
+    parser.add_argument("--points", type=int, default=40, help="path points per mark for the synthetic payload")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("--repeat must be positive")
+
+    payloads = load_payloads(args.payloads) if args.payloads else [
+        (f"synthetic-{args.pages}x{args.marks}x{args.points}", build_payload(args.pages, args.marks, args.points))
+    ]
+
+    results = []
+    for name, text in payloads:
+        summary, items = parse_mark_attachment_text(text)
+        cold = measure(lambda: parse_mark_attachment_text(text), args.repeat)
+
+        memo = MarkOverlayMemo()
+        memo.put(1, name, (summary, items))
+        memoized = measure(lambda: memo.get(1, name), args.repeat)
+
+        results.append({
+            "payload": name,
+            "bytes": len(text.encode("utf-8")),
+            "items": len(items),
+            "summary_lines": len(summary.splitlines()) if summary else 0,
+            "parse_ms_median": round(statistics.median(cold), 3),
+            "parse_ms_min": round(min(cold), 3),
+            "memo_ms_median": round(statistics.median(memoized), 5),
+        })
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        for result in results:
+            print(
+                f"{result['payload']}: {result['bytes']} bytes, {result['items']} items, "
+                f"parse median={result['parse_ms_median']}ms min={result['parse_ms_min']}ms, "
+                f"memoized={result['memo_ms_median']}ms"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
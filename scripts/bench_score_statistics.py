@@ -0,0 +1,156 @@
+"""Offline benchmark for the score page statistics (``score_statistics``).
+
+Compares the previous per-row loop over score mappings with the NumPy ``ScoreTable``: statistics of random selections
+(rebuilt from the selected rows, as ``ScoreInterface.onSelectScore`` did), the same selections through a
+``ScoreSelection`` (masked sums over the precomputed contributions), per-term grouping and a what-if projection.
+Records are synthesized in both score formats (full records and transcript rows without GPA), including zero-credit
+rows.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+
+if __package__ in {None, ""}:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.sessions.tracing import percentile
+from score_statistics import ScoreSelection, ScoreTable, _finite_number
+
+_TYPES = ["必修", "选修", "限选", "通识"]
+
+
+def synthesize_scores(count: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    scores = []
+    for index in range(count):
+        year = 2015 + index * 8 // max(count, 1)
+        score = rng.randint(60, 100)
+        row = {
+            "courseName": f"课程{index:05d}",
+            "coursePoint": rng.choice([0, 1, 1.5, 2, 3, 3.5, 4, 6.5]),
+            "score": score if rng.random() < 0.95 else "通过",
+            "gpa": round(min(4.3, 1 + (score - 60) / 10), 1) if rng.random() < 0.9 else None,
+            "term": f"{year}-{year + 1}-{rng.randint(1, 2)}",
+            "majorFlag": rng.choice(_TYPES),
+        }
+        scores.append(row)
+    return scores
+
+
+def loop_statistics(scores: list[dict]) -> tuple | None:
+    """The statistics loop before the score table: one pass over the mappings per call."""
+    total_credit = gpa_total = gpa_credit = score_total = score_credit = 0.0
+    incomplete = 0
+    for row in scores:
+        credit = _finite_number(row.get("coursePoint"))
+        if credit is None or credit <= 0:
+            incomplete += 1
+            continue
+        total_credit += credit
+        gpa = _finite_number(row.get("gpa"))
+        score = _finite_number(row.get("score"))
+        if gpa is not None:
+            gpa_total += gpa * credit
+            gpa_credit += credit
+        if score is not None:
+            score_total += score * credit
+            score_credit += credit
+        if gpa is None or score is None:
+            incomplete += 1
+    if total_credit <= 0:
+        return None
+    return total_credit, gpa_total / gpa_credit if gpa_credit else None, incomplete
+
+
+def selections(count: int, steps: int, seed: int = 0) -> list[list[int]]:
+    """Shift-click style selections: each step adds or drops a few rows from the previous one."""
+    rng = random.Random(seed)
+    current = set(rng.sample(range(count), count // 2))
+    result = []
+    for _ in range(steps):
+        for row in rng.sample(range(count), min(count, 8)):
+            current.symmetric_difference_update({row})
+        result.append(sorted(current))
+    return result
+
+
+def timed(function, repeat: int) -> list[float]:
+    elapsed = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        elapsed.append((time.perf_counter() - started) * 1000)
+    return sorted(elapsed)
+
+
+def close(left, right) -> bool:
+    if left is None or right is None:
+        return left is right
+    return math.isclose(left, right, rel_tol=1e-9, abs_tol=1e-9)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--steps", type=int, default=200, help="selection changes per run")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    if args.records < 1 or args.steps < 1 or args.repeat < 1:
+        parser.error("--records, --steps and --repeat must be positive")
+
+    scores = synthesize_scores(args.records)
+    steps = selections(args.records, args.steps)
+    table = ScoreTable(scores)
+
+    def loop():
+        return [loop_statistics([scores[index] for index in rows]) for rows in steps]
+
+    def selection_sums():
+        selection = ScoreSelection(table)
+        return [selection.update(rows) for rows in steps]
+
+    cases = [
+        ("loop per selection", loop),
+        ("ScoreTable build", lambda: ScoreTable(scores)),
+        ("ScoreTable per selection", lambda: [table.statistics(rows) for rows in steps]),
+        ("ScoreSelection per selection", selection_sums),
+        ("grouped by term", lambda: table.grouped("term")),
+        ("what-if 10 courses", lambda: table.what_if([{"coursePoint": 3, "score": 90}] * 10)),
+    ]
+    results = []
+    for name, function in cases:
+        elapsed = timed(function, args.repeat)
+        results.append({
+            "case": name,
+            "records": args.records,
+            "p50_ms": round(percentile(elapsed, 50), 3),
+            "p99_ms": round(percentile(elapsed, 99), 3),
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        for result in results:
+            print(f"{result['case']}: {result['records']} records, "
+                  f"p50 {result['p50_ms']} ms, p99 {result['p99_ms']} ms")
+
+    for expected, actual in zip(loop(), selection_sums()):
+        if (expected is None) != (actual is None) or expected is not None and not (
+                close(expected[0], actual.total_credit) and close(expected[1], actual.weighted_gpa)
+                and expected[2] == actual.incomplete_count):
+            print("ScoreSelection disagrees with the per-row loop", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,163 @@
+"""Offline micro-benchmark for session snapshot serialization."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import replace
+from pathlib import Path
+
+
+if __package__ in {None, ""}:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from http.cookiejar import LWPCookieJar
+
+from requests.cookies import create_cookie
+
+from app.utils.session_persistence import (
+    SESSION_AES_KEY_LENGTH,
+    SESSION_COOKIE_PURPOSE,
+    SESSION_METADATA_FILE,
+    SESSION_METADATA_PURPOSE,
+    AccountSessionSnapshot,
+    BackendSnapshot,
+    SessionPersistenceStore,
+    SiteSnapshot,
+    _decrypt_bundle,
+    _decrypt_bytes,
+    _encrypt_bundle,
+    _encrypt_bytes,
+    bytes_to_cookie_jar,
+    cookie_jar_to_bytes,
+    cookie_jar_to_lwp_text,
+    decode_snapshot_bundle,
+    encode_snapshot_bundle,
+    lwp_text_to_cookie_jar,
+)
+
+
+ACCOUNT_UUID = "00000000-0000-4000-8000-000000000000"
+HOSTS = ("login.xjtu.edu.cn", "jwxt.xjtu.edu.cn", "lms.xjtu.edu.cn", "ywtb.xjtu.edu.cn", "webvpn.xjtu.edu.cn")
+
+
+def make_jar(cookies: int) -> LWPCookieJar:
+    jar = LWPCookieJar()
+    expires = int(time.time()) + 3600
+    for index in range(cookies):
+        host = HOSTS[index % len(HOSTS)]
+        jar.set_cookie(create_cookie(f"cookie{index}", os.urandom(24).hex(), domain=host, path="/",
+                                     expires=expires, secure=index % 2 == 0, rest={"HttpOnly": None}))
+    return jar
+
+
+def make_snapshot(cookies: int) -> tuple[AccountSessionSnapshot, dict[str, LWPCookieJar]]:
+    jars = {mode: make_jar(cookies) for mode in ("normal", "webvpn")}
+    sites = {
+        name: SiteSnapshot(name, "normal", {"Authorization": os.urandom(16).hex()}, time.time(), time.time())
+        for name in ("jwxt", "lms", "attendance", "ywtb")
+    }
+    snapshot = AccountSessionSnapshot(
+        version=SessionPersistenceStore.VERSION,
+        account_uuid=ACCOUNT_UUID,
+        saved_at=time.time(),
+        backends={
+            mode: BackendSnapshot(mode, None, None, "Mozilla/5.0", "login-id", time.time())
+            for mode in jars
+        },
+        sites=sites,
+    )
+    return snapshot, jars
+
+
+def legacy_encode(snapshot: AccountSessionSnapshot, jars: dict[str, LWPCookieJar], key: bytes) -> dict[str, bytes]:
+    """Per-file layout used before the bundle: a JSON metadata file plus one LWP text file per backend."""
+    files = {}
+    for mode, jar in jars.items():
+        filename = f"sessions_{mode}.lwp"
+        files[filename] = _encrypt_bytes(cookie_jar_to_lwp_text(jar).encode("utf-8"), key=key,
+                                         account_uuid=ACCOUNT_UUID, purpose=SESSION_COOKIE_PURPOSE, filename=filename)
+    metadata = json.dumps(snapshot.to_dict(), ensure_ascii=False).encode("utf-8")
+    files[SESSION_METADATA_FILE] = _encrypt_bytes(metadata, key=key, account_uuid=ACCOUNT_UUID,
+                                                  purpose=SESSION_METADATA_PURPOSE, filename=SESSION_METADATA_FILE)
+    return files
+
+
+def legacy_decode(files: dict[str, bytes]) -> None:
+    for filename, data in files.items():
+        purpose = SESSION_METADATA_PURPOSE if filename == SESSION_METADATA_FILE else SESSION_COOKIE_PURPOSE
+        decoded = _decrypt_bytes(data, account_uuid=ACCOUNT_UUID, purpose=purpose, filename=filename)
+        if filename == SESSION_METADATA_FILE:
+            json.loads(decoded)
+        else:
+            lwp_text_to_cookie_jar(decoded.decode("utf-8"))
+
+
+def bundle_encode(snapshot: AccountSessionSnapshot, jars: dict[str, LWPCookieJar], key: bytes) -> dict[str, bytes]:
+    backends = {
+        mode: replace(snapshot.backends[mode], cookie_data=cookie_jar_to_bytes(jar))
+        for mode, jar in jars.items()
+    }
+    snapshot = replace(snapshot, backends=backends)
+    data = _encrypt_bundle(encode_snapshot_bundle(snapshot), key=key, account_uuid=ACCOUNT_UUID)
+    return {"sessions.bin": data}
+
+
+def bundle_decode(files: dict[str, bytes]) -> None:
+    decoded = decode_snapshot_bundle(_decrypt_bundle(files["sessions.bin"], account_uuid=ACCOUNT_UUID))
+    for backend in decoded.backends.values():
+        bytes_to_cookie_jar(backend.cookie_data)
+
+
+def run(name: str, encode, decode, snapshot, jars, key: bytes, rounds: int) -> dict:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        files = encode(snapshot, jars, key)
+    encode_elapsed = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(rounds):
+        decode(files)
+    decode_elapsed = time.perf_counter() - started
+    return {
+        "case": name,
+        "files": len(files),
+        "bytes": sum(len(data) for data in files.values()),
+        "us_per_save": round(encode_elapsed / rounds * 1_000_000, 1),
+        "us_per_restore": round(decode_elapsed / rounds * 1_000_000, 1),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cookies", type=int, default=30, help="cookies per backend")
+    parser.add_argument("--rounds", type=int, default=500)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    if args.cookies < 0 or args.rounds < 1:
+        parser.error("--cookies must be non-negative and --rounds must be positive")
+
+    key = os.urandom(SESSION_AES_KEY_LENGTH)
+    snapshot, jars = make_snapshot(args.cookies)
+    # Decryption reads the key from the system keyring; use the throwaway key instead.
+    import app.utils.session_persistence as persistence
+    persistence._load_aes_key = lambda: key
+
+    results = [
+        run("legacy JSON + LWP files", legacy_encode, legacy_decode, snapshot, jars, key, args.rounds),
+        run("binary bundle", bundle_encode, bundle_decode, snapshot, jars, key, args.rounds),
+    ]
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        for result in results:
+            print(f"{result['case']}: {result['files']} files, {result['bytes']} bytes, "
+                  f"{result['us_per_save']} us/save, {result['us_per_restore']} us/restore")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,108 @@
+"""Offline micro-benchmark for WebVPN URL rewriting."""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import sys
+import time
+from binascii import hexlify
+from pathlib import Path
+from urllib.parse import urlparse
+
+
+if __package__ in {None, ""}:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from auth.util import getCiphertext, getOrdinaryUrl, getVPNUrl, institution, iv_
+from app.sessions.common_session import CommonLoginSession
+
+
+SAMPLE_URLS = (
+    "https://jwxt.xjtu.edu.cn/jwapp/sys/cjcx/modules/cjcx/xscjcx.do",
+    "https://lms.xjtu.edu.cn/api/courses/12345/activities",
+    "https://login.xjtu.edu.cn/cas/login?service=https://jwxt.xjtu.edu.cn/jwapp/sys/homeapp/index.do",
+    "http://gmis.xjtu.edu.cn:8080/pyxx/pygl/kbcx",
+    "https://ywtb.xjtu.edu.cn/portal-api/v1/calendar/share/schedule/getEvents",
+    "https://rms-v5.xjtu.edu.cn/api/replay/videos?activity_id=987654",
+    "https://example.xjtu.edu.cn/not/a/known/host",
+)
+
+
+def legacy_get_vpn_url(url: str) -> str:
+    """The rewrite as it was done before host ciphertexts were cached."""
+    parts = url.split('://', maxsplit=1)
+    pro = parts[0]
+    add = parts[1]
+    hosts = add.split('/')
+    domain = hosts[0].split(':')[0]
+    port = '-' + hosts[0].split(':')[1] if ":" in hosts[0] else ''
+    cph = getCiphertext(domain)
+    fold = '/'.join(hosts[1:])
+    key = hexlify(iv_).decode('utf-8')
+    return 'https://' + institution + '/' + pro + port + '/' + key + cph + '/' + fold
+
+
+def legacy_should_rewrite(url: str) -> bool:
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.netloc:
+        return False
+    hostname = parsed.hostname or ""
+    if hostname == "webvpn.xjtu.edu.cn":
+        return False
+    return hostname == "xjtu.edu.cn" or hostname.endswith(".xjtu.edu.cn")
+
+
+def run(name: str, function, urls: list[str]) -> dict:
+    started = time.perf_counter()
+    for url in urls:
+        function(url)
+    elapsed = time.perf_counter() - started
+    return {
+        "case": name,
+        "rewrites": len(urls),
+        "seconds": round(elapsed, 4),
+        "us_per_rewrite": round(elapsed / len(urls) * 1_000_000, 3),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    if args.count < 1:
+        parser.error("--count must be positive")
+
+    urls = list(itertools.islice(itertools.cycle(SAMPLE_URLS), args.count))
+    vpn_urls = [getVPNUrl(url) for url in SAMPLE_URLS]
+    vpn_urls = list(itertools.islice(itertools.cycle(vpn_urls), args.count))
+
+    def legacy_request(url):
+        if legacy_should_rewrite(url):
+            legacy_get_vpn_url(url)
+
+    def cached_request(url):
+        if CommonLoginSession._should_rewrite_to_webvpn(url):
+            getVPNUrl(url)
+
+    results = [
+        run("getVPNUrl (legacy, AES per call)", legacy_get_vpn_url, urls),
+        run("getVPNUrl (host table)", getVPNUrl, urls),
+        run("session rewrite check + getVPNUrl (legacy)", legacy_request, urls),
+        run("session rewrite check + getVPNUrl (cached)", cached_request, urls),
+        run("getOrdinaryUrl (host table)", getOrdinaryUrl, vpn_urls),
+    ]
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        for result in results:
+            print(f"{result['case']}: {result['rewrites']} rewrites in {result['seconds']}s "
+                  f"({result['us_per_rewrite']} us/rewrite)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,142 @@
+"""Saved slider-captcha samples for offline solver benchmarks and tests.
+
+A corpus is a directory holding ``manifest.json`` and, per sample, the background (``<name>-bg.png``) and the
+puzzle piece (``<name>-slider.png``) exactly as decoded from the venue ``/gen`` response. The manifest records the
+slider offset (server coordinates, 0-260) that the ``/check`` endpoint accepted for each sample.
+
+``synthesize`` renders captchas shaped like the venue ones (590x360 background, full-height RGBA slider, darkened
+jigsaw gap with a light outline, optional fainter decoy gap) so the solver can be exercised without any recording.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from captcha_solver import SERVER_BG_W
+
+
+MANIFEST = "manifest.json"
+BG_SIZE = (590, 360)
+SLIDER_WIDTH = 110
+PIECE_SIZE = 80
+# A solution within this many server pixels of the verified offset is accepted by /check.
+DEFAULT_TOLERANCE = 4
+
+
+@dataclass
+class CaptchaSample:
+    name: str
+    background: np.ndarray  # H x W x 3, uint8
+    slider: np.ndarray      # H x w x 4, uint8
+    offset: int             # verified slider displacement, server coordinates
+
+    def is_hit(self, move_x: int, tolerance: int = DEFAULT_TOLERANCE) -> bool:
+        return abs(move_x - self.offset) <= tolerance
+
+
+def save_sample(directory: str | Path, sample: CaptchaSample) -> None:
+    """Add (or replace) a sample in the corpus at ``directory``."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    Image.fromarray(sample.background, "RGB").save(directory / f"{sample.name}-bg.png")
+    Image.fromarray(sample.slider, "RGBA").save(directory / f"{sample.name}-slider.png")
+
+    manifest_path = directory / MANIFEST
+    entries = json.loads(manifest_path.read_text("utf-8")) if manifest_path.exists() else []
+    entries = [entry for entry in entries if entry["name"] != sample.name]
+    entries.append({"name": sample.name, "offset": sample.offset})
+    manifest_path.write_text(json.dumps(entries, indent=1), "utf-8")
+
+
+def load_corpus(directory: str | Path) -> list[CaptchaSample]:
+    directory = Path(directory)
+    samples = []
+    for entry in json.loads((directory / MANIFEST).read_text("utf-8")):
+        name = entry["name"]
+        background = np.array(Image.open(directory / f"{name}-bg.png").convert("RGB"))
+        slider = np.array(Image.open(directory / f"{name}-slider.png").convert("RGBA"))
+        samples.append(CaptchaSample(name, background, slider, int(entry["offset"])))
+    return samples
+
+
+def _texture(rng: np.random.Generator, width: int, height: int) -> np.ndarray:
+    """A photo-like background: smooth colour gradients, blobs and sensor noise."""
+    ys, xs = np.mgrid[0:height, 0:width].astype(np.float32)
+    image = np.zeros((height, width, 3), np.float32)
+    for channel in range(3):
+        for _ in range(4):
+            fx, fy = rng.uniform(0.002, 0.02, 2)
+            phase = rng.uniform(0, 2 * np.pi)
+            image[:, :, channel] += rng.uniform(20, 45) * np.sin(fx * xs * 2 * np.pi + fy * ys * 2 * np.pi + phase)
+        image[:, :, channel] += rng.uniform(80, 170)
+    for _ in range(rng.integers(6, 14)):
+        cx, cy = rng.uniform(0, width), rng.uniform(0, height)
+        radius = rng.uniform(15, 70)
+        blob = (xs - cx) ** 2 + (ys - cy) ** 2 < radius ** 2
+        image[blob] = image[blob] * 0.4 + rng.uniform(0, 255, 3) * 0.6
+    image += rng.normal(0, 4, image.shape)
+    return np.clip(image, 0, 255)
+
+
+def _piece_mask(rng: np.random.Generator) -> np.ndarray:
+    """A jigsaw piece: a square with round knobs on two sides."""
+    size = PIECE_SIZE
+    knob = size // 6
+    full = size + 2 * knob
+    ys, xs = np.mgrid[0:full, 0:full]
+    mask = (xs >= knob) & (xs < knob + size) & (ys >= knob) & (ys < knob + size)
+    centre = knob + size // 2
+    for cx, cy in rng.permutation([(centre, knob), (knob + size, centre), (centre, knob + size), (knob, centre)])[:2]:
+        mask |= (xs - cx) ** 2 + (ys - cy) ** 2 <= knob ** 2
+    return mask
+
+
+def _outline(mask: np.ndarray) -> np.ndarray:
+    padded = np.pad(mask, 2)
+    grown = np.zeros_like(mask)
+    for dy in range(5):
+        for dx in range(5):
+            grown |= padded[dy:dy + mask.shape[0], dx:dx + mask.shape[1]]
+    return grown & ~mask
+
+
+def synthesize_sample(rng: np.random.Generator, name: str, decoy: bool = False) -> CaptchaSample:
+    width, height = BG_SIZE
+    background = _texture(rng, width, height)
+    mask = _piece_mask(rng)
+    outline = _outline(mask)
+    size = mask.shape[0]
+
+    piece_x0 = int(rng.integers(2, SLIDER_WIDTH - size))
+    gap_x = int(rng.integers(size + 90, width - size - 2))
+    y = int(rng.integers(2, height - size - 2))
+
+    slider = np.zeros((height, SLIDER_WIDTH, 4), np.uint8)
+    piece = background[y:y + size, gap_x:gap_x + size]
+    slider[y:y + size, piece_x0:piece_x0 + size, :3][mask] = piece[mask].astype(np.uint8)
+    slider[y:y + size, piece_x0:piece_x0 + size, :3][outline] = 235
+    slider[y:y + size, piece_x0:piece_x0 + size, 3][mask | outline] = 255
+
+    gaps = [(gap_x, 0.45, 200.0)]
+    if decoy:
+        decoy_x = int(rng.integers(size + 90, width - size - 2))
+        if abs(decoy_x - gap_x) > size:
+            gaps.append((decoy_x, 0.75, 150.0))
+    for x, shade, border in gaps:
+        region = background[y:y + size, x:x + size]
+        region[mask] *= shade
+        region[outline] = region[outline] * 0.3 + border * 0.7
+
+    offset = round((gap_x - piece_x0) * SERVER_BG_W / width)
+    return CaptchaSample(name, background.astype(np.uint8), slider, offset)
+
+
+def synthesize(count: int, seed: int = 0, decoy_rate: float = 0.3) -> list[CaptchaSample]:
+    rng = np.random.default_rng(seed)
+    return [synthesize_sample(rng, f"synthetic-{seed}-{index:04d}", decoy=rng.random() < decoy_rate)
+            for index in range(count)]
@@ -0,0 +1,8 @@
+"""
+离线的校园网服务模拟，用于在不访问学校服务器的情况下测试与评测客户端的登录与数据请求。
+"""
+
+from .adapter import FakeCampusAdapter
+from .server import FakeCampus, FakeRequest, FakeResponse, Fault
+
+__all__ = ["FakeCampus", "FakeCampusAdapter", "FakeRequest", "FakeResponse", "Fault"]
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+import requests
+
+from app.sessions.transport import MeteredHTTPAdapter, TransportConfig, TransportStats
+
+if TYPE_CHECKING:
+    from .server import FakeCampus
+
+
+class FakeCampusAdapter(MeteredHTTPAdapter):
+    """
+    把所有请求转发到本地 FakeCampus 服务器的适配器。
+    请求的网址保持不变（仍然是 https://jwxt.xjtu.edu.cn/... 等），只把连接改为本地服务器，并通过 Host 与 X-Forwarded-Proto
+    头告诉服务器原始的主机与协议，因此 Cookie、重定向与 WebVPN 网址改写都与访问真实服务器时一致。
+    连接池、重试与统计沿用 MeteredHTTPAdapter，可以直接评测 TransportConfig 的效果。
+    """
+
+    def __init__(self, campus: FakeCampus, config: TransportConfig | None = None,
+                 stats: TransportStats | None = None) -> None:
+        self.campus = campus
+        super().__init__(config or TransportConfig(), stats or TransportStats())
+
+    def get_connection_with_tls_context(self, request, verify, proxies=None, cert=None):
+        host, port = self.campus.address
+        return self.poolmanager.connection_from_host(host, port, scheme="http")
+
+    def request_url(self, request, proxies) -> str:
+        return request.path_url
+
+    def cert_verify(self, conn, url, verify, cert) -> None:
+        pass
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        routed = request.copy()
+        parsed = urlsplit(request.url)
+        routed.headers["Host"] = parsed.netloc
+        routed.headers["X-Forwarded-Proto"] = parsed.scheme
+        response = super().send(routed, **kwargs)
+        # 让 requests 按原始请求处理 Cookie 与后续重定向
+        response.request = request
+        return response
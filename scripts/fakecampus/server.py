@@ -0,0 +1,374 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import itertools
+import json
+from pathlib import Path
+import random
+import threading
+import time
+from typing import Any
+from urllib.parse import parse_qs
+
+from requests.structures import CaseInsensitiveDict
+
+
+# 默认的录制响应目录，每个主机一个 JSON 文件
+RECORDINGS_DIRECTORY = Path(__file__).resolve().parent / "recordings"
+
+
+@dataclass
+class FakeRequest:
+    """模拟服务器收到的一个请求。host 为请求的原始主机名（例如 jwxt.xjtu.edu.cn），而不是本地服务器的地址。"""
+
+    method: str
+    scheme: str
+    host: str
+    path: str
+    query_string: str = ""
+    headers: CaseInsensitiveDict = field(default_factory=CaseInsensitiveDict)
+    body: bytes = b""
+
+    @property
+    def url(self) -> str:
+        query = f"?{self.query_string}" if self.query_string else ""
+        return f"{self.scheme}://{self.host}{self.path}{query}"
+
+    @property
+    def query(self) -> dict[str, str]:
+        return {key: values[0] for key, values in parse_qs(self.query_string, keep_blank_values=True).items()}
+
+    @property
+    def form(self) -> dict[str, str]:
+        return {key: values[0] for key, values in parse_qs(self.body.decode(), keep_blank_values=True).items()}
+
+    @property
+    def cookies(self) -> dict[str, str]:
+        cookies = {}
+        for part in self.headers.get("Cookie", "").split(";"):
+            name, sep, value = part.strip().partition("=")
+            if sep:
+                cookies[name] = value
+        return cookies
+
+
+@dataclass
+class FakeResponse:
+    """模拟服务器返回的一个响应。"""
+
+    status: int = 200
+    body: bytes = b""
+    content_type: str = "text/html; charset=utf-8"
+    headers: list[tuple[str, str]] = field(default_factory=list)
+
+    @classmethod
+    def html(cls, text: str, status: int = 200) -> FakeResponse:
+        return cls(status, text.encode("utf-8"))
+
+    @classmethod
+    def json(cls, data: Any, status: int = 200) -> FakeResponse:
+        return cls(status, json.dumps(data, ensure_ascii=False).encode("utf-8"), "application/json;charset=UTF-8")
+
+    @classmethod
+    def redirect(cls, location: str, status: int = 302) -> FakeResponse:
+        return cls(status, b"", "text/html; charset=utf-8", [("Location", location)])
+
+    @property
+    def location(self) -> str | None:
+        for name, value in self.headers:
+            if name.lower() == "location":
+                return value
+        return None
+
+    def set_cookie(self, name: str, value: str, path: str = "/") -> FakeResponse:
+        self.headers.append(("Set-Cookie", f"{name}={value}; Path={path}; HttpOnly"))
+        return self
+
+
+@dataclass
+class Fault:
+    """
+    一条延迟或故障注入规则。host 与 path（前缀）都为 None 时匹配全部请求。
+    通过 WebVPN 访问的请求会分别按 WebVPN 与实际站点匹配两次，因此两者的延迟会叠加。
+    """
+
+    host: str | None = None
+    path: str | None = None
+    # 在处理请求前等待的时间（秒），实际等待时间在 latency ± jitter 之间均匀分布
+    latency: float = 0.0
+    jitter: float = 0.0
+    # 直接返回的 HTTP 状态码，例如 502、503
+    status: int | None = None
+    # 不返回任何内容直接关闭连接，模拟连接被重置
+    reset: bool = False
+    # 规则生效的概率
+    probability: float = 1.0
+    # 规则最多生效的次数，为 None 时不限次数
+    times: int | None = None
+    # 规则已经生效的次数
+    hits: int = 0
+
+    def matches(self, request: FakeRequest) -> bool:
+        if self.host is not None and self.host != request.host:
+            return False
+        if self.path is not None and not request.path.startswith(self.path):
+            return False
+        return self.times is None or self.hits < self.times
+
+
+class _ConnectionReset(Exception):
+    """故障注入要求直接关闭连接。"""
+
+
+class _FakeCampusHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: _FakeCampusHTTPServer
+
+    def _handle(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        host = (self.headers.get("Host") or "").split(":")[0]
+        path, _, query_string = self.path.partition("?")
+        request = FakeRequest(
+            method=self.command,
+            scheme=self.headers.get("X-Forwarded-Proto", "https"),
+            host=host,
+            path=path,
+            query_string=query_string,
+            headers=CaseInsensitiveDict(self.headers.items()),
+            body=body,
+        )
+        try:
+            response = self.server.campus.dispatch(request)
+        except _ConnectionReset:
+            self.close_connection = True
+            return
+
+        self.send_response(response.status)
+        self.send_header("Content-Type", response.content_type)
+        self.send_header("Content-Length", str(len(response.body)))
+        for name, value in response.headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(response.body)
+
+    do_GET = do_POST = do_HEAD = _handle
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+class _FakeCampusHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, campus: FakeCampus) -> None:
+        super().__init__(("127.0.0.1", 0), _FakeCampusHandler)
+        self.campus = campus
+
+
+def load_recordings(directory: Path) -> dict[tuple[str, str, str], FakeResponse]:
+    """
+    读取录制的响应。目录下每个 `<host>.json` 文件是一个列表，每一项的格式为：
+    {"method": "POST", "path": "/api/...", "status": 200, "json": {...}} 或者用 "text" 代替 "json" 给出文本响应，
+    可以用 "content_type" 覆盖默认的 Content-Type。
+    """
+    recordings = {}
+    for file in sorted(directory.glob("*.json")):
+        host = file.stem
+        for entry in json.loads(file.read_text(encoding="utf-8")):
+            recordings[(host, entry.get("method", "GET").upper(), entry["path"])] = _recording_response(entry)
+    return recordings
+
+
+def _recording_response(entry: dict[str, Any]) -> FakeResponse:
+    status = entry.get("status", 200)
+    if "json" in entry:
+        response = FakeResponse.json(entry["json"], status)
+    else:
+        response = FakeResponse.html(entry.get("text", ""), status)
+    if "content_type" in entry:
+        response.content_type = entry["content_type"]
+    return response
+
+
+class FakeCampus:
+    """
+    离线的西安交通大学校园网服务模拟，包含统一身份认证（CAS）、WebVPN、教务系统、考勤系统与思源学堂。
+    登录流程按照真实服务器的跳转与 Cookie 行为实现，业务接口则回放录制的响应。
+    配合 FakeCampusAdapter 使用时，客户端仍然请求真实的网址，请求会被转发到本地的服务器上。
+
+    用法：
+        with FakeCampus() as campus:
+            backend = SessionBackend(AccessMode.NORMAL, transport_config=campus.transport_config())
+            ...
+    """
+
+    def __init__(self, username: str = "2220000000", password: str = "password", *,
+                 recordings_directory: Path | None = RECORDINGS_DIRECTORY,
+                 mfa_enabled: bool = True, seed: int = 0) -> None:
+        """
+        :param username: 可以登录的用户名
+        :param password: 该用户的密码
+        :param recordings_directory: 录制响应的目录，为 None 时不加载任何录制的响应
+        :param mfa_enabled: 登录页面是否声明开启 MFA 检测。开启时客户端会先请求 /cas/mfa/detect，但服务器总是回答不需要验证
+        :param seed: 故障注入使用的随机数种子，保证评测结果可以复现
+        """
+        from .sites import create_sites
+
+        self.username = username
+        self.password = password
+        self.mfa_enabled = mfa_enabled
+        self.recordings = load_recordings(recordings_directory) if recordings_directory is not None else {}
+        self.faults: list[Fault] = []
+        # 按主机统计的请求次数，以及按 (主机, 路径) 统计的请求次数
+        self.requests_by_host: dict[str, int] = {}
+        self.requests_by_path: dict[tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._counter = itertools.count(1)
+        self.sites = create_sites(self)
+        self._server: _FakeCampusHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def password_logins(self) -> int:
+        """统一身份认证实际校验密码（而不是通过单点登录直接跳转）的次数。"""
+        return self.sites["login.xjtu.edu.cn"].password_logins  # type: ignore[attr-defined]
+
+    @property
+    def address(self) -> tuple[str, int]:
+        """本地服务器监听的地址与端口。"""
+        if self._server is None:
+            raise RuntimeError("模拟服务器尚未启动。")
+        return self._server.server_address[:2]
+
+    def start(self) -> FakeCampus:
+        """在后台线程中启动本地服务器。"""
+        if self._server is None:
+            self._server = _FakeCampusHTTPServer(self)
+            self._thread = threading.Thread(target=self._server.serve_forever, name="FakeCampus", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """停止本地服务器。"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._thread = None
+
+    def __enter__(self) -> FakeCampus:
+        return self.start()
+
+    def __exit__(self, *args: object) -> None:
+        self.stop()
+
+    def transport_config(self, **overrides: Any):
+        """返回一个把请求转发到本服务器的 TransportConfig，可以直接传给 SessionBackend。"""
+        from app.sessions.transport import TransportConfig
+        from .adapter import FakeCampusAdapter
+
+        return TransportConfig(adapter_factory=lambda config, stats: FakeCampusAdapter(self, config, stats),
+                               **overrides)
+
+    def mount(self, session) -> None:
+        """把转发请求的适配器挂载到一个已有的 requests.Session 上。"""
+        from .adapter import FakeCampusAdapter
+
+        adapter = FakeCampusAdapter(self)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+    def inject(self, **kwargs: Any) -> Fault:
+        """添加一条故障注入规则，参数与 Fault 的字段相同。"""
+        fault = Fault(**kwargs)
+        with self._lock:
+            self.faults.append(fault)
+        return fault
+
+    def clear_faults(self) -> None:
+        with self._lock:
+            self.faults.clear()
+
+    def record(self, host: str, method: str, path: str, *, status: int = 200, json: Any = None,
+               text: str | None = None, content_type: str | None = None) -> None:
+        """添加或覆盖一条录制的响应。"""
+        entry: dict[str, Any] = {"status": status}
+        if json is not None:
+            entry["json"] = json
+        else:
+            entry["text"] = text or ""
+        if content_type is not None:
+            entry["content_type"] = content_type
+        with self._lock:
+            self.recordings[(host, method.upper(), path)] = _recording_response(entry)
+
+    def replay(self, request: FakeRequest, host: str | None = None) -> FakeResponse:
+        """
+        返回请求对应的录制响应，没有录制时返回 404。
+        优先匹配请求方法相同的录制；POST 请求被跳转为 GET（例如经过单点登录恢复会话）时，也会返回同一路径的录制。
+        """
+        host = host or request.host
+        with self._lock:
+            response = self.recordings.get((host, request.method, request.path))
+            if response is None:
+                response = next((recorded for (recorded_host, _, path), recorded in self.recordings.items()
+                                 if recorded_host == host and path == request.path), None)
+        if response is None:
+            return FakeResponse.json({"code": "404", "msg": f"没有录制的响应: {request.method} {request.path}"}, 404)
+        return FakeResponse(response.status, response.body, response.content_type, list(response.headers))
+
+    def hits(self, host: str, path: str | None = None) -> int:
+        """返回某个主机（或主机上某个路径）收到的请求次数。"""
+        with self._lock:
+            if path is None:
+                return self.requests_by_host.get(host, 0)
+            return self.requests_by_path.get((host, path), 0)
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.requests_by_host.clear()
+            self.requests_by_path.clear()
+        self.sites["login.xjtu.edu.cn"].password_logins = 0  # type: ignore[attr-defined]
+
+    def expire_sessions(self, include_cas: bool = True) -> None:
+        """
+        使各业务系统的登录态失效，模拟服务端会话过期。
+        :param include_cas: 是否同时使统一身份认证与 WebVPN 的登录态失效。为 False 时客户端可以通过单点登录直接恢复
+        """
+        for site in self.sites.values():
+            site.expire(include_cas)
+
+    def new_token(self, prefix: str) -> str:
+        return f"{prefix}-{next(self._counter)}-{self._random.getrandbits(48):012x}"
+
+    def dispatch(self, request: FakeRequest) -> FakeResponse:
+        """应用故障注入规则后，把请求交给对应主机的站点处理。"""
+        with self._lock:
+            self.requests_by_host[request.host] = self.requests_by_host.get(request.host, 0) + 1
+            path_key = (request.host, request.path)
+            self.requests_by_path[path_key] = self.requests_by_path.get(path_key, 0) + 1
+            delay = 0.0
+            action: Fault | None = None
+            for fault in self.faults:
+                if not fault.matches(request) or self._random.random() >= fault.probability:
+                    continue
+                fault.hits += 1
+                delay += max(0.0, fault.latency + self._random.uniform(-fault.jitter, fault.jitter))
+                if action is None and (fault.reset or fault.status is not None):
+                    action = fault
+
+        if delay:
+            time.sleep(delay)
+        if action is not None:
+            if action.reset:
+                raise _ConnectionReset()
+            return FakeResponse.html(f"<html><body>{action.status}</body></html>", action.status)
+
+        site = self.sites.get(request.host)
+        if site is None:
+            return FakeResponse.html("<html><body>Unknown host</body></html>", 404)
+        return site.handle(request)
@@ -0,0 +1,395 @@
+from __future__ import annotations
+
+import base64
+import functools
+import threading
+from typing import TYPE_CHECKING
+from urllib.parse import quote, urljoin, urlsplit
+
+from Crypto.Cipher import PKCS1_v1_5
+from Crypto.PublicKey import RSA
+
+from auth.constant import ATTENDANCE_URL, POSTGRADUATE_ATTENDANCE_URL
+from auth.util import getHostPlaintext, getVPNUrl
+
+from .server import FakeRequest, FakeResponse
+
+if TYPE_CHECKING:
+    from .server import FakeCampus
+
+
+CAS_HOST = "login.xjtu.edu.cn"
+ORG_HOST = "org.xjtu.edu.cn"
+WEBVPN_HOST = "webvpn.xjtu.edu.cn"
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><title>统一身份认证</title></head>
+<body>
+<script>var globalConfig = eval('(' + "{{\\"mfaEnabled\\":{mfa_enabled}}}" + ')');</script>
+<form id="fm1" action="/cas/login" method="post">
+<input type="hidden" name="execution" value="{execution}">
+<input type="hidden" name="_eventId" value="submit">
+</form>
+</body></html>"""
+
+WEBVPN_PORTAL_PAGE = "<html><head><title>西安交通大学WebVPN - 资源站点</title></head><body></body></html>"
+
+
+@functools.lru_cache(maxsize=None)
+def _rsa_key() -> RSA.RsaKey:
+    """统一身份认证加密密码使用的密钥。生成 RSA 密钥较慢，同一进程内的多个模拟服务器共用一个。"""
+    return RSA.generate(1024)
+
+
+def cas_login_url(service: str) -> str:
+    return f"https://{CAS_HOST}/cas/login?service={quote(service, safe='')}"
+
+
+def append_query(url: str, name: str, value: str) -> str:
+    return f"{url}{'&' if '?' in url else '?'}{name}={value}"
+
+
+def strip_ticket(url: str) -> str:
+    """去掉网址中的 ticket 参数，保留其他参数的原始写法。"""
+    base, _, query = url.partition("?")
+    parts = [part for part in query.split("&") if part and not part.startswith("ticket=")]
+    return f"{base}?{'&'.join(parts)}" if parts else base
+
+
+class Site:
+    """一个模拟的站点，处理发往 hosts 中主机的请求。"""
+
+    hosts: tuple[str, ...] = ()
+
+    def __init__(self, campus: FakeCampus) -> None:
+        self.campus = campus
+        self._lock = threading.Lock()
+
+    def handle(self, request: FakeRequest) -> FakeResponse:
+        raise NotImplementedError
+
+    def expire(self, include_cas: bool) -> None:
+        """使站点上的登录态失效。"""
+
+
+class CASSite(Site):
+    """
+    统一身份认证（login.xjtu.edu.cn）。
+    实现了 NewLogin 使用的登录页、RSA 公钥、MFA 检测与登录提交接口：密码正确时签发 CASTGC，
+    并带着一次性的 service ticket 跳转回业务系统；已有 CASTGC 时直接跳转，模拟单点登录。
+    """
+
+    hosts = (CAS_HOST,)
+    tgc_cookie = "CASTGC"
+
+    def __init__(self, campus: FakeCampus) -> None:
+        super().__init__(campus)
+        self.executions: set[str] = set()
+        self.granting_tickets: set[str] = set()
+        # service ticket -> 签发时的 service 网址
+        self.service_tickets: dict[str, str] = {}
+        # 实际校验密码的次数
+        self.password_logins = 0
+        # 提前生成密钥，避免第一次登录的耗时包含生成密钥的时间
+        _rsa_key()
+
+    def handle(self, request: FakeRequest) -> FakeResponse:
+        if request.path == "/cas/login":
+            return self._login(request) if request.method == "POST" else self._login_page(request)
+        if request.path == "/cas/jwt/publicKey":
+            public_key = _rsa_key().publickey().export_key().decode()
+            return FakeResponse(200, public_key.encode(), "text/plain;charset=UTF-8")
+        if request.path == "/cas/mfa/detect":
+            return FakeResponse.json({"code": 0, "data": {"state": self.campus.new_token("MFA"), "need": False}})
+        if request.path == "/cas/captcha.jpg":
+            return FakeResponse(200, b"\xff\xd8\xff\xd9", "image/jpeg")
+        return FakeResponse.html("<html><body>Not Found</body></html>", 404)
+
+    def issue_service_ticket(self, service: str) -> str:
+        ticket = self.campus.new_token("ST")
+        with self._lock:
+            self.service_tickets[ticket] = service
+        return ticket
+
+    def validate_service_ticket(self, ticket: str, request: FakeRequest) -> bool:
+        """校验并作废一个 service ticket。ticket 只能由签发时 service 所在的主机使用一次。"""
+        with self._lock:
+            service = self.service_tickets.pop(ticket, None)
+        return service is not None and urlsplit(service).hostname == request.host
+
+    def expire(self, include_cas: bool) -> None:
+        if include_cas:
+            with self._lock:
+                self.granting_tickets.clear()
+
+    def _login_page(self, request: FakeRequest, status: int = 200) -> FakeResponse:
+        service = request.query.get("service")
+        with self._lock:
+            authenticated = request.cookies.get(self.tgc_cookie) in self.granting_tickets
+        if authenticated and service and request.method == "GET":
+            return FakeResponse.redirect(append_query(service, "ticket", self.issue_service_ticket(service)))
+
+        execution = self.campus.new_token("EXEC")
+        with self._lock:
+            self.executions.add(execution)
+        mfa_enabled = "true" if self.campus.mfa_enabled else "false"
+        return FakeResponse.html(LOGIN_PAGE.format(execution=execution, mfa_enabled=mfa_enabled), status)
+
+    def _login(self, request: FakeRequest) -> FakeResponse:
+        form = request.form
+        with self._lock:
+            known_execution = form.get("execution") in self.executions
+            self.executions.discard(form.get("execution"))
+            self.password_logins += 1
+        password = self._decrypt_password(form.get("password", ""))
+        if not known_execution or form.get("username") != self.campus.username or password != self.campus.password:
+            # 与真实服务器一致：用户名或密码错误时返回 401 与新的登录页，不显示 el-alert
+            return self._login_page(request, status=401)
+
+        granting_ticket = self.campus.new_token("TGT")
+        with self._lock:
+            self.granting_tickets.add(granting_ticket)
+        service = request.query.get("service")
+        if service:
+            response = FakeResponse.redirect(append_query(service, "ticket", self.issue_service_ticket(service)))
+        else:
+            response = FakeResponse.html("<html><body>登录成功</body></html>")
+        return response.set_cookie(self.tgc_cookie, granting_ticket, path="/cas")
+
+    @staticmethod
+    def _decrypt_password(value: str) -> str | None:
+        if not value.startswith("__RSA__"):
+            return None
+        try:
+            decrypted = PKCS1_v1_5.new(_rsa_key()).decrypt(base64.b64decode(value[len("__RSA__"):]), None)
+        except ValueError:
+            return None
+        return decrypted.decode() if decrypted is not None else None
+
+
+class ServiceSite(Site):
+    """
+    接入统一身份认证的业务系统：没有登录态时跳转到 CAS，带着 service ticket 回来时签发站点自己的会话 Cookie。
+    与真实系统一致，登录态失效后接口请求也会被跳转到统一身份认证登录页。
+    """
+
+    session_cookie = "JSESSIONID"
+
+    def __init__(self, campus: FakeCampus) -> None:
+        super().__init__(campus)
+        self.sessions: set[str] = set()
+
+    def handle(self, request: FakeRequest) -> FakeResponse:
+        ticket = request.query.get("ticket")
+        if ticket is not None:
+            service = strip_ticket(request.url)
+            if not cas_site(self.campus).validate_service_ticket(ticket, request):
+                return FakeResponse.redirect(cas_login_url(service))
+            session_id = self.campus.new_token("SESSION")
+            with self._lock:
+                self.sessions.add(session_id)
+            return FakeResponse.redirect(service).set_cookie(self.session_cookie, session_id)
+
+        with self._lock:
+            authenticated = request.cookies.get(self.session_cookie) in self.sessions
+        if not authenticated:
+            return FakeResponse.redirect(cas_login_url(request.url))
+        return self.handle_authenticated(request)
+
+    def handle_authenticated(self, request: FakeRequest) -> FakeResponse:
+        return self.campus.replay(request)
+
+    def expire(self, include_cas: bool) -> None:
+        with self._lock:
+            self.sessions.clear()
+
+
+class JWXTSite(ServiceSite):
+    """教务系统（jwxt.xjtu.edu.cn）。"""
+
+    hosts = ("jwxt.xjtu.edu.cn",)
+
+    def handle_authenticated(self, request: FakeRequest) -> FakeResponse:
+        if request.path in ("/", "/jwapp/sys/homeapp/index.do"):
+            return FakeResponse.html("<html><head><title>教务系统</title></head><body></body></html>")
+        return self.campus.replay(request)
+
+
+class LMSSite(ServiceSite):
+    """思源学堂（lms.xjtu.edu.cn）。"""
+
+    hosts = ("lms.xjtu.edu.cn",)
+    session_cookie = "session"
+
+    def handle_authenticated(self, request: FakeRequest) -> FakeResponse:
+        if request.path == "/":
+            return FakeResponse.html("<html><head><title>思源学堂</title></head><body></body></html>")
+        return self.campus.replay(request)
+
+
+class OrgSite(ServiceSite):
+    """开放平台（org.xjtu.edu.cn），考勤系统通过它的 OAuth 接口接入统一身份认证。"""
+
+    hosts = (ORG_HOST,)
+    session_cookie = "org_session"
+
+    def __init__(self, campus: FakeCampus) -> None:
+        super().__init__(campus)
+        self.codes: set[str] = set()
+
+    def handle_authenticated(self, request: FakeRequest) -> FakeResponse:
+        if request.path != "/openplatform/oauth/authorize" or "redirectUri" not in request.query:
+            return FakeResponse.html("<html><body>Not Found</body></html>", 404)
+        code = self.campus.new_token("CODE")
+        with self._lock:
+            self.codes.add(code)
+        redirect_uri = append_query(request.query["redirectUri"], "code", code)
+        return FakeResponse.redirect(append_query(redirect_uri, "state", request.query.get("state", "")))
+
+    def consume_code(self, code: str) -> bool:
+        with self._lock:
+            if code in self.codes:
+                self.codes.discard(code)
+                return True
+            return False
+
+
+class AttendanceSite(Site):
+    """
+    考勤系统（bkkq.xjtu.edu.cn 与 yjskq.xjtu.edu.cn）。
+    通过开放平台的授权码换取 token，并把 token 放在跳转后网址的 fragment 中；接口通过 Synjones-Auth 头校验 token。
+    两个域名的接口相同，都回放 bkkq.xjtu.edu.cn 的录制响应。
+    """
+
+    hosts = ("bkkq.xjtu.edu.cn", "yjskq.xjtu.edu.cn")
+
+    def __init__(self, campus: FakeCampus) -> None:
+        super().__init__(campus)
+        self.tokens: set[str] = set()
+
+    def handle(self, request: FakeRequest) -> FakeResponse:
+        if request.path == "/berserker-auth/auth/attendance-pc/casReturn":
+            if not org_site(self.campus).consume_code(request.query.get("code", "")):
+                return FakeResponse.json({"success": False, "code": 403, "msg": "授权码无效"}, 403)
+            token = self.campus.new_token("TOKEN")
+            with self._lock:
+                self.tokens.add(token)
+            return FakeResponse.redirect(f"https://{request.host}/attendance-student-pc/#/home?token={token}")
+
+        if request.path.startswith("/attendance-student/"):
+            scheme, _, token = request.headers.get("Synjones-Auth", "").partition(" ")
+            with self._lock:
+                authenticated = scheme == "bearer" and token in self.tokens
+            if not authenticated:
+                return FakeResponse.json({"success": False, "code": 401, "msg": "登录已过期"}, 401)
+            return self.campus.replay(request, host=self.hosts[0])
+
+        if request.path == "/":
+            login_url = POSTGRADUATE_ATTENDANCE_URL if request.host == self.hosts[1] else ATTENDANCE_URL
+            return FakeResponse.redirect(login_url)
+        return FakeResponse.html("<html><head><title>考勤系统</title></head><body></body></html>")
+
+    def expire(self, include_cas: bool) -> None:
+        with self._lock:
+            self.tokens.clear()
+
+
+class WebVPNSite(Site):
+    """
+    WebVPN（webvpn.xjtu.edu.cn）。
+    自身通过统一身份认证登录；登录后把 /<协议>/<加密主机名>/<路径> 形式的请求转发给对应的站点，
+    并像真实的 WebVPN 一样在服务端替客户端保存各站点的 Cookie、把跳转地址改写为 WebVPN 地址。
+    """
+
+    hosts = (WEBVPN_HOST,)
+    ticket_cookie = "wengine_vpn_ticketwebvpn_xjtu_edu_cn"
+
+    def __init__(self, campus: FakeCampus) -> None:
+        super().__init__(campus)
+        # WebVPN 登录凭据 -> 主机 -> 该主机的 Cookie
+        self.jars: dict[str, dict[str, dict[str, str]]] = {}
+
+    def handle(self, request: FakeRequest) -> FakeResponse:
+        ticket = request.query.get("ticket")
+        if request.path == "/login" and ticket is not None:
+            if not cas_site(self.campus).validate_service_ticket(ticket, request):
+                return FakeResponse.redirect(cas_login_url(strip_ticket(request.url)))
+            vpn_ticket = self.campus.new_token("VPN")
+            with self._lock:
+                self.jars[vpn_ticket] = {}
+            return FakeResponse.redirect(f"https://{WEBVPN_HOST}/").set_cookie(self.ticket_cookie, vpn_ticket)
+
+        with self._lock:
+            jar = self.jars.get(request.cookies.get(self.ticket_cookie, ""))
+        if request.path == "/login":
+            if jar is not None:
+                return FakeResponse.redirect(f"https://{WEBVPN_HOST}/")
+            if "cas_login" in request.query:
+                return FakeResponse.redirect(cas_login_url(request.url))
+            return FakeResponse.html("<html><head><title>西安交通大学WebVPN</title></head><body></body></html>")
+        if jar is None:
+            return FakeResponse.redirect(f"https://{WEBVPN_HOST}/login")
+        if request.path == "/":
+            return FakeResponse.html(WEBVPN_PORTAL_PAGE)
+        return self._proxy(request, jar)
+
+    def expire(self, include_cas: bool) -> None:
+        if include_cas:
+            with self._lock:
+                self.jars.clear()
+
+    def _proxy(self, request: FakeRequest, jar: dict[str, dict[str, str]]) -> FakeResponse:
+        parts = request.path.split("/", 3)
+        if len(parts) < 3 or len(parts[2]) <= 32:
+            return FakeResponse.html("<html><body>Not Found</body></html>", 404)
+        scheme, _, port = parts[1].partition("-")
+        host = getHostPlaintext(parts[2][32:])
+        headers = request.headers.copy()
+        with self._lock:
+            cookies = dict(jar.get(host, {}))
+        headers["Cookie"] = "; ".join(f"{name}={value}" for name, value in cookies.items())
+        headers["Host"] = f"{host}:{port}" if port else host
+        inner = FakeRequest(
+            method=request.method,
+            scheme=scheme,
+            host=host,
+            path="/" + (parts[3] if len(parts) > 3 else ""),
+            query_string=request.query_string,
+            headers=headers,
+            body=request.body,
+        )
+        response = self.campus.dispatch(inner)
+
+        forwarded_headers = []
+        for name, value in response.headers:
+            if name.lower() == "set-cookie":
+                cookie_name, _, cookie_value = value.split(";", 1)[0].partition("=")
+                with self._lock:
+                    jar.setdefault(host, {})[cookie_name.strip()] = cookie_value
+                continue
+            if name.lower() == "location":
+                location = urljoin(inner.url, value)
+                location_host = urlsplit(location).hostname or ""
+                if location_host.endswith("xjtu.edu.cn") and location_host != WEBVPN_HOST:
+                    value = getVPNUrl(location)
+            forwarded_headers.append((name, value))
+        response.headers = forwarded_headers
+        return response
+
+
+def cas_site(campus: FakeCampus) -> CASSite:
+    return campus.sites[CAS_HOST]  # type: ignore[return-value]
+
+
+def org_site(campus: FakeCampus) -> OrgSite:
+    return campus.sites[ORG_HOST]  # type: ignore[return-value]
+
+
+def create_sites(campus: FakeCampus) -> dict[str, Site]:
+    """创建全部模拟站点，返回主机名到站点的映射。"""
+    sites = {}
+    for site_class in (CASSite, WebVPNSite, JWXTSite, LMSSite, OrgSite, AttendanceSite):
+        site = site_class(campus)
+        for host in site.hosts:
+            sites[host] = site
+    return sites
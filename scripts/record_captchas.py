@@ -0,0 +1,60 @@
+"""Record live venue slider captchas into an offline corpus.
+
+Each captcha is fetched from ``/gen``, solved with the current solver and checked with ``/check``. The server
+accepts one answer per captcha, so only samples whose answer was accepted are stored, together with that offset;
+rejected ones are counted but not kept. Replay the corpus with scripts/bench_captcha_solver.py.
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+
+if __package__ in {None, ""}:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from captcha_solver import detect_gap, fetch_captcha, gen_track, verify
+from scripts.captcha_corpus import CaptchaSample, save_sample
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("output", type=Path, help="corpus directory (created or extended)")
+    parser.add_argument("--count", type=int, default=50, help="captchas to fetch")
+    parser.add_argument("--delay", type=float, default=0.25, help="pause between captchas (s)")
+    args = parser.parse_args()
+    if args.count < 1 or args.delay < 0:
+        parser.error("--count must be positive and --delay non-negative")
+
+    saved = rejected = errors = 0
+    with requests.Session() as session:
+        for index in range(args.count):
+            try:
+                captcha_id, background, slider = fetch_captcha(session)
+                move_x, confidence = detect_gap(background, slider)
+                accepted = verify(gen_track(move_x), captcha_id, session)
+            except (requests.RequestException, KeyError, ValueError) as e:
+                errors += 1
+                print(f"[{index:02d}] ERR {e}")
+            else:
+                if accepted:
+                    name = re.sub(r"[^\w-]", "_", str(captcha_id))
+                    save_sample(args.output, CaptchaSample(name, background, slider, move_x))
+                    saved += 1
+                else:
+                    rejected += 1
+                print(f"[{index:02d}] conf={confidence:.3f} {'saved' if accepted else 'rejected'}")
+            time.sleep(args.delay)
+
+    print(f"saved {saved}, rejected {rejected}, errors {errors} -> {args.output}")
+    return 0 if saved else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,107 @@
+import threading
+import time
+import unittest
+
+from app.utils.judge_pipeline import JudgePipeline
+
+
+class ConcurrencyProbe:
+    """记录同时执行的调用数量的最大值"""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, value):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        return value
+
+
+class JudgePipelineTest(unittest.TestCase):
+    def test_fetches_concurrently_and_bounds_submissions(self):
+        fetch_probe = ConcurrencyProbe()
+        submit_probe = ConcurrencyProbe()
+        complete_threads = set()
+
+        def complete(item, fetched):
+            complete_threads.add(threading.get_ident())
+            return fetched * 10
+
+        pipeline = JudgePipeline(fetch_probe, complete, lambda item, answer: (submit_probe(answer) == item * 10, "ok"),
+                                 fetch_workers=4, submit_workers=2)
+        seen = []
+        report = pipeline.run(range(8), on_result=seen.append)
+
+        self.assertEqual(8, report.succeeded)
+        self.assertEqual(list(range(8)), sorted(result.item for result in seen))
+        self.assertEqual(4, fetch_probe.peak)
+        self.assertEqual(2, submit_probe.peak)
+        # 填写在调用线程中串行执行
+        self.assertEqual({threading.get_ident()}, complete_threads)
+        self.assertEqual({"fetch", "complete", "submit", "total"}, set(report.stages))
+        # 串行执行至少需要 8 * (20 + 20) ms
+        self.assertLess(report.stages["total"], report.stages["fetch"] + report.stages["submit"])
+
+    def test_failures_are_isolated_per_questionnaire(self):
+        def fetch(item):
+            if item == 1:
+                raise ConnectionError("网络错误")
+            return item
+
+        def complete(item, fetched):
+            if item == 2:
+                raise ValueError("无法在输入的答案选项中找到此题目")
+            return fetched
+
+        report = JudgePipeline(fetch, complete, lambda item, answer: (item != 3, "提交失败" if item == 3 else "")) \
+            .run(range(5))
+
+        outcome = {result.item: (result.ok, result.message) for result in report.results}
+        self.assertEqual({0: (True, ""), 1: (False, "网络错误"), 2: (False, "无法在输入的答案选项中找到此题目"),
+                          3: (False, "提交失败"), 4: (True, "")}, outcome)
+        self.assertEqual(2, report.succeeded)
+        self.assertEqual([ConnectionError, ValueError], sorted((type(e) for e in report.errors), key=lambda t: t.__name__))
+
+    def test_abort_waits_for_sent_submissions(self):
+        submitted = threading.Event()
+        release = threading.Event()
+        stop = threading.Event()
+
+        def fetch(item):
+            if item > 0:
+                release.wait(1)
+            return item
+
+        def submit(item, answer):
+            submitted.set()
+            stop.set()
+            release.wait(1)
+            return True, ""
+
+        def aborted():
+            if stop.is_set():
+                release.set()
+                return True
+            return False
+
+        report = JudgePipeline(fetch, lambda item, fetched: fetched, submit, fetch_workers=1).run(range(4), aborted=aborted)
+
+        self.assertTrue(submitted.is_set())
+        self.assertTrue(report.aborted)
+        self.assertEqual([0], [result.item for result in report.results if result.ok])
+
+    def test_empty(self):
+        report = JudgePipeline(lambda item: item, lambda item, fetched: fetched, lambda item, answer: (True, "")).run([])
+        self.assertEqual([], report.results)
+        self.assertIn("total", report.stages)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QBuffer, QByteArray, QIODevice, QSize
+from PyQt5.QtGui import QColor, QImage, QPixmap
+from PyQt5.QtWidgets import QApplication
+
+from app.sub_interfaces.lms.image_preview_dialog import _PreviewCanvas
+from app.sub_interfaces.lms.preview_cache import LMSPreviewCache, decode_preview_image
+
+_app = QApplication.instance() or QApplication([])
+
+
+def png_bytes(width, height, color="#336699") -> bytes:
+    image = QImage(width, height, QImage.Format_RGB32)
+    image.fill(QColor(color))
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, "PNG")
+    return bytes(data)
+
+
+class DecodePreviewImageTest(unittest.TestCase):
+    def test_large_images_are_downscaled_while_decoding(self):
+        pixmap = decode_preview_image(png_bytes(400, 200), max_side=100)
+        self.assertEqual(QSize(100, 50), pixmap.size())
+        self.assertEqual(QSize(400, 200), decode_preview_image(png_bytes(400, 200)).size())
+
+    def test_invalid_data_returns_none(self):
+        self.assertIsNone(decode_preview_image(b""))
+        self.assertIsNone(decode_preview_image(b"<html>not an image</html>"))
+
+
+class LMSPreviewCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_memory_lru_is_bounded_by_pixel_cost(self):
+        cache = LMSPreviewCache(memory_limit=2 * 10 * 10 * 4)
+        for key in ("a", "b"):
+            cache.put(key, decode_preview_image(png_bytes(10, 10)))
+        cache.get("a")
+        cache.put("c", decode_preview_image(png_bytes(10, 10)))
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(2 * 10 * 10 * 4, cache.memory_size)
+
+    def test_disk_cache_survives_memory_eviction(self):
+        cache = LMSPreviewCache(disk_dir=self.directory.name)
+        data = png_bytes(30, 20)
+        cache.put("a", decode_preview_image(data), data)
+
+        reopened = LMSPreviewCache(disk_dir=self.directory.name)
+        self.assertEqual(QSize(30, 20), reopened.get("a").size())
+        self.assertIsNone(LMSPreviewCache().get("a"))
+
+    def test_disk_cache_evicts_least_recently_used_files(self):
+        first, second, third = png_bytes(10, 10, "#111111"), png_bytes(10, 10, "#222222"), png_bytes(10, 10, "#333333")
+        cache = LMSPreviewCache(disk_dir=self.directory.name, disk_limit=len(first) + len(second) + 1)
+        cache.put("a", decode_preview_image(first), first)
+        cache.put("b", decode_preview_image(second), second)
+        path_a, path_b = cache._disk_path("a"), cache._disk_path("b")
+        os.utime(path_a, (1, 1))
+        os.utime(path_b, (2, 2))
+        cache.put("c", decode_preview_image(third), third)
+
+        self.assertFalse(os.path.exists(path_a))
+        self.assertTrue(os.path.exists(path_b))
+        self.assertTrue(os.path.exists(cache._disk_path("c")))
+
+
+class PreviewCanvasTest(unittest.TestCase):
+    def test_levels_are_built_on_demand(self):
+        canvas = _PreviewCanvas()
+        source = QPixmap(800, 400)
+        source.fill(QColor("#ffffff"))
+        canvas.set_source(source)
+
+        self.assertEqual(800, canvas._level_for(1600).width())
+        self.assertEqual(200, canvas._level_for(150).width())
+        self.assertEqual(3, len(canvas._levels))
+        self.assertEqual(400, canvas._level_for(300).width())
+        self.assertEqual(3, len(canvas._levels))
+
+        canvas.set_display_size(QSize(200, 100))
+        canvas.grab()
+        canvas.set_source(None)
+        self.assertFalse(canvas.has_source())
+
+
+if __name__ == "__main__":
+    unittest.main()
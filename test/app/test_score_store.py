@@ -0,0 +1,62 @@
+import unittest
+
+from app.utils.score_store import HISTORY_LIMIT, ScoreStore, score_key
+
+
+def _score(name, score=90, term="2025-2026-1", **extra):
+    return {"courseName": name, "coursePoint": 2.0, "score": score, "gpa": 4.0, "term": term, **extra}
+
+
+class ScoreStoreTest(unittest.TestCase):
+    def test_key_uses_term_code_and_exam(self):
+        self.assertEqual("2025-2026-1|BIOL200913|", score_key(_score("生命科学基础I(BIOL200913)", examProp="初修")))
+        self.assertEqual("2025-2026-1|MATH1|重修", score_key(_score("高等数学", courseCode="MATH1", examProp="重修")))
+        # 研究生成绩没有学期与课程号
+        self.assertEqual("2025-01-19|自然辩证法概论|",
+                         score_key({"courseName": "自然辩证法概论", "examDate": "2025-01-19"}))
+
+    def test_new_changed_removed(self):
+        store = ScoreStore()
+        store.reset([_score("高等数学"), _score("线性代数"), _score("大学物理")])
+
+        diff = store.update([_score("高等数学"), _score("线性代数", 85), _score("大学英语")])
+
+        self.assertEqual(["大学英语"], [one["courseName"] for one in diff.new])
+        self.assertEqual([(90, 85)], [(old["score"], new["score"]) for old, new in diff.changed])
+        self.assertEqual(["大学物理"], [one["courseName"] for one in diff.removed])
+        self.assertEqual({"new": ["大学英语"], "changed": ["线性代数"], "removed": ["大学物理"]},
+                         {key: store.history[-1][key] for key in ("new", "changed", "removed")})
+
+        # 再查询一次同样的结果不应产生变化，也不记录历史
+        history = len(store.history)
+        self.assertFalse(store.update([_score("高等数学"), _score("大学英语"), _score("线性代数", 85)]))
+        self.assertEqual(history, len(store.history))
+
+    def test_partial_terms_do_not_remove_other_terms(self):
+        store = ScoreStore()
+        store.reset([_score("高等数学", term="2024-2025-2"), _score("线性代数")])
+        diff = store.diff([_score("线性代数")], terms=["2025-2026-1"])
+        self.assertFalse(diff)
+        diff = store.diff([], terms=["2025-2026-1"])
+        self.assertEqual(["线性代数"], [one["courseName"] for one in diff.removed])
+
+    def test_report_row_replaced_by_full_record_is_a_change(self):
+        store = ScoreStore()
+        store.reset([_score("生命科学基础I")])
+        diff = store.update([_score("生命科学基础I(BIOL200913)", courseCode="BIOL200913", examProp="初修",
+                                    itemList=[])])
+        self.assertEqual(([], []), (diff.new, diff.removed))
+        self.assertEqual(["生命科学基础I(BIOL200913)"], [new["courseName"] for _, new in diff.changed])
+        self.assertEqual(1, len(store))
+
+    def test_json_round_trip_and_history_limit(self):
+        store = ScoreStore()
+        for index in range(HISTORY_LIMIT + 5):
+            store.update([_score("高等数学", index)])
+        restored = ScoreStore.from_json(store.json())
+        self.assertEqual(HISTORY_LIMIT, len(restored.history))
+        self.assertFalse(restored.diff([_score("高等数学", HISTORY_LIMIT + 4)]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from app.threads.VenueThread import VenueAction, VenueThread
+from app.utils.config import cfg
+from app.venues.rush import CaptchaPolicy
+from captcha_solver import find_gaps, rank_gaps
+from scripts.captcha_corpus import synthesize
+
+
+class FakeVenueUtil:
+    """第一次提交返回验证码错误，之后预订成功"""
+
+    def __init__(self):
+        self.bookings = []
+
+    def book(self, service_id, selections, yzm):
+        self.bookings.append(yzm.rsplit("synjones", 2)[1])
+        if len(self.bookings) == 1:
+            return {"result": "100", "message": "验证码有误"}
+        return {"result": "2", "object": {"orderid": "A1"}}
+
+
+class VenueThreadCaptchaPolicyTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.captchas = [(f"c{index}", sample.background, sample.slider)
+                        for index, sample in enumerate(synthesize(3, seed=5))]
+
+    def setUp(self):
+        self.addCleanup(setattr, cfg.venueCaptchaRanking, "value", cfg.venueCaptchaRanking.value)
+
+    def _book(self):
+        """同步执行一次预订，返回各次提交使用的验证码 ID"""
+        thread = VenueThread()
+        thread.util = FakeVenueUtil()
+        thread.venue_id = 7
+        thread._selections = [(1, 10)]
+        thread.action = VenueAction.BOOK
+        results = []
+        thread.bookingResult.connect(lambda success, message, info: results.append(success))
+        account = SimpleNamespace(username="2220000000", password="password")
+        session = SimpleNamespace(backend=SimpleNamespace(session=None))
+        with mock.patch("app.threads.VenueThread.accounts", SimpleNamespace(current=account)), \
+                mock.patch.object(VenueThread, "session", session), \
+                mock.patch("captcha_solver.fetch_captcha", side_effect=self.captchas):
+            thread.run()
+        self.assertEqual(results, [True])
+        return thread.util.bookings
+
+    def test_default_submits_each_captcha_once(self):
+        cfg.venueCaptchaRanking.value = False
+        self.assertEqual(CaptchaPolicy.from_config(), CaptchaPolicy(find_gaps, 1))
+        self.assertEqual(self._book(), ["c0", "c1"])
+
+    def test_switch_enables_ranked_runner_up_retry(self):
+        cfg.venueCaptchaRanking.value = True
+        self.assertEqual(CaptchaPolicy.from_config(), CaptchaPolicy(rank_gaps, 2))
+        with mock.patch("app.venues.rush.rank_gaps", wraps=rank_gaps) as ranked:
+            # 打开开关后，第一张验证码被拒绝时先提交它的第二个候选位置
+            self.assertEqual(self._book(), ["c0", "c0"])
+        self.assertEqual(ranked.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
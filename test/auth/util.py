@@ -1,6 +1,7 @@
 import unittest
 
-from auth import ServerError, getVPNUrl, getOrdinaryUrl
+from auth import ServerError, getVPNUrl, getOrdinaryUrl, getHostCiphertext, getHostPlaintext, getUrlOrigin
+from auth.util import KNOWN_WEBVPN_HOSTS, _cached_ciphertext, getCiphertext
 
 
 class TestAuthUtils(unittest.TestCase):
@@ -24,6 +25,31 @@ class TestAuthUtils(unittest.TestCase):
         ordinary_url = getOrdinaryUrl(vpn_url)
         self.assertEqual(ordinary_url, "https://kns.cnki.net/KCMS/detail/detail.aspx?dbcode=CJFQ&dbname=CJFD2007&filename=JEXK200702000&uid=WEEvREcwSlJHSldRa1FhcTdnTnhXY20wTWhLQWVGdmJFOTcvMFFDWDBycz0=$9A4hF_YAuvQ5obgVAqNKPCYcEjKensW4IQMovwHtwkF4VYPoHbKxJw!!&v=MTYzNjU3cWZaT2RuRkNuaFZMN0tMeWpUWmJHNEh0Yk1yWTlGWklSOGVYMUx1eFlTN0RoMVQzcVRyV00xRnJDVVI=")
 
+    def test_host_table_round_trip(self):
+        for host in KNOWN_WEBVPN_HOSTS:
+            ciphertext = getHostCiphertext(host)
+            self.assertEqual(ciphertext, getCiphertext(host))
+            self.assertEqual(host, getHostPlaintext(ciphertext))
+
+        url = "http://gmis.xjtu.edu.cn:8080/pyxx/pygl/kbcx?x=https://jwxt.xjtu.edu.cn/"
+        self.assertEqual(url, getOrdinaryUrl(getVPNUrl(url)))
+        self.assertEqual("https://lms.xjtu.edu.cn/", getOrdinaryUrl(getVPNUrl("https://lms.xjtu.edu.cn")))
+
+    def test_unknown_host_ciphertext_is_cached(self):
+        _cached_ciphertext.cache_clear()
+        getHostCiphertext("kns.cnki.net")
+        getHostCiphertext("kns.cnki.net")
+        getHostCiphertext("jwxt.xjtu.edu.cn")
+        info = _cached_ciphertext.cache_info()
+        self.assertEqual((1, 1), (info.hits, info.misses))
+
+    def test_geturlorigin(self):
+        self.assertEqual("https://jwxt.xjtu.edu.cn:8080", getUrlOrigin("https://jwxt.xjtu.edu.cn:8080/a/b?c=d"))
+        self.assertEqual("https://lms.xjtu.edu.cn", getUrlOrigin("https://lms.xjtu.edu.cn?next=http://x/"))
+        self.assertEqual("https://lms.xjtu.edu.cn", getUrlOrigin("https://lms.xjtu.edu.cn#top"))
+        self.assertEqual("https://lms.xjtu.edu.cn", getUrlOrigin("https://lms.xjtu.edu.cn"))
+        self.assertEqual("not a url", getUrlOrigin("not a url"))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -18,7 +18,7 @@ EXPECTED_DOMAINS = (
     ("qt-ui", "Qt and desktop UI"),
     ("notification-crawler", "Notifications and crawler"),
     ("auth-session", "Authentication and sessions"),
-    ("schedule", "Schedule"),
+    ("schedule", "Schedule and campus services"),
 )
 
 
@@ -32,8 +32,12 @@ SHARDS: tuple[Shard, ...] = (
             "test.app.test_campus_registration",
             "test.app.test_ctrl_c",
             "test.app.test_jiaoxiaozhi",
+            "test.app.test_judge_pipeline",
+            "test.app.test_lms_preview_cache",
             "test.app.test_notice_search_ui",
             "test.app.test_notice_thread",
+            "test.app.test_score_store",
+            "test.app.test_venue_thread",
         ),
     ),
     Shard(
@@ -54,20 +58,36 @@ SHARDS: tuple[Shard, ...] = (
             "test.fitness.test_session",
             "test.hello.test_session",
             "test.sessions.session_manager",
+            "test.sessions.test_fake_campus",
+            "test.sessions.test_login_coordinator",
+            "test.sessions.test_network_fingerprint",
+            "test.sessions.test_request_tracing",
+            "test.sessions.test_session_persistence",
+            "test.sessions.test_transport",
         ),
     ),
     Shard(
         "schedule",
-        "Schedule",
+        "Schedule and campus services",
         (
             "test.fitness.test_score_zero",
             "test.fitness.test_years",
             "test.hello.test_profile",
             "test.jwxt.test_calendar_api",
             "test.jwxt.test_calendar_week",
+            "test.jwxt.test_questionnaire_template",
+            "test.jwxt.test_reported_grade",
             "test.jwxt.test_school_course_headers",
+            "test.lms.test_mark_overlay",
+            "test.lms.test_prefetch",
+            "test.lms.test_request_cache",
+            "test.lms.test_sync_store",
             "test.schedule.test_lesson",
             "test.schedule.test_schedule",
+            "test.test_score_statistics",
+            "test.venues.test_booking_rush",
+            "test.venues.test_captcha_solver",
+            "test.venues.test_slot_scanner",
         ),
     ),
 )
@@ -58,7 +58,7 @@ EXPECTED_DOMAINS = (
     ("qt-ui", "Qt and desktop UI"),
     ("notification-crawler", "Notifications and crawler"),
     ("auth-session", "Authentication and sessions"),
-    ("schedule", "Schedule"),
+    ("schedule", "Schedule and campus services"),
 )
 
 ARM_IMPORTS = (
@@ -355,7 +355,7 @@ class TestInventoryContract(unittest.TestCase):
         self.assertEqual(set(), missing)
         self.assertEqual({}, duplicates)
         self.assertEqual(set(), unexpected)
-        self.assertEqual(25, len(product_test_modules()))
+        self.assertEqual(45, len(product_test_modules()))
         self.assertEqual(product_test_modules(), set(owned_modules()))
 
     def test_missing_assignment_is_rejected(self) -> None:
@@ -367,9 +367,19 @@ class TestInventoryContract(unittest.TestCase):
                 "test.hello.test_profile",
                 "test.jwxt.test_calendar_api",
                 "test.jwxt.test_calendar_week",
+                "test.jwxt.test_questionnaire_template",
+                "test.jwxt.test_reported_grade",
                 "test.jwxt.test_school_course_headers",
+                "test.lms.test_mark_overlay",
+                "test.lms.test_prefetch",
+                "test.lms.test_request_cache",
+                "test.lms.test_sync_store",
                 "test.schedule.test_lesson",
                 "test.schedule.test_schedule",
+                "test.test_score_statistics",
+                "test.venues.test_booking_rush",
+                "test.venues.test_captcha_solver",
+                "test.venues.test_slot_scanner",
             },
             missing,
         )
@@ -486,7 +496,7 @@ class TestInventoryContract(unittest.TestCase):
             check=False,
         )
         self.assertEqual(0, result.returncode, result.stderr)
-        self.assertIn("25 product test modules", result.stdout)
+        self.assertIn("45 product test modules", result.stdout)
 
 
 class TestShardRunner(unittest.TestCase):
@@ -678,7 +688,7 @@ class TestWorkflowContract(unittest.TestCase):
             1,
         )
         missing_hosted_domain = workflow.replace(
-            "          - id: schedule\n            name: Schedule\n",
+            "          - id: schedule\n            name: Schedule and campus services\n",
             "",
             1,
         )
@@ -0,0 +1,99 @@
+import unittest
+
+from jwxt import (OptionIndex, QuestionnaireData, QuestionnaireOptionData, QuestionnaireOptions,
+                  QuestionnaireTemplate, QuestionnaireTemplateData)
+
+
+def _question(code, name, kind="01", score=None):
+    return QuestionnaireData("WJ", "CPR", "BPR", "PGNR", code, "PC", kind, "JXB", "", name, "DADM", FZ=score)
+
+
+def _options(code, scores):
+    return [QuestionnaireOptionData(code, "", "DADM", f"{code}-{score}", "01", score, "5") for score in scores]
+
+
+class OptionIndexTest(unittest.TestCase):
+    def test_exact_and_nearest_choice(self):
+        options = QuestionnaireOptions({"Z1": _options("Z1", ["1", "2", "3", "4", "5"]), "Z2": _options("Z2", ["1", "3"])})
+        question = _question("Z1", "教学内容")
+        question.setOption(options, "2")
+        self.assertEqual("Z1-2", question.DA)
+
+        # 没有对应分值时选最接近的第一个选项
+        question = _question("Z2", "教学方法")
+        question.setOption(options, "2")
+        self.assertEqual("Z2-1", question.DA)
+        question.setOption(options, "2.6")
+        self.assertEqual("Z2-3", question.DA)
+        self.assertEqual(("3", "1"), (question.getOptionMaxScore(options), question.getOptionMinScore(options)))
+        # 索引只建立一次
+        self.assertIs(options.index("Z2"), options.index("Z2"))
+
+    def test_plain_dict_and_errors(self):
+        question = _question("Z1", "教学内容")
+        question.setOption({"Z1": _options("Z1", ["4", "5"])}, "1")
+        self.assertEqual("Z1-4", question.DA)
+        with self.assertRaises(ValueError):
+            question.setOption({}, "1")
+        with self.assertRaises(ValueError):
+            question.setOption(QuestionnaireOptions({"Z1": []}), "1")
+        with self.assertRaises(ValueError):
+            _question("Z1", "评语", kind="02").getOptionMaxScore({"Z1": _options("Z1", ["1"])})
+        with self.assertRaises(ValueError):
+            OptionIndex([])
+
+
+class QuestionnaireTemplateTest(unittest.TestCase):
+    def setUp(self):
+        self.template = QuestionnaireTemplate("test", [
+            QuestionnaireTemplateData("讲解清楚", "Z1", DAPX="2"),
+            QuestionnaireTemplateData("讲解清楚", "Z1", DAPX="5"),
+            QuestionnaireTemplateData("师德师风", "Z9", DAPX="3"),
+            QuestionnaireTemplateData("意见建议", "Z3", ZGDA="无", TXDM="02"),
+        ])
+        self.options = QuestionnaireOptions({code: _options(code, ["1", "2", "3", "4", "5"])
+                                             for code in ("Z1", "Z2", "Z4")})
+
+    def test_match_by_code_then_name(self):
+        by_code = _question("Z1", "其他名称")
+        self.template.complete(by_code, self.options)
+        self.assertEqual("Z1-2", by_code.DA)
+
+        by_name = _question("Z2", "老师师德师风端正")
+        self.template.complete(by_name, self.options)
+        self.assertEqual("Z2-3", by_name.DA)
+
+        unmatched = _question("Z4", "课程难度")
+        self.template.complete(unmatched, self.options)
+        self.assertEqual("", unmatched.DA)
+        self.template.complete(unmatched, self.options, always_complete=True, default_score=80)
+        self.assertEqual("Z4-2", unmatched.DA)
+
+        scored = _question("Z5", "总体评分", kind="03", score="10")
+        self.template.complete(scored, self.options, always_complete=True, default_score=60)
+        self.assertEqual("6", scored.DA)
+
+    def test_with_subjective_does_not_modify_template(self):
+        custom = self.template.with_subjective("老师讲课很好")
+        subjective = _question("Z3", "意见建议", kind="02")
+        custom.complete(subjective, self.options)
+        self.assertEqual("老师讲课很好", subjective.ZGDA)
+        self.assertEqual("无", self.template.data[3].ZGDA)
+
+    def test_append_updates_index(self):
+        self.template.complete(_question("Z4", "课程难度"), self.options)
+        self.template.append(QuestionnaireTemplateData("课程难度", "Z8", DAPX="4"))
+        question = _question("Z4", "课程难度")
+        self.template.complete(question, self.options)
+        self.assertEqual("Z4-4", question.DA)
+
+    def test_bundled_templates_are_loaded_once(self):
+        for type_ in QuestionnaireTemplate.Type:
+            for score in QuestionnaireTemplate.Score:
+                template = QuestionnaireTemplate.load(type_, score)
+                self.assertIs(template, QuestionnaireTemplate.load(type_, score))
+                self.assertTrue(template.data)
+
+
+if __name__ == "__main__":
+    unittest.main()
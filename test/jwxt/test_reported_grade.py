@@ -0,0 +1,63 @@
+import threading
+import time
+import unittest
+
+from jwxt.score import Score
+from scripts.bench_fr_report import FakeReportSession, sequential_reported_grade, synthesize_pages
+
+
+class SlowFirstPagesSession(FakeReportSession):
+    """越靠前的页面返回越慢，使各页完成顺序与页码顺序相反"""
+
+    def __init__(self, pages):
+        super().__init__(pages, 0)
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def get(self, url, params=None, **kwargs):
+        params = params or {}
+        if params.get("op") != "page_content" or params["pn"] == 1:
+            return super().get(url, params, **kwargs)
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.01 * (len(self.pages) - params["pn"] + 1))
+        with self.lock:
+            self.active -= 1
+        return super().get(url, params, **kwargs)
+
+
+class ReportedGradeTest(unittest.TestCase):
+    def test_pages_are_stitched_in_order_with_carried_term(self):
+        pages = synthesize_pages(6, 25)
+        session = SlowFirstPagesSession(pages)
+        courses = Score(session).reported_grade("2200000000")
+
+        self.assertEqual(sequential_reported_grade(FakeReportSession(pages, 0), "2200000000"), courses)
+        self.assertGreater(session.peak, 1)
+        self.assertLessEqual(session.peak, Score.FR_PAGE_WORKERS)
+        # 合成的课程名包含学年与学期编号，跨页的课程也应归入正确的学期
+        for course in courses:
+            year, term_no = course["term"].split("-")[0], course["term"][-1]
+            self.assertTrue(course["courseName"].startswith(f"课程{year}{term_no}-"), course)
+        self.assertEqual(sum(page.count("<tr><td>课程") for page in pages) - len(pages), len(courses))
+
+    def test_term_filter(self):
+        courses = Score(FakeReportSession(synthesize_pages(3, 20), 0)).reported_grade("2200000000", term="2019-2020-2")
+        self.assertTrue(courses)
+        self.assertEqual({"2019-2020-2"}, {course["term"] for course in courses})
+
+    def test_page_without_term_row_needs_initial_term(self):
+        page = ('<table><tbody class="rows-height-counter"><tr><td>课程</td><td>学分</td><td>成绩</td></tr>'
+                "<tr><td>高等数学I-1</td><td>6.5</td><td>95</td></tr></tbody></table>")
+        with self.assertRaises(ValueError):
+            Score.extract_course_scores_from_fr_form_html(page)
+        courses, last_term = Score.extract_course_scores_from_fr_form_html(page, initial_term="2022-2023-1")
+        self.assertEqual("2022-2023-1", last_term)
+        self.assertEqual([{"courseName": "高等数学I-1", "coursePoint": 6.5, "score": 95.0,
+                           "term": "2022-2023-1", "gpa": 4.3}], courses)
+
+
+if __name__ == "__main__":
+    unittest.main()
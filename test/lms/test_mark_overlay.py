@@ -0,0 +1,99 @@
+import json
+import unittest
+from urllib.parse import quote
+
+from lms.mark_overlay import (
+    MarkOverlayMemo,
+    extract_mark_overlay,
+    iter_mark_payload_candidates,
+    parse_mark_attachment_text,
+)
+
+
+class ExtractMarkOverlayTest(unittest.TestCase):
+    def test_items_inherit_target_size_page_and_unit(self):
+        payload = {
+            "coord_unit": "percent",
+            "pages": [
+                {"x": 1, "y": 2, "w": 3, "h": 4, "comment": "first"},
+                {
+                    "upload": {"id": 7, "reference_id": "R1"},
+                    "image_width": 800,
+                    "image_height": 600,
+                    "marks": [{"rect": [10, 20, 30, 40], "text": " second "}],
+                },
+            ],
+        }
+        summary, items = extract_mark_overlay(payload)
+
+        self.assertEqual("first\nsecond", summary)
+        self.assertEqual(
+            {"x": 1.0, "y": 2.0, "w": 3.0, "h": 4.0, "text": "first", "color": None, "border_width": None,
+             "page_index": 0, "coord_unit": "percent"},
+            items[0],
+        )
+        self.assertEqual((10.0, 20.0, 20.0, 20.0), tuple(items[1][key] for key in ("x", "y", "w", "h")))
+        self.assertEqual(["id:7", "reference_id:r1"], items[1]["targets"])
+        self.assertEqual((800.0, 600.0, 1), (items[1]["base_w"], items[1]["base_h"], items[1]["page_index"]))
+
+    def test_graphic_path_without_box_only_adds_path_item(self):
+        node = {"graphic": {"path": [["M", 0, 0], ["L", 5, 5]], "borderColor": "#00FF00", "borderWidth": 3},
+                "left": 4, "top": 5}
+        _, items = extract_mark_overlay([node])
+        self.assertEqual(1, len(items))
+        self.assertEqual("#00FF00", items[0]["color"])
+        self.assertEqual(3.0, items[0]["border_width"])
+
+    def test_result_is_capped(self):
+        payload = [{"x": i, "y": i, "text": str(i)} for i in range(300)]
+        summary, items = extract_mark_overlay(payload)
+        self.assertEqual(200, len(items))
+        self.assertEqual(199.0, items[-1]["x"])
+        self.assertEqual(10, len(summary.splitlines()))
+
+
+class ParseMarkAttachmentTextTest(unittest.TestCase):
+    def test_nested_encoded_json_is_unwrapped(self):
+        inner = json.dumps({"annotations": [{"x": 5, "y": 6, "text": "nice"}]})
+        text = json.dumps({"data": quote(inner)})
+        summary, items = parse_mark_attachment_text(text)
+        self.assertEqual("nice", summary)
+        self.assertEqual([(5.0, 6.0)], [(one["x"], one["y"]) for one in items])
+
+    def test_plain_text_lines_fall_back_to_points(self):
+        summary, items = parse_mark_attachment_text("12,34: 步骤缺失\n随便写写")
+        self.assertEqual("12,34: 步骤缺失\n随便写写", summary)
+        self.assertEqual([{"x": 12.0, "y": 34.0, "text": "步骤缺失", "shape": "point"}], items)
+        self.assertEqual((None, []), parse_mark_attachment_text("  "))
+
+    def test_candidates_are_lazy_and_deduplicated(self):
+        shared = {"marks": []}
+        candidates = iter_mark_payload_candidates({"data": shared, "other": shared})
+        self.assertIsInstance(next(candidates), dict)
+        self.assertIs(shared, next(candidates))
+        self.assertEqual([[]], list(candidates))
+
+
+class MarkOverlayMemoTest(unittest.TestCase):
+    def test_invalidate_only_drops_one_submission(self):
+        memo = MarkOverlayMemo(max_entries=3)
+        memo.put(1, "a", ("x", []))
+        memo.put(1, "b", ("y", []))
+        memo.put(2, "a", ("z", []))
+        memo.invalidate(1)
+        self.assertIsNone(memo.get(1, "a"))
+        self.assertEqual(("z", []), memo.get(2, "a"))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        memo = MarkOverlayMemo(max_entries=2)
+        memo.put(1, "a", 1)
+        memo.put(1, "b", 2)
+        memo.get(1, "a")
+        memo.put(1, "c", 3)
+        self.assertEqual(1, memo.get(1, "a"))
+        self.assertIsNone(memo.get(1, "b"))
+        self.assertEqual(2, len(memo))
+
+
+if __name__ == "__main__":
+    unittest.main()
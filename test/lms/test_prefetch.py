@@ -0,0 +1,69 @@
+import datetime
+import unittest
+
+from lms import LMSRequestCache
+from lms.prefetch import LMSDetailPrefetcher, prefetch_order
+
+NOW = datetime.datetime(2026, 3, 1, tzinfo=datetime.timezone.utc)
+
+
+class FakeLMSUtil:
+    def __init__(self, failing=()):
+        self.cache = LMSRequestCache()
+        self.failing = set(failing)
+        self.requests = []
+
+    def has_cached_activity_detail(self, activity_id):
+        return self.cache.peek("activity_detail", activity_id)[0]
+
+    def get_activity_detail(self, activity_id, refresh=False):
+        def load():
+            self.requests.append(activity_id)
+            if activity_id in self.failing:
+                raise ValueError("boom")
+            return {"id": activity_id}
+
+        return self.cache.get_or_load("activity_detail", activity_id, load, refresh=refresh)
+
+
+class PrefetchOrderTest(unittest.TestCase):
+    def test_open_homework_comes_first_by_deadline(self):
+        activities = [
+            {"id": 1, "type": "material"},
+            {"id": 2, "type": "homework", "end_time": "2026-03-10T00:00:00Z"},
+            {"id": 3, "type": "homework", "end_time": "2026-02-01T00:00:00Z"},
+            {"id": 4, "type": "homework", "end_time": "2026-03-02T00:00:00Z"},
+            {"id": 5, "type": "homework", "end_time": None},
+        ]
+        self.assertEqual([4, 2, 1, 3, 5], prefetch_order(activities, limit=10, now=NOW))
+
+    def test_limit_and_invalid_items(self):
+        activities = [{"id": 1}, {"id": None}, "bad", {"id": 1}, {"id": 2}, {"id": 3}]
+        self.assertEqual([1, 2], prefetch_order(activities, limit=2, now=NOW))
+        self.assertEqual([], prefetch_order(activities, limit=0, now=NOW))
+
+
+class LMSDetailPrefetcherTest(unittest.TestCase):
+    def test_prefetch_fills_cache_and_skips_cached(self):
+        util = FakeLMSUtil(failing={3})
+        util.get_activity_detail(1)
+
+        report = LMSDetailPrefetcher(util).prefetch([1, 2, 3, 4])
+        self.assertEqual([1], report.skipped)
+        self.assertEqual([2, 4], report.fetched)
+        self.assertEqual([3], list(report.failed))
+        self.assertTrue(util.has_cached_activity_detail(4))
+
+        util.get_activity_detail(2)
+        self.assertEqual([1, 2, 3, 4], util.requests)
+
+    def test_prefetch_stops_when_cancelled(self):
+        util = FakeLMSUtil()
+        remaining = [True, True]
+        report = LMSDetailPrefetcher(util).prefetch([1, 2, 3], should_continue=lambda: bool(remaining and remaining.pop()))
+        self.assertTrue(report.canceled)
+        self.assertEqual([1, 2], util.requests)
+
+
+if __name__ == "__main__":
+    unittest.main()
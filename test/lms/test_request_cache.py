@@ -0,0 +1,140 @@
+import threading
+import unittest
+
+from lms import LMSRequestCache, LMSUtil
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeResponse:
+    text = 'globalData = {user: {id: 7, name: "张三"}, dept: {id: 1, name: "电信学部"}, locale: "zh"}'
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        return FakeResponse()
+
+
+class LMSRequestCacheTest(unittest.TestCase):
+    def test_values_expire_per_endpoint(self):
+        clock = FakeClock()
+        cache = LMSRequestCache(ttls={"short": 10, "long": 100}, clock=clock)
+        calls = []
+
+        def loader(value):
+            calls.append(value)
+            return {"value": value}
+
+        cache.get_or_load("short", 1, lambda: loader("a"))
+        cache.get_or_load("long", 1, lambda: loader("b"))
+        clock.now = 50
+        cache.get_or_load("short", 1, lambda: loader("c"))
+        cache.get_or_load("long", 1, lambda: loader("d"))
+        self.assertEqual(["a", "b", "c"], calls)
+
+    def test_returned_values_are_copies(self):
+        cache = LMSRequestCache()
+        first = cache.get_or_load("activity_detail", 1, lambda: {"uploads": []})
+        first["uploads"].append("changed")
+        self.assertEqual({"uploads": []}, cache.get_or_load("activity_detail", 1, lambda: {"other": True}))
+
+    def test_concurrent_identical_requests_share_one_load(self):
+        cache = LMSRequestCache()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "token"
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(cache.get_or_load("embed_token", "t", loader)))
+        leader.start()
+        started.wait(5)
+        followers = [
+            threading.Thread(target=lambda: results.append(cache.get_or_load("embed_token", "t", loader)))
+            for _ in range(4)
+        ]
+        for one in followers:
+            one.start()
+        while cache.coalesced < 4:
+            threading.Event().wait(0.01)
+        release.set()
+        for one in [leader, *followers]:
+            one.join(5)
+
+        self.assertEqual(1, len(calls))
+        self.assertEqual(["token"] * 5, results)
+
+    def test_errors_are_shared_and_not_cached(self):
+        cache = LMSRequestCache()
+
+        def failing():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            cache.get_or_load("user_info", None, failing)
+        self.assertEqual("ok", cache.get_or_load("user_info", None, lambda: "ok"))
+
+    def test_invalidate_during_load_discards_stale_result(self):
+        cache = LMSRequestCache()
+
+        def loader():
+            cache.invalidate("activity_detail", 1)
+            return "stale"
+
+        self.assertEqual("stale", cache.get_or_load("activity_detail", 1, loader))
+        self.assertEqual((False, None), cache.peek("activity_detail", 1))
+
+    def test_invalidate_by_endpoint_and_all(self):
+        cache = LMSRequestCache()
+        cache.put("activity_detail", 1, "a")
+        cache.put("activity_detail", 2, "b")
+        cache.put("user_info", None, "u")
+        cache.invalidate("activity_detail")
+        self.assertFalse(cache.peek("activity_detail", 2)[0])
+        self.assertTrue(cache.peek("user_info", None)[0])
+        cache.invalidate()
+        self.assertFalse(cache.peek("user_info", None)[0])
+
+
+class LMSUtilCacheTest(unittest.TestCase):
+    def test_utils_on_same_session_share_cache_until_refresh(self):
+        session = FakeSession()
+        self.assertEqual(7, LMSUtil(session).get_user_info()["id"])
+        self.assertEqual("张三", LMSUtil(session).get_user_info()["name"])
+        self.assertEqual(1, len(session.urls))
+
+        LMSUtil(session).get_user_info(refresh=True)
+        self.assertEqual(2, len(session.urls))
+
+        LMSUtil(session).invalidate_cache("user_info")
+        LMSUtil(session).get_user_info()
+        self.assertEqual(3, len(session.urls))
+
+    def test_different_sessions_do_not_share_cache(self):
+        first, second = FakeSession(), FakeSession()
+        LMSUtil(first).get_user_info()
+        LMSUtil(second).get_user_info()
+        self.assertEqual(1, len(first.urls))
+        self.assertEqual(1, len(second.urls))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import os
+import tempfile
+import unittest
+
+from lms.sync_store import LMSIncrementalSync, LMSSyncStore
+
+
+class FakeLMSUtil:
+    def __init__(self, courses, activities):
+        self.courses = courses
+        self.activities = activities
+        self.activity_requests = []
+
+    def get_my_courses(self):
+        return [dict(one) for one in self.courses]
+
+    def get_course_activities(self, course_id):
+        self.activity_requests.append(course_id)
+        return [dict(one) for one in self.activities.get(course_id, [])]
+
+
+class LMSSyncStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = LMSSyncStore(os.path.join(self.directory.name, "account", "lms_sync.db"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_sync_courses_reports_new_updated_and_removed_rows(self):
+        first = self.store.sync_courses([{"id": 1, "name": "A"}, {"id": 2, "name": "B"}], now=100)
+        self.assertEqual([1, 2], [one["id"] for one in first.new])
+
+        second = self.store.sync_courses([{"id": 2, "name": "B2"}, {"id": 3, "name": "C"}], now=200)
+        self.assertEqual([3], [one["id"] for one in second.new])
+        self.assertEqual([2], [one["id"] for one in second.updated])
+        self.assertEqual([1], second.removed)
+        self.assertEqual([{"id": 2, "name": "B2"}, {"id": 3, "name": "C"}], self.store.get_courses())
+
+        third = self.store.sync_courses([{"id": 2, "name": "B2"}, {"id": 3, "name": "C"}], now=300)
+        self.assertTrue(third.identical)
+
+    def test_activities_keep_server_order_and_record_last_sync(self):
+        self.store.sync_courses([{"id": 1, "name": "A"}], now=100)
+        self.assertIsNone(self.store.last_synced(1))
+
+        self.store.sync_activities(1, [{"id": 20, "title": "b"}, {"id": 10, "title": "a"}], now=150)
+        self.assertEqual([20, 10], [one["id"] for one in self.store.get_activities(1)])
+        self.assertEqual(150, self.store.last_synced(1))
+
+        diff = self.store.sync_activities(1, [{"id": 10, "title": "a"}], now=160)
+        self.assertEqual([20], diff.removed)
+        self.assertEqual([], diff.upserts)
+
+    def test_courses_to_refresh_only_returns_changed_or_stale_courses(self):
+        self.store.sync_courses([{"id": 1, "name": "A"}, {"id": 2, "name": "B"}, {"id": 3, "name": "C"}], now=100)
+        for course_id in (1, 2, 3):
+            self.store.sync_activities(course_id, [], now=100)
+        self.assertEqual([], self.store.courses_to_refresh(max_age=50, now=120))
+
+        self.store.sync_courses([{"id": 1, "name": "A"}, {"id": 2, "name": "B (changed)"}, {"id": 3, "name": "C"}],
+                                now=130)
+        self.assertEqual([2], self.store.courses_to_refresh(max_age=50, now=130))
+        self.assertEqual([1, 2, 3], self.store.courses_to_refresh(max_age=50, now=200))
+
+    def test_changes_since_lists_new_activities_and_uploads(self):
+        self.store.sync_courses([{"id": 1, "name": "A"}], now=100)
+        self.store.sync_activities(1, [{"id": 10, "title": "old"}], now=100)
+        self.store.sync_activities(1, [{"id": 10, "title": "old"}, {"id": 11, "title": "new"}], now=200)
+        self.store.sync_uploads({"id": 11, "course_id": 1, "uploads": [{"id": 5, "name": "a.pdf"}]}, now=210)
+
+        changes = self.store.changes_since(150)
+        self.assertEqual([], changes["courses"])
+        self.assertEqual([11], [one["id"] for one in changes["activities"]])
+        self.assertTrue(changes["activities"][0]["_is_new"])
+        self.assertEqual(1, changes["activities"][0]["_course_id"])
+        self.assertEqual([5], [one["id"] for one in changes["uploads"]])
+        self.assertEqual(11, changes["uploads"][0]["_activity_id"])
+        self.assertEqual([{"id": 5, "name": "a.pdf"}], self.store.get_uploads(11))
+
+    def test_removing_course_drops_its_activities(self):
+        self.store.sync_courses([{"id": 1, "name": "A"}], now=100)
+        self.store.sync_activities(1, [{"id": 10}], now=100)
+        self.store.sync_courses([], now=200)
+        self.assertEqual([], self.store.get_activities(1))
+
+
+class LMSIncrementalSyncTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = LMSSyncStore(os.path.join(self.directory.name, "lms_sync.db"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_second_sync_only_refreshes_changed_courses(self):
+        util = FakeLMSUtil(
+            [{"id": 1, "name": "A"}, {"id": 2, "name": "B"}],
+            {1: [{"id": 10, "title": "hw"}], 2: [{"id": 20, "title": "hw"}]},
+        )
+        syncer = LMSIncrementalSync(util, self.store)
+
+        first = syncer.sync()
+        self.assertEqual([1, 2], first.refreshed_course_ids)
+        self.assertEqual(2, len(first.new_activities))
+
+        util.courses = [{"id": 1, "name": "A"}, {"id": 2, "name": "B (renamed)"}]
+        util.activities[2].append({"id": 21, "title": "new hw"})
+        util.activity_requests.clear()
+
+        second = syncer.sync()
+        self.assertEqual([2], util.activity_requests)
+        self.assertEqual([1], second.skipped_course_ids)
+        self.assertEqual([21], [one["id"] for one in second.new_activities])
+        self.assertEqual([21], [one["id"] for one in self.store.changes_since_last_sync()["activities"]])
+
+    def test_failed_sync_keeps_changes_of_last_sync(self):
+        util = FakeLMSUtil([{"id": 1, "name": "A"}], {1: [{"id": 10, "title": "hw"}]})
+        syncer = LMSIncrementalSync(util, self.store)
+        syncer.sync()
+        self.assertEqual([10], [one["id"] for one in self.store.changes_since_last_sync()["activities"]])
+
+        def offline():
+            raise ConnectionError("offline")
+
+        util.get_my_courses = offline
+        with self.assertRaises(ConnectionError):
+            syncer.sync()
+        self.assertEqual([10], [one["id"] for one in self.store.changes_since_last_sync()["activities"]])
+
+    def test_sync_stops_when_cancelled(self):
+        util = FakeLMSUtil([{"id": 1}, {"id": 2}], {})
+        report = LMSIncrementalSync(util, self.store).sync(should_continue=lambda: False)
+        self.assertEqual([], report.refreshed_course_ids)
+        self.assertEqual([], util.activity_requests)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,11 +4,14 @@ import time
 import threading
 import unittest
 
+import requests
+
 from requests.cookies import create_cookie
 
-from app.sessions.common_session import CommonLoginSession
+from app.sessions.common_session import CommonLoginSession, KeepAliveStatus
 from app.sessions.session_backend import AccessMode
 from auth import ATTENDANCE_WEBVPN_URL
+from app.utils.account import Account
 from app.utils.config import cfg
 from app.utils.session_manager import SessionManager
 import app.utils.session_manager as session_manager_module
@@ -57,6 +60,68 @@ class DirectOffCampusTestSession(CommonLoginSession):
         """模拟重新登录流程。"""
 
 
+class SlowKeepAliveSession(NormalTestSession):
+    """保活验证需要等待一段时间的测试 Session，用于验证并发保活。"""
+
+    delay = 0.2
+
+    def validate_login(self) -> bool:
+        """模拟耗时的登录态验证请求。"""
+        time.sleep(self.delay)
+        return True
+
+
+class WarmUpTestSession(NormalTestSession):
+    """
+    模拟统一认证登录的测试 Session：后端还没有统一认证 cookie 时需要完整登录，之后只需重定向。
+    """
+
+    full_login_delay = 0.1
+    redirect_delay = 0.2
+    fail_login = False
+
+    def _login(self, username: str, password: str, **kwargs: object) -> None:
+        """模拟统一认证登录，并记录登录顺序。"""
+        if self.fail_login:
+            raise RuntimeError("登录失败")
+        if not any(cookie.name == "CASTGC" for cookie in self.backend.session.cookies):
+            time.sleep(self.full_login_delay)
+            self.backend.session.cookies.set_cookie(create_cookie(name="CASTGC", value="tgc"))
+            self.kwargs = kwargs
+            self.full_login = True
+        else:
+            time.sleep(self.redirect_delay)
+            self.full_login = False
+        self.has_login = True
+
+    _re_login = _login
+
+    def validate_login(self) -> bool:
+        """已经登录过的站点视为登录状态有效。"""
+        return True
+
+
+class TrustedRestoreTestSession(NormalTestSession):
+    """启用可信恢复的测试 Session，记录验证请求与登录次数。"""
+
+    trusted_restore_window = 600.0
+
+    def __init__(self, *args: object, **kwargs: object) -> None:
+        super().__init__(*args, **kwargs)
+        self.validate_calls = 0
+        self.login_calls = 0
+
+    def validate_login(self) -> bool:
+        """模拟一次验证请求。"""
+        self.validate_calls += 1
+        return True
+
+    def _login(self, username: str, password: str, **kwargs: object) -> None:
+        """模拟登录流程。"""
+        self.login_calls += 1
+        self.has_login = True
+
+
 class ProbeResponse:
     """用于模拟校园网探测请求响应。"""
 
@@ -77,6 +142,9 @@ class SessionManagerTestCase(unittest.TestCase):
         self._original_access_policy = cfg.campusAccessPolicy.value
         self.s1 = SessionManager()
         self.s2 = SessionManager()
+        # 避免访问方式探测在测试中真正访问 WebVPN
+        self.s1.can_reach_webvpn = lambda timeout=10.0: False
+        self.s2.can_reach_webvpn = lambda timeout=10.0: False
 
     def tearDown(self) -> None:
         """恢复测试修改过的全局配置。"""
@@ -317,6 +385,101 @@ class SessionManagerTestCase(unittest.TestCase):
         self.assertFalse(refresh_thread.is_alive())
         self.assertIsNone(self.s1.get_cached_access_probe_result())
 
+    def test_access_probe_is_cached_per_network_fingerprint(self) -> None:
+        """网络指纹不变时复用探测结果，网络环境变化后重新探测。"""
+        cfg.campusAccessPolicy.value = cfg.NetworkAccessPolicy.AUTO
+        fingerprint = ["campus"]
+        probe_calls = []
+        original_fingerprint = session_manager_module.current_network_fingerprint
+        session_manager_module.current_network_fingerprint = lambda: fingerprint[0]
+        self.addCleanup(setattr, session_manager_module, "current_network_fingerprint", original_fingerprint)
+        original_last_fingerprint = session_manager_module.last_network_fingerprint
+        session_manager_module.last_network_fingerprint = lambda **_: fingerprint[0]
+        self.addCleanup(setattr, session_manager_module, "last_network_fingerprint", original_last_fingerprint)
+
+        def probe(timeout: float = 10.0) -> bool:
+            """校园网指纹下可以直连。"""
+            probe_calls.append(fingerprint[0])
+            return fingerprint[0] == "campus"
+
+        self.s1.can_reach_campus_network = probe
+        self.assertEqual(self.s1.resolve_access_mode(), AccessMode.NORMAL)
+        # 超过无指纹时的有效期，但网络环境没有变化
+        self.s1._access_probe_time = time.time() - SessionManager.ACCESS_PROBE_TTL - 1
+        self.assertEqual(self.s1.resolve_access_mode(), AccessMode.NORMAL)
+        self.assertEqual(self.s1.get_cached_access_probe_result(), AccessMode.NORMAL)
+        self.assertEqual(probe_calls, ["campus"])
+
+        fingerprint[0] = "home"
+        self.assertIsNone(self.s1.get_cached_access_probe_result())
+        self.assertEqual(self.s1.resolve_access_mode(), AccessMode.WEBVPN)
+        self.assertEqual(probe_calls, ["campus", "home"])
+
+    def test_cached_probe_read_does_not_compute_fingerprint(self) -> None:
+        """读取探测缓存只使用最近一次的网络指纹，不在持有探测锁时执行子进程。"""
+        fingerprint = ["campus"]
+        original_last_fingerprint = session_manager_module.last_network_fingerprint
+        session_manager_module.last_network_fingerprint = lambda **_: fingerprint[0]
+        self.addCleanup(setattr, session_manager_module, "last_network_fingerprint", original_last_fingerprint)
+        original_fingerprint = session_manager_module.current_network_fingerprint
+
+        def computing_fingerprint() -> str:
+            """缓存读取路径不应调用。"""
+            raise AssertionError("current_network_fingerprint called")
+
+        session_manager_module.current_network_fingerprint = computing_fingerprint
+        self.addCleanup(setattr, session_manager_module, "current_network_fingerprint", original_fingerprint)
+        self.s1._access_probe_result = AccessMode.NORMAL
+        self.s1._access_probe_fingerprint = "campus"
+        self.s1._access_probe_time = time.time() - SessionManager.ACCESS_PROBE_TTL - 1
+
+        self.assertEqual(self.s1.get_cached_access_probe_result(), AccessMode.NORMAL)
+        fingerprint[0] = "home"
+        self.assertIsNone(self.s1.get_cached_access_probe_result())
+
+        # 最近没有计算过指纹时，无法确认网络没有变化，只按较短的 ACCESS_PROBE_TTL 判断
+        fingerprint[0] = None
+        self.assertIsNone(self.s1.get_cached_access_probe_result())
+        self.s1._access_probe_time = time.time()
+        self.assertEqual(self.s1.get_cached_access_probe_result(), AccessMode.NORMAL)
+
+    def test_probe_access_mode_races_direct_and_webvpn(self) -> None:
+        """直连探测结果优先；WebVPN 先成功时只再等待一小段时间。"""
+        release_direct = threading.Event()
+        self.addCleanup(release_direct.set)
+        self.s1.ACCESS_PROBE_WEBVPN_GRACE = 0.05
+
+        def slow_direct(timeout: float = 10.0) -> bool:
+            """模拟校外网络下迟迟没有结果的直连探测。"""
+            release_direct.wait(timeout=5.0)
+            return True
+
+        self.s1.can_reach_campus_network = slow_direct
+        self.s1.can_reach_webvpn = lambda timeout=10.0: True
+        started_at = time.monotonic()
+        self.assertEqual(self.s1.probe_access_mode(timeout=5.0), AccessMode.WEBVPN)
+        self.assertLess(time.monotonic() - started_at, 1.0)
+
+        def slow_webvpn(timeout: float = 10.0) -> bool:
+            """模拟很慢的 WebVPN 入口。"""
+            release_direct.wait(timeout=5.0)
+            return True
+
+        self.s1.can_reach_campus_network = lambda timeout=10.0: True
+        self.s1.can_reach_webvpn = slow_webvpn
+        started_at = time.monotonic()
+        self.assertEqual(self.s1.probe_access_mode(timeout=5.0), AccessMode.NORMAL)
+        self.assertLess(time.monotonic() - started_at, 1.0)
+
+        def late_direct(timeout: float = 10.0) -> bool:
+            """WebVPN 不可达时，应等待稍慢的直连探测。"""
+            time.sleep(0.2)
+            return True
+
+        self.s1.can_reach_campus_network = late_direct
+        self.s1.can_reach_webvpn = lambda timeout=10.0: False
+        self.assertEqual(self.s1.probe_access_mode(timeout=5.0), AccessMode.NORMAL)
+
     def test_cached_site_resolver_does_not_probe_without_cache(self) -> None:
         """只读站点解析在自动无缓存时不应发起网络探测。"""
         cfg.campusAccessPolicy.value = cfg.NetworkAccessPolicy.AUTO
@@ -350,6 +513,235 @@ class SessionManagerTestCase(unittest.TestCase):
             AccessMode.NORMAL,
         )
 
+    def _login_slow_sessions(self, count: int) -> list[CommonLoginSession]:
+        """注册并标记若干个已登录的慢速保活测试 Session。"""
+        sessions = []
+        for index in range(count):
+            self.s1.register(SlowKeepAliveSession, f"slow{index}")
+            session = self.s1.get_session(f"slow{index}")
+            session.has_login = True
+            sessions.append(session)
+        return sessions
+
+    def test_keep_alive_runs_sites_concurrently_and_records_latency(self) -> None:
+        """同一后端内的站点应并发保活，并在报告中记录各自耗时。"""
+        self._login_slow_sessions(4)
+
+        report = self.s1.keep_alive_logged_in_sessions("uuid")
+
+        self.assertEqual([result.site_key for result in report.site_results], ["slow0", "slow1", "slow2", "slow3"])
+        self.assertTrue(all(result.status == KeepAliveStatus.VALID for result in report.site_results))
+        self.assertTrue(all(result.latency >= SlowKeepAliveSession.delay for result in report.site_results))
+        self.assertLess(report.duration, SlowKeepAliveSession.delay * 3)
+        self.assertGreaterEqual(report.max_latency, SlowKeepAliveSession.delay)
+
+    def test_keep_alive_skips_sites_while_backend_is_logging_in(self) -> None:
+        """后端 login_lock 被其他线程占用时，该后端的站点应记为 BUSY 且不发出请求。"""
+        self._login_slow_sessions(2)
+        backend = self.s1.get_backend(AccessMode.NORMAL)
+        locked = threading.Event()
+        release = threading.Event()
+
+        def hold_lock() -> None:
+            with backend.login_lock:
+                locked.set()
+                release.wait(5)
+
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        locked.wait(5)
+        try:
+            report = self.s1.keep_alive_logged_in_sessions()
+        finally:
+            release.set()
+            holder.join()
+
+        self.assertEqual([result.status for result in report.site_results], [KeepAliveStatus.BUSY] * 2)
+        self.assertEqual([result.latency for result in report.site_results], [0.0, 0.0])
+
+    def test_busy_sites_are_retried_soon(self) -> None:
+        """按间隔保活时，因后端正在登录而跳过的站点应在短时间后重试，而不是推迟整个间隔。"""
+        self._login_slow_sessions(2)
+        SlowKeepAliveSession.delay = 0.0
+        self.addCleanup(setattr, SlowKeepAliveSession, "delay", 0.2)
+        self.s1.keep_alive_logged_in_sessions(interval=600)
+        self.s1._keep_alive_due["slow0"] = 0.0
+        backend = self.s1.get_backend(AccessMode.NORMAL)
+
+        with backend.login_lock:
+            # 在其他线程中执行保活，使 login_lock 对它不可重入
+            holder = threading.Thread(target=self.s1.keep_alive_logged_in_sessions, kwargs={"interval": 600})
+            holder.start()
+            holder.join()
+
+        retry = SessionManager.KEEP_ALIVE_BUSY_RETRY * (1 + SessionManager.KEEP_ALIVE_JITTER)
+        self.assertLessEqual(self.s1._keep_alive_due["slow0"], time.time() + retry)
+
+    def test_keep_alive_interval_staggers_sites(self) -> None:
+        """按间隔保活时，新站点先被安排到随机时刻，到期后才保活并重新安排带抖动的时间。"""
+        self._login_slow_sessions(2)
+        SlowKeepAliveSession.delay = 0.0
+        self.addCleanup(setattr, SlowKeepAliveSession, "delay", 0.2)
+
+        first = self.s1.keep_alive_logged_in_sessions(interval=600)
+        self.assertEqual(first.site_results, ())
+        for due_time in self.s1._keep_alive_due.values():
+            self.assertLessEqual(due_time, time.time() + 600)
+
+        self.s1._keep_alive_due["slow0"] = 0.0
+        second = self.s1.keep_alive_logged_in_sessions(interval=600)
+        self.assertEqual([result.site_key for result in second.site_results], ["slow0"])
+        self.assertGreaterEqual(self.s1._keep_alive_due["slow0"], time.time() + 600 * 0.7)
+
+        self.s1.get_session("slow1").has_login = False
+        self.s1.keep_alive_logged_in_sessions(interval=600)
+        self.assertNotIn("slow1", self.s1._keep_alive_due)
+
+    def _register_warm_up_sessions(self, count: int) -> list[str]:
+        """注册若干个登录预热测试 Session。"""
+        cfg.campusAccessPolicy.value = cfg.NetworkAccessPolicy.DIRECT
+        names = [f"warm{index}" for index in range(count)]
+        for name in names:
+            self.s1.register(WarmUpTestSession, name)
+        return names
+
+    def test_warm_up_logs_in_leader_first_then_followers_concurrently(self) -> None:
+        """预热应先完整登录一个站点取得统一认证 cookie，其余站点随后并发登录且不弹出交互。"""
+        names = self._register_warm_up_sessions(4)
+        account = Account("2220000000", "password")
+
+        report = self.s1.warm_up_logins(account, names)
+
+        self.assertEqual([result.site_key for result in report.site_results], names)
+        self.assertTrue(all(result.success and result.performed_login for result in report.site_results))
+        sessions = [self.s1.get_session(name) for name in names]
+        self.assertEqual([session.full_login for session in sessions], [True, False, False, False])
+        self.assertIsInstance(sessions[0].kwargs["mfa_provider"], session_manager_module._NonInteractiveMFAProvider)
+        self.assertIs(sessions[0].kwargs["allow_qrcode_login"], False)
+        self.assertNotIn("mfa_provider", sessions[0]._login_context.kwargs)
+        # 三个跟随站点若串行需要 0.6 秒
+        self.assertLess(report.duration, WarmUpTestSession.full_login_delay + WarmUpTestSession.redirect_delay * 2)
+
+        again = self.s1.warm_up_logins(account, names[:1])
+        self.assertFalse(again.site_results[0].performed_login)
+
+    def test_warm_up_keeps_context_of_concurrent_login(self) -> None:
+        """预热登录结束前其他线程登录时，预热不应覆盖那次登录保存的上下文。"""
+        names = self._register_warm_up_sessions(1)
+        session = self.s1.get_session(names[0])
+        account = Account("2220000000", "password")
+        ui_provider = object()
+        original_ensure_login = session.ensure_login
+
+        def ensure_login_then_ui_login(*args: object, **kwargs: object) -> bool:
+            """预热登录完成后，界面发起的登录保存了自己的上下文。"""
+            result = original_ensure_login(*args, **kwargs)
+            session.update_login_context("ui-user", "ui-password", {"mfa_provider": ui_provider}, True)
+            return result
+
+        session.ensure_login = ensure_login_then_ui_login
+        report = self.s1.warm_up_logins(account, names)
+
+        self.assertTrue(report.site_results[0].success)
+        self.assertEqual(session._login_context.username, "ui-user")
+        self.assertIs(session._login_context.kwargs["mfa_provider"], ui_provider)
+
+    def test_warm_up_skips_followers_when_leader_fails(self) -> None:
+        """第一个站点预热失败时，同一后端的其他站点不应继续尝试登录。"""
+        names = self._register_warm_up_sessions(3)
+        WarmUpTestSession.fail_login = True
+        self.addCleanup(setattr, WarmUpTestSession, "fail_login", False)
+
+        report = self.s1.warm_up_logins(Account("2220000000", "password"), names)
+
+        self.assertEqual([result.success for result in report.site_results], [False, False, False])
+        self.assertEqual(report.site_results[0].error, "登录失败")
+        self.assertTrue(report.site_results[1].error.startswith("跳过"))
+
+    def test_warm_up_candidates_prefer_previously_used_sites(self) -> None:
+        """预热站点优先取上次保存了登录状态的站点，没有时使用按账号类型的默认站点。"""
+        self._register_warm_up_sessions(2)
+        self.s1.register(NormalTestSession, "jwxt")
+        self.s1.register(NormalTestSession, "gmis")
+        account = Account("2220000000", "password")
+        self.assertEqual(self.s1.warm_up_candidates(account), ["jwxt"])
+
+        account.type = Account.POSTGRADUATE
+        self.assertEqual(self.s1.warm_up_candidates(account), ["gmis"])
+
+        self.s1._pending_site_snapshots["warm1"] = SiteSnapshot(
+            site_key="normal_test", access_mode=AccessMode.NORMAL.value, headers={}, saved_at=1.0)
+        self.assertEqual(self.s1.warm_up_candidates(account), ["warm1"])
+
+        canceled = self.s1.warm_up_logins(account, should_continue=lambda: False)
+        self.assertTrue(canceled.canceled)
+        self.assertEqual(canceled.site_results, ())
+
+    def _restore_trusted_session(self, last_validated_at: float) -> TrustedRestoreTestSession:
+        """从带验证时间的站点快照恢复一个可信恢复测试 Session。"""
+        cfg.campusAccessPolicy.value = cfg.NetworkAccessPolicy.DIRECT
+        self.s1.register(TrustedRestoreTestSession, "trusted")
+        self.s1._pending_site_snapshots["trusted"] = SiteSnapshot(
+            site_key="normal_test",
+            access_mode=AccessMode.NORMAL.value,
+            headers={"Authorization": "Bearer restored"},
+            saved_at=time.time(),
+            last_validated_at=last_validated_at,
+        )
+        return self.s1.get_session("trusted")
+
+    def test_recently_validated_restore_skips_validation(self) -> None:
+        """窗口期内验证过的恢复态在 ensure_login 时不应再发送验证请求。"""
+        original = cfg.trustedSessionRestore.value
+        self.addCleanup(setattr, cfg.trustedSessionRestore, "value", original)
+        cfg.trustedSessionRestore.value = True
+        session = self._restore_trusted_session(time.time() - 60)
+
+        self.assertFalse(session.ensure_login("user", "password"))
+        self.assertEqual((session.validate_calls, session.login_calls), (0, 0))
+        self.assertIsNotNone(session._login_context)
+
+        cfg.trustedSessionRestore.value = False
+        self.assertFalse(session.ensure_login("user", "password"))
+        self.assertEqual(session.validate_calls, 1)
+
+    def test_stale_restore_is_validated_and_timestamp_persisted(self) -> None:
+        """超出窗口期或从未验证的恢复态仍需验证，验证时间会写入站点快照。"""
+        original = cfg.trustedSessionRestore.value
+        self.addCleanup(setattr, cfg.trustedSessionRestore, "value", original)
+        cfg.trustedSessionRestore.value = True
+        session = self._restore_trusted_session(time.time() - 3600)
+
+        self.assertFalse(session.ensure_login("user", "password"))
+        self.assertEqual(session.validate_calls, 1)
+        snapshot = session.to_site_snapshot()
+        self.assertAlmostEqual(snapshot.last_validated_at, time.time(), delta=5)
+        self.assertEqual(SiteSnapshot.from_mapping(snapshot.to_dict()), snapshot)
+        # 已验证的登录态不再是恢复态，之后仍按原有逻辑验证
+        self.assertFalse(session.is_trusted_restore())
+
+        session.clear_site_state()
+        self.assertEqual(session.to_site_snapshot().last_validated_at, 0.0)
+
+    def test_trusted_restore_relogs_in_on_auth_failure(self) -> None:
+        """信任的恢复态实际已失效时，第一次遇到认证失败的响应应重新登录并重放请求。"""
+        original = cfg.trustedSessionRestore.value
+        self.addCleanup(setattr, cfg.trustedSessionRestore, "value", original)
+        cfg.trustedSessionRestore.value = True
+        session = self._restore_trusted_session(time.time() - 60)
+        session.ensure_login("user", "password")
+
+        responses = [requests.Response(), requests.Response()]
+        responses[0]._content = "统一身份认证 cas/login id=\"fm1\" name=\"execution\"".encode()
+        responses[0].headers["Content-Type"] = "text/html"
+        responses[1]._content = b"{}"
+        responses[1].headers["Content-Type"] = "application/json"
+        session.backend.session.request = lambda *args, **kwargs: responses.pop(0)
+        session._ensure_login_context_matches_current_account = lambda context: None
+
+        self.assertEqual(session.get("https://example.com/api").content, b"{}")
+        self.assertEqual(session.login_calls, 1)
+
 
 if __name__ == "__main__":
     unittest.main()
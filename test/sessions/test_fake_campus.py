@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import time
+import unittest
+
+import requests
+
+from app.sessions.attendance_session import AttendanceSession
+from app.sessions.jwxt_session import JWXTSession
+from app.sessions.lms_session import LMSSession
+from app.sessions.session_backend import AccessMode, SessionBackend
+from app.utils.config import cfg
+from attendance.attendance import Attendance
+from auth import WEBVPN_LOGIN_URL, ServerError
+from auth.new_login import NewLogin
+from jwxt.schedule import Schedule
+from jwxt.score import Score
+from lms import LMSUtil
+from scripts.bench_campus_client import first_data, fresh_account
+from scripts.fakecampus import FakeCampus
+
+
+class FakeCampusTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.campus = FakeCampus().start()
+        cls._original_qrcode_login = cfg.enableQRCodeLogin.value
+        cfg.enableQRCodeLogin.value = False
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cfg.enableQRCodeLogin.value = cls._original_qrcode_login
+        cls.campus.stop()
+
+    def setUp(self) -> None:
+        self.campus.expire_sessions()
+        self.campus.clear_faults()
+        self.campus.reset_counters()
+
+    def _backend(self, access_mode: AccessMode = AccessMode.NORMAL, **transport: object) -> SessionBackend:
+        backend = SessionBackend(access_mode, transport_config=self.campus.transport_config(**transport))
+        self.addCleanup(backend.transport.close)
+        return backend
+
+    def _session(self, session_class, backend: SessionBackend):
+        session = session_class(backend)
+        session.tracer = None
+        session.ensure_login(self.campus.username, self.campus.password)
+        return session
+
+    def test_login_and_fetch_share_single_sign_on(self) -> None:
+        backend = self._backend()
+        jwxt = self._session(JWXTSession, backend)
+        lms = self._session(LMSSession, backend)
+        attendance = self._session(AttendanceSession, backend)
+
+        self.assertEqual(Schedule(jwxt).getCurrentTerm(), "2025-2026-1")
+        self.assertEqual(len(Score(jwxt).grade()), 36)
+        self.assertEqual(len(LMSUtil(lms).get_my_courses()), 12)
+        self.assertEqual(LMSUtil(lms).get_user_info()["userNo"], self.campus.username)
+        self.assertEqual(Attendance(attendance).getStudentInfo()["sno"], self.campus.username)
+        # 后两个站点通过统一身份认证的 CASTGC 直接登录，只校验了一次密码
+        self.assertEqual(self.campus.password_logins, 1)
+
+    def test_warm_up_leaves_only_data_requests_for_first_page(self) -> None:
+        self.addCleanup(setattr, cfg.campusAccessPolicy, "value", cfg.campusAccessPolicy.value)
+        cfg.campusAccessPolicy.value = cfg.NetworkAccessPolicy.DIRECT
+        hits = {}
+        for warm_up in (False, True):
+            account = fresh_account(self.campus, warm_up)
+            before = sum(self.campus.requests_by_host.values())
+            self.assertEqual(first_data(account, "jwxt", lambda session: Schedule(session).getCurrentTerm()),
+                             "2025-2026-1")
+            hits[warm_up] = sum(self.campus.requests_by_host.values()) - before
+        # 预热后打开页面不再经过统一认证登录，只剩登录状态检查与数据请求
+        self.assertEqual(hits[True], 2)
+        self.assertGreater(hits[False], hits[True] + 3)
+
+    def test_wrong_password_is_rejected(self) -> None:
+        session = JWXTSession(self._backend())
+        session.tracer = None
+        with self.assertRaises(ServerError):
+            session.ensure_login(self.campus.username, "wrong")
+        self.assertEqual(self.campus.password_logins, 1)
+        self.assertFalse(session.has_login)
+
+    def test_expired_site_session_is_recovered(self) -> None:
+        jwxt = self._session(JWXTSession, self._backend())
+
+        # 只有业务系统的会话过期时，单点登录会直接签发新的会话
+        self.campus.expire_sessions(include_cas=False)
+        self.assertEqual(Schedule(jwxt).getCurrentTerm(), "2025-2026-1")
+        self.assertEqual(self.campus.password_logins, 1)
+
+        # 统一身份认证的登录态也过期时，请求会得到登录页，客户端使用保存的密码重新登录
+        self.campus.expire_sessions()
+        self.assertEqual(Schedule(jwxt).getCurrentTerm(), "2025-2026-1")
+        self.assertEqual(self.campus.password_logins, 2)
+
+    def test_webvpn_proxies_sites(self) -> None:
+        backend = self._backend(AccessMode.WEBVPN)
+        NewLogin(WEBVPN_LOGIN_URL, session=backend.session).login_or_raise(self.campus.username, self.campus.password)
+        self.assertIn("西安交通大学WebVPN - 资源站点", backend.session.get(WEBVPN_LOGIN_URL).text)
+
+        jwxt = self._session(JWXTSession, backend)
+        attendance = self._session(AttendanceSession, backend)
+
+        self.assertEqual(Schedule(jwxt).getCurrentTerm(), "2025-2026-1")
+        self.assertEqual(Attendance(attendance).getStudentInfo()["name"], "测试学生")
+        # 登录 WebVPN 与通过 WebVPN 访问的统一身份认证是两个独立的登录态，之后的站点共享后者
+        self.assertEqual(self.campus.password_logins, 2)
+        # 业务系统的 Cookie 保存在 WebVPN 服务端，不会出现在客户端
+        domains = {cookie.domain for cookie in backend.session.cookies}
+        self.assertIn("webvpn.xjtu.edu.cn", domains)
+        self.assertNotIn("jwxt.xjtu.edu.cn", domains)
+        self.assertGreater(self.campus.hits("jwxt.xjtu.edu.cn"), 0)
+
+    def test_latency_and_failures_are_injected(self) -> None:
+        backend = self._backend()
+        jwxt = self._session(JWXTSession, backend)
+        api = "https://jwxt.xjtu.edu.cn/jwapp/sys/homeapp/api/home/currentUser.do"
+
+        self.campus.inject(host="jwxt.xjtu.edu.cn", path="/jwapp/sys/homeapp/api", latency=0.2)
+        started = time.perf_counter()
+        self.assertEqual(jwxt.get(api).json()["code"], "0")
+        self.assertGreaterEqual(time.perf_counter() - started, 0.2)
+        self.campus.clear_faults()
+
+        # 幂等请求遇到 503 时由传输层重试
+        fault = self.campus.inject(host="jwxt.xjtu.edu.cn", status=503, times=1)
+        self.assertEqual(jwxt.get(api).status_code, 200)
+        self.assertEqual(fault.hits, 1)
+        self.assertEqual(backend.transport_stats()["retries"], 1)
+
+        # POST 请求发出后连接被重置时不会重试
+        self.campus.inject(host="jwxt.xjtu.edu.cn", reset=True, times=1)
+        with self.assertRaises(requests.ConnectionError):
+            Schedule(jwxt).getCurrentTerm()
+
+    def test_recorded_responses_can_be_overridden(self) -> None:
+        jwxt = self._session(JWXTSession, self._backend())
+        self.addCleanup(self.campus.recordings.update, dict(self.campus.recordings))
+        self.campus.record("jwxt.xjtu.edu.cn", "POST", "/jwapp/sys/wdkb/modules/jshkcb/dqxnxq.do",
+                           json={"datas": {"dqxnxq": {"rows": [{"DM": "2030-2031-2"}]}}})
+
+        self.assertEqual(Schedule(jwxt).getCurrentTerm(), "2030-2031-2")
+        self.assertEqual(jwxt.get("https://jwxt.xjtu.edu.cn/jwapp/sys/unknown.do").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
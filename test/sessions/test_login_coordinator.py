@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import itertools
+import threading
+import time
+import unittest
+from urllib.parse import parse_qs
+
+from auth import ServerError
+from app.sessions.common_session import CommonLoginSession
+from app.sessions.login_coordinator import LoginCoordinator
+from app.sessions.session_backend import AccessMode, SessionBackend
+
+
+LOGIN_PAGE = "<html>统一身份认证 <form id=\"fm1\" action=\"/cas/login\"><input name=\"execution\"></form></html>"
+
+
+class FakeCASHandler(BaseHTTPRequestHandler):
+    """
+    模拟统一身份认证与一个业务系统：POST /cas/login 校验密码后签发 SESSION cookie，
+    GET /api 在 cookie 有效时返回 JSON，否则返回统一认证登录页。
+    """
+
+    protocol_version = "HTTP/1.1"
+    password = "secret"
+    login_delay = 0.2
+    lock = threading.Lock()
+    logins = 0
+    api_calls = 0
+    tokens: set[str] = set()
+    counter = itertools.count()
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls.lock:
+            cls.logins = 0
+            cls.api_calls = 0
+            cls.tokens = set()
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode())
+        time.sleep(self.login_delay)
+        with self.lock:
+            FakeCASHandler.logins += 1
+            if form.get("password") != [self.password]:
+                self._reply(401, b"bad password", "text/plain")
+                return
+            token = f"T{next(self.counter)}"
+            self.tokens.add(token)
+        self._reply(200, b"ok", "text/plain", cookie=f"SESSION={token}; Path=/")
+
+    def do_GET(self) -> None:
+        cookies = dict(part.strip().split("=", 1) for part in self.headers.get("Cookie", "").split(";") if "=" in part)
+        with self.lock:
+            FakeCASHandler.api_calls += 1
+            valid = cookies.get("SESSION") in self.tokens
+        if valid:
+            self._reply(200, b"{\"ok\": true}", "application/json")
+        else:
+            self._reply(200, LOGIN_PAGE.encode(), "text/html; charset=utf-8")
+
+    def _reply(self, status: int, body: bytes, content_type: str, cookie: str | None = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if cookie is not None:
+            self.send_header("Set-Cookie", cookie)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+class FakeCASSession(CommonLoginSession):
+    site_key = "fake_cas"
+    base_url = ""
+
+    def _login(self, username: str, password: str, **kwargs: object) -> None:
+        response = self.post(self.base_url + "/cas/login", data={"username": username, "password": password})
+        if response.status_code != 200:
+            raise ServerError(101, "用户名或密码错误")
+        self.has_login = True
+
+    def _re_login(self, username: str, password: str, **kwargs: object) -> None:
+        self._login(username, password, **kwargs)
+
+    def validate_login(self) -> bool:
+        response = self.get(self.base_url + "/api", _skip_auth_check=True)
+        return not self.is_auth_failure_response(response)
+
+
+def run_concurrently(count: int, target) -> tuple[list[object], list[BaseException]]:
+    """在 count 个线程中同时执行 target，返回结果与异常。"""
+    barrier = threading.Barrier(count)
+    results: list[object] = []
+    errors: list[BaseException] = []
+    lock = threading.Lock()
+
+    def worker() -> None:
+        barrier.wait()
+        try:
+            result = target()
+        except BaseException as e:
+            with lock:
+                errors.append(e)
+        else:
+            with lock:
+                results.append(result)
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results, errors
+
+
+class LoginCoordinatorTestCase(unittest.TestCase):
+    def test_concurrent_calls_share_one_result(self) -> None:
+        coordinator = LoginCoordinator()
+        calls = []
+
+        def operation() -> str:
+            calls.append(1)
+            time.sleep(0.1)
+            return "token"
+
+        results, errors = run_concurrently(6, lambda: coordinator.run("site", operation))
+        self.assertEqual((results, errors), (["token"] * 6, []))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual((coordinator.started, coordinator.coalesced), (1, 5))
+        self.assertFalse(coordinator.in_flight("site"))
+
+        # 上一次登录结束后到达的调用会重新执行
+        self.assertEqual(coordinator.run("site", operation), "token")
+        self.assertEqual(len(calls), 2)
+
+    def test_failure_is_shared_and_keys_are_independent(self) -> None:
+        coordinator = LoginCoordinator()
+        started = threading.Event()
+
+        def failing() -> None:
+            started.set()
+            time.sleep(0.1)
+            raise ServerError(101, "用户名或密码错误")
+
+        _, errors = run_concurrently(4, lambda: coordinator.run("a", failing))
+        self.assertEqual(len(errors), 4)
+        self.assertEqual(len({id(error) for error in errors}), 1)
+        self.assertEqual(coordinator.started, 1)
+        self.assertEqual(coordinator.run("b", lambda: 2), 2)
+
+    def test_reentrant_call_does_not_wait_for_itself(self) -> None:
+        coordinator = LoginCoordinator()
+        result = coordinator.run("site", lambda: coordinator.run("site", lambda: 3) + 1)
+        self.assertEqual(result, 4)
+
+
+class SessionLoginContentionTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeCASHandler)
+        FakeCASSession.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        FakeCASHandler.reset()
+        self.session = FakeCASSession(SessionBackend(AccessMode.NORMAL))
+        self.session.tracer = None
+        self.addCleanup(self.session.close)
+
+    def test_concurrent_ensure_login_logs_in_once(self) -> None:
+        results, errors = run_concurrently(8, lambda: self.session.ensure_login("user", "secret"))
+
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [True] * 8)
+        self.assertEqual(FakeCASHandler.logins, 1)
+        # 等待者直接共享登录结果，不会在拿到锁后再逐个验证登录态
+        self.assertEqual(FakeCASHandler.api_calls, 0)
+
+    def test_expired_session_is_renewed_once_for_concurrent_requests(self) -> None:
+        self.session.ensure_login("user", "secret")
+        FakeCASHandler.reset()
+
+        results, errors = run_concurrently(8, lambda: self.session.get(FakeCASSession.base_url + "/api").json())
+
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [{"ok": True}] * 8)
+        self.assertEqual(FakeCASHandler.logins, 1)
+
+    def test_wrong_password_is_submitted_once(self) -> None:
+        _, errors = run_concurrently(5, lambda: self.session.ensure_login("user", "wrong"))
+
+        self.assertEqual(len(errors), 5)
+        self.assertTrue(all(isinstance(error, ServerError) for error in errors))
+        self.assertEqual(FakeCASHandler.logins, 1)
+        self.assertFalse(self.session.has_login)
+
+    def test_different_interaction_modes_are_not_merged(self) -> None:
+        calls = []
+        original = self.session._ensure_login
+
+        def record(*args: object, **kwargs: object) -> bool:
+            calls.append(kwargs["allow_qrcode_login"])
+            return original(*args, **kwargs)
+
+        self.session._ensure_login = record
+        threads = [
+            threading.Thread(target=self.session.ensure_login, args=("user", "secret"),
+                             kwargs={"allow_qrcode_login": allow})
+            for allow in (True, False)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+
+        self.assertEqual(sorted(calls), [False, True])
+        # 第二个调用在锁释放后验证了第一个调用的登录态，没有重复登录
+        self.assertEqual(FakeCASHandler.logins, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
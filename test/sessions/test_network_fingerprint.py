@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import unittest
+from unittest import mock
+
+import app.utils.network_fingerprint as network_fingerprint
+
+
+class NetworkFingerprintTestCase(unittest.TestCase):
+    def _collectors(self, *values: str):
+        def collector(value: str):
+            if value == "error":
+                def failing() -> str:
+                    raise OSError("unavailable")
+                return failing
+            return lambda: value
+        return mock.patch.object(network_fingerprint, "NETWORK_FINGERPRINT_COLLECTORS",
+                                 tuple(collector(value) for value in values))
+
+    def test_fingerprint_changes_with_network(self) -> None:
+        with self._collectors("10.0.0.2", "eth0:10.0.0.1", "XJTU"):
+            campus = network_fingerprint.compute_network_fingerprint()
+        with self._collectors("192.168.1.5", "eth0:192.168.1.1", "home"):
+            home = network_fingerprint.compute_network_fingerprint()
+        with self._collectors("10.0.0.2", "error", "XJTU"):
+            partial = network_fingerprint.compute_network_fingerprint()
+
+        self.assertTrue(campus)
+        self.assertNotEqual(campus, home)
+        self.assertNotIn(partial, ("", campus))
+
+    def test_unavailable_fingerprint_is_empty(self) -> None:
+        with self._collectors("", "error"):
+            self.assertEqual(network_fingerprint.compute_network_fingerprint(), "")
+
+    def test_current_fingerprint_is_reused_within_max_age(self) -> None:
+        calls = []
+
+        def collector() -> str:
+            calls.append(1)
+            return str(len(calls))
+
+        with mock.patch.object(network_fingerprint, "NETWORK_FINGERPRINT_COLLECTORS", (collector,)), \
+                mock.patch.object(network_fingerprint, "_cached_fingerprint_time", 0.0):
+            first = network_fingerprint.current_network_fingerprint(max_age=60.0)
+            self.assertEqual(network_fingerprint.current_network_fingerprint(max_age=60.0), first)
+            self.assertNotEqual(network_fingerprint.current_network_fingerprint(max_age=0.0), first)
+        self.assertEqual(len(calls), 2)
+
+    def test_last_fingerprint_never_computes(self) -> None:
+        def collector() -> str:
+            raise AssertionError("collector called")
+
+        with mock.patch.object(network_fingerprint, "NETWORK_FINGERPRINT_COLLECTORS", (collector,)), \
+                mock.patch.object(network_fingerprint, "_cached_fingerprint_time", 0.0):
+            self.assertIsNone(network_fingerprint.last_network_fingerprint())
+        with mock.patch.object(network_fingerprint, "_cached_fingerprint", "old"), \
+                mock.patch.object(network_fingerprint, "_cached_fingerprint_time", 1.0):
+            # 即使已超过有效期，也只返回上一次的结果
+            self.assertEqual(network_fingerprint.last_network_fingerprint(), "old")
+            self.assertIsNone(network_fingerprint.last_network_fingerprint(max_age=15.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+import requests
+
+from app.sessions.common_session import CommonLoginSession
+from app.sessions.session_backend import AccessMode, SessionBackend
+from app.sessions.tracing import RequestTrace, RequestTracer, normalize_endpoint, percentile
+
+
+class TracingHandler(BaseHTTPRequestHandler):
+    """/expired 第一次返回统一认证页面，其余路径返回固定大小的 JSON。"""
+
+    protocol_version = "HTTP/1.1"
+    expired_left = 0
+
+    def do_GET(self) -> None:
+        if self.path.startswith("/expired") and TracingHandler.expired_left > 0:
+            TracingHandler.expired_left -= 1
+            body = "统一身份认证 cas/login id=\"fm1\" name=\"execution\"".encode()
+            content_type = "text/html"
+        else:
+            body = json.dumps({"data": "x" * 100}).encode()
+            content_type = "application/json"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+class TracedSession(CommonLoginSession):
+    site_key = "traced"
+    default_access_mode = AccessMode.NORMAL
+
+    def __init__(self, *args: object, **kwargs: object) -> None:
+        super().__init__(*args, **kwargs)
+        self.login_calls = 0
+
+    def _login(self, username: str, password: str, **kwargs: object) -> None:
+        self.login_calls += 1
+        self.has_login = True
+
+    def _re_login(self, username: str, password: str, **kwargs: object) -> None:
+        pass
+
+
+def make_trace(site: str = "lms", endpoint: str = "lms.xjtu.edu.cn/api", total: float = 0.1,
+               **kwargs: object) -> RequestTrace:
+    values = dict(site=site, method="GET", endpoint=endpoint, access_mode="normal", status=200, bytes=10,
+                  started_at=0.0, total=total, connect=0.0, ttfb=total, body=0.0)
+    values.update(kwargs)
+    return RequestTrace(**values)
+
+
+class RequestTracerTestCase(unittest.TestCase):
+    def test_normalize_endpoint(self) -> None:
+        self.assertEqual(normalize_endpoint("https://lms.xjtu.edu.cn/api/courses/12345/activities?page=2"),
+                         "lms.xjtu.edu.cn/api/courses/{id}/activities")
+        self.assertEqual(normalize_endpoint("http://gmis.xjtu.edu.cn:8080/files/0123456789abcdef0123#x"),
+                         "gmis.xjtu.edu.cn/files/{id}")
+        self.assertEqual(normalize_endpoint("https://jwxt.xjtu.edu.cn"), "jwxt.xjtu.edu.cn/")
+
+    def test_percentile(self) -> None:
+        values = [float(value) for value in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 99), 99.0)
+        self.assertEqual(percentile([3.0], 90), 3.0)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_ring_buffer_and_summary(self) -> None:
+        tracer = RequestTracer(capacity=3)
+        for total in (9.0, 1.0, 2.0, 3.0):
+            tracer.record(make_trace(total=total))
+        tracer.record(make_trace(site="jwxt", endpoint="jwxt.xjtu.edu.cn/", status=500, auth_retry=True))
+
+        self.assertEqual(len(tracer), 3)
+        self.assertEqual([trace.total for trace in tracer.traces("lms")], [2.0, 3.0])
+        summary = tracer.summary()
+        self.assertEqual([item["site"] for item in summary], ["lms", "jwxt"])
+        self.assertEqual((summary[0]["count"], summary[0]["p50"], summary[0]["p99"]), (2, 2.0, 3.0))
+        self.assertEqual((summary[1]["errors"], summary[1]["auth_retries"]), (1, 1))
+
+        tracer.enabled = False
+        tracer.record(make_trace())
+        self.assertEqual(len(tracer), 3)
+        tracer.clear()
+        self.assertEqual(tracer.traces(), [])
+
+    def test_export_to_file(self) -> None:
+        tracer = RequestTracer()
+        tracer.record(make_trace())
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "trace.json")
+            tracer.export_to_file(path)
+            with open(path, encoding="utf-8") as file:
+                exported = json.load(file)
+        self.assertEqual(exported["traces"][0]["endpoint"], "lms.xjtu.edu.cn/api")
+        self.assertEqual(exported["summary"][0]["count"], 1)
+
+
+class SessionTracingTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), TracingHandler)
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        TracingHandler.expired_left = 0
+        self.session = TracedSession(SessionBackend(AccessMode.NORMAL))
+        self.addCleanup(self.session.close)
+        self.session.tracer = RequestTracer()
+
+    def test_requests_are_traced(self) -> None:
+        self.session.get(self.url + "/items/42?full=1")
+        self.session.get(self.url + "/items/43")
+        first, second = self.session.tracer.traces()
+
+        self.assertEqual((first.site, first.method, first.endpoint, first.access_mode, first.status),
+                         ("traced", "GET", "127.0.0.1/items/{id}", "normal", 200))
+        self.assertEqual(first.bytes, len(json.dumps({"data": "x" * 100})))
+        self.assertGreater(first.connect, 0)
+        # 第二个请求复用了连接
+        self.assertEqual(second.connect, 0)
+        self.assertAlmostEqual(first.total, first.connect + first.ttfb + first.body, places=3)
+
+    def test_stream_request_uses_content_length(self) -> None:
+        response = self.session.get(self.url + "/stream", stream=True)
+        trace = self.session.tracer.traces()[0]
+        self.assertEqual(trace.bytes, int(response.headers["Content-Length"]))
+        self.assertEqual(trace.body, 0)
+        response.close()
+
+    def test_failed_request_is_traced(self) -> None:
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        with self.assertRaises(requests.ConnectionError):
+            self.session.get(f"http://127.0.0.1:{port}/", timeout=2)
+        trace = self.session.tracer.traces()[0]
+        self.assertIsNone(trace.status)
+        self.assertEqual(trace.error, "ConnectionError")
+
+    def test_auth_retry_is_traced(self) -> None:
+        self.session.ensure_login("user", "password")
+        self.session._ensure_login_context_matches_current_account = lambda context: None
+        TracingHandler.expired_left = 1
+
+        self.session.get(self.url + "/expired")
+        failed, retried = self.session.tracer.traces()
+        self.assertEqual((failed.auth_failed, failed.auth_retry), (True, False))
+        self.assertEqual((retried.auth_failed, retried.auth_retry), (False, True))
+        self.assertEqual(self.session.login_calls, 2)
+
+    def test_tracing_can_be_disabled(self) -> None:
+        self.session.tracer = None
+        self.assertEqual(self.session.get(self.url + "/").status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
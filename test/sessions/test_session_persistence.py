@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+import unittest
+from http.cookiejar import LWPCookieJar
+from unittest import mock
+
+from requests.cookies import create_cookie
+
+import app.utils.session_persistence as persistence
+from app.sessions.session_backend import AccessMode
+from app.utils.account import Account
+from app.utils.config import cfg
+from app.utils.session_manager import SessionManager
+from app.utils.session_persistence import (
+    AccountSessionSnapshot,
+    BackendSnapshot,
+    SessionPersistenceStore,
+    SiteSnapshot,
+    bytes_to_cookie_jar,
+    cookie_jar_to_bytes,
+    cookie_jar_to_lwp_text,
+    decode_snapshot_bundle,
+    encode_snapshot_bundle,
+)
+
+
+def make_jar() -> LWPCookieJar:
+    """构造包含各种 cookie 属性的 cookie jar。"""
+    jar = LWPCookieJar()
+    jar.set_cookie(create_cookie("CASTGC", "TGT-1", domain=".xjtu.edu.cn", expires=int(time.time()) + 600,
+                                 secure=True, rest={"HttpOnly": None}))
+    jar.set_cookie(create_cookie("session", "中文值", domain="lms.xjtu.edu.cn", path="/api"))
+    jar.set_cookie(create_cookie("empty", None, domain="jwxt.xjtu.edu.cn", discard=True))
+    return jar
+
+
+def cookie_attributes(jar: LWPCookieJar) -> list[list[tuple[str, object]]]:
+    """把 cookie jar 转换为可比较的属性列表。"""
+    return sorted(sorted(vars(cookie).items()) for cookie in jar)
+
+
+class CookieBinaryFormatTestCase(unittest.TestCase):
+    def test_round_trip_keeps_all_attributes(self) -> None:
+        jar = make_jar()
+        data = cookie_jar_to_bytes(jar)
+
+        self.assertEqual(cookie_attributes(bytes_to_cookie_jar(data)), cookie_attributes(jar))
+        self.assertLess(len(data), len(cookie_jar_to_lwp_text(jar).encode("utf-8")))
+        self.assertEqual(list(bytes_to_cookie_jar(cookie_jar_to_bytes(LWPCookieJar()))), [])
+
+    def test_corrupted_data_is_rejected(self) -> None:
+        data = cookie_jar_to_bytes(make_jar())
+        self.assertIsNone(bytes_to_cookie_jar(data[:-2]))
+        self.assertIsNone(bytes_to_cookie_jar(b"#LWP-Cookies-2.0\n"))
+
+    def test_bundle_round_trip_and_legacy_lwp_conversion(self) -> None:
+        jar = make_jar()
+        snapshot = AccountSessionSnapshot(
+            version=SessionPersistenceStore.VERSION,
+            account_uuid="uuid",
+            saved_at=1.0,
+            backends={
+                "normal": BackendSnapshot("normal", None, None, "ua", "id", 1.0, cookie_data=cookie_jar_to_bytes(jar)),
+                "webvpn": BackendSnapshot("webvpn", cookie_jar_to_lwp_text(jar), None, "ua", "id", 1.0),
+            },
+            sites={"lms": SiteSnapshot("lms", "normal", {"Authorization": "x"}, 2.0, last_validated_at=3.0)},
+        )
+        data = encode_snapshot_bundle(snapshot)
+        decoded = decode_snapshot_bundle(data)
+
+        self.assertEqual(decoded.sites, snapshot.sites)
+        self.assertEqual(decoded.backends["normal"].cookie_data, snapshot.backends["normal"].cookie_data)
+        self.assertEqual(len(list(bytes_to_cookie_jar(decoded.backends["webvpn"].cookie_data))), 3)
+        self.assertIsNone(decode_snapshot_bundle(data[:-1]))
+
+
+class SessionPersistenceStoreTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        for target in ("app.utils.cache.DEFAULT_DATA_DIRECTORY", "app.utils.session_persistence.SESSION_DATA_DIRECTORY"):
+            patcher = mock.patch(target, self.directory)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self._original_use_keyring = cfg.useKeyring.value
+        self.addCleanup(setattr, cfg.useKeyring, "value", self._original_use_keyring)
+        cfg.useKeyring.value = False
+        self.account = Account("2220000000", "password")
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.directory, self.account.uuid, filename)
+
+    def _manager_with_cookie(self) -> SessionManager:
+        manager = SessionManager()
+        manager.get_backend(AccessMode.NORMAL).session.cookies.set_cookie(
+            create_cookie("CASTGC", "TGT-1", domain=".xjtu.edu.cn"))
+        return manager
+
+    def test_save_writes_single_bundle_only_when_changed(self) -> None:
+        manager = self._manager_with_cookie()
+
+        self.assertTrue(manager.save_persisted_state(self.account))
+        self.assertEqual(os.listdir(os.path.join(self.directory, self.account.uuid)), ["sessions.bin"])
+        self.assertFalse(manager.save_persisted_state(self.account))
+
+        manager.get_backend(AccessMode.NORMAL).session.cookies.set_cookie(
+            create_cookie("route", "2", domain="lms.xjtu.edu.cn"))
+        self.assertTrue(manager.save_persisted_state(self.account))
+
+        restored = SessionManager()
+        restored.restore_persisted_state(self.account)
+        cookies = {cookie.name for cookie in restored.get_backend(AccessMode.NORMAL).session.cookies}
+        self.assertEqual(cookies, {"CASTGC", "route"})
+        self.assertFalse(restored.save_persisted_state(self.account))
+
+        restored.clear_persisted_session_state(self.account)
+        self.assertFalse(os.path.exists(self._path("sessions.bin")))
+        self.assertTrue(restored.save_persisted_state(self.account))
+
+    def test_legacy_files_are_read_and_replaced(self) -> None:
+        jar = make_jar()
+        legacy = SessionManager()
+        snapshot = AccountSessionSnapshot(
+            version=SessionPersistenceStore.VERSION,
+            account_uuid=self.account.uuid,
+            saved_at=1.0,
+            backends={
+                mode.value: BackendSnapshot(mode.value, None, f"sessions_{mode.value}.lwp",
+                                            str(cfg.userAgent.value), str(cfg.loginId.value), 1.0)
+                for mode in legacy.backends
+            },
+            sites={},
+        )
+        os.makedirs(os.path.join(self.directory, self.account.uuid))
+        with open(self._path("sessions.json"), "w", encoding="utf-8") as file:
+            file.write(persistence.json.dumps(snapshot.to_dict()))
+        for mode in legacy.backends:
+            with open(self._path(f"sessions_{mode.value}.lwp"), "w", encoding="utf-8") as file:
+                file.write(cookie_jar_to_lwp_text(jar))
+
+        legacy.restore_persisted_state(self.account)
+        self.assertEqual(len(list(legacy.get_backend(AccessMode.WEBVPN).session.cookies)), 3)
+
+        self.assertTrue(legacy.save_persisted_state(self.account))
+        self.assertEqual(os.listdir(os.path.join(self.directory, self.account.uuid)), ["sessions.bin"])
+
+    def test_encrypted_bundle_requires_matching_account(self) -> None:
+        key = os.urandom(persistence.SESSION_AES_KEY_LENGTH)
+        cfg.useKeyring.value = True
+        with mock.patch.object(persistence, "_get_or_create_aes_key", return_value=key), \
+                mock.patch.object(persistence, "_load_aes_key", return_value=key):
+            self._manager_with_cookie().save_persisted_state(self.account)
+            with open(self._path("sessions.bin"), "rb") as file:
+                raw = file.read()
+            self.assertTrue(raw.startswith(persistence.SESSION_BUNDLE_ENCRYPTED_MAGIC))
+            self.assertNotIn(b"CASTGC", raw)
+
+            store = SessionPersistenceStore()
+            self.assertIsNotNone(store.load_account_snapshot(self.account))
+            other = Account("2220000001", "password")
+            self.assertIsNone(store._snapshot_from_bundle(other, raw))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import time
+import unittest
+
+import requests
+
+from app.sessions.session_backend import AccessMode, SessionBackend
+from app.sessions.transport import MeteredHTTPAdapter, SessionTransport, TransportConfig
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """前几次请求返回 503，随后返回 200 的测试服务器；/slow 会等待一段时间再响应。"""
+
+    protocol_version = "HTTP/1.1"
+    failures_left = 0
+    slow_requests = 0
+    lock = threading.Lock()
+
+    def do_GET(self) -> None:
+        if self.path == "/slow":
+            with self.lock:
+                FlakyHandler.slow_requests += 1
+            time.sleep(0.2)
+        with self.lock:
+            fail = FlakyHandler.failures_left > 0
+            if fail:
+                FlakyHandler.failures_left -= 1
+        self._reply(503 if fail else 200)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        with self.lock:
+            fail = FlakyHandler.failures_left > 0
+            if fail:
+                FlakyHandler.failures_left -= 1
+        self._reply(503 if fail else 200)
+
+    def _reply(self, status: int) -> None:
+        body = self.headers.get("Connection", "keep-alive").encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+class TransportTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        FlakyHandler.failures_left = 0
+        FlakyHandler.slow_requests = 0
+
+    def _session(self, config: TransportConfig) -> tuple[requests.Session, SessionTransport]:
+        session = requests.Session()
+        transport = SessionTransport(config)
+        transport.mount(session)
+        self.addCleanup(session.close)
+        return session, transport
+
+    def test_backend_mounts_shared_transport(self) -> None:
+        backend = SessionBackend(AccessMode.NORMAL)
+        self.addCleanup(backend.close)
+        self.assertIsInstance(backend.session.get_adapter("https://lms.xjtu.edu.cn/"), MeteredHTTPAdapter)
+        self.assertIs(backend.session.get_adapter("http://a/"), backend.session.get_adapter("https://b/"))
+        self.assertEqual(backend.transport.adapter._pool_maxsize, TransportConfig().pool_maxsize)
+
+    def test_idempotent_requests_are_retried_with_backoff(self) -> None:
+        session, transport = self._session(TransportConfig(max_retries=2, backoff_factor=0))
+        FlakyHandler.failures_left = 2
+        self.assertEqual(session.get(self.url + "/").status_code, 200)
+        self.assertEqual(transport.stats.snapshot()["retries"], 2)
+
+        FlakyHandler.failures_left = 3
+        self.assertEqual(session.get(self.url + "/").status_code, 503)
+
+    def test_post_is_not_retried_on_status(self) -> None:
+        session, transport = self._session(TransportConfig(max_retries=2, backoff_factor=0))
+        FlakyHandler.failures_left = 1
+        self.assertEqual(session.post(self.url + "/", data=b"x").status_code, 503)
+        self.assertEqual(transport.stats.snapshot()["retries"], 0)
+
+    def test_read_timeouts_are_retried_only_when_enabled(self) -> None:
+        # 默认只重试连接错误与 503 等状态码，读取超时直接失败，异常类型与不重试时相同
+        session, transport = self._session(TransportConfig(max_retries=2, backoff_factor=0))
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            session.get(self.url + "/slow", timeout=0.05)
+        self.assertEqual((FlakyHandler.slow_requests, transport.stats.snapshot()["retries"]), (1, 0))
+
+        FlakyHandler.slow_requests = 0
+        session, transport = self._session(TransportConfig(max_retries=2, backoff_factor=0, retry_read_timeouts=True))
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            session.get(self.url + "/slow", timeout=0.05)
+        self.assertEqual(transport.stats.snapshot()["retries"], 2)
+
+    def test_pool_exhaustion_is_counted(self) -> None:
+        session, transport = self._session(TransportConfig(pool_maxsize=2, max_retries=0))
+        threads = [threading.Thread(target=session.get, args=(self.url + "/slow",)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = transport.stats.snapshot()
+        self.assertEqual(stats["requests"], 5)
+        self.assertGreaterEqual(stats["peak_in_flight"], 3)
+        self.assertGreaterEqual(stats["pool_exhausted"], 1)
+        self.assertEqual(sum(stats["exhausted_by_host"].values()), stats["pool_exhausted"])
+
+        transport.stats.reset()
+        session.get(self.url + "/")
+        self.assertEqual(transport.stats.snapshot()["pool_exhausted"], 0)
+
+    def test_keep_alive_can_be_disabled(self) -> None:
+        session, _ = self._session(TransportConfig(keep_alive=False))
+        self.assertEqual(session.get(self.url + "/").text, "close")
+
+    def test_custom_adapter_factory(self) -> None:
+        created = []
+
+        def factory(config, stats):
+            adapter = MeteredHTTPAdapter(config, stats)
+            created.append(adapter)
+            return adapter
+
+        session, transport = self._session(TransportConfig(adapter_factory=factory))
+        self.assertEqual(created, [transport.adapter])
+        self.assertIs(session.get_adapter(self.url), transport.adapter)
+
+
+if __name__ == "__main__":
+    unittest.main()
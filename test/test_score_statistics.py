@@ -0,0 +1,85 @@
+import math
+import unittest
+
+from score_statistics import ScoreSelection, ScoreTable, calculate_score_statistics
+from scripts.bench_score_statistics import loop_statistics, selections, synthesize_scores
+
+
+def _score(credit, score, gpa, term="2024-2025-1", flag="必修"):
+    return {"coursePoint": credit, "score": score, "gpa": gpa, "term": term, "majorFlag": flag}
+
+
+class ScoreTableTest(unittest.TestCase):
+    def setUp(self):
+        self.scores = [
+            _score(4, 90, 4.0),
+            _score(2, 80, 3.0, flag="选修"),
+            _score(1, "通过", None, term="2024-2025-2"),
+            _score(0, 95, 4.3, term="2024-2025-2"),
+            _score(3, 70, 2.0, term="2024-2025-2"),
+        ]
+        self.table = ScoreTable(self.scores)
+
+    def test_same_result_as_row_loop(self):
+        # 与原先逐行计算的结果一致，包括 0 学分与缺少绩点的课程
+        scores = synthesize_scores(500, seed=3)
+        statistics = calculate_score_statistics(scores)
+        credit, gpa, incomplete = loop_statistics(scores)
+        self.assertAlmostEqual(credit, statistics.total_credit)
+        self.assertAlmostEqual(gpa, statistics.weighted_gpa)
+        self.assertEqual(incomplete, statistics.incomplete_count)
+        self.assertIsNone(calculate_score_statistics([_score(0, 90, 4.0), "not a row"]))
+
+    def test_indices_keep_positions(self):
+        table = ScoreTable(["not a row", *self.scores])
+        self.assertEqual(self.table.statistics([0, 1]), table.statistics([1, 2]))
+        self.assertEqual(self.table.statistics(), table.statistics())
+
+    def test_incremental_selection(self):
+        scores = synthesize_scores(300, seed=1)
+        selection = ScoreSelection(ScoreTable(scores))
+        for rows in [*selections(300, 20, seed=2), list(range(300)), [7], []]:
+            expected = calculate_score_statistics([scores[index] for index in rows])
+            actual = selection.update(rows)
+            if expected is None:
+                self.assertIsNone(actual)
+                continue
+            self.assertTrue(math.isclose(expected.weighted_gpa, actual.weighted_gpa, rel_tol=1e-9))
+            self.assertTrue(math.isclose(expected.total_credit, actual.total_credit, rel_tol=1e-9))
+            self.assertEqual((expected.incomplete_count, expected.course_count),
+                             (actual.incomplete_count, actual.course_count))
+
+    def test_selection_emptied_after_changes_is_none(self):
+        # 加入、移除若干行后回到空选择，不应因浮点误差得到 0 学分的统计
+        scores = [_score(0.1, 90, 4.0), _score(0.2, 80, 3.0)] + [_score(3, 85, 3.7) for _ in range(8)]
+        selection = ScoreSelection(ScoreTable(scores))
+        for rows in ([0], [0, 1], [1]):
+            self.assertIsNotNone(selection.update(rows))
+        self.assertIsNone(selection.update([]))
+        self.assertIsNone(calculate_score_statistics([]))
+        self.assertAlmostEqual(0.2, selection.update([1]).total_credit)
+
+    def test_grouped(self):
+        terms = self.table.grouped("term")
+        self.assertEqual(["2024-2025-1", "2024-2025-2"], sorted(terms))
+        self.assertAlmostEqual(11 / 3, terms["2024-2025-1"].weighted_gpa)
+        self.assertEqual((4, 2, 2.0), (terms["2024-2025-2"].total_credit, terms["2024-2025-2"].incomplete_count,
+                                       terms["2024-2025-2"].weighted_gpa))
+        types = self.table.grouped("type")
+        self.assertEqual({"必修": 8, "选修": 2}, {key: value.total_credit for key, value in types.items()})
+
+    def test_what_if(self):
+        current = self.table.statistics()
+        projected = self.table.what_if([{"coursePoint": 3, "score": 95}, {"coursePoint": 2, "gpa": 4.0}])
+        self.assertEqual(current.total_credit + 5, projected.total_credit)
+        self.assertAlmostEqual((current.weighted_gpa * 9 + 4.3 * 3 + 4.0 * 2) / 14, projected.weighted_gpa)
+        self.assertEqual(current.incomplete_count + 1, projected.incomplete_count)
+
+        needed = self.table.required_gpa(3.5, 10)
+        projected = self.table.what_if([{"coursePoint": 10, "score": 0, "gpa": needed}])
+        self.assertAlmostEqual(3.5, projected.weighted_gpa)
+        self.assertIsNone(self.table.required_gpa(3.5, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
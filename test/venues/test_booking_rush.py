@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import unittest
+from unittest import mock
+
+from app.venues.rush import BookingRush, CaptchaPolicy, booking_outcome
+from app.venues.venue import AreaSlot, VenueAPIError
+from captcha_solver import rank_gaps
+from scripts.captcha_corpus import synthesize
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class FakeVenueUtil:
+    """放号时刻 opens_at 之前查询时段返回提示页，之后返回 slots。"""
+
+    def __init__(self, clock: FakeClock, opens_at: float, slots: list[AreaSlot], results: list[dict]):
+        self.clock = clock
+        self.opens_at = opens_at
+        self.slots = slots
+        self.results = results
+        self.polls: list[float] = []
+        self.bookings: list[tuple[float, list, str]] = []
+
+    def get_available_slots(self, service_id: int, date_str: str) -> list[AreaSlot]:
+        self.polls.append(self.clock())
+        self.clock.now += 0.05
+        if self.clock() < self.opens_at:
+            raise VenueAPIError("未到可预订时间")
+        return self.slots
+
+    def book(self, service_id: int, selections: list, yzm: str) -> dict:
+        self.bookings.append((self.clock(), selections, yzm))
+        self.clock.now += 0.1
+        return self.results.pop(0)
+
+
+def slot(area_id: int, area_name: str, time_slot: str, status: int = 1) -> AreaSlot:
+    return AreaSlot(area_id, area_name, area_id * 10, time_slot, 20.0, "2026-10-26", status)
+
+
+class BookingRushTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.captchas = [(f"c{index}", sample.background, sample.slider)
+                        for index, sample in enumerate(synthesize(8, seed=11))]
+
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.fetched_at: list[float] = []
+
+        def fetch_captcha(session):
+            self.fetched_at.append(self.clock())
+            self.clock.now += 0.2
+            return self.captchas[len(self.fetched_at) - 1]
+
+        patcher = mock.patch("captcha_solver.fetch_captcha", side_effect=fetch_captcha)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _rush(self, util: FakeVenueUtil, wanted, release_at: float, **kwargs) -> BookingRush:
+        return BookingRush(util, None, 7, "2026-10-26", wanted, release_at,
+                           clock=self.clock, sleep=self.clock.sleep, **kwargs)
+
+    def test_books_with_pre_solved_captcha_when_slots_open(self) -> None:
+        release = self.clock() + 120
+        slots = [slot(1, "场地1", "18:30-19:30", status=2), slot(2, "场地2", "18:30-19:30"),
+                 slot(3, "场地1", "19:30-20:30")]
+        util = FakeVenueUtil(self.clock, release + 1.0, slots,
+                             [{"result": "2", "object": {"orderid": "A1", "price": 20}}])
+        stages = []
+        report = self._rush(util, [("18:30-19:30", None), ("19:30-20:30", "场地1")], release).run(
+            lambda stage, seconds: stages.append(stage))
+
+        self.assertEqual(report.outcome, "booked")
+        self.assertEqual(report.selections, [(2, 20), (3, 30)])
+        # 验证码全部在放号前获取，放号后的预订没有等待验证码
+        self.assertTrue(self.fetched_at)
+        self.assertTrue(all(release - 15 <= at < release for at in self.fetched_at))
+        self.assertGreaterEqual(util.polls[0], release)
+        self.assertEqual(len(util.bookings), 1)
+        self.assertLess(util.bookings[0][0] - release, 1.5)
+        self.assertEqual(report.submissions, 1)
+        self.assertEqual(set(report.stages), {"prefetch", "open", "book", "release_to_result"})
+        self.assertEqual(report.pool["fetched"], len(self.fetched_at))
+        self.assertEqual([stages[0], stages[-2], stages[-1]], ["waiting", "polling", "booking"])
+
+    def test_expired_captchas_are_replaced_before_release(self) -> None:
+        release = self.clock() + 200
+        util = FakeVenueUtil(self.clock, release, [slot(2, "场地2", "18:30-19:30")],
+                             [{"result": "2", "object": {"orderid": "A2"}}])
+        rush = self._rush(util, [("18:30-19:30", None)], release, lead=70.0, pool_size=2)
+        report = rush.run()
+
+        self.assertEqual(report.outcome, "booked")
+        self.assertGreaterEqual(report.pool["expired"], 2)
+        first_yzm_id = util.bookings[0][2].rsplit("synjones", 2)[1]
+        used = self.fetched_at[int(first_yzm_id[1:])]
+        self.assertLess(release - used, rush.pool.ttl)
+
+    def test_captcha_rejection_uses_next_captcha(self) -> None:
+        release = self.clock() + 5
+        util = FakeVenueUtil(self.clock, release, [slot(2, "场地2", "18:30-19:30")],
+                             [{"result": "100", "message": "验证码有误"},
+                              {"result": "1", "message": "该时段已被预订"}])
+        report = self._rush(util, [("18:30-19:30", "场地2")], release).run()
+
+        self.assertEqual(report.outcome, "failed")
+        self.assertEqual(report.submissions, 2)
+        yzm_ids = [yzm.rsplit("synjones", 2)[1] for _, _, yzm in util.bookings]
+        # 每张验证码只提交一次，被拒绝后换下一张
+        self.assertNotEqual(yzm_ids[0], yzm_ids[1])
+
+    def test_ranked_policy_retries_runner_up_of_same_captcha(self) -> None:
+        release = self.clock() + 5
+        util = FakeVenueUtil(self.clock, release, [slot(2, "场地2", "18:30-19:30")],
+                             [{"result": "100", "message": "验证码有误"},
+                              {"result": "2", "object": {"orderid": "A3"}}])
+        report = self._rush(util, [("18:30-19:30", "场地2")], release,
+                            captcha_policy=CaptchaPolicy(rank_gaps, 2)).run()
+
+        self.assertEqual(report.outcome, "booked")
+        yzm_ids = [yzm.rsplit("synjones", 2)[1] for _, _, yzm in util.bookings]
+        # 第一个位置被拒绝后提交同一张验证码的第二个候选位置
+        self.assertEqual(yzm_ids[0], yzm_ids[1])
+        self.assertNotEqual(util.bookings[0][2], util.bookings[1][2])
+
+    def test_gives_up_when_slots_never_open(self) -> None:
+        release = self.clock() + 5
+        util = FakeVenueUtil(self.clock, release + 1000, [], [])
+        report = self._rush(util, [("18:30-19:30", None)], release, window=10.0).run()
+
+        self.assertEqual(report.outcome, "not_open")
+        self.assertGreater(report.polls, 10)
+        self.assertEqual(util.bookings, [])
+
+    def test_abort_while_waiting(self) -> None:
+        util = FakeVenueUtil(self.clock, 0, [], [])
+        ticks = []
+        report = self._rush(util, [("18:30-19:30", None)], self.clock() + 3600).run(
+            lambda stage, seconds: ticks.append(seconds), aborted=lambda: len(ticks) >= 3)
+
+        self.assertEqual(report.outcome, "aborted")
+        self.assertEqual(self.fetched_at, [])
+
+    def test_booking_outcome(self) -> None:
+        self.assertEqual(booking_outcome({"result": "2"}), "booked")
+        self.assertEqual(booking_outcome({"result": "1", "object": {"orderid": "X"}}), "booked")
+        self.assertEqual(booking_outcome({"result": "100", "message": "验证码有误"}), "captcha")
+        self.assertEqual(booking_outcome({"result": "1", "message": "已满"}), "failed")
+
+
+if __name__ == "__main__":
+    unittest.main()
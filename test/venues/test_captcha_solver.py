@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import requests
+
+from captcha_solver import CaptchaAttempts, CaptchaPool, GapCandidate, detect_gap, find_gaps, ncc_scores, rank_gaps
+from scripts.bench_captcha_solver import evaluate, loop_detect_gap
+from scripts.captcha_corpus import load_corpus, save_sample, synthesize, synthesize_sample
+
+
+class CaptchaSolverTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.samples = synthesize(30, seed=7)
+
+    def test_vectorized_matcher_agrees_with_loop(self) -> None:
+        for sample in self.samples[:10]:
+            with self.subTest(sample=sample.name):
+                move_x, _ = detect_gap(sample.background, sample.slider)
+                self.assertEqual(move_x, loop_detect_gap(sample.background, sample.slider))
+
+    def test_ncc_scores_match_direct_computation(self) -> None:
+        rng = np.random.default_rng(1)
+        band = (rng.random((20, 90)) > 0.7).astype(np.float32)
+        template = band[:, 40:65].copy()
+        scores = ncc_scores(band, template)
+
+        self.assertEqual(scores.shape, (66,))
+        tmpl = template - template.mean()
+        for x in (0, 17, 40, 65):
+            win = band[:, x:x + 25] - band[:, x:x + 25].mean()
+            expected = (win * tmpl).sum() / ((np.sqrt((tmpl * tmpl).sum()) + 1e-6) * (np.sqrt((win * win).sum()) + 1e-6))
+            self.assertAlmostEqual(scores[x], expected, places=5)
+        self.assertEqual(int(scores.argmax()), 40)
+        self.assertEqual(ncc_scores(band[:, :10], template).size, 0)
+
+    def test_candidates_are_ranked_and_distinct(self) -> None:
+        hits = 0
+        for sample in self.samples:
+            candidates = find_gaps(sample.background, sample.slider, top_k=3, min_distance=20)
+            self.assertEqual(len(candidates), 3)
+            confidences = [candidate.confidence for candidate in candidates]
+            self.assertEqual(confidences, sorted(confidences, reverse=True))
+            offsets = sorted(candidate.x for candidate in candidates)
+            self.assertTrue(all(b - a >= 20 for a, b in zip(offsets, offsets[1:])))
+            hits += sample.is_hit(candidates[0].move_x)
+        self.assertGreaterEqual(hits / len(self.samples), 0.9)
+
+    def test_empty_slider(self) -> None:
+        sample = self.samples[0]
+        empty = np.zeros_like(sample.slider)
+        self.assertEqual(find_gaps(sample.background, empty), [])
+        self.assertEqual(detect_gap(sample.background, empty), (0, 0.0))
+
+    def test_corpus_round_trip(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            for sample in self.samples[:3]:
+                save_sample(directory, sample)
+            save_sample(directory, self.samples[0])
+            loaded = load_corpus(directory)
+
+        self.assertEqual([sample.name for sample in loaded], [s.name for s in self.samples[1:3]] + [self.samples[0].name])
+        for sample in loaded:
+            original = next(s for s in self.samples if s.name == sample.name)
+            self.assertEqual(sample.offset, original.offset)
+            np.testing.assert_array_equal(sample.background, original.background)
+            np.testing.assert_array_equal(sample.slider, original.slider)
+
+    def test_corpus_replay_reports_accuracy_latency_and_memory(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            for sample in self.samples[:8]:
+                save_sample(directory, sample)
+            results = evaluate(load_corpus(directory), top_k=3, tolerance=4, repeat=1, compare_loop=False)
+
+        detect, track, solve, ranked = results
+        self.assertEqual(detect["samples"], 8)
+        self.assertGreaterEqual(detect["top3_accuracy"], detect["top1_accuracy"])
+        self.assertGreaterEqual(detect["top1_accuracy"], 0.75)
+        self.assertEqual(track["invalid_tracks"], 0)
+        self.assertGreater(solve["peak_kib"], 0)
+        self.assertLessEqual(solve["p50_ms"], solve["p99_ms"])
+
+    def test_ranked_candidates_reject_decoy_gaps(self) -> None:
+        rng = np.random.default_rng(5)
+        samples = [synthesize_sample(rng, str(index), decoy=True) for index in range(40)]
+        edge_hits = sum(sample.is_hit(find_gaps(sample.background, sample.slider, top_k=1)[0].move_x)
+                        for sample in samples)
+        ranked_hits = sum(sample.is_hit(rank_gaps(sample.background, sample.slider)[0].move_x)
+                          for sample in samples)
+        self.assertGreaterEqual(ranked_hits, edge_hits)
+        self.assertGreaterEqual(ranked_hits / len(samples), 0.95)
+
+    def test_attempts_try_runners_up_before_fetching_again(self) -> None:
+        fetched = [("a", self.samples[0].background, self.samples[0].slider), requests.ConnectionError("offline"),
+                   ("b", self.samples[1].background, self.samples[1].slider)]
+        with mock.patch("captcha_solver.fetch_captcha", side_effect=fetched):
+            attempts = CaptchaAttempts(budget=60, fetches=3, candidates=2, ranker=rank_gaps)
+            tried = [(yzm.rsplit("synjones", 2)[1], candidate) for yzm, candidate in attempts]
+
+        self.assertEqual([captcha_id for captcha_id, _ in tried], ["a", "a", "b", "b"])
+        self.assertTrue(all(isinstance(candidate, GapCandidate) for _, candidate in tried))
+        self.assertEqual(attempts.fetch_errors, 1)
+
+    def test_attempts_submit_each_captcha_once_by_default(self) -> None:
+        fetched = [(name, sample.background, sample.slider) for name, sample in zip("ab", self.samples)]
+        with mock.patch("captcha_solver.fetch_captcha", side_effect=fetched), \
+                mock.patch("captcha_solver.rank_gaps") as ranked:
+            tried = [(yzm.rsplit("synjones", 2)[1], candidate) for yzm, candidate in
+                     CaptchaAttempts(budget=60, fetches=2)]
+
+        self.assertEqual([captcha_id for captcha_id, _ in tried], ["a", "b"])
+        # 默认使用 find_gaps，rank_gaps 需要显式启用
+        ranked.assert_not_called()
+        self.assertEqual(tried[0][1], find_gaps(self.samples[0].background, self.samples[0].slider, top_k=1)[0])
+
+    def test_attempts_stop_when_budget_is_spent(self) -> None:
+        now = [0.0]
+        captcha = ("a", self.samples[0].background, self.samples[0].slider)
+        with mock.patch("captcha_solver.fetch_captcha", return_value=captcha) as fetch:
+            attempts = CaptchaAttempts(budget=10, fetches=3, candidates=2, clock=lambda: now[0])
+            tried = 0
+            for _ in attempts:
+                tried += 1
+                now[0] += 4
+        # 0 秒和 4 秒时提交第一张验证码的两个候选，8 秒时换一张，12 秒时超出预算
+        self.assertEqual(tried, 3)
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_pool_hands_out_fresh_captchas_first(self) -> None:
+        now = [0.0]
+        captchas = [(name, sample.background, sample.slider) for name, sample in zip("abcd", self.samples)]
+        with mock.patch("captcha_solver.fetch_captcha", side_effect=captchas):
+            pool = CaptchaPool(size=2, ttl=30, clock=lambda: now[0])
+            self.assertEqual(pool.fill(), 2)
+            now[0] = 20
+            self.assertEqual(pool.fill(), 0)
+            now[0] = 40
+            # 两张验证码都已过期，补充两张新的
+            self.assertEqual(len(pool), 0)
+            self.assertEqual(pool.fill(), 2)
+            attempts = CaptchaAttempts(budget=60, fetches=0, clock=lambda: now[0], pool=pool)
+            tried = [yzm.rsplit("synjones", 2)[1] for yzm, _ in attempts]
+
+        self.assertEqual(tried, ["c", "d"])
+        stats = pool.stats()
+        self.assertEqual((stats["fetched"], stats["expired"], stats["ready"]), (4, 2, 0))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import threading
+import time
+import unittest
+
+from app.venues.scanner import AvailabilityIndex, RateLimiter, SlotScanner
+from app.venues.venue import AreaSlot, VenueAPIError, VenueInfo
+
+
+def slot(area_id: int, area_name: str, time_slot: str, date_str: str, status: int = 1) -> AreaSlot:
+    return AreaSlot(area_id, area_name, area_id * 100, time_slot, 20.0, date_str, status)
+
+
+class FakeVenueUtil:
+    def __init__(self, slots: dict[tuple[int, str], list[AreaSlot]], latency: float = 0.0):
+        self.slots = slots
+        self.latency = latency
+        self.calls: list[tuple[int, str]] = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def get_available_slots(self, service_id: int, date_str: str) -> list[AreaSlot]:
+        with self._lock:
+            self.calls.append((service_id, date_str))
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.latency)
+            if (service_id, date_str) not in self.slots:
+                raise VenueAPIError("未到可预订时间")
+            return list(self.slots[(service_id, date_str)])
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+BADMINTON = VenueInfo(1, "羽毛球馆")
+TENNIS = VenueInfo(2, "网球场")
+DAY1, DAY2 = "2026-10-20", "2026-10-21"
+
+
+class SlotScannerTestCase(unittest.TestCase):
+    def _slots(self) -> dict:
+        return {
+            (1, DAY1): [slot(11, "场地1", "18:30-19:30", DAY1), slot(12, "场地2", "18:30-19:30", DAY1, status=2),
+                        slot(13, "场地3", "9:00-10:00", DAY1)],
+            (1, DAY2): [slot(11, "场地1", "20:30-21:30", DAY2)],
+            (2, DAY1): [slot(21, "网球1号", "19:00-20:00", DAY1)],
+        }
+
+    def test_scan_builds_index_and_answers_queries(self) -> None:
+        util = FakeVenueUtil(self._slots(), latency=0.05)
+        scanner = SlotScanner(util, max_workers=6, rate=1000)
+        report = scanner.scan([BADMINTON, TENNIS], [DAY1, DAY2])
+
+        self.assertEqual(report.requests, 4)
+        self.assertEqual(report.errors, 1)  # 网球场第二天未开放
+        self.assertEqual(report.changes, [])
+        self.assertGreater(util.max_active, 1)
+        self.assertLess(report.elapsed, 0.05 * 4)
+
+        evening = scanner.index.query("羽毛球", date_str=DAY1, start_after="18:00")
+        self.assertEqual([(venue.id, s.area_name) for venue, s in evening], [(1, "场地1")])
+        # 9:00 补齐为 09:00 后参与比较
+        morning = scanner.index.query(start_before="12:00")
+        self.assertEqual([s.area_id for _, s in morning], [13])
+        every = scanner.index.query()
+        self.assertEqual([s.area_id for _, s in every], [13, 11, 21, 11])
+        self.assertEqual([s.area_id for _, s in scanner.index.query("网球1号")], [21])
+        self.assertEqual(len(scanner.index.slots(1, DAY1, "18:30-19:30")), 1)
+
+    def test_rescan_reports_opened_and_taken_slots(self) -> None:
+        slots = self._slots()
+        util = FakeVenueUtil(slots)
+        scanner = SlotScanner(util, rate=1000)
+        scanner.scan([BADMINTON], [DAY1])
+
+        slots[(1, DAY1)] = [slot(12, "场地2", "18:30-19:30", DAY1), slot(13, "场地3", "9:00-10:00", DAY1)]
+        notified = []
+        report = scanner.scan([BADMINTON], [DAY1], on_change=notified.append)
+
+        self.assertEqual(sorted((c.kind, c.slot.area_id) for c in report.changes), [("opened", 12), ("taken", 11)])
+        self.assertEqual(notified, [report.changes])
+        self.assertEqual([s.area_id for _, s in scanner.index.query(date_str=DAY1)], [13, 12])
+
+    def test_failed_query_keeps_previous_slots(self) -> None:
+        slots = self._slots()
+        scanner = SlotScanner(FakeVenueUtil(slots), rate=1000)
+        scanner.scan([BADMINTON], [DAY1])
+        del slots[(1, DAY1)]
+        report = scanner.scan([BADMINTON], [DAY1])
+
+        self.assertEqual(report.errors, 1)
+        self.assertEqual(len(scanner.index.query(date_str=DAY1)), 2)
+
+    def test_rate_limiter_spaces_requests(self) -> None:
+        now = [0.0]
+        waits = []
+
+        def sleep(seconds: float) -> None:
+            waits.append(round(seconds, 3))
+
+        limiter = RateLimiter(4, clock=lambda: now[0], sleep=sleep)
+        for _ in range(3):
+            limiter.acquire()
+        now[0] = 1.0
+        limiter.acquire()
+        self.assertEqual(waits, [0.25, 0.5])
+
+    def test_index_is_empty_before_scanning(self) -> None:
+        self.assertEqual(AvailabilityIndex().query("羽毛球"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()